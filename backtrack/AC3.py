@@ -1,9 +1,15 @@
 # This file implements the AC3 algorithms for PPC
+from itertools import islice
 from typing import Tuple
 
-from models import CSP
+from models import CSP, vectorized_form
 from constants import Constraint, Domain
 
+from .vectorized_revision import (
+    VECTORIZED_REVISION_MIN_PAIRS,
+    vectorized_restrict_domain_with_constraint,
+)
+
 
 def restrict_domain_with_constraint(
     csp_instance: CSP,
@@ -14,13 +20,28 @@ def restrict_domain_with_constraint(
     domains_last_valid_index: list,
 ) -> Tuple[bool, bool]:
     """
-    This function attempts to restrict the domain of the first variable.
+    This function attempts to restrict the domain of the first variable. A constraint with a vectorized
+    form is evaluated on the whole domains at once when they are large.
     It returns a tuple of booleans:
     - the first stating wether it emptied the domain
     - the second stating if it restricted the domain
     """
     domain_1_last_valid = domains_last_valid_index[index_variable_1]
     domain_2_last_valid = domains_last_valid_index[index_variable_2]
+    # On large domains a single NumPy evaluation is faster, if the constraint has a vectorized form
+    if (domain_1_last_valid + 1) * (
+        domain_2_last_valid + 1
+    ) >= VECTORIZED_REVISION_MIN_PAIRS and (
+        vectorized_constraint := vectorized_form(constraint)
+    ) is not None:
+        return vectorized_restrict_domain_with_constraint(
+            csp_instance=csp_instance,
+            index_variable_1=index_variable_1,
+            index_variable_2=index_variable_2,
+            vectorized_constraint=vectorized_constraint,
+            shrinking_operations=shrinking_operations,
+            domains_last_valid_index=domains_last_valid_index,
+        )
     domain_1: Domain = csp_instance.domains[index_variable_1]
     domain_2: Domain = csp_instance.domains[index_variable_2]
     shrunk_domain_of = 0
@@ -74,8 +95,12 @@ def AC3_current_state(
     """
     This function performs arc consistency by the AC3 algorithm in place and returns a
     boolean stating wether it emptied a domain.
+    With a frequency k > 1, arc consistency having only been run every k assignments, it propagates
+    from the last k variables added to the state.
     """
-    # Store the variables couples to be tested. We use a set to avoid duplicates
+    # Store the variables couples to be tested. We use a set to avoid duplicates, the constraints of the
+    # couples queued from the neighbours of a variable are kept to avoid looking them up again
+    arc_constraints = dict()
 
     if last_variable_index is None:  # root node
         to_be_tested = set(csp_instance.constraints.keys())
@@ -84,34 +109,27 @@ def AC3_current_state(
             return False
     else:  # If we have added a value to state, propagate from there, meaning attempt to cut its neighbours
         if frequency == 1:
-            to_be_tested = {
-                (linked_variable_index, last_variable_index)
-                for linked_variable_index in csp_instance.variable_is_constrained_by[
-                    last_variable_index
-                ]
-            }
+            indices_to_use = [last_variable_index]
         else:
-            indices_to_use = state.keys[-frequency:]
-            to_be_tested = set()
-            for index in indices_to_use:
-                to_be_tested.union(
-                    {
-                        (linked_variable_index, index)
-                        for linked_variable_index in csp_instance.variable_is_constrained_by[
-                            index
-                        ]
-                    }
-                )
+            # Propagate from the last frequency variables added to the state, the dict keeps their order
+            indices_to_use = list(islice(reversed(state), frequency))
+        for index in indices_to_use:
+            for linked_variable_index, constraint in csp_instance.neighbour_constraints(
+                variable_index=index, towards=True
+            ):
+                arc_constraints[(linked_variable_index, index)] = constraint
+        to_be_tested = set(arc_constraints)
 
     while len(to_be_tested) > 0:
-        (index_variable_1, index_variable_2) = to_be_tested.pop()
+        arc = to_be_tested.pop()
+        index_variable_1, index_variable_2 = arc
         # No need to work if the first variable is already instantiated, cutting its domain yields nothing
         if state.get(index_variable_1, None) is not None:
             continue
 
-        constraint: Constraint = csp_instance.constraints[
-            (index_variable_1, index_variable_2)
-        ]
+        constraint: Constraint = arc_constraints.get(arc)
+        if constraint is None:
+            constraint = csp_instance.constraints[arc]
         # We check both x through y and y through x at once.
         domain_was_emptied, domain_was_restricted = restrict_domain_with_constraint(
             csp_instance=csp_instance,
@@ -124,11 +142,13 @@ def AC3_current_state(
         if domain_was_emptied:
             return True
         elif domain_was_restricted:
-            for linked_variable_index in csp_instance.variable_is_constrained_by[
-                index_variable_1
-            ]:
+            for linked_variable_index, constraint in csp_instance.neighbour_constraints(
+                variable_index=index_variable_1, towards=True
+            ):
                 if linked_variable_index != index_variable_2:
-                    to_be_tested.add((linked_variable_index, index_variable_1))
+                    arc = (linked_variable_index, index_variable_1)
+                    arc_constraints[arc] = constraint
+                    to_be_tested.add(arc)
         else:
             continue
 
@@ -1,3 +1,29 @@
 from .AC3 import AC3_current_state
-from .backtrack_class import BacktrackClass
+from .backtrack_class import BacktrackClass, SEARCH_OPTIONS
 from .forward_checking import forward_checking_current_state
+from .propagation_engine import PropagationEngine
+from .propagation_scheduler import (
+    AdaptivePropagationScheduler,
+    PROPAGATION_MODES,
+    NO_PROPAGATION_MODE,
+    FORWARD_CHECKING_MODE,
+    ARC_CONSISTENCY_MODE,
+)
+from .search_tracer import SearchTracer, read_search_trace, build_trace_histograms
+from .search_limits import SOLUTION_STATUS, NO_SOLUTION_STATUS, TIMEOUT_STATUS
+from .search_strategies import (
+    SEARCH_STRATEGIES,
+    DEPTH_FIRST_STRATEGY,
+    LIMITED_DISCREPANCY_STRATEGY,
+    ITERATIVE_DISCREPANCY_STRATEGY,
+    DEPTH_BOUNDED_DISCREPANCY_STRATEGY,
+    BEST_FIRST_STRATEGY,
+)
+from .dancing_links import DancingLinksSolver
+from .presolve import presolve, PresolveResult
+from .incremental_solver import IncrementalSolver
+from .tree_decomposition import (
+    GoodsTable,
+    TreeDecomposition,
+    min_fill_elimination_order,
+)
@@ -1,17 +1,73 @@
 # Main file for the backtrack algorithm.
+from itertools import islice
 from typing import Callable, Tuple
-from time import time
+from time import monotonic, perf_counter
 
 from models import CSP
 
-from .AC3 import AC3_current_state
-from .forward_checking import forward_checking_current_state
+from .parallel_components import fork_is_available, solve_components_in_parallel
+from .presolve import build_sub_csp, connected_components, presolve, PresolveResult
+from .propagation_engine import PropagationEngine
+from .search_strategies import (
+    BEST_FIRST_STRATEGY,
+    DEPTH_FIRST_STRATEGY,
+    DISCREPANCY_STRATEGIES,
+    SEARCH_STRATEGIES,
+    best_first_search,
+    discrepancy_search,
+)
+from .tree_decomposition import (
+    DEFAULT_GOODS_TABLE_SIZE,
+    GoodsTable,
+    TreeDecomposition,
+    tree_decomposition_search,
+)
+from .propagation_scheduler import (
+    AdaptivePropagationScheduler,
+    NO_PROPAGATION_MODE,
+    ARC_CONSISTENCY_MODE,
+)
+from .search_limits import (
+    current_memory_usage,
+    DEFAULT_LIMITS_CHECK_FREQUENCY,
+    SOLUTION_STATUS,
+    NO_SOLUTION_STATUS,
+    TIMEOUT_STATUS,
+    TIME_LIMIT_REASON,
+    NODE_LIMIT_REASON,
+    MEMORY_LIMIT_REASON,
+    CANCELLED_REASON,
+)
+from .search_tracer import (
+    SearchTracer,
+    BRANCH_EVENT,
+    PRUNE_EVENT,
+    FAIL_EVENT,
+    SOLUTION_EVENT,
+)
 from .variables_choosing_algorithms import (
     naive_variable_choosing,
 )
 from .values_ordering_algorithms import naive_values_ordering
 from constants import VariableValue
 
+# Options of the BacktrackClass which change its search, unlike its budgets, its tracer and its processes
+SEARCH_OPTIONS = (
+    "next_variable_choosing_method",
+    "next_values_ordering_method",
+    "use_arc_consistency",
+    "use_forward_checking",
+    "arc_consistency_frequency",
+    "adaptive_propagation",
+    "use_presolve",
+    "use_singleton_arc_consistency",
+    "decompose_components",
+    "use_tree_decomposition",
+    "goods_table_size",
+    "search_strategy",
+    "max_discrepancies",
+)
+
 
 class BacktrackClass:
     """
@@ -29,6 +85,40 @@ class BacktrackClass:
             (and not decision) problem.
         - domains_last_valid_index : this states for i in range the number of variables, which subpart of the domain of
             the variable is currently valid, inspired by the slides of the third lesson on memory management.
+        - propagation_engine (PropagationEngine): built for each search, it runs the forward checking, the arc
+            consistency and the global constraints to a fixpoint at each node. With arc_consistency_frequency
+            k > 1, arc consistency only runs at the depths multiple of k, from the last k assigned variables.
+        - adaptive_propagation : choose at each node between no propagation, forward checking and maintaining
+            arc consistency with an AdaptivePropagationScheduler (propagation_scheduler), from the values each
+            one recently removed and its time. use_forward_checking, use_arc_consistency and
+            arc_consistency_frequency are then ignored, the global constraints are always propagated.
+        - tracer (SearchTracer): optional, streams the search events (branch, prune, fail, solution) to a file
+            for offline analysis. When None, nothing is recorded.
+        - time_limit, node_limit, memory_limit : budgets of a run in seconds, nodes and bytes (-1 for none).
+            They are only checked every limits_check_frequency nodes, along with the cancellation_token
+            which can be any object with an is_set() method (threading.Event, multiprocessing.Event) that
+            another thread or process sets to stop the search.
+        - status : after a run, SOLUTION_STATUS, NO_SOLUTION_STATUS (the search was complete) or TIMEOUT_STATUS
+            when one of the budgets stopped it, in which case stop_reason tells which one.
+        - use_presolve : run the presolve (root arc consistency made permanent, removal of the fixed and
+            unconstrained variables, split in connected components) before the search, with singleton arc
+            consistency if use_singleton_arc_consistency. Meant for decision problems as the leaves are then
+            evaluated on each component separately.
+        - decompose_components : split the constraint graph in connected components and solve each one
+            independently, so that a failure in one component doesn't re-explore the others. Components are
+            solved in `processes` parallel processes when it is more than 1 (and fork is available).
+        - use_tree_decomposition : search the clusters of a min-fill tree decomposition of the constraint
+            graph (tree_decomposition) one after the other, recording in a table of goods_table_size entries
+            the result of each subtree for the values of its separator so that it is never searched twice
+            for them. Inside a cluster, the variables choosing method picks the order. Meant for the graphs
+            with small separators (anna, jean), it always uses the forward checking and never the arc
+            consistency. tree_decomposition and goods_table are those of the last search.
+        - search_strategy : one of search_strategies.SEARCH_STRATEGIES, the depth first search by default.
+            The discrepancy searches (limited, iterative and depth-bounded) run the depth first search with
+            a probe choosing the values tried at each node, max_discrepancies bounding the discrepancies on
+            a path (the depth of the last iteration for the depth-bounded one, -1 for no bound). When it
+            keeps a part of the tree unexplored, the status is TIMEOUT_STATUS with DISCREPANCY_LIMIT_REASON.
+            The best-first search expands first the open node whose free domains are the smallest.
 
     """
 
@@ -39,14 +129,44 @@ class BacktrackClass:
     use_arc_consistency: bool
     use_forward_checking: bool
     arc_consistency_frequency: int
+    adaptive_propagation: bool
+    propagation_scheduler: AdaptivePropagationScheduler = None
+    # Presolve options
+    use_presolve: bool
+    use_singleton_arc_consistency: bool
+    presolve_result: PresolveResult = None
+    # Components decomposition options
+    decompose_components: bool
+    processes: int
+    # Tree decomposition options
+    use_tree_decomposition: bool
+    goods_table_size: int
+    tree_decomposition: TreeDecomposition = None
+    goods_table: GoodsTable = None
+    # Search strategy options, discrepancy_probe being the iteration running
+    search_strategy: str
+    max_discrepancies: int
+    discrepancy_probe: object = None
+    # Optional search events tracer
+    tracer: SearchTracer
     # Statistics attributes
     nodes: int = 0
     # Variables that need to be reset
     domains_last_valid_index: list[int]
+    propagation_engine: PropagationEngine
     # Time variables
     time_limit: int
     start_time: float
     run_time: float
+    # Budgets and cancellation
+    node_limit: int
+    memory_limit: int
+    cancellation_token: object
+    limits_check_frequency: int
+    _next_limits_check: int
+    # Result of the last run
+    status: str = None
+    stop_reason: str = None
 
     def __init__(
         self,
@@ -56,14 +176,48 @@ class BacktrackClass:
         use_arc_consistency: bool = False,
         use_forward_checking: bool = False,
         arc_consistency_frequency: int = 1,
+        adaptive_propagation: bool = False,
         time_limit: int = -1,
+        tracer: SearchTracer = None,
+        node_limit: int = -1,
+        memory_limit: int = -1,
+        cancellation_token: object = None,
+        limits_check_frequency: int = DEFAULT_LIMITS_CHECK_FREQUENCY,
+        use_presolve: bool = False,
+        use_singleton_arc_consistency: bool = False,
+        decompose_components: bool = False,
+        processes: int = 1,
+        use_tree_decomposition: bool = False,
+        goods_table_size: int = DEFAULT_GOODS_TABLE_SIZE,
+        search_strategy: str = DEPTH_FIRST_STRATEGY,
+        max_discrepancies: int = -1,
     ) -> None:
         self.next_variable_choosing_method = next_variable_choosing_method
         self.next_values_ordering_method = next_values_ordering_method
         self.use_arc_consistency = use_arc_consistency
         self.arc_consistency_frequency = arc_consistency_frequency
         self.use_forward_checking = use_forward_checking
+        self.adaptive_propagation = adaptive_propagation
+        if adaptive_propagation:
+            self.propagation_scheduler = AdaptivePropagationScheduler()
         self.time_limit = time_limit
+        self.tracer = tracer
+        self.node_limit = node_limit
+        self.memory_limit = memory_limit
+        self.cancellation_token = cancellation_token
+        self.limits_check_frequency = limits_check_frequency
+        self.use_presolve = use_presolve
+        self.use_singleton_arc_consistency = use_singleton_arc_consistency
+        self.decompose_components = decompose_components
+        self.processes = processes
+        self.use_tree_decomposition = use_tree_decomposition
+        self.goods_table_size = goods_table_size
+        if search_strategy not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy {search_strategy}")
+        self.search_strategy = search_strategy
+        self.max_discrepancies = max_discrepancies
+        if memory_limit > 0 and current_memory_usage is None:
+            raise ValueError("No way to measure the memory used on this platform")
         # By default always return True in a valid leaf
         if leaf_evaluation_method is None:
             self.leaf_evaluation_method = self.decision_leaf_evaluation
@@ -76,11 +230,69 @@ class BacktrackClass:
         Used before each backtrack
         """
         self.nodes = 0
-        self.start_time = time()
+        self.start_time = monotonic()
+        self.run_time = 0
+        self.status = None
+        self.stop_reason = None
+        # Check the limits at the first node so that an exhausted budget stops right away.
+        self._next_limits_check = 1
+        if self.propagation_scheduler is not None:
+            self.propagation_scheduler.reset()
         return
 
     def _update_runtime(self) -> None:
-        self.run_time = time() - self.start_time
+        self.run_time = monotonic() - self.start_time
+
+    def _check_limits(self) -> None:
+        """
+        Checks the budgets and cancellation token, and sets stop_reason if the search must stop.
+        This is amortized: it is only called every limits_check_frequency nodes (and exactly when
+        the node budget is reached).
+        """
+        self._next_limits_check = self.nodes + self.limits_check_frequency
+        if self.node_limit > 0:
+            if self.nodes > self.node_limit:
+                self.stop_reason = NODE_LIMIT_REASON
+                return
+            self._next_limits_check = min(self._next_limits_check, self.node_limit + 1)
+
+        self._update_runtime()
+        if self.time_limit > 0 and self.run_time >= self.time_limit:
+            self.stop_reason = TIME_LIMIT_REASON
+        elif self.cancellation_token is not None and self.cancellation_token.is_set():
+            self.stop_reason = CANCELLED_REASON
+        elif self.memory_limit > 0 and current_memory_usage() >= self.memory_limit:
+            self.stop_reason = MEMORY_LIMIT_REASON
+        return
+
+    def _trace_event(
+        self,
+        csp_instance: CSP,
+        event: str,
+        state: dict,
+        variable_index: int = None,
+    ) -> None:
+        """
+        Sends an event to the tracer with the sizes of the domains. This is only called when
+        a tracer is set, so that untraced runs never pay for the domain sizes computation.
+        """
+        free_domains_size = sum(
+            self.domains_last_valid_index[index] + 1
+            for index in range(len(csp_instance.variables))
+            if index not in state
+        )
+        self.tracer.record(
+            event=event,
+            depth=len(state),
+            variable_index=-1 if variable_index is None else int(variable_index),
+            variable_domain_size=(
+                0
+                if variable_index is None
+                else self.domains_last_valid_index[variable_index] + 1
+            ),
+            free_domains_size=free_domains_size,
+        )
+        return
 
     def decision_leaf_evaluation(self, leaf_state: dict) -> bool:
         """
@@ -99,22 +311,30 @@ class BacktrackClass:
             return True
 
         last_variable_value = state[last_variable_index]
-        for other_variable_index in state:
-            other_variable_value = state[other_variable_index]
-            if other_variable_index != last_variable_index:
-                if (
-                    constraint := csp_instance.constraints.get(
-                        (last_variable_index, other_variable_index), None
-                    )
-                ) is not None:
-                    if not constraint(
-                        last_variable_index,
-                        other_variable_index,
-                        last_variable_value,
-                        other_variable_value,
-                    ):
-                        # If the constraint was not valid, directly return False
-                        return False
+        # Only the neighbours can be violated, they come with their constraint
+        for other_variable_index, constraint in csp_instance.neighbour_constraints(
+            variable_index=last_variable_index
+        ):
+            if other_variable_index not in state:
+                continue
+            if not constraint(
+                last_variable_index,
+                other_variable_index,
+                last_variable_value,
+                state[other_variable_index],
+            ):
+                # If the constraint was not valid, directly return False
+                return False
+
+        # Global constraints are checked once all their variables hold a value
+        for global_constraint in csp_instance.variable_global_constraints[
+            last_variable_index
+        ]:
+            if all(
+                variable_index in state
+                for variable_index in global_constraint.variables_indices
+            ) and not global_constraint.is_satisfied(state):
+                return False
 
         return True
 
@@ -141,8 +361,47 @@ class BacktrackClass:
         self.domains_last_valid_index[last_variable_index] = last_variable_domain_size
         return
 
+    def _propagate_adaptively(
+        self,
+        csp_instance: CSP,
+        state: dict,
+        last_variable_index: int,
+        shrinking_operations: dict,
+    ) -> bool:
+        """
+        Propagates with the mode chosen by the propagation scheduler and tells it how many values were
+        removed and how long it took. It returns a boolean stating wether a domain became empty.
+        """
+        if last_variable_index is None:
+            mode = self.propagation_scheduler.root_mode()
+        else:
+            mode = self.propagation_scheduler.choose_mode()
+
+        propagation_start = perf_counter()
+        emptied_a_domain = self.propagation_engine.propagate(
+            state=state,
+            last_variable_index=last_variable_index,
+            shrinking_operations=shrinking_operations,
+            domains_last_valid_index=self.domains_last_valid_index,
+            run_forward_checking=mode != NO_PROPAGATION_MODE,
+            run_arc_consistency=mode == ARC_CONSISTENCY_MODE,
+        )
+        if last_variable_index is not None:
+            self.propagation_scheduler.record(
+                mode=mode,
+                removed_values=sum(shrinking_operations.values()),
+                emptied_a_domain=emptied_a_domain,
+                free_variables=len(csp_instance.variables) - len(state),
+                propagation_time=perf_counter() - propagation_start,
+            )
+        return emptied_a_domain
+
     def _backtrack(
-        self, csp_instance: CSP, state: dict, last_variable_index: int = None
+        self,
+        csp_instance: CSP,
+        state: dict,
+        last_variable_index: int = None,
+        discrepancies: int = 0,
     ) -> Tuple[bool, dict]:
         """
         This backtrack will return back the first possible solution.
@@ -155,13 +414,18 @@ class BacktrackClass:
         The state is depicted as a dict, in which keys are variables idexes and values the value of
         each variable. A variable which currently holds no value is not in the dict.
 
+        discrepancies is the number of values taken against the values ordering on the path, used by the
+        discrepancy_probe of a discrepancy search to choose the values it tries.
+
         It returns a boolean and the current state.
         """
         self.nodes += 1
-        # If runtime is exceeded, return with False as we don't know if the node is valid or not.
-        self._update_runtime()
-        if self.time_limit > 0 and self.run_time >= self.time_limit:
-            return False, state
+        # If a budget is exceeded, return with False as we don't know if the node is valid or not.
+        # The parents see stop_reason and unwind without trying their other children.
+        if self.nodes >= self._next_limits_check:
+            self._check_limits()
+            if self.stop_reason is not None:
+                return False, state
 
         # Check if a constraint is invalidated by the new state
         if not self._check_if_new_state_is_valid(
@@ -169,11 +433,21 @@ class BacktrackClass:
             state=state,
             last_variable_index=last_variable_index,
         ):
+            if self.tracer is not None:
+                self._trace_event(csp_instance, FAIL_EVENT, state, last_variable_index)
             return False, state
 
         # If the current state is a leaf, evaluate it
         if len(state) == len(csp_instance.variables):
-            return self.leaf_evaluation_method(state), state
+            leaf_result = self.leaf_evaluation_method(state)
+            if self.tracer is not None:
+                self._trace_event(
+                    csp_instance,
+                    SOLUTION_EVENT if leaf_result else FAIL_EVENT,
+                    state,
+                    last_variable_index,
+                )
+            return leaf_result, state
 
         if last_variable_index is not None:
             last_variable_domain_first_value = csp_instance.domains[
@@ -188,42 +462,35 @@ class BacktrackClass:
             self.domains_last_valid_index[last_variable_index] = 0
 
         shrinking_operations: dict = dict()
-        # Use arc consistency if asked
-        if (
-            self.use_arc_consistency
-            and (self.nodes % self.arc_consistency_frequency) == 0
-        ):
-            emptied_a_domain = AC3_current_state(
-                csp_instance=csp_instance,
-                state=state,
-                shrinking_operations=shrinking_operations,
-                domains_last_valid_index=self.domains_last_valid_index,
-                last_variable_index=last_variable_index,
-            )
-            if emptied_a_domain:
-                self._revert_shrinking_operations(
+        # Propagate the new state
+        if self.propagation_engine.has_propagators:
+            if self.propagation_scheduler is not None:
+                emptied_a_domain = self._propagate_adaptively(
                     csp_instance=csp_instance,
+                    state=state,
+                    last_variable_index=last_variable_index,
                     shrinking_operations=shrinking_operations,
                 )
-                if last_variable_index is not None:
-                    self._revert_last_variable_domain(
-                        csp_instance=csp_instance,
-                        last_variable_index=last_variable_index,
-                        last_variable_domain_first_value=last_variable_domain_first_value,
-                        last_variable_domain_size=last_variable_domain_size,
-                    )
-                return False, state
-
-        # Use forward checking if asked
-        if self.use_forward_checking:
-            emptied_a_domain = forward_checking_current_state(
-                csp_instance=csp_instance,
-                state=state,
-                last_variable_index=last_variable_index,
-                shrinking_operations=shrinking_operations,
-                domains_last_valid_index=self.domains_last_valid_index,
-            )
+            else:
+                run_arc_consistency = len(state) % self.arc_consistency_frequency == 0
+                emptied_a_domain = self.propagation_engine.propagate(
+                    state=state,
+                    last_variable_index=last_variable_index,
+                    shrinking_operations=shrinking_operations,
+                    domains_last_valid_index=self.domains_last_valid_index,
+                    run_arc_consistency=run_arc_consistency,
+                    # The variables assigned since the last node which ran arc consistency
+                    arc_consistency_variables=(
+                        list(islice(reversed(state), 1, self.arc_consistency_frequency))
+                        if run_arc_consistency
+                        else None
+                    ),
+                )
             if emptied_a_domain:
+                if self.tracer is not None:
+                    self._trace_event(
+                        csp_instance, PRUNE_EVENT, state, last_variable_index
+                    )
                 self._revert_shrinking_operations(
                     csp_instance=csp_instance,
                     shrinking_operations=shrinking_operations,
@@ -249,25 +516,39 @@ class BacktrackClass:
             last_variable_index=new_variable_index,
             domain_last_valid_index=self.domains_last_valid_index[new_variable_index],
         )
+        if self.discrepancy_probe is None:
+            ranked_values = enumerate(new_variable_values_order)
+        else:
+            ranked_values = self.discrepancy_probe.allowed_values(
+                depth=len(state),
+                discrepancies=discrepancies,
+                values=new_variable_values_order,
+            )
 
-        for new_variable_possible_value in new_variable_values_order:
+        for rank, new_variable_possible_value in ranked_values:
             # Copy the state dict to be able to call recurisvely without issue
             # TODO this copy could probably be removed by removing last added value in the dict
             # when finding an invalid state.
             new_state = state.copy()
             new_state.update({new_variable_index: new_variable_possible_value})
+            if self.tracer is not None:
+                self._trace_event(csp_instance, BRANCH_EVENT, state, new_variable_index)
 
             child_result, child_state = self._backtrack(
                 csp_instance=csp_instance,
                 state=new_state,
                 last_variable_index=new_variable_index,
+                discrepancies=discrepancies + rank,
             )
             if child_result:
                 # If a sub node has a solution, go back up and return true
                 return True, child_state
+            if self.stop_reason is not None:
+                # The search was stopped, don't try the other values
+                break
 
         # If no sub nodes was true, undo domains modifications
-        if self.use_forward_checking or self.use_arc_consistency:
+        if shrinking_operations:
             self._revert_shrinking_operations(
                 csp_instance=csp_instance, shrinking_operations=shrinking_operations
             )
@@ -278,24 +559,147 @@ class BacktrackClass:
                 last_variable_domain_first_value=last_variable_domain_first_value,
                 last_variable_domain_size=last_variable_domain_size,
             )
+        if self.tracer is not None and self.stop_reason is None:
+            self._trace_event(csp_instance, FAIL_EVENT, state, last_variable_index)
         # Then return false
         return False, state
 
-    def run_backtrack(self, csp_instance: CSP) -> Tuple[bool, dict]:
+    def _search(self, csp_instance: CSP) -> Tuple[bool, dict]:
         """
-        Runs the backtrack and creates a human readable state to return.
+        Runs the backtrack itself on a CSP and creates a human readable state to return.
         """
-        self._reset_statistics_variables()
-
         self.domains_last_valid_index = [
             len(csp_instance.domains[i]) - 1 for i in range(len(csp_instance.domains))
         ]
-
-        found_solution, indexes_state = self._backtrack(
-            csp_instance=csp_instance, state=dict()
+        self.propagation_engine = PropagationEngine(
+            csp_instance=csp_instance,
+            use_forward_checking=self.use_forward_checking
+            or self.adaptive_propagation
+            or self.use_tree_decomposition,
+            use_arc_consistency=self.use_arc_consistency or self.adaptive_propagation,
         )
+
+        if self.use_tree_decomposition:
+            found_solution, indexes_state = tree_decomposition_search(
+                backtrack_object=self, csp_instance=csp_instance
+            )
+        elif self.search_strategy in DISCREPANCY_STRATEGIES:
+            found_solution, indexes_state = discrepancy_search(
+                backtrack_object=self, csp_instance=csp_instance
+            )
+        elif self.search_strategy == BEST_FIRST_STRATEGY:
+            found_solution, indexes_state = best_first_search(
+                backtrack_object=self, csp_instance=csp_instance
+            )
+        else:
+            found_solution, indexes_state = self._backtrack(
+                csp_instance=csp_instance, state=dict()
+            )
         readable_state = dict()
         for index in indexes_state:
             readable_state[csp_instance.variables[index]] = indexes_state[index]
 
         return found_solution, readable_state
+
+    def _search_components(self, components: list[CSP]) -> Tuple[bool, dict]:
+        """
+        Solves independent components one after the other, or in parallel processes if asked, and merges
+        their readable states.
+        """
+        if self.processes > 1 and len(components) > 1 and fork_is_available():
+            (
+                found_solution,
+                readable_state,
+                nodes,
+                self.stop_reason,
+            ) = solve_components_in_parallel(
+                backtrack_object=self, components=components, processes=self.processes
+            )
+            self.nodes += nodes
+            return found_solution, readable_state
+
+        readable_state = dict()
+        for component in components:
+            found_solution, component_state = self._search(csp_instance=component)
+            if not found_solution:
+                return False, dict()
+            readable_state.update(component_state)
+        return True, readable_state
+
+    def _presolve_should_stop(self) -> bool:
+        """
+        Called before each probe of the singleton arc consistency, which counts as a node of the budgets.
+        """
+        self.nodes += 1
+        if self.nodes >= self._next_limits_check:
+            self._check_limits()
+        return self.stop_reason is not None
+
+    def _search_presolved(self, csp_instance: CSP) -> Tuple[bool, dict]:
+        """
+        Presolves the CSP and then searches each component of the reduced model. As the components
+        share no constraint, the solution is the union of the fixed variables and the components' solutions.
+        """
+        self.presolve_result = presolve(
+            csp_instance=csp_instance,
+            use_singleton_arc_consistency=self.use_singleton_arc_consistency,
+            should_stop=self._presolve_should_stop,
+        )
+        if self.presolve_result.stopped or not self.presolve_result.feasible:
+            return False, dict()
+
+        found_solution, readable_state = self._search_components(
+            components=self.presolve_result.components
+        )
+        if not found_solution:
+            return False, dict()
+        for index, value in self.presolve_result.fixed_assignments.items():
+            readable_state[csp_instance.variables[index]] = value
+
+        return True, readable_state
+
+    def _search_decomposed(self, csp_instance: CSP) -> Tuple[bool, dict]:
+        """
+        Splits the CSP in connected components and searches each one independently.
+        """
+        components_variables = connected_components(csp_instance=csp_instance)
+        if len(components_variables) == 1:
+            return self._search(csp_instance=csp_instance)
+
+        return self._search_components(
+            components=[
+                build_sub_csp(csp_instance=csp_instance, variables_indices=component)
+                for component in components_variables
+            ]
+        )
+
+    def run_backtrack(self, csp_instance: CSP) -> Tuple[bool, dict]:
+        """
+        Runs the backtrack, after the presolve if asked, and creates a human readable state to return.
+        A False result is only a proof that there is no solution if status is NO_SOLUTION_STATUS,
+        it is TIMEOUT_STATUS when a budget or the cancellation token stopped the search.
+        """
+        self._reset_statistics_variables()
+
+        if self.use_presolve:
+            found_solution, readable_state = self._search_presolved(
+                csp_instance=csp_instance
+            )
+        elif self.decompose_components:
+            found_solution, readable_state = self._search_decomposed(
+                csp_instance=csp_instance
+            )
+        else:
+            found_solution, readable_state = self._search(csp_instance=csp_instance)
+
+        self._update_runtime()
+        if found_solution:
+            self.status = SOLUTION_STATUS
+        elif self.stop_reason is not None:
+            self.status = TIMEOUT_STATUS
+        else:
+            self.status = NO_SOLUTION_STATUS
+        if self.tracer is not None:
+            self.tracer.flush()
+
+        return found_solution, readable_state
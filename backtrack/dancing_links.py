@@ -0,0 +1,319 @@
+# This file implements the dancing links solver of the exact cover problems (models.ExactCoverProblem),
+# Knuth's Algorithm X: the column with the fewest rows left is covered first, and each of its rows is
+# tried in turn, covering the columns of the row. The sudokus and the n-queens get there from their
+# builders with exact_cover=True, without the binary constraints of their CSP.
+# The nodes are not objects: node i is the index i of the integer lists left, right, up, down, column
+# and row, the root being 0 and the header of the column c being c + 1. Covering and uncovering a
+# column only moves integers in these lists, and uncovering restores them exactly, so the same links
+# solve a batch of sudoku grids, each one only giving other rows.
+from time import monotonic
+from typing import Iterable, Tuple
+
+from models import ExactCoverProblem
+
+from .search_limits import (
+    CANCELLED_REASON,
+    DEFAULT_LIMITS_CHECK_FREQUENCY,
+    NODE_LIMIT_REASON,
+    NO_SOLUTION_STATUS,
+    SOLUTION_STATUS,
+    TIME_LIMIT_REASON,
+    TIMEOUT_STATUS,
+)
+
+
+class DancingLinksSolver:
+    """
+    Solver of an ExactCoverProblem, whose links are built once in __init__. The modes:
+        - run(given_rows) : the first solution, as run_backtrack returns it.
+        - count_solutions(given_rows, solutions_limit) : the number of solutions, at most solutions_limit
+            if it is positive (2 tells wether a grid has a unique solution).
+        - run_batch(given_rows_batch) : run for each list of given rows, on the same links.
+    given_rows defaults to the given_rows of the problem. The node and time budgets and the cancellation
+    token stop a run as they stop the backtrack: status is then TIMEOUT_STATUS and stop_reason tells why.
+    """
+
+    problem: ExactCoverProblem
+    # The links, an entry per node
+    left: list[int]
+    right: list[int]
+    up: list[int]
+    down: list[int]
+    column: list[int]
+    row: list[int]
+    # Number of rows left in each column, indexed by header
+    column_size: list[int]
+    # A node of each row
+    row_first_node: list[int]
+    # Budgets options
+    time_limit: int
+    node_limit: int
+    cancellation_token: object
+    # Statistics of the last run (summed on a batch)
+    nodes: int
+    solutions_count: int
+    status: str = None
+    stop_reason: str = None
+    start_time: float
+    run_time: float
+
+    def __init__(
+        self,
+        problem: ExactCoverProblem,
+        time_limit: int = -1,
+        node_limit: int = -1,
+        cancellation_token: object = None,
+    ) -> None:
+        self.problem = problem
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.cancellation_token = cancellation_token
+        self._build_links()
+        self.nodes = 0
+        self.solutions_count = 0
+        self.run_time = 0
+        return
+
+    def _build_links(self) -> None:
+        headers_count = self.problem.columns_count + 1
+        nodes_count = headers_count + sum(len(columns) for columns in self.problem.rows)
+        self.left = [0] * nodes_count
+        self.right = [0] * nodes_count
+        self.up = list(range(nodes_count))
+        self.down = list(range(nodes_count))
+        self.column = list(range(nodes_count))
+        self.row = [-1] * nodes_count
+        self.column_size = [0] * headers_count
+        self.row_first_node = []
+
+        # The primary headers are linked around the root, the secondary ones to themselves so that they
+        # are never chosen
+        primary_headers = list(range(self.problem.primary_columns_count + 1))
+        for position, header in enumerate(primary_headers):
+            self.right[header] = primary_headers[(position + 1) % len(primary_headers)]
+            self.left[header] = primary_headers[position - 1]
+        for header in range(self.problem.primary_columns_count + 1, headers_count):
+            self.left[header] = header
+            self.right[header] = header
+
+        node = headers_count
+        for row_index, columns in enumerate(self.problem.rows):
+            self.row_first_node.append(node)
+            for position, column_index in enumerate(columns):
+                header = column_index + 1
+                # Inserted at the bottom of its column
+                self.column[node] = header
+                self.row[node] = row_index
+                self.up[node] = self.up[header]
+                self.down[node] = header
+                self.down[self.up[header]] = node
+                self.up[header] = node
+                self.column_size[header] += 1
+                # In a circular list with the other nodes of the row
+                self.left[node] = node - 1 if position > 0 else node + len(columns) - 1
+                self.right[node] = (
+                    node + 1 if position < len(columns) - 1 else node - position
+                )
+                node += 1
+        return
+
+    def _reset_statistics_variables(self) -> None:
+        self.nodes = 0
+        self.solutions_count = 0
+        self.status = None
+        self.stop_reason = None
+        self.start_time = monotonic()
+        self.run_time = 0
+        return
+
+    def _next_limits_check(self) -> int:
+        # Exactly when the node budget is reached, as in BacktrackClass
+        next_limits_check = self.nodes + DEFAULT_LIMITS_CHECK_FREQUENCY
+        if self.node_limit > 0:
+            next_limits_check = min(next_limits_check, self.node_limit + 1)
+        return next_limits_check
+
+    def _check_limits(self) -> None:
+        if self.node_limit > 0 and self.nodes > self.node_limit:
+            self.stop_reason = NODE_LIMIT_REASON
+        elif self.time_limit > 0 and monotonic() - self.start_time >= self.time_limit:
+            self.stop_reason = TIME_LIMIT_REASON
+        elif self.cancellation_token is not None and self.cancellation_token.is_set():
+            self.stop_reason = CANCELLED_REASON
+        return
+
+    def _search(self, given_rows: list[int], solutions_limit: int) -> list[int]:
+        """
+        Covers the columns of the given rows, runs Algorithm X until solutions_limit solutions were
+        counted (all of them if it isn't positive) and uncovers everything. Returns the rows of the first
+        solution, None if there is none.
+        """
+        left, right, up, down = self.left, self.right, self.up, self.down
+        column, row, column_size = self.column, self.row, self.column_size
+
+        def cover(header: int) -> None:
+            right[left[header]] = right[header]
+            left[right[header]] = left[header]
+            i = down[header]
+            while i != header:
+                j = right[i]
+                while j != i:
+                    up[down[j]] = up[j]
+                    down[up[j]] = down[j]
+                    column_size[column[j]] -= 1
+                    j = right[j]
+                i = down[i]
+            return
+
+        def uncover(header: int) -> None:
+            i = up[header]
+            while i != header:
+                j = left[i]
+                while j != i:
+                    column_size[column[j]] += 1
+                    up[down[j]] = j
+                    down[up[j]] = j
+                    j = left[j]
+                i = up[i]
+            right[left[header]] = header
+            left[right[header]] = header
+            return
+
+        solution = None
+        partial_solution = []
+        next_limits_check = self._next_limits_check()
+
+        def search() -> bool:
+            """
+            Returns True when the search must stop: solutions_limit is reached or a budget is exceeded.
+            """
+            nonlocal solution, next_limits_check
+            if right[0] == 0:
+                self.solutions_count += 1
+                if solution is None:
+                    solution = partial_solution.copy()
+                return self.solutions_count == solutions_limit
+            # The primary column with the fewest rows left
+            chosen_header = right[0]
+            smallest_size = column_size[chosen_header]
+            header = right[chosen_header]
+            while header != 0 and smallest_size > 1:
+                if column_size[header] < smallest_size:
+                    chosen_header = header
+                    smallest_size = column_size[header]
+                header = right[header]
+            if smallest_size == 0:
+                return False
+
+            cover(chosen_header)
+            stop = False
+            i = down[chosen_header]
+            while i != chosen_header:
+                self.nodes += 1
+                if self.nodes >= next_limits_check:
+                    self._check_limits()
+                    next_limits_check = self._next_limits_check()
+                    if self.stop_reason is not None:
+                        stop = True
+                        break
+                partial_solution.append(row[i])
+                j = right[i]
+                while j != i:
+                    cover(column[j])
+                    j = right[j]
+                stop = search()
+                j = left[i]
+                while j != i:
+                    uncover(column[j])
+                    j = left[j]
+                partial_solution.pop()
+                if stop:
+                    break
+                i = down[i]
+            uncover(chosen_header)
+            return stop
+
+        # The given rows are selected before the search, two of them covering a same column have no
+        # solution
+        covered_headers = []
+        given_rows_fit = True
+        for given_row in given_rows:
+            row_headers = [
+                column[node]
+                for node in range(
+                    self.row_first_node[given_row],
+                    self.row_first_node[given_row] + len(self.problem.rows[given_row]),
+                )
+            ]
+            if not set(row_headers).isdisjoint(covered_headers):
+                given_rows_fit = False
+                break
+            for header in row_headers:
+                cover(header)
+                covered_headers.append(header)
+        if given_rows_fit:
+            partial_solution.extend(given_rows)
+            search()
+        for header in reversed(covered_headers):
+            uncover(header)
+        return solution
+
+    def _set_status(self, found_solution: bool) -> None:
+        self.run_time = monotonic() - self.start_time
+        if found_solution:
+            self.status = SOLUTION_STATUS
+        elif self.stop_reason is not None:
+            self.status = TIMEOUT_STATUS
+        else:
+            self.status = NO_SOLUTION_STATUS
+        return
+
+    def run(self, given_rows: list[int] = None) -> Tuple[bool, dict]:
+        """
+        Returns wether a solution was found and its readable state, as run_backtrack does.
+        """
+        self._reset_statistics_variables()
+        solution = self._search(
+            given_rows=self.problem.given_rows if given_rows is None else given_rows,
+            solutions_limit=1,
+        )
+        self._set_status(found_solution=solution is not None)
+        if solution is None:
+            return False, dict()
+        return True, self.problem.readable_state(rows=solution)
+
+    def count_solutions(
+        self, given_rows: list[int] = None, solutions_limit: int = -1
+    ) -> int:
+        """
+        Returns the number of solutions, solutions_limit at most if it is positive. status is
+        TIMEOUT_STATUS if a budget stopped the count, the number being then a lower bound.
+        """
+        self._reset_statistics_variables()
+        self._search(
+            given_rows=self.problem.given_rows if given_rows is None else given_rows,
+            solutions_limit=solutions_limit,
+        )
+        self._set_status(found_solution=False)
+        if self.solutions_count > 0 and self.stop_reason is None:
+            self.status = SOLUTION_STATUS
+        return self.solutions_count
+
+    def run_batch(
+        self, given_rows_batch: Iterable[list[int]]
+    ) -> list[Tuple[bool, dict]]:
+        """
+        Runs each list of given rows in turn on the same links, for instance the rows_of_domains of
+        sudoku grids of the size of the problem. nodes and run_time are summed over the batch, the budgets
+        apply to each run.
+        """
+        results = []
+        nodes = 0
+        run_time = 0
+        for given_rows in given_rows_batch:
+            results.append(self.run(given_rows=given_rows))
+            nodes += self.nodes
+            run_time += self.run_time
+        self.nodes = nodes
+        self.run_time = run_time
+        return results
@@ -1,10 +1,22 @@
 # This file implements forward checking algorithm for PPC
-from models import CSP
+from typing import Tuple
+
+from models import CSP, remove_valid_values_between, vectorized_form
 from constants import Constraint, VariableValue, Domain
+from wrappers import alldiff
+
+from .vectorized_revision import (
+    VECTORIZED_FORWARD_CHECKING_MIN_VALUES,
+    vectorized_restrict_domain_with_value,
+)
 
 
 def forward_checking_current_state(
-    csp_instance: CSP, state: dict, last_variable_index: int, shrinking_operations: dict, domains_last_valid_index: list
+    csp_instance: CSP,
+    state: dict,
+    last_variable_index: int,
+    shrinking_operations: dict,
+    domains_last_valid_index: list,
 ) -> bool:
     """
     This function performs a forward checking on the current state of the csp instance,
@@ -16,65 +28,119 @@ def forward_checking_current_state(
         return False
     last_variable_value: VariableValue = state[last_variable_index]
 
-    for linked_variable_index in csp_instance.variable_is_constrained_by[
-        last_variable_index
-    ]:
+    for linked_variable_index, constraint in csp_instance.neighbour_constraints(
+        variable_index=last_variable_index
+    ):
         # If the linked variable is already instanciated, do nothing
         if state.get(linked_variable_index, None) is not None:
             continue
 
-        else:
-            shrunk_domain_of = 0
-            # Get the associated constraint
-            constraint: Constraint = csp_instance.constraints[
-                (last_variable_index, linked_variable_index)
-            ]
-            # Get the current domain of the linked variable
-            linked_variable_domain: Domain = csp_instance.domains[linked_variable_index]
-            linked_domain_last_index = domains_last_valid_index[
-                linked_variable_index
-            ]
-
-            index = 0
-            while index <= linked_domain_last_index:
-                # Get a value for the linked variable
-                linked_variable_value: VariableValue = linked_variable_domain[index]
-
-                if not constraint(
-                    last_variable_index,
-                    linked_variable_index,
-                    last_variable_value,
-                    linked_variable_value,
-                ):
-                    shrunk_domain_of += 1
-
-                    # If a constraint is invalid, if possible swap the last valid value with the current one and decrement
-                    # the last valid index.
-                    if not linked_domain_last_index == 0:
-                        linked_variable_domain[index] = linked_variable_domain[
-                            linked_domain_last_index
-                        ]
-                        linked_variable_domain[
-                            linked_domain_last_index
-                        ] = linked_variable_value
-                        linked_domain_last_index -= 1
-                    # Otherwise we know that we have an empty domain, just stop there
-                    else:
-                        return True
-
-                # Otherwise just go check next possible value
-                else:
-                    index += 1
-            # At the end update the csp and store the shrunking opération if it exists.
-            domains_last_valid_index[
-                linked_variable_index
-            ] = linked_domain_last_index
-
-            if shrunk_domain_of > 0:
-                shrinking_operations[
-                    linked_variable_index
-                ] = shrunk_domain_of + shrinking_operations.get(
-                    linked_variable_index, 0
-                )
+        emptied_a_domain, _ = restrict_domain_with_value(
+            csp_instance=csp_instance,
+            index_variable=linked_variable_index,
+            fixed_variable_index=last_variable_index,
+            fixed_variable_value=last_variable_value,
+            shrinking_operations=shrinking_operations,
+            domains_last_valid_index=domains_last_valid_index,
+            constraint=constraint,
+        )
+        if emptied_a_domain:
+            return True
 
     return False
+
+
+def restrict_domain_with_value(
+    csp_instance: CSP,
+    index_variable: int,
+    fixed_variable_index: int,
+    fixed_variable_value: VariableValue,
+    shrinking_operations: dict,
+    domains_last_valid_index: list,
+    constraint: Constraint = None,
+) -> Tuple[bool, bool]:
+    """
+    This function removes from the domain of a variable the values which violate its constraint with
+    a fixed variable, in a single call to the vectorized form of the constraint on large domains. The
+    constraint oriented from the fixed variable is looked up when it isn't given.
+    It returns a tuple of booleans:
+    - the first stating wether it emptied the domain
+    - the second stating if it restricted the domain
+    """
+    # Get the associated constraint
+    if constraint is None:
+        constraint = csp_instance.constraints[(fixed_variable_index, index_variable)]
+    # Get the current domain of the linked variable
+    linked_variable_domain: Domain = csp_instance.domains[index_variable]
+    linked_domain_last_index = domains_last_valid_index[index_variable]
+
+    if constraint is alldiff:
+        # Only the fixed value itself has to be removed, no need to test every value
+        new_last_index = remove_valid_values_between(
+            domain=linked_variable_domain,
+            lower_bound=fixed_variable_value,
+            upper_bound=fixed_variable_value,
+            last_valid_index=linked_domain_last_index,
+        )
+        if new_last_index == linked_domain_last_index:
+            return False, False
+        if new_last_index < 0:
+            return True, True
+        domains_last_valid_index[index_variable] = new_last_index
+        shrinking_operations[index_variable] = (
+            linked_domain_last_index - new_last_index
+        ) + shrinking_operations.get(index_variable, 0)
+        return False, True
+
+    if (
+        linked_domain_last_index + 1 >= VECTORIZED_FORWARD_CHECKING_MIN_VALUES
+        and (vectorized_constraint := vectorized_form(constraint)) is not None
+    ):
+        return vectorized_restrict_domain_with_value(
+            csp_instance=csp_instance,
+            index_variable=index_variable,
+            fixed_variable_index=fixed_variable_index,
+            fixed_variable_value=fixed_variable_value,
+            vectorized_constraint=vectorized_constraint,
+            shrinking_operations=shrinking_operations,
+            domains_last_valid_index=domains_last_valid_index,
+        )
+
+    shrunk_domain_of = 0
+    index = 0
+    while index <= linked_domain_last_index:
+        # Get a value for the linked variable
+        linked_variable_value: VariableValue = linked_variable_domain[index]
+
+        if not constraint(
+            fixed_variable_index,
+            index_variable,
+            fixed_variable_value,
+            linked_variable_value,
+        ):
+            shrunk_domain_of += 1
+
+            # If a constraint is invalid, if possible swap the last valid value with the current one and decrement
+            # the last valid index.
+            if not linked_domain_last_index == 0:
+                linked_variable_domain[index] = linked_variable_domain[
+                    linked_domain_last_index
+                ]
+                linked_variable_domain[linked_domain_last_index] = linked_variable_value
+                linked_domain_last_index -= 1
+            # Otherwise we know that we have an empty domain, just stop there
+            else:
+                return True, True
+
+        # Otherwise just go check next possible value
+        else:
+            index += 1
+    # At the end update the csp and store the shrunking opération if it exists.
+    domains_last_valid_index[index_variable] = linked_domain_last_index
+
+    if shrunk_domain_of > 0:
+        shrinking_operations[index_variable] = (
+            shrunk_domain_of + shrinking_operations.get(index_variable, 0)
+        )
+        return False, True
+    return False, False
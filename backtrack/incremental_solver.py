@@ -0,0 +1,279 @@
+# This file implements the incremental solver: a CSP edited between its solves (domains tightened or
+# relaxed, constraints added or removed) is solved again from the work of the previous solve rather
+# than from scratch. Streams of slightly changed instances mostly become repairs of the last solution.
+from typing import Iterable, Tuple
+
+from models import CSP
+from constants import Constraint, Domain, VariableValue
+
+from .backtrack_class import BacktrackClass
+from .presolve import valid_domains
+from .propagation_engine import PropagationEngine
+from .search_limits import NO_SOLUTION_STATUS, SOLUTION_STATUS
+from .values_ordering_algorithms import phase_saving_values_ordering
+
+
+class IncrementalSolver:
+    """
+    Owns a CSP and re-solves it after each batch of edits, made through its methods so that it knows
+    which of its previous results still hold:
+        - the last solution: if it is still valid after the edits, it is returned without any search. Only
+            the variables touched by tightening edits (tighten_domain, add_constraint, add_global_constraint)
+            need to be checked again.
+        - the phase: otherwise the search tries first for each variable its value in the last solution
+            (phase saving on the values ordering), so that it only repairs the part broken by the edits.
+        - the root propagation: the domains after arc consistency at the root stay valid while the model
+            only gets tighter, the next solve propagates the edits from them. Relaxing a domain or removing a
+            constraint may bring back the values they removed, they are propagated again from the model.
+        - the proof of infeasibility: a model without solution still has none after tightening edits.
+    The domains of the CSP are the model ones and are never reduced by the solves, the search works on
+    copies of the root domains. nodes and status are those of the last solve, repaired tells wether it
+    only checked the last solution.
+    """
+
+    csp_instance: CSP
+    backtrack_object: BacktrackClass
+    # Last solution, variable index -> value, None if the last solve found none
+    solution: dict
+    # Phase: variable index -> value it had in the last solution where it was assigned
+    saved_values: dict
+    # Domains after the root propagation of the model, None when they must be computed again
+    root_domains: list
+    # Variables whose value in the last solution may have been invalidated by the edits
+    edited_variables: set
+    # The model was proven without solution and only got tighter since
+    proven_infeasible: bool
+    # Statistics of the last solve
+    nodes: int
+    status: str
+    repaired: bool
+
+    def __init__(
+        self, csp_instance: CSP, backtrack_object: BacktrackClass = None
+    ) -> None:
+        self.csp_instance = csp_instance
+        self.backtrack_object = (
+            BacktrackClass(use_forward_checking=True)
+            if backtrack_object is None
+            else backtrack_object
+        )
+        self.solution = None
+        self.saved_values = dict()
+        self.root_domains = None
+        self.edited_variables = set()
+        self.proven_infeasible = False
+        self.nodes = 0
+        self.status = None
+        self.repaired = False
+        return
+
+    # Tightening edits
+    def tighten_domain(
+        self, variable_index: int, values: Iterable[VariableValue]
+    ) -> None:
+        """
+        Only keeps the values of the domain of the variable which are in values.
+        """
+        kept_values = set(values)
+        self.csp_instance.domains[variable_index] = [
+            value
+            for value in self.csp_instance.domains[variable_index]
+            if value in kept_values
+        ]
+        if self.root_domains is not None:
+            self.root_domains[variable_index] = [
+                value
+                for value in self.root_domains[variable_index]
+                if value in kept_values
+            ]
+        self.edited_variables.add(variable_index)
+        return
+
+    def add_constraint(
+        self, index_variable_1: int, index_variable_2: int, new_constraint: Constraint
+    ) -> None:
+        self.csp_instance.add_constraint(
+            index_variable_1=index_variable_1,
+            index_variable_2=index_variable_2,
+            new_constraint=new_constraint,
+        )
+        self.edited_variables.update((index_variable_1, index_variable_2))
+        return
+
+    def add_global_constraint(self, global_constraint) -> None:
+        self.csp_instance.add_global_constraint(global_constraint=global_constraint)
+        self.edited_variables.update(global_constraint.variables_indices)
+        return
+
+    # Relaxing edits
+    def _relaxed(self) -> None:
+        self.root_domains = None
+        self.proven_infeasible = False
+        return
+
+    def relax_domain(
+        self, variable_index: int, values: Iterable[VariableValue]
+    ) -> None:
+        """
+        Adds the values to the domain of the variable.
+        """
+        domain = list(self.csp_instance.domains[variable_index])
+        current_values = set(domain)
+        domain.extend(value for value in values if value not in current_values)
+        self.csp_instance.domains[variable_index] = domain
+        self._relaxed()
+        return
+
+    def set_domain(self, variable_index: int, domain: Domain) -> None:
+        """
+        Replaces the domain of the variable, a tightening if it only loses values.
+        """
+        if set(domain) <= set(self.csp_instance.domains[variable_index]):
+            self.tighten_domain(variable_index=variable_index, values=domain)
+            return
+        self.csp_instance.domains[variable_index] = list(domain)
+        self.edited_variables.add(variable_index)
+        self._relaxed()
+        return
+
+    def remove_constraint(
+        self, index_variable_1: int, index_variable_2: int
+    ) -> Constraint:
+        removed_constraint = self.csp_instance.remove_constraint(
+            index_variable_1=index_variable_1, index_variable_2=index_variable_2
+        )
+        self._relaxed()
+        return removed_constraint
+
+    def remove_global_constraint(self, global_constraint) -> None:
+        self.csp_instance.remove_global_constraint(global_constraint=global_constraint)
+        self._relaxed()
+        return
+
+    # Solve
+    def _solution_is_still_valid(self) -> bool:
+        """
+        The last solution satisfied the model before the edits, only the edited variables' values and
+        constraints are checked again.
+        """
+        if self.solution is None or len(self.solution) != len(
+            self.csp_instance.variables
+        ):
+            return False
+        csp_instance = self.csp_instance
+        solution = self.solution
+        for variable_index in self.edited_variables:
+            value = solution[variable_index]
+            if value not in csp_instance.domains[variable_index]:
+                return False
+            for linked_variable_index in csp_instance.variable_is_constrained_by[
+                variable_index
+            ]:
+                if not csp_instance.constraints[
+                    (variable_index, linked_variable_index)
+                ](
+                    variable_index,
+                    linked_variable_index,
+                    value,
+                    solution[linked_variable_index],
+                ):
+                    return False
+            for global_constraint in csp_instance.variable_global_constraints.get(
+                variable_index, ()
+            ):
+                if not global_constraint.is_satisfied(state=solution):
+                    return False
+        return True
+
+    def _propagate_root(self) -> bool:
+        """
+        Brings the root domains to the fixpoint of arc consistency, from the model domains if they were
+        relaxed. Returns wether the model was proven infeasible.
+        """
+        csp_instance = self.csp_instance
+        model_domains = csp_instance.domains
+        root_domains = [
+            domain.copy()
+            for domain in (
+                model_domains if self.root_domains is None else self.root_domains
+            )
+        ]
+        domains_last_valid_index = [len(domain) - 1 for domain in root_domains]
+        infeasible = any(len(domain) == 0 for domain in root_domains)
+        if not infeasible:
+            csp_instance.domains = root_domains
+            try:
+                infeasible = PropagationEngine(
+                    csp_instance=csp_instance, use_arc_consistency=True
+                ).propagate(
+                    state=dict(),
+                    last_variable_index=None,
+                    shrinking_operations=dict(),
+                    domains_last_valid_index=domains_last_valid_index,
+                )
+            finally:
+                csp_instance.domains = model_domains
+        if not infeasible:
+            self.root_domains = valid_domains(
+                domains=root_domains, domains_last_valid_index=domains_last_valid_index
+            )
+        return infeasible
+
+    def _readable_state(self, state: dict) -> dict:
+        variables = self.csp_instance.variables
+        return {variables[index]: value for index, value in state.items()}
+
+    def solve(self) -> Tuple[bool, dict]:
+        """
+        Solves the model as edited since the last solve, with the same result as a run_backtrack of the
+        backtrack_object on it. A False result is only a proof when status is NO_SOLUTION_STATUS.
+        """
+        self.nodes = 0
+        self.repaired = False
+        if self.proven_infeasible:
+            self.status = NO_SOLUTION_STATUS
+            self.edited_variables.clear()
+            return False, dict()
+        if self._solution_is_still_valid():
+            self.status = SOLUTION_STATUS
+            self.repaired = True
+            self.edited_variables.clear()
+            return True, self._readable_state(state=self.solution)
+
+        self.edited_variables.clear()
+        self.solution = None
+        if self._propagate_root():
+            self.status = NO_SOLUTION_STATUS
+            self.proven_infeasible = True
+            self.root_domains = None
+            return False, dict()
+
+        csp_instance = self.csp_instance
+        backtrack_object = self.backtrack_object
+        model_domains = csp_instance.domains
+        original_values_ordering = backtrack_object.next_values_ordering_method
+        # The search reorders the domains in place, it gets copies of the root ones
+        csp_instance.domains = [domain.copy() for domain in self.root_domains]
+        backtrack_object.next_values_ordering_method = phase_saving_values_ordering(
+            saved_values=self.saved_values
+        )
+        try:
+            found_solution, readable_state = backtrack_object.run_backtrack(
+                csp_instance=csp_instance
+            )
+        finally:
+            csp_instance.domains = model_domains
+            backtrack_object.next_values_ordering_method = original_values_ordering
+
+        self.nodes = backtrack_object.nodes
+        self.status = backtrack_object.status
+        if found_solution:
+            variables_to_index_dict = csp_instance.variables_to_index_dict
+            self.solution = {
+                variables_to_index_dict[variable]: value
+                for variable, value in readable_state.items()
+            }
+            self.saved_values.update(self.solution)
+        elif self.status == NO_SOLUTION_STATUS:
+            self.proven_infeasible = True
+        return found_solution, readable_state
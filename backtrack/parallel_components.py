@@ -0,0 +1,169 @@
+# This file implements the independent solving of the connected components of a CSP, optionally
+# in parallel processes.
+# Constraints are lambdas which can't be pickled, so the components are not sent to the workers:
+# they are put in a module variable before the pool is created and inherited by the forked workers,
+# which only receive the index of the component to solve. Where fork is not available (Windows),
+# the components are solved one after the other.
+# multiprocessing is imported when the workers are started, a sequential solve doesn't pay for it.
+from contextlib import contextmanager
+from typing import Callable, Iterator, Tuple
+
+# Context inherited by the forked workers
+_FORKED_CONTEXT = None
+
+
+class AnyTokenIsSet:
+    """
+    Cancellation token which is set as soon as one of the given tokens is. It is used to stop
+    a worker either on the user's token or when another component proved there is no solution.
+    """
+
+    tokens: list
+
+    def __init__(self, tokens: list) -> None:
+        self.tokens = [token for token in tokens if token is not None]
+        return
+
+    def is_set(self) -> bool:
+        return any(token.is_set() for token in self.tokens)
+
+
+def fork_is_available() -> bool:
+    import multiprocessing
+
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def _run_task_in_worker(function: Callable, task_index: int):
+    return function(_FORKED_CONTEXT, task_index)
+
+
+@contextmanager
+def forked_process_pool(context: object, processes: int) -> Iterator[object]:
+    """
+    A pool of `processes` forked workers inheriting context, for callers submitting their tasks as they
+    go with submit_in_forked_process. The tasks that haven't started are cancelled on exit.
+    """
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    global _FORKED_CONTEXT
+    _FORKED_CONTEXT = context
+    try:
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("fork"),
+        ) as executor:
+            try:
+                yield executor
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+    finally:
+        _FORKED_CONTEXT = None
+    return
+
+
+def submit_in_forked_process(executor, function: Callable, task_index: int):
+    """
+    Submits function(context, task_index) to a forked_process_pool, returns its future.
+    """
+    return executor.submit(_run_task_in_worker, function, task_index)
+
+
+def map_in_forked_processes(
+    function: Callable, context: object, tasks_count: int, processes: int
+) -> Iterator[Tuple[int, object]]:
+    """
+    Runs function(context, task_index) for each task in forked processes and yields the couples
+    (task_index, result) as soon as they are completed. The function must be defined at module level
+    and its result must be picklable, the context doesn't need to be.
+    Stopping the iteration cancels the tasks that haven't started yet.
+    """
+    from concurrent.futures import as_completed
+
+    with forked_process_pool(
+        context=context, processes=min(processes, tasks_count)
+    ) as executor:
+        futures = {
+            submit_in_forked_process(
+                executor=executor, function=function, task_index=task_index
+            ): task_index
+            for task_index in range(tasks_count)
+        }
+        try:
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+        finally:
+            for future in futures:
+                future.cancel()
+    return
+
+
+def _solve_component(context: tuple, component_index: int) -> tuple:
+    """
+    Runs in a worker: solves one component with the (inherited copy of the) backtrack object.
+    """
+    backtrack_object, components, stop_event = context
+    # Each worker owns its copy of the object, the tracer's file can't be shared between processes.
+    backtrack_object.tracer = None
+    backtrack_object.use_presolve = False
+    backtrack_object.decompose_components = False
+    backtrack_object.processes = 1
+    backtrack_object.cancellation_token = AnyTokenIsSet(
+        [backtrack_object.cancellation_token, stop_event]
+    )
+    found_solution, readable_state = backtrack_object.run_backtrack(
+        csp_instance=components[component_index]
+    )
+    return (
+        found_solution,
+        readable_state,
+        backtrack_object.nodes,
+        backtrack_object.stop_reason,
+    )
+
+
+def solve_components_in_parallel(
+    backtrack_object, components: list, processes: int
+) -> Tuple[bool, dict, int, str]:
+    """
+    Solves each component in its own process and merges the solutions. As soon as a component has no
+    solution, the others are cancelled. It returns wether a solution was found, the merged readable state,
+    the total number of nodes and the stop reason (None if the search was complete).
+    """
+    import multiprocessing
+
+    stop_event = multiprocessing.get_context("fork").Event()
+    readable_state = dict()
+    nodes = 0
+    stop_reason = None
+    proved_infeasible = False
+
+    for _, (
+        found_solution,
+        component_state,
+        component_nodes,
+        component_stop_reason,
+    ) in map_in_forked_processes(
+        function=_solve_component,
+        context=(backtrack_object, components, stop_event),
+        tasks_count=len(components),
+        processes=processes,
+    ):
+        nodes += component_nodes
+        if found_solution:
+            readable_state.update(component_state)
+            continue
+        if component_stop_reason is None:
+            # This component has no solution, neither has the CSP
+            proved_infeasible = True
+            stop_event.set()
+            break
+        if stop_reason is None:
+            stop_reason = component_stop_reason
+
+    if proved_infeasible:
+        return False, dict(), nodes, None
+    if stop_reason is not None:
+        return False, dict(), nodes, stop_reason
+    return True, readable_state, nodes, None
@@ -0,0 +1,390 @@
+# This file implements the presolve run once before the search: arc consistency at the root
+# made permanent, singleton arc consistency, removal of the fixed and unconstrained variables
+# and split of the remaining constraint graph in connected components.
+import sys
+from typing import Callable, Tuple
+
+from models import CSP, IntervalDomain
+from constants import Constraint, Constraints
+
+from .AC3 import AC3_current_state
+from .propagation_engine import PropagationEngine
+
+
+def _is_compact(csp_instance: CSP) -> bool:
+    """
+    Wether the CSP is a CompactCSP, without importing its module (and NumPy) for the plain models: a
+    CompactCSP exists only once it was imported.
+    """
+    compact_csp_module = sys.modules.get("models.compact_csp")
+    return compact_csp_module is not None and isinstance(
+        csp_instance, compact_csp_module.CompactCSP
+    )
+
+
+class PresolveResult:
+    """
+    Result of the presolve of a CSP:
+        - feasible : False if the presolve proved that the CSP has no solution.
+        - fixed_assignments : dict variable index -> value of the variables removed from the model, either
+            because their domain was reduced to a single value or because they are not constrained.
+        - components : the reduced CSPs left to be solved by the search, one per connected component of
+            the constraint graph. They share no variable nor constraint so they can be solved independently.
+        - components_variables : for each component, the indices in the original CSP of its variables, in
+            the order of the component's variables.
+        - removed_values : number of values removed from the domains by the presolve.
+        - stopped : True if should_stop ended the singleton arc consistency, nothing is proven then and the
+            other fields are empty.
+    """
+
+    feasible: bool
+    fixed_assignments: dict
+    components: list[CSP]
+    components_variables: list[list[int]]
+    removed_values: int
+    stopped: bool
+
+    def __init__(
+        self,
+        feasible: bool,
+        fixed_assignments: dict,
+        components: list[CSP],
+        components_variables: list[list[int]],
+        removed_values: int,
+        stopped: bool = False,
+    ) -> None:
+        self.feasible = feasible
+        self.fixed_assignments = fixed_assignments
+        self.components = components
+        self.components_variables = components_variables
+        self.removed_values = removed_values
+        self.stopped = stopped
+        return
+
+    @property
+    def solved(self) -> bool:
+        """
+        The presolve alone found the solution, there is nothing left to search.
+        """
+        return self.feasible and not self.stopped and len(self.components) == 0
+
+
+def _remove_value_at(
+    domain: list, domains_last_valid_index: list, variable_index: int, index: int
+) -> None:
+    """
+    Put the value at index after the valid part of the domain.
+    """
+    last_valid = domains_last_valid_index[variable_index]
+    domain[index], domain[last_valid] = domain[last_valid], domain[index]
+    domains_last_valid_index[variable_index] = last_valid - 1
+    return
+
+
+def valid_domains(domains: list, domains_last_valid_index: list) -> list:
+    """
+    The valid parts of the domains as new domains, to make the removals of a propagation permanent.
+    """
+    return [
+        (
+            domain.valid_part(last_valid_index=last_valid_index)
+            if isinstance(domain, IntervalDomain)
+            else domain[: last_valid_index + 1]
+        )
+        for domain, last_valid_index in zip(domains, domains_last_valid_index)
+    ]
+
+
+def singleton_arc_consistency(
+    csp_instance: CSP,
+    domains_last_valid_index: list,
+    should_stop: Callable[[], bool] = None,
+) -> Tuple[bool, bool]:
+    """
+    Singleton arc consistency: for each variable and each value of its domain, we try to give the value
+    to the variable and propagate with AC3. If a domain is emptied the value can't be in any solution
+    and is removed, then AC3 propagates this removal. We loop until no value is removed.
+    The domains are shrunk in place through domains_last_valid_index, which the root AC must have already
+    made consistent. should_stop is called before each probe (the budgets of the backtrack), the loop ends
+    as soon as it returns True. It returns wether a domain became empty and wether it was stopped.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for variable_index in range(len(csp_instance.variables)):
+            domain = csp_instance.domains[variable_index]
+            index = 0
+            while index <= domains_last_valid_index[variable_index]:
+                if should_stop is not None and should_stop():
+                    return False, True
+                value = domain[index]
+                # Put the value first and make it the only valid one for the probe
+                domain[0], domain[index] = domain[index], domain[0]
+                domain_last_valid = domains_last_valid_index[variable_index]
+                domains_last_valid_index[variable_index] = 0
+
+                shrinking_operations = dict()
+                emptied_a_domain = AC3_current_state(
+                    csp_instance=csp_instance,
+                    state={variable_index: value},
+                    shrinking_operations=shrinking_operations,
+                    domains_last_valid_index=domains_last_valid_index,
+                    last_variable_index=variable_index,
+                )
+                # Undo the probe
+                for shrunk_variable_index in shrinking_operations:
+                    domains_last_valid_index[
+                        shrunk_variable_index
+                    ] += shrinking_operations[shrunk_variable_index]
+                domains_last_valid_index[variable_index] = domain_last_valid
+                domain[0], domain[index] = domain[index], domain[0]
+
+                if not emptied_a_domain:
+                    index += 1
+                    continue
+
+                # The value is not singleton arc consistent, remove it for good
+                changed = True
+                if domain_last_valid == 0:
+                    return True, False
+                _remove_value_at(
+                    domain=domain,
+                    domains_last_valid_index=domains_last_valid_index,
+                    variable_index=variable_index,
+                    index=index,
+                )
+                if AC3_current_state(
+                    csp_instance=csp_instance,
+                    state=dict(),
+                    shrinking_operations=dict(),
+                    domains_last_valid_index=domains_last_valid_index,
+                    last_variable_index=variable_index,
+                ):
+                    return True, False
+    return False, False
+
+
+def _reindex_constraint(
+    constraint: Constraint, original_index_1: int, original_index_2: int
+) -> Constraint:
+    """
+    Constraints may use the indices of the variables (the n-queens diagonals do), so a constraint moved
+    to a reduced CSP is still called with its original indices.
+    """
+    return lambda i, j, value_var_i, value_var_j: constraint(
+        original_index_1, original_index_2, value_var_i, value_var_j
+    )
+
+
+def build_sub_csp(csp_instance: CSP, variables_indices: list[int]) -> CSP:
+    """
+    Builds the CSP restricted to the given variables (and the constraints between them). The i-th variable
+    of the new CSP is the variables_indices[i]-th one of the original CSP.
+    """
+    new_indices = {
+        original_index: new_index
+        for new_index, original_index in enumerate(variables_indices)
+    }
+    if _is_compact(csp_instance=csp_instance):
+        return _build_compact_sub_csp(
+            csp_instance=csp_instance,
+            variables_indices=variables_indices,
+            new_indices=new_indices,
+        )
+    constraints: Constraints = dict()
+    for original_index_1 in variables_indices:
+        for original_index_2 in csp_instance.variable_is_constrained_by[
+            original_index_1
+        ]:
+            if original_index_2 in new_indices:
+                constraints[
+                    (new_indices[original_index_1], new_indices[original_index_2])
+                ] = _reindex_constraint(
+                    constraint=csp_instance.constraints[
+                        (original_index_1, original_index_2)
+                    ],
+                    original_index_1=original_index_1,
+                    original_index_2=original_index_2,
+                )
+    sub_csp = CSP(
+        variables=[csp_instance.variables[index] for index in variables_indices],
+        domains=[csp_instance.domains[index].copy() for index in variables_indices],
+        constraints=constraints,
+    )
+    for global_constraint in csp_instance.global_constraints:
+        if all(index in new_indices for index in global_constraint.variables_indices):
+            sub_csp.add_global_constraint(
+                global_constraint=global_constraint.reindexed(new_indices=new_indices)
+            )
+    return sub_csp
+
+
+def _build_compact_sub_csp(
+    csp_instance: "CompactCSP", variables_indices: list[int], new_indices: dict
+) -> "CompactCSP":
+    """
+    Same as build_sub_csp for a CompactCSP, the names are still read from the original CSP.
+    """
+    from models import CompactCSP
+
+    sub_csp = CompactCSP(
+        variables_count=len(variables_indices),
+        domains=[csp_instance.domains[index].copy() for index in variables_indices],
+        variable_name=lambda index: csp_instance.variables[variables_indices[index]],
+    )
+    for original_index_1, original_index_2 in csp_instance.arcs():
+        if original_index_1 in new_indices and original_index_2 in new_indices:
+            sub_csp.add_constraint(
+                index_variable_1=new_indices[original_index_1],
+                index_variable_2=new_indices[original_index_2],
+                new_constraint=_reindex_constraint(
+                    constraint=csp_instance.constraints[
+                        (original_index_1, original_index_2)
+                    ],
+                    original_index_1=original_index_1,
+                    original_index_2=original_index_2,
+                ),
+            )
+    for global_constraint in csp_instance.global_constraints:
+        if all(index in new_indices for index in global_constraint.variables_indices):
+            sub_csp.add_global_constraint(
+                global_constraint=global_constraint.reindexed(new_indices=new_indices)
+            )
+    return sub_csp
+
+
+def connected_components(
+    csp_instance: CSP, variables_indices: list[int] = None
+) -> list[list[int]]:
+    """
+    Splits the given variables (all of them by default) in the connected components of the constraint
+    graph they induce, the variables of a global constraint being all linked together. Each component is
+    sorted to keep the order of the CSP.
+    """
+    if variables_indices is None:
+        variables_indices = range(len(csp_instance.variables))
+    to_visit = set(variables_indices)
+    components = []
+    for start_index in variables_indices:
+        if start_index not in to_visit:
+            continue
+        to_visit.remove(start_index)
+        component = [start_index]
+        stack = [start_index]
+        while stack:
+            variable_index = stack.pop()
+            linked_variables_indices = list(
+                csp_instance.variable_is_constrained_by[variable_index]
+            )
+            for global_constraint in csp_instance.variable_global_constraints[
+                variable_index
+            ]:
+                linked_variables_indices.extend(global_constraint.variables_indices)
+            for linked_variable_index in linked_variables_indices:
+                if linked_variable_index in to_visit:
+                    to_visit.remove(linked_variable_index)
+                    component.append(linked_variable_index)
+                    stack.append(linked_variable_index)
+        components.append(sorted(component))
+    return components
+
+
+def presolve(
+    csp_instance: CSP,
+    use_singleton_arc_consistency: bool = False,
+    should_stop: Callable[[], bool] = None,
+) -> PresolveResult:
+    """
+    Runs the presolve on a copy of the domains, the given CSP is left untouched:
+        1. arc consistency and the propagation of the global constraints at the root, whose removals
+            are permanent.
+        2. optionally singleton arc consistency to shrink the domains further.
+        3. removal of the variables with a single value left (sudoku givens and what AC deduced from them)
+            and of the unconstrained variables, which take any value of their domain. The variables of the
+            global constraints are kept, these constraints are only checked on complete scopes.
+        4. split of the remaining variables in connected components, each one built as its own CSP.
+    should_stop is given to the singleton arc consistency, the result is stopped if it ended it.
+    """
+    if _is_compact(csp_instance=csp_instance):
+        working_csp = csp_instance.with_domains(
+            domains=[domain.copy() for domain in csp_instance.domains]
+        )
+    else:
+        working_csp = CSP(
+            variables=csp_instance.variables,
+            domains=[domain.copy() for domain in csp_instance.domains],
+            constraints=csp_instance.constraints,
+        )
+        for global_constraint in csp_instance.global_constraints:
+            working_csp.add_global_constraint(global_constraint=global_constraint)
+    domains_last_valid_index = [len(domain) - 1 for domain in working_csp.domains]
+    initial_size = sum(len(domain) for domain in working_csp.domains)
+
+    infeasible = any(len(domain) == 0 for domain in working_csp.domains)
+    if not infeasible:
+        # Arc consistency and the global constraints, each one propagating the removals of the others
+        infeasible = PropagationEngine(
+            csp_instance=working_csp, use_arc_consistency=True
+        ).propagate(
+            state=dict(),
+            last_variable_index=None,
+            shrinking_operations=dict(),
+            domains_last_valid_index=domains_last_valid_index,
+        )
+    if not infeasible and use_singleton_arc_consistency:
+        infeasible, stopped = singleton_arc_consistency(
+            csp_instance=working_csp,
+            domains_last_valid_index=domains_last_valid_index,
+            should_stop=should_stop,
+        )
+        if stopped:
+            return PresolveResult(
+                feasible=True,
+                fixed_assignments=dict(),
+                components=[],
+                components_variables=[],
+                removed_values=0,
+                stopped=True,
+            )
+    if infeasible:
+        return PresolveResult(
+            feasible=False,
+            fixed_assignments=dict(),
+            components=[],
+            components_variables=[],
+            removed_values=0,
+        )
+
+    # Make the removals permanent
+    working_csp.domains[:] = valid_domains(
+        domains=working_csp.domains, domains_last_valid_index=domains_last_valid_index
+    )
+    removed_values = initial_size - sum(len(domain) for domain in working_csp.domains)
+
+    # Once the CSP is arc consistent, a fixed variable supports every value left in its neighbours'
+    # domains, so it can be taken out of the model.
+    fixed_assignments = dict()
+    free_variables = []
+    for variable_index in range(len(working_csp.variables)):
+        if not working_csp.variable_global_constraints[variable_index] and (
+            len(working_csp.domains[variable_index]) == 1
+            or len(working_csp.variable_is_constrained_by[variable_index]) == 0
+        ):
+            fixed_assignments[variable_index] = working_csp.domains[variable_index][0]
+        else:
+            free_variables.append(variable_index)
+
+    components_variables = connected_components(
+        csp_instance=working_csp, variables_indices=free_variables
+    )
+    components = [
+        build_sub_csp(csp_instance=working_csp, variables_indices=component)
+        for component in components_variables
+    ]
+    return PresolveResult(
+        feasible=True,
+        fixed_assignments=fixed_assignments,
+        components=components,
+        components_variables=components_variables,
+        removed_values=removed_values,
+    )
@@ -0,0 +1,355 @@
+# This file implements the propagation engine: the propagators subscribe to events on the variables
+# (fixed, bounds changed, domain changed) and are run from a priority queue, the cheap ones first,
+# until none of them can remove a value.
+import heapq
+from itertools import count
+
+from models import CSP, IntervalDomain, domain_valid_bounds
+from constants import (
+    FIXED_EVENT,
+    BOUNDS_EVENT,
+    DOMAIN_EVENT,
+    PROPAGATION_EVENTS,
+    FORWARD_CHECKING_PRIORITY,
+    ARC_CONSISTENCY_PRIORITY,
+    GLOBAL_PRIORITY,
+)
+
+from .AC3 import restrict_domain_with_constraint
+from .forward_checking import restrict_domain_with_value
+
+# Kinds of the tasks of the queue
+_FORWARD_CHECKING_TASK = 0
+_ARC_CONSISTENCY_TASK = 1
+_GLOBAL_CONSTRAINT_TASK = 2
+
+
+class PropagationEngine:
+    """
+    Runs the propagators of a CSP to a fixpoint, built for each search.
+    The binary constraints have two propagators working on a variable:
+        - forward checking, on FIXED_EVENT: the neighbours lose the values not supported by its value.
+        - arc consistency, on DOMAIN_EVENT: the arcs (neighbour, variable) are revised.
+    A global constraint subscribes to the events of its `events` attribute (DOMAIN_EVENT by default) on
+    each of its variables, and is run with the priority of its `priority` attribute (GLOBAL_PRIORITY by
+    default). The tasks are waiting in a heap ordered by priority and a task already waiting isn't added
+    twice, so a propagator woken up by several removals only runs once, after the cheaper ones did their
+    removals. A global constraint isn't woken up by its own removals, it propagates them itself.
+    When both forward checking and arc consistency are used, the arcs towards a fixed variable aren't
+    revised: the forward checking already removed every value they could.
+    """
+
+    csp_instance: CSP
+    use_forward_checking: bool
+    use_arc_consistency: bool
+    # event -> variable index -> global constraints woken up
+    global_subscribers: dict
+    # Wether propagate can remove anything
+    has_propagators: bool
+
+    def __init__(
+        self,
+        csp_instance: CSP,
+        use_forward_checking: bool = False,
+        use_arc_consistency: bool = False,
+    ) -> None:
+        self.csp_instance = csp_instance
+        self.use_forward_checking = use_forward_checking
+        self.use_arc_consistency = use_arc_consistency
+        self.global_subscribers = {
+            event: [[] for _ in range(len(csp_instance.variables))]
+            for event in PROPAGATION_EVENTS
+        }
+        for global_constraint in csp_instance.global_constraints:
+            for event in getattr(global_constraint, "events", (DOMAIN_EVENT,)):
+                for variable_index in global_constraint.variables_indices:
+                    self.global_subscribers[event][variable_index].append(
+                        global_constraint
+                    )
+        self.has_propagators = (
+            use_forward_checking
+            or use_arc_consistency
+            or len(csp_instance.global_constraints) > 0
+        )
+        return
+
+    def _schedule(self, priority: int, kind: int, subject: object) -> None:
+        key = (kind, subject if kind != _GLOBAL_CONSTRAINT_TASK else id(subject))
+        if key in self._waiting:
+            return
+        self._waiting.add(key)
+        heapq.heappush(self._queue, (priority, next(self._counter), kind, subject))
+        return
+
+    def _schedule_global_constraints(
+        self, global_constraints: list, source: object = None
+    ) -> None:
+        for global_constraint in global_constraints:
+            if global_constraint is not source:
+                self._schedule(
+                    priority=getattr(global_constraint, "priority", GLOBAL_PRIORITY),
+                    kind=_GLOBAL_CONSTRAINT_TASK,
+                    subject=global_constraint,
+                )
+        return
+
+    def _notify_shrink(
+        self,
+        variable_index: int,
+        shrinking_operations: dict,
+        domains_last_valid_index: list,
+        source: object = None,
+    ) -> None:
+        """
+        Schedules the propagators woken up by the removals from the domain of a variable since it was last
+        notified, or since the beginning of the node.
+        """
+        last_valid = domains_last_valid_index[variable_index]
+        previous_last_valid = self._notified_last_valid.get(
+            variable_index,
+            last_valid + shrinking_operations.get(variable_index, 0),
+        )
+        if previous_last_valid == last_valid:
+            return
+        self._notified_last_valid[variable_index] = last_valid
+
+        if last_valid == 0:
+            if self._run_forward_checking:
+                self._schedule(
+                    priority=FORWARD_CHECKING_PRIORITY,
+                    kind=_FORWARD_CHECKING_TASK,
+                    subject=variable_index,
+                )
+            self._schedule_global_constraints(
+                global_constraints=self.global_subscribers[FIXED_EVENT][variable_index],
+                source=source,
+            )
+        if self._run_arc_consistency and not (
+            last_valid == 0 and self._run_forward_checking
+        ):
+            self._schedule(
+                priority=ARC_CONSISTENCY_PRIORITY,
+                kind=_ARC_CONSISTENCY_TASK,
+                subject=variable_index,
+            )
+        self._schedule_global_constraints(
+            global_constraints=self.global_subscribers[DOMAIN_EVENT][variable_index],
+            source=source,
+        )
+
+        bounds_subscribers = self.global_subscribers[BOUNDS_EVENT][variable_index]
+        if bounds_subscribers:
+            domain = self.csp_instance.domains[variable_index]
+            valid_min, valid_max = domain_valid_bounds(
+                domain=domain, last_valid_index=last_valid
+            )
+            if isinstance(domain, IntervalDomain):
+                # The removed values aren't materialized, the former bounds are those of the positions
+                # up to previous_last_valid which still hold the same values
+                previous_min, previous_max = domain.valid_bounds(
+                    last_valid_index=previous_last_valid
+                )
+            else:
+                removed_values = domain[last_valid + 1 : previous_last_valid + 1]
+                previous_min, previous_max = min(removed_values), max(removed_values)
+            if previous_min < valid_min or previous_max > valid_max:
+                self._schedule_global_constraints(
+                    global_constraints=bounds_subscribers, source=source
+                )
+        return
+
+    def _schedule_fixed_variable(
+        self, variable_index: int, arc_consistency_variables: list[int]
+    ) -> None:
+        """
+        Schedules every propagator of a variable which was just given a value by the search. Without forward
+        checking, the arcs towards arc_consistency_variables (assigned at nodes where arc consistency was
+        skipped) are revised too.
+        """
+        if self._run_forward_checking:
+            self._schedule(
+                priority=FORWARD_CHECKING_PRIORITY,
+                kind=_FORWARD_CHECKING_TASK,
+                subject=variable_index,
+            )
+        elif self._run_arc_consistency:
+            for assigned_variable_index in [variable_index] + arc_consistency_variables:
+                self._schedule(
+                    priority=ARC_CONSISTENCY_PRIORITY,
+                    kind=_ARC_CONSISTENCY_TASK,
+                    subject=assigned_variable_index,
+                )
+        for event in PROPAGATION_EVENTS:
+            self._schedule_global_constraints(
+                global_constraints=self.global_subscribers[event][variable_index]
+            )
+        return
+
+    def _schedule_root(self, domains_last_valid_index: list) -> None:
+        """
+        At the root every arc and every global constraint is propagated once, and the variables with a
+        single value (sudoku givens) are forward checked.
+        """
+        for variable_index in range(len(self.csp_instance.variables)):
+            if (
+                self._run_forward_checking
+                and domains_last_valid_index[variable_index] == 0
+            ):
+                self._schedule(
+                    priority=FORWARD_CHECKING_PRIORITY,
+                    kind=_FORWARD_CHECKING_TASK,
+                    subject=variable_index,
+                )
+            if self._run_arc_consistency:
+                self._schedule(
+                    priority=ARC_CONSISTENCY_PRIORITY,
+                    kind=_ARC_CONSISTENCY_TASK,
+                    subject=variable_index,
+                )
+        self._schedule_global_constraints(
+            global_constraints=self.csp_instance.global_constraints
+        )
+        return
+
+    def _forward_check(
+        self,
+        variable_index: int,
+        state: dict,
+        shrinking_operations: dict,
+        domains_last_valid_index: list,
+    ) -> bool:
+        """
+        Forward checking from a fixed variable, returns wether a domain was emptied.
+        """
+        # A fixed variable holds its value first, even the last assigned one whose domain was overwritten
+        value = self.csp_instance.domains[variable_index][0]
+        neighbour_constraints = self.csp_instance.neighbour_constraints(
+            variable_index=variable_index
+        )
+        for linked_variable_index, constraint in neighbour_constraints:
+            if linked_variable_index in state:
+                continue
+            emptied_a_domain, restricted = restrict_domain_with_value(
+                csp_instance=self.csp_instance,
+                index_variable=linked_variable_index,
+                fixed_variable_index=variable_index,
+                fixed_variable_value=value,
+                shrinking_operations=shrinking_operations,
+                domains_last_valid_index=domains_last_valid_index,
+                constraint=constraint,
+            )
+            if emptied_a_domain:
+                return True
+            if restricted:
+                self._notify_shrink(
+                    variable_index=linked_variable_index,
+                    shrinking_operations=shrinking_operations,
+                    domains_last_valid_index=domains_last_valid_index,
+                )
+        return False
+
+    def _revise_arcs_towards(
+        self,
+        variable_index: int,
+        state: dict,
+        shrinking_operations: dict,
+        domains_last_valid_index: list,
+    ) -> bool:
+        """
+        Revises the arcs (neighbour, variable) like AC3, returns wether a domain was emptied.
+        """
+        neighbour_constraints = self.csp_instance.neighbour_constraints(
+            variable_index=variable_index, towards=True
+        )
+        for linked_variable_index, constraint in neighbour_constraints:
+            if linked_variable_index in state:
+                continue
+            emptied_a_domain, restricted = restrict_domain_with_constraint(
+                csp_instance=self.csp_instance,
+                index_variable_1=linked_variable_index,
+                index_variable_2=variable_index,
+                constraint=constraint,
+                shrinking_operations=shrinking_operations,
+                domains_last_valid_index=domains_last_valid_index,
+            )
+            if emptied_a_domain:
+                return True
+            if restricted:
+                self._notify_shrink(
+                    variable_index=linked_variable_index,
+                    shrinking_operations=shrinking_operations,
+                    domains_last_valid_index=domains_last_valid_index,
+                )
+        return False
+
+    def propagate(
+        self,
+        state: dict,
+        last_variable_index: int,
+        shrinking_operations: dict,
+        domains_last_valid_index: list,
+        run_forward_checking: bool = True,
+        run_arc_consistency: bool = True,
+        arc_consistency_variables: list[int] = None,
+    ) -> bool:
+        """
+        Propagates the assignment of the last variable (everything at the root, when it is None) until no
+        propagator removes a value. The removals are made in place and recorded in shrinking_operations,
+        the last variable being fixed beforehand by the search.
+        run_forward_checking and run_arc_consistency let the search skip them at some nodes, and
+        arc_consistency_variables are the variables assigned since arc consistency was last run.
+        It returns a boolean stating wether a domain became empty.
+        """
+        self._queue = []
+        self._counter = count()
+        self._waiting = set()
+        self._notified_last_valid = dict()
+        self._run_forward_checking = self.use_forward_checking and run_forward_checking
+        self._run_arc_consistency = self.use_arc_consistency and run_arc_consistency
+
+        if last_variable_index is None:
+            self._schedule_root(domains_last_valid_index=domains_last_valid_index)
+        else:
+            self._schedule_fixed_variable(
+                variable_index=last_variable_index,
+                arc_consistency_variables=arc_consistency_variables or [],
+            )
+
+        while self._queue:
+            _, _, kind, subject = heapq.heappop(self._queue)
+            self._waiting.discard(
+                (kind, subject if kind != _GLOBAL_CONSTRAINT_TASK else id(subject))
+            )
+            if kind == _FORWARD_CHECKING_TASK:
+                emptied_a_domain = self._forward_check(
+                    variable_index=subject,
+                    state=state,
+                    shrinking_operations=shrinking_operations,
+                    domains_last_valid_index=domains_last_valid_index,
+                )
+            elif kind == _ARC_CONSISTENCY_TASK:
+                emptied_a_domain = self._revise_arcs_towards(
+                    variable_index=subject,
+                    state=state,
+                    shrinking_operations=shrinking_operations,
+                    domains_last_valid_index=domains_last_valid_index,
+                )
+            else:
+                emptied_a_domain, shrunk_variables = subject.propagate(
+                    domains=self.csp_instance.domains,
+                    state=state,
+                    domains_last_valid_index=domains_last_valid_index,
+                    shrinking_operations=shrinking_operations,
+                )
+                if not emptied_a_domain:
+                    for variable_index in shrunk_variables:
+                        self._notify_shrink(
+                            variable_index=variable_index,
+                            shrinking_operations=shrinking_operations,
+                            domains_last_valid_index=domains_last_valid_index,
+                            source=subject,
+                        )
+            if emptied_a_domain:
+                return True
+
+        return False
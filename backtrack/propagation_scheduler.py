@@ -0,0 +1,143 @@
+# This file implements the adaptive choice of the propagation done at each node of the search:
+# none, forward checking or maintaining arc consistency, from what each one recently removed and
+# how long it took.
+from time import perf_counter
+
+# Propagation modes, the global constraints are propagated in all of them
+NO_PROPAGATION_MODE = "none"
+FORWARD_CHECKING_MODE = "forward_checking"
+ARC_CONSISTENCY_MODE = "arc_consistency"
+PROPAGATION_MODES = [NO_PROPAGATION_MODE, FORWARD_CHECKING_MODE, ARC_CONSISTENCY_MODE]
+
+# Weight of the last node in the moving averages
+DEFAULT_SMOOTHING = 0.1
+# Every exploration_period nodes the mode measured the longest ago is used, so that its
+# averages follow the search
+DEFAULT_EXPLORATION_PERIOD = 50
+
+
+class AdaptivePropagationScheduler:
+    """
+    Chooses the propagation mode of each node of a BacktrackClass search (adaptive_propagation=True).
+    For each mode it keeps moving averages over the recent nodes of:
+        - the yield: the number of values removed, a wiped out domain counting as many values as there are
+            free variables since the whole subtree is cut.
+        - the cost: the time spent propagating.
+    A removed value is a branch the search won't try, so it is worth about the time the search spends on a
+    node besides propagating, also measured. A mode scores yield * node time - cost and the best one is
+    used, except every exploration_period nodes where the one measured the longest ago is tried again.
+    Each mode is tried once first, and NO_PROPAGATION_MODE scores 0 when it removes nothing: forward
+    checking or arc consistency are only used while they are expected to save more time than they cost.
+    """
+
+    modes: list[str]
+    smoothing: float
+    exploration_period: int
+    # mode -> moving averages
+    average_yield: dict
+    average_cost: dict
+    # Moving average of the time of a node besides the propagation
+    average_node_time: float
+    # mode -> node of its last use, and number of nodes it was used at
+    last_used: dict
+    mode_counts: dict
+    _nodes: int
+    _last_node_start: float
+    _last_propagation_time: float
+
+    def __init__(
+        self,
+        modes: list[str] = PROPAGATION_MODES,
+        smoothing: float = DEFAULT_SMOOTHING,
+        exploration_period: int = DEFAULT_EXPLORATION_PERIOD,
+    ) -> None:
+        for mode in modes:
+            if mode not in PROPAGATION_MODES:
+                raise ValueError(f"Unknown propagation mode {mode}")
+        self.modes = list(modes)
+        self.smoothing = smoothing
+        self.exploration_period = exploration_period
+        self.reset()
+        return
+
+    def reset(self) -> None:
+        """
+        Forgets the measures, used before each search.
+        """
+        self.average_yield = dict()
+        self.average_cost = dict()
+        self.average_node_time = None
+        self.last_used = {mode: -1 for mode in self.modes}
+        self.mode_counts = {mode: 0 for mode in self.modes}
+        self._nodes = 0
+        self._last_node_start = None
+        self._last_propagation_time = 0.0
+        return
+
+    def _average(self, average: float, value: float) -> float:
+        if average is None:
+            return value
+        return average + self.smoothing * (value - average)
+
+    def score(self, mode: str) -> float:
+        """
+        Expected time saved by the mode at a node, in seconds.
+        """
+        node_time = (
+            self.average_node_time if self.average_node_time is not None else 0.0
+        )
+        return self.average_yield[mode] * node_time - self.average_cost[mode]
+
+    def root_mode(self) -> str:
+        """
+        The root isn't measured, it gets the strongest propagation of the modes.
+        """
+        return max(self.modes, key=PROPAGATION_MODES.index)
+
+    def choose_mode(self) -> str:
+        """
+        Called at each node before propagating, it returns the mode to use.
+        """
+        now = perf_counter()
+        if self._last_node_start is not None:
+            self.average_node_time = self._average(
+                average=self.average_node_time,
+                value=max(
+                    0.0, now - self._last_node_start - self._last_propagation_time
+                ),
+            )
+        self._last_node_start = now
+        self._last_propagation_time = 0.0
+        self._nodes += 1
+
+        untried_modes = [mode for mode in self.modes if mode not in self.average_cost]
+        if untried_modes:
+            mode = untried_modes[0]
+        elif self._nodes % self.exploration_period == 0:
+            mode = min(self.modes, key=lambda mode: self.last_used[mode])
+        else:
+            mode = max(self.modes, key=self.score)
+        self.last_used[mode] = self._nodes
+        self.mode_counts[mode] += 1
+        return mode
+
+    def record(
+        self,
+        mode: str,
+        removed_values: int,
+        emptied_a_domain: bool,
+        free_variables: int,
+        propagation_time: float,
+    ) -> None:
+        """
+        Called after the propagation of a node with what it removed and how long it took.
+        """
+        node_yield = removed_values + (free_variables if emptied_a_domain else 0)
+        self.average_yield[mode] = self._average(
+            average=self.average_yield.get(mode, None), value=node_yield
+        )
+        self.average_cost[mode] = self._average(
+            average=self.average_cost.get(mode, None), value=propagation_time
+        )
+        self._last_propagation_time = propagation_time
+        return
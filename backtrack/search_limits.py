@@ -0,0 +1,45 @@
+# This file stores what is needed to stop a backtrack before its end: the statuses of a run
+# and the measure of the memory used by the process.
+import os
+
+# Status of a run of the backtrack
+SOLUTION_STATUS = "solution"
+NO_SOLUTION_STATUS = "no_solution"
+# The search was stopped before its end, no conclusion can be drawn on the CSP
+TIMEOUT_STATUS = "timeout"
+
+# Reasons why a search can be stopped, stored in BacktrackClass.stop_reason
+TIME_LIMIT_REASON = "time_limit"
+NODE_LIMIT_REASON = "node_limit"
+MEMORY_LIMIT_REASON = "memory_limit"
+CANCELLED_REASON = "cancelled"
+# A discrepancy search left a part of the tree unexplored (see search_strategies)
+DISCREPANCY_LIMIT_REASON = "discrepancy_limit"
+
+# Number of nodes between two checks of the clock, memory and cancellation token by default
+DEFAULT_LIMITS_CHECK_FREQUENCY = 256
+
+# The current resident memory, not the peak (ru_maxrss): after a run over its memory budget, the peak of
+# the process would stop the next runs of a warm worker at their first check.
+if os.path.exists("/proc/self/statm"):  # Linux
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+
+    def current_memory_usage() -> int:
+        """
+        Returns the resident memory of the process in bytes (second field of statm, in pages).
+        """
+        with open("/proc/self/statm", "rb") as statm_file:
+            return int(statm_file.read().split()[1]) * _PAGE_SIZE
+
+else:
+    try:
+        import psutil
+
+        def current_memory_usage() -> int:
+            """
+            Returns the resident memory of the process in bytes.
+            """
+            return psutil.Process().memory_info().rss
+
+    except ImportError:
+        current_memory_usage = None
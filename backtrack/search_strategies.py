@@ -0,0 +1,259 @@
+# This file implements the search strategies of BacktrackClass other than its depth first search, for
+# when the heuristics are good but not perfect: the depth first search spends almost all its time below
+# an early wrong choice, these ones go back to the top of the tree sooner.
+#   - discrepancy searches: a discrepancy is a value taken against the values ordering, trying the value of
+#       rank r costing r discrepancies (the r right branches of the binary x = v / x != v tree). Limited
+#       discrepancy search (LDS) allows at most max_discrepancies of them on a path, its iterative version
+#       (ILDS) allows 0, 1, 2, ... in turn, and depth-bounded discrepancy search (DDS) only allows them above
+#       a depth growing at each iteration, the early choices being the least reliable.
+#   - best-first search: the open nodes are kept in a heap and the one with the fewest values left in the
+#       domains of its free variables is expanded first, whatever its depth.
+import heapq
+import math
+from itertools import count
+from typing import Tuple
+
+from models import CSP
+
+from .presolve import valid_domains
+from .search_limits import DISCREPANCY_LIMIT_REASON
+
+DEPTH_FIRST_STRATEGY = "depth_first"
+LIMITED_DISCREPANCY_STRATEGY = "limited_discrepancy"
+ITERATIVE_DISCREPANCY_STRATEGY = "iterative_discrepancy"
+DEPTH_BOUNDED_DISCREPANCY_STRATEGY = "depth_bounded_discrepancy"
+BEST_FIRST_STRATEGY = "best_first"
+SEARCH_STRATEGIES = [
+    DEPTH_FIRST_STRATEGY,
+    LIMITED_DISCREPANCY_STRATEGY,
+    ITERATIVE_DISCREPANCY_STRATEGY,
+    DEPTH_BOUNDED_DISCREPANCY_STRATEGY,
+    BEST_FIRST_STRATEGY,
+]
+DISCREPANCY_STRATEGIES = [
+    LIMITED_DISCREPANCY_STRATEGY,
+    ITERATIVE_DISCREPANCY_STRATEGY,
+    DEPTH_BOUNDED_DISCREPANCY_STRATEGY,
+]
+
+
+class LimitedDiscrepancyProbe:
+    """
+    One iteration of LDS: the values of rank at most the discrepancies left are tried at each node.
+    cut_off tells wether a value was left out, if not the iteration was a complete search.
+    """
+
+    max_discrepancies: int
+    cut_off: bool
+
+    def __init__(self, max_discrepancies: int) -> None:
+        self.max_discrepancies = max_discrepancies
+        self.cut_off = False
+        return
+
+    def allowed_values(self, depth: int, discrepancies: int, values: list) -> list:
+        """
+        The couples (rank, value) to try at a node, the path to it having taken discrepancies.
+        """
+        allowed_count = self.max_discrepancies - discrepancies + 1
+        if len(values) > allowed_count:
+            self.cut_off = True
+            values = values[:allowed_count]
+        return list(enumerate(values))
+
+
+class DepthBoundedDiscrepancyProbe:
+    """
+    Iteration depth_bound of DDS: any value above depth_bound and the first value below. The iteration
+    doesn't skip the paths of the previous one, the values ordering depends on the order the propagation
+    left the domains in, which changes from one iteration to the next.
+    branching_depth is the deepest node below depth_bound where a value was left out, -1 if none.
+    """
+
+    depth_bound: int
+    branching_depth: int
+
+    def __init__(self, depth_bound: int) -> None:
+        self.depth_bound = depth_bound
+        self.branching_depth = -1
+        return
+
+    def allowed_values(self, depth: int, discrepancies: int, values: list) -> list:
+        if depth < self.depth_bound:
+            return list(enumerate(values))
+        if len(values) > 1:
+            self.branching_depth = max(self.branching_depth, depth)
+        return list(enumerate(values[:1]))
+
+
+def _discrepancy_probes(backtrack_object, variables_count: int):
+    """
+    Yields the probes of the strategy of the backtrack_object, each one being searched before the next one
+    is built, and stops once they covered the whole tree or reached max_discrepancies.
+    """
+    strategy = backtrack_object.search_strategy
+    max_discrepancies = backtrack_object.max_discrepancies
+    if strategy == LIMITED_DISCREPANCY_STRATEGY:
+        probe = LimitedDiscrepancyProbe(
+            max_discrepancies=math.inf if max_discrepancies < 0 else max_discrepancies
+        )
+        yield probe
+        if probe.cut_off:
+            backtrack_object.stop_reason = DISCREPANCY_LIMIT_REASON
+        return
+
+    if strategy == ITERATIVE_DISCREPANCY_STRATEGY:
+        for discrepancies in count():
+            probe = LimitedDiscrepancyProbe(max_discrepancies=discrepancies)
+            yield probe
+            if not probe.cut_off:
+                return
+            if discrepancies == max_discrepancies:
+                backtrack_object.stop_reason = DISCREPANCY_LIMIT_REASON
+                return
+
+    # Depth-bounded: the iteration covered the whole tree if no value was left out below depth_bound
+    for depth_bound in range(variables_count + 1):
+        probe = DepthBoundedDiscrepancyProbe(depth_bound=depth_bound)
+        yield probe
+        if probe.branching_depth < 0:
+            return
+        if depth_bound == max_discrepancies:
+            backtrack_object.stop_reason = DISCREPANCY_LIMIT_REASON
+            return
+    return
+
+
+def discrepancy_search(backtrack_object, csp_instance: CSP) -> Tuple[bool, dict]:
+    """
+    Search of BacktrackClass with a discrepancy strategy: its depth first search is run once per probe, the
+    probe choosing the values tried at each node. The nodes of all the probes are counted. It returns
+    wether a solution was found and the state by variable index; when none was, stop_reason is
+    DISCREPANCY_LIMIT_REASON if max_discrepancies kept a part of the tree unexplored.
+    """
+    try:
+        for probe in _discrepancy_probes(
+            backtrack_object=backtrack_object,
+            variables_count=len(csp_instance.variables),
+        ):
+            backtrack_object.discrepancy_probe = probe
+            found_solution, indexes_state = backtrack_object._backtrack(
+                csp_instance=csp_instance, state=dict()
+            )
+            if found_solution:
+                return True, indexes_state
+            if backtrack_object.stop_reason is not None:
+                return False, dict()
+    finally:
+        backtrack_object.discrepancy_probe = None
+    return False, dict()
+
+
+def best_first_search(backtrack_object, csp_instance: CSP) -> Tuple[bool, dict]:
+    """
+    Search of BacktrackClass with BEST_FIRST_STRATEGY. Each open node keeps its assignment and the valid
+    parts of its domains after propagation, the one whose free variables have the fewest values left is
+    expanded first (the deepest one on ties): the variables choosing method picks its variable and each
+    value of the values ordering makes a child, propagated with the propagation engine. The memory grows
+    with the open nodes, node_limit and memory_limit bound it. The tracer isn't used.
+    It returns wether a solution was found and the state by variable index.
+    """
+    propagation_engine = backtrack_object.propagation_engine
+    original_domains = csp_instance.domains
+    variables_count = len(csp_instance.variables)
+    try:
+        if propagation_engine.has_propagators and propagation_engine.propagate(
+            state=dict(),
+            last_variable_index=None,
+            shrinking_operations=dict(),
+            domains_last_valid_index=backtrack_object.domains_last_valid_index,
+        ):
+            return False, dict()
+        if variables_count == 0:
+            return True, dict()
+        insertion_order = count()
+        open_nodes = [
+            (
+                0,
+                0,
+                next(insertion_order),
+                dict(),
+                valid_domains(
+                    domains=csp_instance.domains,
+                    domains_last_valid_index=backtrack_object.domains_last_valid_index,
+                ),
+            )
+        ]
+        while open_nodes:
+            _, _, _, state, domains = heapq.heappop(open_nodes)
+            csp_instance.domains = domains
+            backtrack_object.domains_last_valid_index = [
+                len(domain) - 1 for domain in domains
+            ]
+            new_variable_index = backtrack_object.next_variable_choosing_method(
+                csp_instance=csp_instance,
+                state=state,
+                domains_last_valid_index=backtrack_object.domains_last_valid_index,
+            )
+            new_variable_values_order = backtrack_object.next_values_ordering_method(
+                csp_instance=csp_instance,
+                last_variable_index=new_variable_index,
+                domain_last_valid_index=backtrack_object.domains_last_valid_index[
+                    new_variable_index
+                ],
+            )
+            for new_variable_possible_value in new_variable_values_order:
+                backtrack_object.nodes += 1
+                if backtrack_object.nodes >= backtrack_object._next_limits_check:
+                    backtrack_object._check_limits()
+                    if backtrack_object.stop_reason is not None:
+                        return False, dict()
+                new_state = state.copy()
+                new_state[new_variable_index] = new_variable_possible_value
+                csp_instance.domains = domains
+                if not backtrack_object._check_if_new_state_is_valid(
+                    csp_instance=csp_instance,
+                    state=new_state,
+                    last_variable_index=new_variable_index,
+                ):
+                    continue
+                if len(new_state) == variables_count:
+                    if backtrack_object.leaf_evaluation_method(new_state):
+                        return True, new_state
+                    continue
+
+                child_domains = [domain.copy() for domain in domains]
+                child_domains[new_variable_index] = [new_variable_possible_value]
+                child_last_valid_index = [len(domain) - 1 for domain in child_domains]
+                csp_instance.domains = child_domains
+                if propagation_engine.has_propagators and propagation_engine.propagate(
+                    state=new_state,
+                    last_variable_index=new_variable_index,
+                    shrinking_operations=dict(),
+                    domains_last_valid_index=child_last_valid_index,
+                ):
+                    continue
+                free_domains_size = sum(
+                    child_last_valid_index[index] + 1
+                    for index in range(variables_count)
+                    if index not in new_state
+                )
+                heapq.heappush(
+                    open_nodes,
+                    (
+                        free_domains_size,
+                        -len(new_state),
+                        next(insertion_order),
+                        new_state,
+                        valid_domains(
+                            domains=child_domains,
+                            domains_last_valid_index=child_last_valid_index,
+                        ),
+                    ),
+                )
+        return False, dict()
+    finally:
+        csp_instance.domains = original_domains
+        backtrack_object.domains_last_valid_index = [
+            len(domain) - 1 for domain in original_domains
+        ]
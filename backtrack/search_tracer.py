@@ -0,0 +1,198 @@
+# This file implements an opt-in tracer for the backtrack, used to analyse the search
+# tree offline instead of aggregating statistics by hand in the notebooks.
+import json
+import struct
+from pathlib import Path
+from typing import BinaryIO, Iterator, Union
+
+# Events that can be streamed by the tracer
+BRANCH_EVENT = "branch"
+PRUNE_EVENT = "prune"
+FAIL_EVENT = "fail"
+SOLUTION_EVENT = "solution"
+TRACE_EVENTS = [BRANCH_EVENT, PRUNE_EVENT, FAIL_EVENT, SOLUTION_EVENT]
+
+# Supported formats
+JSONL_FORMAT = "jsonl"
+BINARY_FORMAT = "binary"
+
+# A binary record is: event code, depth, variable index (-1 when there is none), domain size
+# of this variable and sum of the sizes of the domains of the variables not in the state yet.
+BINARY_RECORD = struct.Struct("<BIiIQ")
+# Default size of the write buffer, a trace of millions of nodes should not hit the disk at
+# every event.
+DEFAULT_BUFFER_SIZE = 1 << 20
+# Number of records read at once from a binary trace
+READ_CHUNK_RECORDS = 1 << 15
+
+
+class SearchTracer:
+    """
+    Streams the events of a backtrack to a file through a buffered writer. The events are:
+        - branch: a value is given to a variable, a new node is opened.
+        - prune: the consistency layers (AC3 / forward checking) emptied a domain.
+        - fail: the node violates a constraint or none of its children led to a solution.
+        - solution: a valid leaf was reached.
+    Each event stores the depth of the node (size of the state), the index of the variable involved
+    (-1 if there is none), the size of its domain and the total size of the domains of the variables
+    which are not instantiated yet.
+
+    The tracer is meant to be used as a context manager and given to a BacktrackClass:
+        with SearchTracer("run.trace", trace_format="binary") as tracer:
+            BacktrackClass(tracer=tracer).run_backtrack(csp_instance)
+    """
+
+    path: Path
+    trace_format: str
+    buffer_size: int
+    events_count: int
+    _file: BinaryIO = None
+
+    def __init__(
+        self,
+        path: Union[str, Path],
+        trace_format: str = JSONL_FORMAT,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+    ) -> None:
+        if trace_format not in (JSONL_FORMAT, BINARY_FORMAT):
+            raise ValueError(f"Unknown trace format {trace_format}")
+        self.path = Path(path)
+        self.trace_format = trace_format
+        self.buffer_size = buffer_size
+        self.events_count = 0
+        return
+
+    def open(self) -> None:
+        if self._file is None:
+            self._file = open(self.path, "wb", buffering=self.buffer_size)
+        return
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return
+
+    def flush(self) -> None:
+        if self._file is not None:
+            self._file.flush()
+        return
+
+    def __enter__(self) -> "SearchTracer":
+        self.open()
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+        return
+
+    def record(
+        self,
+        event: str,
+        depth: int,
+        variable_index: int = -1,
+        variable_domain_size: int = 0,
+        free_domains_size: int = 0,
+    ) -> None:
+        """
+        Writes a single event to the trace.
+        """
+        if self._file is None:
+            self.open()
+        if self.trace_format == BINARY_FORMAT:
+            self._file.write(
+                BINARY_RECORD.pack(
+                    TRACE_EVENTS.index(event),
+                    depth,
+                    variable_index,
+                    variable_domain_size,
+                    free_domains_size,
+                )
+            )
+        else:
+            self._file.write(
+                (
+                    json.dumps(
+                        [
+                            event,
+                            depth,
+                            variable_index,
+                            variable_domain_size,
+                            free_domains_size,
+                        ],
+                        separators=(",", ":"),
+                    )
+                    + "\n"
+                ).encode()
+            )
+        self.events_count += 1
+        return
+
+
+def read_search_trace(
+    path: Union[str, Path], trace_format: str = None
+) -> Iterator[dict]:
+    """
+    Reads back a trace written by a SearchTracer, one event at a time so that traces
+    of millions of nodes never have to fit in memory. If the format is not given it is
+    guessed from the file extension (".jsonl" for JSON lines, binary otherwise).
+    """
+    path = Path(path)
+    if trace_format is None:
+        trace_format = JSONL_FORMAT if path.suffix == ".jsonl" else BINARY_FORMAT
+
+    keys = ["event", "depth", "variable", "variable_domain_size", "free_domains_size"]
+    if trace_format == JSONL_FORMAT:
+        with open(path, "r") as trace_file:
+            for line in trace_file:
+                yield dict(zip(keys, json.loads(line)))
+    else:
+        chunk_size = READ_CHUNK_RECORDS * BINARY_RECORD.size
+        # Bytes of a record cut by the end of the previous chunk
+        remainder = b""
+        with open(path, "rb") as trace_file:
+            while chunk := trace_file.read(chunk_size):
+                chunk = remainder + chunk
+                records_end = len(chunk) - len(chunk) % BINARY_RECORD.size
+                for record in BINARY_RECORD.iter_unpack(
+                    memoryview(chunk)[:records_end]
+                ):
+                    yield dict(zip(keys, (TRACE_EVENTS[record[0]],) + record[1:]))
+                remainder = chunk[records_end:]
+        if remainder:
+            raise ValueError(f"The trace {path} ends with a truncated record")
+    return
+
+
+def build_trace_histograms(path: Union[str, Path], trace_format: str = None) -> dict:
+    """
+    Rebuilds the statistics of the search tree from a trace. It returns a dict with:
+        - events_count: the number of events of each kind.
+        - tree_size: the number of nodes of the search tree (branches plus the root).
+        - nodes_per_depth: for each depth, the number of nodes opened at this depth.
+        - failures_per_depth: for each depth, the number of fails and prunes at this depth.
+        - max_depth: deepest depth reached.
+    """
+    events_count = {event: 0 for event in TRACE_EVENTS}
+    nodes_per_depth = dict()
+    failures_per_depth = dict()
+    max_depth = 0
+
+    for event in read_search_trace(path=path, trace_format=trace_format):
+        event_name, depth = event["event"], event["depth"]
+        events_count[event_name] += 1
+        max_depth = max(max_depth, depth)
+        if event_name == BRANCH_EVENT:
+            # A branch at depth d opens a node at depth d + 1
+            nodes_per_depth[depth + 1] = nodes_per_depth.get(depth + 1, 0) + 1
+        elif event_name in (FAIL_EVENT, PRUNE_EVENT):
+            failures_per_depth[depth] = failures_per_depth.get(depth, 0) + 1
+
+    nodes_per_depth[0] = 1
+    return {
+        "events_count": events_count,
+        "tree_size": events_count[BRANCH_EVENT] + 1,
+        "nodes_per_depth": dict(sorted(nodes_per_depth.items())),
+        "failures_per_depth": dict(sorted(failures_per_depth.items())),
+        "max_depth": max_depth,
+    }
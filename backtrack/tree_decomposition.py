@@ -0,0 +1,477 @@
+# This file implements the search guided by a tree decomposition of the constraint graph, with the
+# recording of goods and nogoods on the separators (backtracking on tree decomposition). Once the
+# variables of a separator hold values, the subproblem below it doesn't depend on the other assigned
+# variables: its result is recorded for these values and reused when they come back, instead of being
+# searched again under each assignment of unrelated variables.
+from collections import OrderedDict
+from typing import Collection, Tuple
+
+from models import CSP
+
+from .variables_choosing_algorithms import naive_variable_choosing
+
+# Number of separator assignments recorded by default
+DEFAULT_GOODS_TABLE_SIZE = 100000
+
+# A subproblem without solution for an assignment of its separator
+NOGOOD = None
+_MISSING = object()
+# Value showing to the variables choosing method the variables outside of the cluster as assigned
+_OUTSIDE = object()
+
+
+def constraint_graph(csp_instance: CSP, fixed_variables: Collection = ()) -> list[set]:
+    """
+    The neighbours of each variable, the scope of a global constraint being a clique so that it is in a
+    bag of the decomposition. The fixed variables, constants for the search, have no neighbours.
+    """
+    neighbours = [
+        set(csp_instance.variable_is_constrained_by[variable_index])
+        for variable_index in range(len(csp_instance.variables))
+    ]
+    for global_constraint in csp_instance.global_constraints:
+        for variable_index in global_constraint.variables_indices:
+            neighbours[variable_index].update(global_constraint.variables_indices)
+            neighbours[variable_index].discard(variable_index)
+    for fixed_variable_index in fixed_variables:
+        for neighbour in neighbours[fixed_variable_index]:
+            neighbours[neighbour].discard(fixed_variable_index)
+        neighbours[fixed_variable_index] = set()
+    return neighbours
+
+
+def _fill_in(neighbours: list[set], variable_index: int) -> int:
+    """
+    Number of edges to add between the neighbours of the variable to eliminate it.
+    """
+    variable_neighbours = neighbours[variable_index]
+    degree = len(variable_neighbours)
+    linked_couples = sum(
+        len(neighbours[neighbour] & variable_neighbours)
+        for neighbour in variable_neighbours
+    )
+    return degree * (degree - 1) // 2 - linked_couples // 2
+
+
+def min_fill_elimination_order(
+    csp_instance: CSP, fixed_variables: Collection = ()
+) -> list[int]:
+    """
+    Eliminates at each step the variable whose neighbours need the fewest edges to become a clique,
+    the smallest degree breaking the ties. Only the fill-in of the variables around the eliminated one
+    can change, it is the only one computed again. The fixed variables are left out of the order.
+    """
+    neighbours = constraint_graph(
+        csp_instance=csp_instance, fixed_variables=fixed_variables
+    )
+    fill_ins = {
+        variable_index: _fill_in(neighbours=neighbours, variable_index=variable_index)
+        for variable_index in range(len(neighbours))
+        if variable_index not in fixed_variables
+    }
+    elimination_order = []
+    while fill_ins:
+        eliminated = min(
+            fill_ins,
+            key=lambda variable_index: (
+                fill_ins[variable_index],
+                len(neighbours[variable_index]),
+            ),
+        )
+        del fill_ins[eliminated]
+        elimination_order.append(eliminated)
+        eliminated_neighbours = neighbours[eliminated]
+        for neighbour in eliminated_neighbours:
+            neighbours[neighbour].discard(eliminated)
+            neighbours[neighbour].update(eliminated_neighbours)
+            neighbours[neighbour].discard(neighbour)
+        updated_variables = set(eliminated_neighbours)
+        for neighbour in eliminated_neighbours:
+            updated_variables.update(neighbours[neighbour])
+        for variable_index in updated_variables:
+            if variable_index in fill_ins:
+                fill_ins[variable_index] = _fill_in(
+                    neighbours=neighbours, variable_index=variable_index
+                )
+    return elimination_order
+
+
+class TreeDecomposition:
+    """
+    Tree decomposition built from an elimination order, with one node per variable but the fixed ones,
+    holding their only value during the whole search:
+        - separators[v] : the neighbours of v when it was eliminated, its bag being v and its separator.
+            They are the variables outside of the subtree of v constraining a variable of it.
+        - parents[v] : the first eliminated variable of the separator of v, None for a root.
+        - children[v] and roots, in the order of the search.
+        - order : the variables in the order of the search, each one after its separator (preorder of the
+            tree), and subtree_variables[v] the variables of the subtree of v in this order.
+        - width : the size of the largest bag minus one.
+        - recorded[v] : wether the results of the subtree of v are recorded. A leaf's are not, the forward
+            checking solves it. Neither are those of a variable whose separator is its parent's whole bag:
+            its parent's subtree is only searched again for other values of this bag.
+        - clusters[v] : for a root or a recorded variable, the variables searched together with it, in the
+            order of the search: itself and the variables below it reached without crossing a recorded
+            one. Their separators are assigned once v's is, so that they can be chosen in any order.
+            cluster_children[v] are the recorded variables right below its cluster, solved once it is.
+    """
+
+    separators: list[tuple]
+    parents: list
+    children: list[list[int]]
+    roots: list[int]
+    order: list[int]
+    subtree_variables: list[list[int]]
+    width: int
+    recorded: list[bool]
+    clusters: list[list[int]]
+    cluster_children: list[list[int]]
+
+    def __init__(
+        self,
+        csp_instance: CSP,
+        elimination_order: list[int] = None,
+        fixed_variables: Collection = (),
+    ) -> None:
+        if elimination_order is None:
+            elimination_order = min_fill_elimination_order(
+                csp_instance=csp_instance, fixed_variables=fixed_variables
+            )
+        neighbours = constraint_graph(
+            csp_instance=csp_instance, fixed_variables=fixed_variables
+        )
+        position = {
+            variable_index: rank
+            for rank, variable_index in enumerate(elimination_order)
+        }
+        variables_count = len(csp_instance.variables)
+        self.separators = [() for _ in range(variables_count)]
+        self.parents = [None for _ in range(variables_count)]
+        self.children = [[] for _ in range(variables_count)]
+        self.roots = []
+        for variable_index in elimination_order:
+            later_neighbours = neighbours[variable_index]
+            self.separators[variable_index] = tuple(
+                sorted(later_neighbours, key=position.__getitem__)
+            )
+            for neighbour in later_neighbours:
+                neighbours[neighbour].discard(variable_index)
+                neighbours[neighbour].update(later_neighbours)
+                neighbours[neighbour].discard(neighbour)
+        # The last eliminated variables are the top of the tree
+        for variable_index in reversed(elimination_order):
+            if self.separators[variable_index]:
+                parent = self.separators[variable_index][0]
+                self.parents[variable_index] = parent
+                self.children[parent].append(variable_index)
+            else:
+                self.roots.append(variable_index)
+        self.width = max((len(separator) for separator in self.separators), default=0)
+
+        self.order = []
+        self.subtree_variables = [[] for _ in range(variables_count)]
+        # Iterative preorder, the subtrees are filled from the leaves once the order is known
+        stack = list(reversed(self.roots))
+        while stack:
+            variable_index = stack.pop()
+            self.order.append(variable_index)
+            stack.extend(reversed(self.children[variable_index]))
+        self.recorded = [
+            len(self.children[variable_index]) > 0
+            and self.parents[variable_index] is not None
+            and len(self.separators[variable_index])
+            <= len(self.separators[self.parents[variable_index]])
+            for variable_index in range(variables_count)
+        ]
+        for variable_index in reversed(self.order):
+            subtree = [variable_index]
+            for child in self.children[variable_index]:
+                subtree.extend(self.subtree_variables[child])
+            self.subtree_variables[variable_index] = subtree
+
+        self.clusters = [[] for _ in range(variables_count)]
+        self.cluster_children = [[] for _ in range(variables_count)]
+        cluster_of = [None for _ in range(variables_count)]
+        # In preorder, the cluster of a parent is known before its children's
+        for variable_index in self.order:
+            parent = self.parents[variable_index]
+            if parent is None or self.recorded[variable_index]:
+                cluster_of[variable_index] = variable_index
+                if parent is not None:
+                    self.cluster_children[cluster_of[parent]].append(variable_index)
+            else:
+                cluster_of[variable_index] = cluster_of[parent]
+            self.clusters[cluster_of[variable_index]].append(variable_index)
+        return
+
+
+class GoodsTable:
+    """
+    Bounded memo of the subproblems already solved: (variable, values of its separator) -> the values of
+    its subtree's variables in a solution (a good), or NOGOOD. The least recently used records are evicted
+    past max_entries.
+    """
+
+    max_entries: int
+    records: OrderedDict
+    hits: int
+    misses: int
+
+    def __init__(self, max_entries: int = DEFAULT_GOODS_TABLE_SIZE) -> None:
+        self.max_entries = max_entries
+        self.records = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        return
+
+    def get(self, key: tuple):
+        record = self.records.get(key, _MISSING)
+        if record is _MISSING:
+            self.misses += 1
+            return _MISSING
+        self.hits += 1
+        self.records.move_to_end(key)
+        return record
+
+    def put(self, key: tuple, record) -> None:
+        self.records[key] = record
+        if len(self.records) > self.max_entries:
+            self.records.popitem(last=False)
+        return
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+
+def _choose_cluster_variable(
+    backtrack_object, csp_instance: CSP, left_variables: list[int], state: dict
+) -> int:
+    """
+    Chooses the next variable among the left ones of the cluster with the variables choosing method of
+    the backtrack object, the variables outside of them being shown to it as assigned. The naive method,
+    or a choice outside of them, takes the next one in the order of the decomposition.
+    """
+    choosing_method = backtrack_object.next_variable_choosing_method
+    if choosing_method is naive_variable_choosing or len(left_variables) == 1:
+        return left_variables[0]
+    scoped_state = dict.fromkeys(range(len(csp_instance.variables)), _OUTSIDE)
+    for variable_index in left_variables:
+        del scoped_state[variable_index]
+    variable_index = choosing_method(
+        csp_instance=csp_instance,
+        state=scoped_state,
+        domains_last_valid_index=backtrack_object.domains_last_valid_index,
+    )
+    return variable_index if variable_index in left_variables else left_variables[0]
+
+
+def _solve_cluster_children(
+    backtrack_object,
+    csp_instance: CSP,
+    decomposition: TreeDecomposition,
+    goods_table: GoodsTable,
+    cluster: int,
+    state: dict,
+) -> Tuple[bool, dict]:
+    """
+    Solves the subtrees of the recorded variables right below the assigned cluster, each one independently
+    from its siblings, reusing and filling the goods table. It returns wether all have a solution and the
+    values of their variables.
+    """
+    children_state = dict()
+    for child in decomposition.cluster_children[cluster]:
+        key = (child, tuple(state[index] for index in decomposition.separators[child]))
+        record = goods_table.get(key=key)
+        if record is _MISSING:
+            found_solution, child_state = _search_cluster(
+                backtrack_object=backtrack_object,
+                csp_instance=csp_instance,
+                decomposition=decomposition,
+                goods_table=goods_table,
+                cluster=child,
+                left_variables=decomposition.clusters[child],
+                state=state,
+            )
+            if backtrack_object.stop_reason is not None:
+                return False, dict()
+            goods_table.put(
+                key=key,
+                record=(
+                    tuple(
+                        child_state[index]
+                        for index in decomposition.subtree_variables[child]
+                    )
+                    if found_solution
+                    else NOGOOD
+                ),
+            )
+        elif record is NOGOOD:
+            found_solution = False
+        else:
+            found_solution = True
+            child_state = dict(zip(decomposition.subtree_variables[child], record))
+        if not found_solution:
+            return False, dict()
+        children_state.update(child_state)
+    return True, children_state
+
+
+def _search_cluster(
+    backtrack_object,
+    csp_instance: CSP,
+    decomposition: TreeDecomposition,
+    goods_table: GoodsTable,
+    cluster: int,
+    left_variables: list[int],
+    state: dict,
+) -> Tuple[bool, dict]:
+    """
+    Searches the subtree of the cluster, its separator and the variables of the cluster outside of
+    left_variables holding values in state. The left variables are assigned in the order of the variables
+    choosing method, then the clusters below are solved. It returns wether it found a solution and the
+    values of the left variables and of the clusters below, leaving state and the domains as they were.
+    """
+    if not left_variables:
+        return _solve_cluster_children(
+            backtrack_object=backtrack_object,
+            csp_instance=csp_instance,
+            decomposition=decomposition,
+            goods_table=goods_table,
+            cluster=cluster,
+            state=state,
+        )
+    domains_last_valid_index = backtrack_object.domains_last_valid_index
+    variable_index = _choose_cluster_variable(
+        backtrack_object=backtrack_object,
+        csp_instance=csp_instance,
+        left_variables=left_variables,
+        state=state,
+    )
+    other_left_variables = [
+        left_variable
+        for left_variable in left_variables
+        if left_variable != variable_index
+    ]
+    values_order = backtrack_object.next_values_ordering_method(
+        csp_instance=csp_instance,
+        last_variable_index=variable_index,
+        domain_last_valid_index=domains_last_valid_index[variable_index],
+    )
+    for value in values_order:
+        backtrack_object.nodes += 1
+        if backtrack_object.nodes >= backtrack_object._next_limits_check:
+            backtrack_object._check_limits()
+            if backtrack_object.stop_reason is not None:
+                return False, dict()
+        state[variable_index] = value
+
+        # The propagation keeps the values left consistent with the assigned variables, only the global
+        # constraints whose scope is now complete are left to check
+        if not all(
+            global_constraint.is_satisfied(state)
+            for global_constraint in csp_instance.variable_global_constraints.get(
+                variable_index, ()
+            )
+            if all(index in state for index in global_constraint.variables_indices)
+        ):
+            del state[variable_index]
+            continue
+        # Like in the backtrack, the propagation engine reads the value of the assigned variable first in
+        # its domain
+        domain = csp_instance.domains[variable_index]
+        domain_first_value = domain[0]
+        domain_last_valid_index = domains_last_valid_index[variable_index]
+        domain[0] = value
+        domains_last_valid_index[variable_index] = 0
+        shrinking_operations = dict()
+        found_solution = False
+        if not backtrack_object.propagation_engine.propagate(
+            state=state,
+            last_variable_index=variable_index,
+            shrinking_operations=shrinking_operations,
+            domains_last_valid_index=domains_last_valid_index,
+            run_arc_consistency=False,
+        ):
+            found_solution, below_state = _search_cluster(
+                backtrack_object=backtrack_object,
+                csp_instance=csp_instance,
+                decomposition=decomposition,
+                goods_table=goods_table,
+                cluster=cluster,
+                left_variables=other_left_variables,
+                state=state,
+            )
+
+        for shrunk_variable_index, removed_values in shrinking_operations.items():
+            domains_last_valid_index[shrunk_variable_index] += removed_values
+        domain[0] = domain_first_value
+        domains_last_valid_index[variable_index] = domain_last_valid_index
+        del state[variable_index]
+        if found_solution:
+            below_state[variable_index] = value
+            return True, below_state
+        if backtrack_object.stop_reason is not None:
+            return False, dict()
+    return False, dict()
+
+
+def tree_decomposition_search(backtrack_object, csp_instance: CSP) -> Tuple[bool, dict]:
+    """
+    Search of BacktrackClass with use_tree_decomposition: once the variables with a single value are
+    fixed, the clusters of a min-fill tree decomposition of the others are searched from the roots with
+    the forward checking and the global constraints of the propagation engine, the variables of a cluster
+    in the order of the variables choosing method, and the results of the subtrees below them are recorded
+    in a GoodsTable of goods_table_size entries. The arc consistency and the tracer aren't used. It returns
+    wether a solution was found and the state by variable index.
+    """
+    backtrack_object.tree_decomposition = None
+    backtrack_object.goods_table = GoodsTable(
+        max_entries=backtrack_object.goods_table_size
+    )
+    domains_last_valid_index = backtrack_object.domains_last_valid_index
+    if any(last_valid_index < 0 for last_valid_index in domains_last_valid_index):
+        return False, dict()
+    # Like the smallest domain choice would, the variables with a single value left after the propagation
+    # at the root are assigned first: constants for the search, they are left out of the decomposition
+    shrinking_operations = dict()
+    found_solution = not backtrack_object.propagation_engine.propagate(
+        state=dict(),
+        last_variable_index=None,
+        shrinking_operations=shrinking_operations,
+        domains_last_valid_index=domains_last_valid_index,
+        run_arc_consistency=False,
+    )
+    fixed_state = {
+        variable_index: csp_instance.domains[variable_index][0]
+        for variable_index, last_valid_index in enumerate(domains_last_valid_index)
+        if last_valid_index == 0
+    }
+    found_solution = found_solution and all(
+        global_constraint.is_satisfied(fixed_state)
+        for global_constraint in csp_instance.global_constraints
+        if all(index in fixed_state for index in global_constraint.variables_indices)
+    )
+
+    indexes_state = dict(fixed_state)
+    if found_solution:
+        decomposition = TreeDecomposition(
+            csp_instance=csp_instance, fixed_variables=fixed_state
+        )
+        backtrack_object.tree_decomposition = decomposition
+        for root in decomposition.roots:
+            found_solution, root_state = _search_cluster(
+                backtrack_object=backtrack_object,
+                csp_instance=csp_instance,
+                decomposition=decomposition,
+                goods_table=backtrack_object.goods_table,
+                cluster=root,
+                left_variables=decomposition.clusters[root],
+                state=dict(fixed_state),
+            )
+            if not found_solution:
+                break
+            indexes_state.update(root_state)
+
+    for shrunk_variable_index, removed_values in shrinking_operations.items():
+        domains_last_valid_index[shrunk_variable_index] += removed_values
+    return (True, indexes_state) if found_solution else (False, dict())
@@ -1,5 +1,7 @@
 # This file contains several heuristics to choose in which order to choose
 # the next values for the next variable to be instantiated.
+from typing import Callable
+
 from models import CSP
 from constants import Domain
 
@@ -12,3 +14,25 @@ def naive_values_ordering(
     We just return the domain.
     """
     return csp_instance.domains[last_variable_index][: domain_last_valid_index + 1]
+
+
+def phase_saving_values_ordering(saved_values: dict) -> Callable:
+    """
+    Builds a values ordering which tries first the value saved for the variable (the value it had
+    in a previous solution or local search assignment, keys being variables indices) and then the
+    rest of the domain.
+    """
+
+    def values_ordering(
+        csp_instance: CSP, last_variable_index: int, domain_last_valid_index: int
+    ) -> Domain:
+        domain = csp_instance.domains[last_variable_index][
+            : domain_last_valid_index + 1
+        ]
+        saved_value = saved_values.get(last_variable_index, None)
+        if saved_value is None or saved_value not in domain:
+            return domain
+        domain.remove(saved_value)
+        return [saved_value] + domain
+
+    return values_ordering
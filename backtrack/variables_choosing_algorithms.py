@@ -1,7 +1,7 @@
 # This file contains several heuristics to choose the next variable to choose
 # when resolving a CSP
-import numpy as np
 import math
+from typing import Callable
 
 from models import CSP
 from constants import Variable
@@ -21,14 +21,14 @@ def smallest_domain_variable_choosing(
     csp_instance: CSP, state: dict, domains_last_valid_index: list
 ) -> Variable:
     """
-    Here, we choose the variable with the smallest domain to take next.
-    return np.argmin(domains_sizes)
+    Here, we choose the variable with the smallest domain to take next, the first one on ties
+    like np.argmin did.
     """
     domains_sizes = [
         domains_last_valid_index[i] if state.get(i, None) is None else math.inf
         for i in range(len(csp_instance.variables))
     ]
-    return np.argmin(domains_sizes)
+    return min(range(len(domains_sizes)), key=domains_sizes.__getitem__)
 
 
 def random_variable_choosing(
@@ -36,7 +36,10 @@ def random_variable_choosing(
 ) -> Variable:
     """
     Here, we choose the variable randomly in the ones currently choosable.
+    The global generator of NumPy is kept, the benchmarks seed it.
     """
+    import numpy as np
+
     left_variables = [
         i for i in range(len(csp_instance.variables)) if state.get(i, None) is None
     ]
@@ -45,3 +48,17 @@ def random_variable_choosing(
         if len(left_variables) == 1
         else left_variables[np.random.randint(0, len(left_variables))]
     )
+
+
+def ordered_variable_choosing(order: list[int]) -> Callable:
+    """
+    Builds a variable choosing method taking the variables in the given order, for instance the order
+    of a TreeDecomposition. The state is then always the beginning of the order.
+    """
+
+    def variable_choosing(
+        csp_instance: CSP, state: dict, domains_last_valid_index: list
+    ) -> Variable:
+        return order[len(state)]
+
+    return variable_choosing
@@ -0,0 +1,9 @@
+from .benchmark_configurations import SOLVER_CONFIGURATIONS
+from .benchmark_runner import (
+    IMPROVEMENT_CHANGE,
+    REGRESSION_CHANGE,
+    run_benchmark_suites,
+    compare_with_baseline,
+    write_benchmark_results,
+    load_benchmark_results,
+)
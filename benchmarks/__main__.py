@@ -0,0 +1,87 @@
+# Command line entry point of the benchmarks, run from the root of the repository:
+#   python -m benchmarks --suites queens sudoku --output results.json --baseline baseline.json
+import argparse
+import sys
+
+from .benchmark_configurations import SOLVER_CONFIGURATIONS
+from .benchmark_runner import (
+    BENCHMARK_SUITES,
+    RANDOM_BENCHMARK_SUITES,
+    REGRESSION_CHANGE,
+    compare_with_baseline,
+    load_benchmark_results,
+    run_benchmark_suites,
+    write_benchmark_results,
+)
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Sweeps solver configurations over the bundled instances.",
+    )
+    parser.add_argument(
+        "--suites",
+        nargs="+",
+        choices=BENCHMARK_SUITES + RANDOM_BENCHMARK_SUITES,
+        default=None,
+        help="the random suites model_rb and leighton are only run when given",
+    )
+    parser.add_argument(
+        "--configurations",
+        nargs="+",
+        choices=list(SOLVER_CONFIGURATIONS.keys()),
+        default=None,
+    )
+    parser.add_argument(
+        "--queens-sizes", nargs="+", type=int, default=None, help="n values to test"
+    )
+    parser.add_argument(
+        "--instances", nargs="+", default=None, help="only run these instance names"
+    )
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--time-limit", type=int, default=30, help="seconds per run, -1 for none"
+    )
+    parser.add_argument("--no-memory", action="store_true", help="skip memory peaks")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument(
+        "--baseline", default=None, help="results file to flag regressions against"
+    )
+    parser.add_argument("--time-tolerance", type=float, default=0.2)
+    parser.add_argument("--quiet", action="store_true")
+    parsed_arguments = parser.parse_args(arguments)
+
+    results = run_benchmark_suites(
+        suites=parsed_arguments.suites,
+        configurations=parsed_arguments.configurations,
+        queens_sizes=parsed_arguments.queens_sizes,
+        instances_filter=parsed_arguments.instances,
+        repeats=parsed_arguments.repeats,
+        seed=parsed_arguments.seed,
+        time_limit=parsed_arguments.time_limit,
+        measure_memory=not parsed_arguments.no_memory,
+        verbose=not parsed_arguments.quiet,
+    )
+    write_benchmark_results(results=results, results_path=parsed_arguments.output)
+    print(f"Wrote {len(results)} results to {parsed_arguments.output}")
+
+    if parsed_arguments.baseline is None:
+        return 0
+
+    changes = compare_with_baseline(
+        results=results,
+        baseline=load_benchmark_results(parsed_arguments.baseline),
+        time_tolerance=parsed_arguments.time_tolerance,
+    )
+    for change in changes:
+        print(
+            f"{change['kind'].upper()} {change['suite']} {change['instance']} "
+            f"{change['configuration']}: {', '.join(change['reasons'])}"
+        )
+    return 1 if any(change["kind"] == REGRESSION_CHANGE for change in changes) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
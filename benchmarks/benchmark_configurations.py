@@ -0,0 +1,80 @@
+# This file stores the solver configurations swept by the benchmarks. Each configuration is
+# a set of keyword arguments given to the BacktrackClass, named like the CSVs we used to
+# write from the notebooks (queens_forward_arc_smallest, coloring_forward, ...).
+from backtrack.variables_choosing_algorithms import (
+    naive_variable_choosing,
+    smallest_domain_variable_choosing,
+    random_variable_choosing,
+)
+
+SOLVER_CONFIGURATIONS = {
+    "naive": dict(),
+    "forward": dict(use_forward_checking=True),
+    "arc": dict(use_arc_consistency=True),
+    "forward_smallest": dict(
+        use_forward_checking=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    ),
+    "forward_arc_smallest": dict(
+        use_forward_checking=True,
+        use_arc_consistency=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    ),
+    "forward_random": dict(
+        use_forward_checking=True,
+        next_variable_choosing_method=random_variable_choosing,
+    ),
+    "forward_naive_order": dict(
+        use_forward_checking=True,
+        next_variable_choosing_method=naive_variable_choosing,
+    ),
+    "adaptive_smallest": dict(
+        adaptive_propagation=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    ),
+    # Search following a tree decomposition with the goods and nogoods of its separators recorded
+    "forward_tree_decomposition": dict(
+        use_forward_checking=True, use_tree_decomposition=True
+    ),
+    "forward_smallest_tree_decomposition": dict(
+        use_forward_checking=True,
+        use_tree_decomposition=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    ),
+    # Closest settings to the CP Optimizer parameters files of opl/affectation, to compare both solvers
+    # on the frequency assignment: affectation_param_low_inf.ops, affectation_param_high_inf.ops,
+    # affectation_param_no_presolve.ops and affectation_param_search_type.ops (DepthFirst).
+    "opl_low_inference": dict(use_forward_checking=True, use_presolve=True),
+    "opl_high_inference": dict(
+        use_forward_checking=True,
+        use_arc_consistency=True,
+        use_presolve=True,
+        use_singleton_arc_consistency=True,
+    ),
+    "opl_no_presolve": dict(use_forward_checking=True, use_arc_consistency=True),
+    "opl_depth_first": dict(
+        use_forward_checking=True,
+        use_arc_consistency=True,
+        use_presolve=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    ),
+}
+
+# Configurations used when none is given on the command line, the naive ones do not
+# finish on most instances.
+DEFAULT_CONFIGURATIONS = ["forward", "forward_smallest", "forward_arc_smallest"]
+
+# Default sizes for the n-queens suite
+DEFAULT_QUEENS_SIZES = list(range(4, 31, 2))
+
+# Default board sizes for the knights domination suite, 8 (cavaliers.dat) takes far longer
+DEFAULT_KNIGHTS_SIZES = [3, 4, 5, 6]
+
+# Random instances of the scaling studies, each size drawn with the seeds 0 to RANDOM_SEEDS_COUNT - 1.
+# Model RB: numbers of variables, at the tightness of the phase transition of alpha and r.
+DEFAULT_MODEL_RB_SIZES = [15, 20, 25, 30, 35, 40]
+MODEL_RB_ALPHA = 0.8
+MODEL_RB_R = 0.8
+# Leighton-style graphs: (nodes, chromatic number, edges)
+DEFAULT_LEIGHTON_GRAPHS = [(30, 4, 120), (50, 4, 250), (70, 5, 450), (90, 5, 700)]
+RANDOM_SEEDS_COUNT = 3
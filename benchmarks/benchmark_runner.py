@@ -0,0 +1,480 @@
+# This file implements the reproducible benchmarks of the solver over the bundled instances.
+# Every run is seeded, repeated, and the medians are written to a single JSON file that can
+# be compared to a stored baseline to catch regressions.
+import json
+import random
+import statistics
+import tracemalloc
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Tuple, Union
+
+import numpy as np
+
+from backtrack import BacktrackClass, TIMEOUT_STATUS
+from instances import (
+    AFFECTATION_DATA_PATH,
+    COLORING_INSTANCES,
+    COLORING_INSTANCES_PATH,
+    KNIGHTS_DOMINATION,
+    KNIGHTS_DOMINATION_NUMBERS,
+    SUDOKU_ALL_INSTANCES,
+    SUDOKU_INSTANCES_PATH,
+    coloring_optimization,
+    coloring_problem,
+    frequency_assignment_optimization,
+    frequency_assignment_problem,
+    graph_coloring_problem,
+    knights_optimization,
+    knights_problem,
+    leighton_graph_edges,
+    model_rb_critical_tightness,
+    model_rb_parameters,
+    model_rb_problem,
+    n_queens_problem,
+    sudoku_problem,
+)
+
+from .benchmark_configurations import (
+    DEFAULT_CONFIGURATIONS,
+    DEFAULT_KNIGHTS_SIZES,
+    DEFAULT_LEIGHTON_GRAPHS,
+    DEFAULT_MODEL_RB_SIZES,
+    DEFAULT_QUEENS_SIZES,
+    MODEL_RB_ALPHA,
+    MODEL_RB_R,
+    RANDOM_SEEDS_COUNT,
+    SOLVER_CONFIGURATIONS,
+)
+
+QUEENS_SUITE = "queens"
+COLORING_SUITE = "coloring"
+SUDOKU_SUITE = "sudoku"
+FREQUENCY_SUITE = "frequency"
+KNIGHTS_SUITE = "knights"
+BENCHMARK_SUITES = [
+    QUEENS_SUITE,
+    COLORING_SUITE,
+    SUDOKU_SUITE,
+    FREQUENCY_SUITE,
+    KNIGHTS_SUITE,
+]
+# Random instances of growing sizes, for the scaling curves. They aren't run by default.
+MODEL_RB_SUITE = "model_rb"
+LEIGHTON_SUITE = "leighton"
+RANDOM_BENCHMARK_SUITES = [MODEL_RB_SUITE, LEIGHTON_SUITE]
+
+# Kinds of the changes found by compare_with_baseline
+REGRESSION_CHANGE = "regression"
+IMPROVEMENT_CHANGE = "improvement"
+
+
+def _seed_everything(seed: int) -> None:
+    """
+    The random heuristics use NumPy's global generator, seed it along with the standard one.
+    """
+    random.seed(seed)
+    np.random.seed(seed)
+    return
+
+
+def _solve_decision_instance(
+    build_instance: Callable, backtrack_object: BacktrackClass
+) -> dict:
+    csp_instance = build_instance()
+    found_solution, _ = backtrack_object.run_backtrack(csp_instance=csp_instance)
+    return {
+        "found": found_solution,
+        "nodes": backtrack_object.nodes,
+        "timed_out": backtrack_object.status == TIMEOUT_STATUS,
+    }
+
+
+def _solve_coloring_instance(
+    instance_name: str, backtrack_object: BacktrackClass, time_limit: int
+) -> dict:
+    csp_coloring, max_degree = coloring_problem(
+        graph_path=COLORING_INSTANCES_PATH / instance_name
+    )
+    colors_needed, _, nodes, finished = coloring_optimization(
+        coloring_instance=csp_coloring,
+        max_degree=max_degree,
+        backtrack_object=backtrack_object,
+        time_limit=time_limit,
+    )
+    return {
+        "found": colors_needed == COLORING_INSTANCES[instance_name],
+        "nodes": nodes,
+        "colors": colors_needed,
+        "optimum": COLORING_INSTANCES[instance_name],
+        "finished": finished,
+        "timed_out": not finished,
+    }
+
+
+def _solve_frequency_instance(
+    backtrack_object: BacktrackClass, time_limit: int, binary_distances: bool
+) -> dict:
+    csp_frequencies, number_of_frequencies = frequency_assignment_problem(
+        data_path=AFFECTATION_DATA_PATH, binary_distances=binary_distances
+    )
+    max_frequency, _, nodes, finished = frequency_assignment_optimization(
+        frequency_instance=csp_frequencies,
+        max_frequency=number_of_frequencies,
+        backtrack_object=backtrack_object,
+        time_limit=time_limit,
+    )
+    return {
+        "found": max_frequency is not None,
+        "nodes": nodes,
+        "max_frequency": max_frequency,
+        "finished": finished,
+        "timed_out": not finished,
+    }
+
+
+def _solve_knights_instance(
+    dimension: int, backtrack_object: BacktrackClass, time_limit: int
+) -> dict:
+    knights_count, _, nodes, finished = knights_optimization(
+        knights_instance=knights_problem(
+            dimension=dimension, mode=KNIGHTS_DOMINATION, symmetry_breaking=True
+        ),
+        mode=KNIGHTS_DOMINATION,
+        backtrack_object=backtrack_object,
+        time_limit=time_limit,
+    )
+    return {
+        "found": knights_count == KNIGHTS_DOMINATION_NUMBERS[dimension],
+        "nodes": nodes,
+        "knights": knights_count,
+        "optimum": KNIGHTS_DOMINATION_NUMBERS[dimension],
+        "finished": finished,
+        "timed_out": not finished,
+    }
+
+
+def _model_rb_instance(n: int, seed: int):
+    """
+    Model RB instance of n variables at the phase transition of MODEL_RB_ALPHA and MODEL_RB_R.
+    """
+    d, constraints_count = model_rb_parameters(n=n, alpha=MODEL_RB_ALPHA, r=MODEL_RB_R)
+    return model_rb_problem(
+        n=n,
+        d=d,
+        density=constraints_count / (n * (n - 1) / 2),
+        tightness=model_rb_critical_tightness(alpha=MODEL_RB_ALPHA, r=MODEL_RB_R),
+        seed=seed,
+    )
+
+
+def _solve_leighton_instance(
+    n: int,
+    chromatic_number: int,
+    edges_count: int,
+    seed: int,
+    backtrack_object: BacktrackClass,
+    time_limit: int,
+) -> dict:
+    csp_coloring, max_degree = graph_coloring_problem(
+        n=n,
+        edges=leighton_graph_edges(
+            n=n, chromatic_number=chromatic_number, edges_count=edges_count, seed=seed
+        ),
+    )
+    colors_needed, _, nodes, finished = coloring_optimization(
+        coloring_instance=csp_coloring,
+        max_degree=max_degree,
+        backtrack_object=backtrack_object,
+        time_limit=time_limit,
+    )
+    return {
+        "found": colors_needed == chromatic_number,
+        "nodes": nodes,
+        "colors": colors_needed,
+        "optimum": chromatic_number,
+        "finished": finished,
+        "timed_out": not finished,
+    }
+
+
+def _instances_of_suite(
+    suite: str, queens_sizes: list, time_limit: int
+) -> list[Tuple[str, Callable]]:
+    """
+    Returns for a suite the list of (instance name, solving function). The solving function
+    takes a BacktrackClass and returns the result dict of the run.
+    """
+    if suite == QUEENS_SUITE:
+        return [
+            (
+                str(n),
+                lambda backtrack_object, n=n: _solve_decision_instance(
+                    build_instance=lambda: n_queens_problem(n),
+                    backtrack_object=backtrack_object,
+                ),
+            )
+            for n in queens_sizes
+        ]
+    elif suite == SUDOKU_SUITE:
+        return [
+            (
+                instance_name,
+                lambda backtrack_object, instance_name=instance_name: _solve_decision_instance(
+                    build_instance=lambda: sudoku_problem(
+                        instance_path=SUDOKU_INSTANCES_PATH / instance_name
+                    ),
+                    backtrack_object=backtrack_object,
+                ),
+            )
+            for instance_name in SUDOKU_ALL_INSTANCES
+        ]
+    elif suite == COLORING_SUITE:
+        return [
+            (
+                instance_name,
+                lambda backtrack_object, instance_name=instance_name: _solve_coloring_instance(
+                    instance_name=instance_name,
+                    backtrack_object=backtrack_object,
+                    time_limit=time_limit,
+                ),
+            )
+            for instance_name in COLORING_INSTANCES
+        ]
+    elif suite == FREQUENCY_SUITE:
+        # The distances as bounds revised global constraints and as binary constraints
+        return [
+            (
+                f"affectation{suffix}",
+                lambda backtrack_object, binary_distances=binary_distances: _solve_frequency_instance(
+                    backtrack_object=backtrack_object,
+                    time_limit=time_limit,
+                    binary_distances=binary_distances,
+                ),
+            )
+            for suffix, binary_distances in (("", False), ("_binary", True))
+        ]
+    elif suite == KNIGHTS_SUITE:
+        # The optima are those of the OPL models of opl/Cavaliers
+        return [
+            (
+                f"knights_{dimension}",
+                lambda backtrack_object, dimension=dimension: _solve_knights_instance(
+                    dimension=dimension,
+                    backtrack_object=backtrack_object,
+                    time_limit=time_limit,
+                ),
+            )
+            for dimension in DEFAULT_KNIGHTS_SIZES
+        ]
+    elif suite == MODEL_RB_SUITE:
+        return [
+            (
+                f"rb_{n}_seed_{seed}",
+                lambda backtrack_object, n=n, seed=seed: _solve_decision_instance(
+                    build_instance=lambda: _model_rb_instance(n=n, seed=seed),
+                    backtrack_object=backtrack_object,
+                ),
+            )
+            for n in DEFAULT_MODEL_RB_SIZES
+            for seed in range(RANDOM_SEEDS_COUNT)
+        ]
+    elif suite == LEIGHTON_SUITE:
+        return [
+            (
+                f"le_{n}_{chromatic_number}_{edges_count}_seed_{seed}",
+                lambda backtrack_object, n=n, chromatic_number=chromatic_number, edges_count=edges_count, seed=seed: _solve_leighton_instance(
+                    n=n,
+                    chromatic_number=chromatic_number,
+                    edges_count=edges_count,
+                    seed=seed,
+                    backtrack_object=backtrack_object,
+                    time_limit=time_limit,
+                ),
+            )
+            for n, chromatic_number, edges_count in DEFAULT_LEIGHTON_GRAPHS
+            for seed in range(RANDOM_SEEDS_COUNT)
+        ]
+    else:
+        raise ValueError(f"Unknown benchmark suite {suite}")
+
+
+def _run_single_benchmark(
+    solve: Callable,
+    configuration_name: str,
+    repeats: int,
+    seed: int,
+    time_limit: int,
+    measure_memory: bool,
+) -> dict:
+    """
+    Runs one (instance, configuration) couple `repeats` times and keeps the medians.
+    The memory peak is measured in an extra run since tracemalloc slows the solver down
+    and would spoil the timings.
+    """
+    times = []
+    nodes = []
+    result = None
+    for repeat in range(repeats):
+        _seed_everything(seed + repeat)
+        backtrack_object = BacktrackClass(
+            time_limit=time_limit, **SOLVER_CONFIGURATIONS[configuration_name]
+        )
+        start = perf_counter()
+        result = solve(backtrack_object)
+        times.append(perf_counter() - start)
+        nodes.append(result["nodes"] if result["nodes"] is not None else 0)
+
+    record = dict(result)
+    record.update(
+        {
+            "configuration": configuration_name,
+            "repeats": repeats,
+            "seed": seed,
+            "time_limit": time_limit,
+            "times": times,
+            "time_median": statistics.median(times),
+            "nodes": int(statistics.median(nodes)),
+            "peak_memory": None,
+        }
+    )
+
+    if measure_memory:
+        _seed_everything(seed)
+        backtrack_object = BacktrackClass(
+            time_limit=time_limit, **SOLVER_CONFIGURATIONS[configuration_name]
+        )
+        tracemalloc.start()
+        solve(backtrack_object)
+        _, peak_memory = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        record["peak_memory"] = peak_memory
+
+    return record
+
+
+def run_benchmark_suites(
+    suites: list = None,
+    configurations: list = None,
+    queens_sizes: list = None,
+    instances_filter: list = None,
+    repeats: int = 3,
+    seed: int = 0,
+    time_limit: int = 30,
+    measure_memory: bool = True,
+    verbose: bool = False,
+) -> list[dict]:
+    """
+    Sweeps the given configurations over the instances of the given suites and returns one
+    record per (suite, instance, configuration) with the median time and nodes and the memory peak.
+    """
+    suites = BENCHMARK_SUITES if suites is None else suites
+    configurations = (
+        DEFAULT_CONFIGURATIONS if configurations is None else configurations
+    )
+    queens_sizes = DEFAULT_QUEENS_SIZES if queens_sizes is None else queens_sizes
+
+    results = []
+    for suite in suites:
+        for instance_name, solve in _instances_of_suite(
+            suite=suite, queens_sizes=queens_sizes, time_limit=time_limit
+        ):
+            if instances_filter is not None and instance_name not in instances_filter:
+                continue
+            for configuration_name in configurations:
+                record = _run_single_benchmark(
+                    solve=solve,
+                    configuration_name=configuration_name,
+                    repeats=repeats,
+                    seed=seed,
+                    time_limit=time_limit,
+                    measure_memory=measure_memory,
+                )
+                record.update({"suite": suite, "instance": instance_name})
+                results.append(record)
+                if verbose:
+                    print(
+                        f"{suite:9} {instance_name:20} {configuration_name:22} "
+                        f"time {record['time_median']:.3f}s nodes {record['nodes']}"
+                    )
+    return results
+
+
+def write_benchmark_results(
+    results: list[dict], results_path: Union[str, Path]
+) -> None:
+    with open(results_path, "w") as results_file:
+        json.dump(results, results_file, indent=1)
+    return
+
+
+def load_benchmark_results(results_path: Union[str, Path]) -> list[dict]:
+    with open(results_path, "r") as results_file:
+        return json.load(results_file)
+
+
+def compare_with_baseline(
+    results: list[dict],
+    baseline: list[dict],
+    time_tolerance: float = 0.2,
+    nodes_tolerance: float = 0.0,
+) -> list[dict]:
+    """
+    Compares results with a baseline run and returns the changes, each one a dict with the kind of the
+    change (REGRESSION_CHANGE or IMPROVEMENT_CHANGE) and its reasons:
+        - a regression is a record which stopped finding the solution the baseline found, which now hits
+            the time limit, or whose median time or nodes grew above the tolerance (a ratio).
+        - an improvement is a record which hit the time limit in the baseline and doesn't anymore.
+    The times and nodes of a run stopped by the time limit only measure the limit, they are compared only
+    when neither run timed out.
+    """
+    baseline_records = {
+        (record["suite"], record["instance"], record["configuration"]): record
+        for record in baseline
+    }
+    changes = []
+    for record in results:
+        key = (record["suite"], record["instance"], record["configuration"])
+        if (baseline_record := baseline_records.get(key, None)) is None:
+            continue
+
+        regression_reasons = []
+        improvement_reasons = []
+        if baseline_record["found"] and not record["found"]:
+            regression_reasons.append("lost solution")
+        # The baselines written before timed_out was recorded
+        timed_out = record.get("timed_out", False)
+        baseline_timed_out = baseline_record.get("timed_out", False)
+        if timed_out and not baseline_timed_out:
+            regression_reasons.append("now times out")
+        elif baseline_timed_out and not timed_out:
+            improvement_reasons.append(
+                f"no longer times out ({record['time_median']:.3f}s)"
+            )
+        elif not timed_out:
+            if record["time_median"] > baseline_record["time_median"] * (
+                1 + time_tolerance
+            ):
+                regression_reasons.append(
+                    f"time {baseline_record['time_median']:.3f}s -> {record['time_median']:.3f}s"
+                )
+            if record["nodes"] > baseline_record["nodes"] * (1 + nodes_tolerance):
+                regression_reasons.append(
+                    f"nodes {baseline_record['nodes']} -> {record['nodes']}"
+                )
+
+        for kind, reasons in (
+            (REGRESSION_CHANGE, regression_reasons),
+            (IMPROVEMENT_CHANGE, improvement_reasons),
+        ):
+            if reasons:
+                changes.append(
+                    {
+                        "suite": record["suite"],
+                        "instance": record["instance"],
+                        "configuration": record["configuration"],
+                        "kind": kind,
+                        "reasons": reasons,
+                    }
+                )
+    return changes
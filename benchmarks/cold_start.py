@@ -0,0 +1,95 @@
+# This file implements the measure of the cold start of the command line solver: each instance is solved
+# by a new `python -m solver` process, whose wall time is split between the interpreter startup (an empty
+# python run), the imports, the build of the model and the search. Run from the root of the repository:
+#   python -m benchmarks.cold_start --repeats 10
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from time import perf_counter
+
+REPOSITORY_PATH = Path(__file__).resolve().parent.parent
+
+# Small jobs, for which the startup used to cost more than the search
+DEFAULT_COLD_START_JOBS = [
+    ["sudoku", "easy1.txt"],
+    ["sudoku", "expert1.txt"],
+    ["queens", "8"],
+    ["queens", "30"],
+    ["coloring", "myciel3.col.txt"],
+]
+
+
+def _wall_time(command: list) -> float:
+    start = perf_counter()
+    subprocess.run(command, cwd=REPOSITORY_PATH, check=False, stdout=subprocess.PIPE)
+    return perf_counter() - start
+
+
+def measure_cold_start(jobs: list = None, repeats: int = 5) -> list[dict]:
+    """
+    Runs each job `repeats` times in a new process and returns one record per job with the medians of the
+    wall time and of the times reported by the solver. The interpreter time is that of `python -c pass`.
+    """
+    jobs = DEFAULT_COLD_START_JOBS if jobs is None else jobs
+    interpreter_time = statistics.median(
+        _wall_time(command=[sys.executable, "-c", "pass"]) for _ in range(repeats)
+    )
+    records = []
+    for job in jobs:
+        wall_times = []
+        reports = []
+        for _ in range(repeats):
+            start = perf_counter()
+            completed = subprocess.run(
+                [sys.executable, "-m", "solver", *job, "--json"],
+                cwd=REPOSITORY_PATH,
+                check=False,
+                stdout=subprocess.PIPE,
+                text=True,
+            )
+            wall_times.append(perf_counter() - start)
+            reports.append(json.loads(completed.stdout))
+        records.append(
+            {
+                "job": " ".join(job),
+                "wall_time": statistics.median(wall_times),
+                "interpreter_time": interpreter_time,
+                **{
+                    measure: statistics.median(report[measure] for report in reports)
+                    for measure in ("import_time", "build_time", "solve_time")
+                },
+            }
+        )
+    return records
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.cold_start",
+        description="Measures the cold start of python -m solver on small jobs.",
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--output", default=None, help="JSON file to write")
+    parsed_arguments = parser.parse_args(arguments)
+
+    records = measure_cold_start(repeats=parsed_arguments.repeats)
+    for record in records:
+        print(
+            f"{record['job']:<26} wall {record['wall_time'] * 1000:7.1f} ms = "
+            f"interpreter {record['interpreter_time'] * 1000:5.1f} "
+            f"+ imports {record['import_time'] * 1000:6.1f} "
+            f"+ build {record['build_time'] * 1000:6.1f} "
+            f"+ solve {record['solve_time'] * 1000:7.1f} (+ rest)"
+        )
+    if parsed_arguments.output is not None:
+        with open(parsed_arguments.output, "w") as output_file:
+            json.dump(records, output_file, indent=2)
+        print(f"Wrote {len(records)} records to {parsed_arguments.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,217 @@
+# This file implements the memory footprint report of the models of the bundled instances, built
+# as CSP and, when their builder can, as CompactCSP. Run from the root of the repository:
+#   python -m benchmarks.memory_report --output memory_report.json
+import argparse
+import json
+import sys
+import tracemalloc
+from typing import Callable, Tuple
+
+from instances import (
+    AFFECTATION_DATA_PATH,
+    COLORING_INSTANCES,
+    COLORING_INSTANCES_PATH,
+    KNIGHTS_DOMINATION,
+    SUDOKU_ALL_INSTANCES,
+    SUDOKU_INSTANCES_PATH,
+    coloring_problem,
+    frequency_assignment_problem,
+    knights_problem,
+    n_queens_problem,
+    sudoku_problem,
+)
+from models import IntervalDomain
+
+from .benchmark_configurations import DEFAULT_KNIGHTS_SIZES
+
+DEFAULT_MEMORY_QUEENS_SIZES = [8, 30, 100]
+
+
+def _domains_bytes(domains: list) -> int:
+    """
+    Size of the domains containers, the values are small ints shared by all the models.
+    """
+    size = sys.getsizeof(domains)
+    for domain in domains:
+        if isinstance(domain, IntervalDomain):
+            size += sys.getsizeof(domain) + sys.getsizeof(domain.__dict__)
+            size += sum(sys.getsizeof(values) for values in vars(domain).values())
+        else:
+            size += sys.getsizeof(domain)
+    return size
+
+
+def measure_model_memory(build_instance: Callable) -> dict:
+    """
+    Builds an instance under tracemalloc and returns the memory it keeps (model_bytes), the memory of its
+    domains, the rest being the bookkeeping of the model (names, neighbours, constraints), and the peak
+    of the construction.
+    """
+    tracemalloc.start()
+    csp_instance = build_instance()
+    model_bytes, peak_bytes = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    domains_bytes = _domains_bytes(domains=csp_instance.domains)
+    return {
+        "variables": len(csp_instance.variables),
+        "model_bytes": model_bytes,
+        "domains_bytes": domains_bytes,
+        "bookkeeping_bytes": max(0, model_bytes - domains_bytes),
+        "peak_bytes": peak_bytes,
+    }
+
+
+def _reported_instances(
+    queens_sizes: list, knights_sizes: list
+) -> list[Tuple[str, str, Callable, Callable]]:
+    """
+    Returns for each bundled instance (suite, instance name, CSP builder, CompactCSP builder or None). The
+    queens, knights and magic square constraints are families which store nothing per pair.
+    """
+    instances = [
+        (
+            "sudoku",
+            instance_name,
+            lambda instance_name=instance_name: sudoku_problem(
+                instance_path=SUDOKU_INSTANCES_PATH / instance_name
+            ),
+            lambda instance_name=instance_name: sudoku_problem(
+                instance_path=SUDOKU_INSTANCES_PATH / instance_name, compact=True
+            ),
+        )
+        for instance_name in SUDOKU_ALL_INSTANCES
+    ]
+    instances.extend(
+        (
+            "coloring",
+            instance_name,
+            lambda instance_name=instance_name: coloring_problem(
+                graph_path=COLORING_INSTANCES_PATH / instance_name
+            )[0],
+            lambda instance_name=instance_name: coloring_problem(
+                graph_path=COLORING_INSTANCES_PATH / instance_name, compact=True
+            )[0],
+        )
+        for instance_name in COLORING_INSTANCES
+    )
+    instances.extend(
+        (
+            "frequency",
+            f"affectation{suffix}",
+            lambda binary_distances=binary_distances: frequency_assignment_problem(
+                data_path=AFFECTATION_DATA_PATH, binary_distances=binary_distances
+            )[0],
+            lambda binary_distances=binary_distances: frequency_assignment_problem(
+                data_path=AFFECTATION_DATA_PATH,
+                binary_distances=binary_distances,
+                compact=True,
+            )[0],
+        )
+        for suffix, binary_distances in (("", False), ("_binary", True))
+    )
+    instances.extend(
+        ("queens", str(n), lambda n=n: n_queens_problem(n), None) for n in queens_sizes
+    )
+    instances.extend(
+        (
+            "knights",
+            f"knights_{dimension}",
+            lambda dimension=dimension: knights_problem(
+                dimension=dimension, mode=KNIGHTS_DOMINATION
+            ),
+            None,
+        )
+        for dimension in knights_sizes
+    )
+    return instances
+
+
+def memory_report(
+    suites: list = None,
+    queens_sizes: list = None,
+    knights_sizes: list = None,
+    verbose: bool = True,
+) -> list[dict]:
+    """
+    Measures the models of the bundled instances, one record per instance with the CSP measures and the
+    CompactCSP ones (None when the builder has no compact version).
+    """
+    records = []
+    for (
+        suite,
+        instance_name,
+        build_instance,
+        build_compact_instance,
+    ) in _reported_instances(
+        queens_sizes=queens_sizes or DEFAULT_MEMORY_QUEENS_SIZES,
+        knights_sizes=knights_sizes or DEFAULT_KNIGHTS_SIZES,
+    ):
+        if suites is not None and suite not in suites:
+            continue
+        record = {
+            "suite": suite,
+            "instance": instance_name,
+            "csp": measure_model_memory(build_instance=build_instance),
+            "compact_csp": (
+                None
+                if build_compact_instance is None
+                else measure_model_memory(build_instance=build_compact_instance)
+            ),
+        }
+        records.append(record)
+        if verbose:
+            print(_format_record(record=record))
+    return records
+
+
+def _format_record(record: dict) -> str:
+    csp_measures = record["csp"]
+    line = (
+        f"{record['suite']:<10} {record['instance']:<22} "
+        f"{csp_measures['variables']:>6} variables  "
+        f"CSP {csp_measures['bookkeeping_bytes'] / 1024:>9.1f} KiB bookkeeping "
+        f"/ {csp_measures['domains_bytes'] / 1024:>8.1f} KiB domains"
+    )
+    if (compact_measures := record["compact_csp"]) is not None:
+        ratio = csp_measures["bookkeeping_bytes"] / max(
+            1, compact_measures["bookkeeping_bytes"]
+        )
+        line += (
+            f"  CompactCSP {compact_measures['bookkeeping_bytes'] / 1024:>8.1f} KiB "
+            f"bookkeeping (x{ratio:.1f} smaller)"
+        )
+    return line
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.memory_report",
+        description="Measures the memory kept by the models of the bundled instances.",
+    )
+    parser.add_argument(
+        "--suites",
+        nargs="+",
+        choices=["sudoku", "coloring", "frequency", "queens", "knights"],
+        default=None,
+    )
+    parser.add_argument("--queens-sizes", nargs="+", type=int, default=None)
+    parser.add_argument("--knights-sizes", nargs="+", type=int, default=None)
+    parser.add_argument("--output", default=None, help="JSON file to write")
+    parser.add_argument("--quiet", action="store_true")
+    parsed_arguments = parser.parse_args(arguments)
+
+    records = memory_report(
+        suites=parsed_arguments.suites,
+        queens_sizes=parsed_arguments.queens_sizes,
+        knights_sizes=parsed_arguments.knights_sizes,
+        verbose=not parsed_arguments.quiet,
+    )
+    if parsed_arguments.output is not None:
+        with open(parsed_arguments.output, "w") as output_file:
+            json.dump(records, output_file, indent=2)
+        print(f"Wrote {len(records)} records to {parsed_arguments.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1 +1,2 @@
-from .custom_types_definitions import *
\ No newline at end of file
+from .custom_types_definitions import *
+from .propagation_events import *
@@ -14,5 +14,10 @@ Domains = list[Domain]
 # A constraint is now a Callable that takes for values, the indices of the two variables to test on and the two
 # associated values.
 Constraint = Callable[[int, int, VariableValue, VariableValue], bool]
+# A unary constraint only takes the value of its variable, it is applied to the domain once.
+UnaryConstraint = Callable[[VariableValue], bool]
 # Constraints are stored in a dict whose keys are the tuple of the indices i and j of the variable it constricts
 Constraints = dict[Tuple[int, int], Constraint]
+# The optional vectorized form of a constraint takes the indices of the two variables and NumPy arrays of values
+# broadcast against each other, and returns the boolean mask of the valid couples.
+VectorizedConstraint = Callable[[int, int, object, object], object]
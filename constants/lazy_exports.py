@@ -0,0 +1,28 @@
+# This file implements the lazy exports of the packages (PEP 562): a name of the package is only imported
+# from its module when it is first used, so that importing a package doesn't import the modules, and
+# NumPy or multiprocessing behind them, that the job at hand doesn't need.
+from importlib import import_module
+from typing import Callable, Tuple
+
+
+def lazy_exports(
+    package_globals: dict, exports: dict[str, str]
+) -> Tuple[Callable, Callable]:
+    """
+    Returns the __getattr__ and __dir__ of a package, given its globals() and its lazy exports as
+    name -> module of the package. The names are stored in the package once imported, __getattr__ is
+    only called the first time.
+    """
+    package_name = package_globals["__name__"]
+
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {package_name!r} has no attribute {name!r}")
+        value = getattr(import_module(f".{exports[name]}", package_name), name)
+        package_globals[name] = value
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(package_globals) | set(exports))
+
+    return __getattr__, __dir__
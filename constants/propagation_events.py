@@ -0,0 +1,18 @@
+# Events of the propagation engine and priorities of its propagators. A global constraint subscribes
+# to events with its `events` attribute and tells how costly it is with its `priority` one.
+
+# The domain of a variable has a single value left
+FIXED_EVENT = "fixed"
+# The min or the max of the domain of a variable changed
+BOUNDS_EVENT = "bounds"
+# Any value was removed from the domain of a variable
+DOMAIN_EVENT = "domain"
+PROPAGATION_EVENTS = [FIXED_EVENT, BOUNDS_EVENT, DOMAIN_EVENT]
+
+# The lowest priority runs first: forward checking only goes through the neighbours of a fixed
+# variable, the bounds propagators are O(arity), an arc consistency revision is quadratic in the
+# size of the domains and the other global constraints may be even more costly.
+FORWARD_CHECKING_PRIORITY = 0
+BOUNDS_PRIORITY = 1
+ARC_CONSISTENCY_PRIORITY = 2
+GLOBAL_PRIORITY = 3
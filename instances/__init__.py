@@ -1,6 +1,48 @@
+# The builders are imported on first use (see constants.lazy_exports): solving a sudoku doesn't import
+# the coloring, its solvers and the local search.
+from constants.lazy_exports import lazy_exports
+
 from .coloring_instances import COLORING_INSTANCES_PATH, COLORING_INSTANCES
 from .sudoku_instances import *
-from .coloring import coloring_problem, coloring_optimization
-from .instances_utils import read_single_problem_from_path_as_adjacency
-from .n_queens import n_queens_problem
-from .sudoku import display_grid, sudoku_problem
+
+__getattr__, __dir__ = lazy_exports(
+    package_globals=globals(),
+    exports={
+        "coloring_problem": "coloring",
+        "coloring_optimization": "coloring",
+        "DEFAULT_CACHE_PATH": "instances_cache",
+        "InstanceCache": "instances_cache",
+        "file_key": "instances_cache",
+        "graph_key": "instances_cache",
+        "solver_configuration_key": "instances_cache",
+        "read_single_problem_from_path_as_adjacency": "instances_utils",
+        "n_queens_exact_cover_problem": "n_queens",
+        "n_queens_problem": "n_queens",
+        "display_grid": "sudoku",
+        "sudoku_domains": "sudoku",
+        "sudoku_exact_cover_problem": "sudoku",
+        "sudoku_grid_problem": "sudoku",
+        "sudoku_problem": "sudoku",
+        "hybrid_coloring_optimization": "hybrid_coloring",
+        "parallel_coloring_optimization": "parallel_coloring",
+        "magic_square_problem": "magic_square",
+        "AFFECTATION_DATA_PATH": "frequency_assignment",
+        "frequency_assignment_optimization": "frequency_assignment",
+        "frequency_assignment_problem": "frequency_assignment",
+        "read_frequency_assignment_data": "frequency_assignment",
+        "CAVALIERS_DATA_PATH": "knights",
+        "KNIGHTS_DOMINATION": "knights",
+        "KNIGHTS_DOMINATION_NUMBERS": "knights",
+        "KNIGHTS_INDEPENDENCE": "knights",
+        "knights_optimization": "knights",
+        "knights_problem": "knights",
+        "read_knights_dimension": "knights",
+        "geometric_graph_edges": "random_instances",
+        "gnp_graph_edges": "random_instances",
+        "graph_coloring_problem": "random_instances",
+        "leighton_graph_edges": "random_instances",
+        "model_rb_critical_tightness": "random_instances",
+        "model_rb_parameters": "random_instances",
+        "model_rb_problem": "random_instances",
+    },
+)
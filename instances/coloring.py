@@ -1,20 +1,50 @@
-from typing import Tuple
+from typing import Callable, Tuple
 from time import time
 
 from pathlib import Path
 
 from models import CSP
 from backtrack import BacktrackClass
+from backtrack.parallel_components import fork_is_available, map_in_forked_processes
+from backtrack.presolve import build_sub_csp, connected_components
+from backtrack.search_limits import TIMEOUT_STATUS
 from wrappers import alldiff
 
+from .instances_cache import (
+    InstanceCache,
+    file_key,
+    graph_key,
+    solver_configuration_key,
+)
+
 lambda_wrapper_for_a_couple_of_variables = None
 
 
-def coloring_problem(graph_path: Path) -> Tuple[CSP, int]:
+def _coloring_variable_name(index: int) -> str:
+    # Not a lambda so that the compact models can be cached
+    return str(index + 1)
+
+
+def coloring_problem(
+    graph_path: Path, compact: bool = False, cache: InstanceCache = None
+) -> Tuple[CSP, int]:
     """
     Used to build a CSP to be resolved as an optimization problem to color a graph.
     It also returns the max degree of the graph.
+    With compact, the CSP is a CompactCSP whose variables are named when read.
+    With a cache, a graph file already built is loaded from it instead of being parsed again.
     """
+    if cache is not None:
+        key = file_key(graph_path, "coloring_problem", compact)
+        if (cached_problem := cache.get(key)) is not None:
+            return cached_problem
+        cached_problem = _build_coloring_problem(graph_path=graph_path, compact=compact)
+        cache.put(key, cached_problem)
+        return cached_problem
+    return _build_coloring_problem(graph_path=graph_path, compact=compact)
+
+
+def _build_coloring_problem(graph_path: Path, compact: bool) -> Tuple[CSP, int]:
     with open(graph_path, "r") as instance_file:
         while (line := instance_file.readline()).startswith("c"):
             pass
@@ -22,12 +52,21 @@ def coloring_problem(graph_path: Path) -> Tuple[CSP, int]:
         splitted_line = line.split(" ")
         number_of_nodes, number_of_edges = int(splitted_line[2]), int(splitted_line[3])
         degrees = [0 for _ in range(number_of_nodes)]
-        # We could build smarter domains but won't
-        variables = [str(i) for i in range(1, number_of_nodes + 1)]
         # Domains are left empty and will be computed in the optimization function
-        domains = [[] for _ in range(len(variables))]
+        domains = [[] for _ in range(number_of_nodes)]
+        if compact:
+            # The CompactCSP and NumPy are only imported for the compact models
+            from models import CompactCSP
 
-        csp_coloring = CSP(variables=variables, domains=domains, constraints={})
+            csp_coloring = CompactCSP(
+                variables_count=number_of_nodes,
+                domains=domains,
+                variable_name=_coloring_variable_name,
+            )
+        else:
+            # We could build smarter domains but won't
+            variables = [str(i) for i in range(1, number_of_nodes + 1)]
+            csp_coloring = CSP(variables=variables, domains=domains, constraints={})
 
         # At this point we have built a naive coloring CSP with no constraint.
         # So we now add constraint one by one when we discover the edges.
@@ -61,13 +100,83 @@ def coloring_optimization(
     max_degree: int,
     backtrack_object: BacktrackClass,
     time_limit: int = -1,
+    decompose_components: bool = False,
+    processes: int = 1,
+    progress_callback: Callable[[dict], None] = None,
+    cache: InstanceCache = None,
 ) -> Tuple[int, bool, int, bool]:
     """
     This function takes a coloring problem instance and returns an upper bound
     (if not the minimum) number of colors needed to color this graph, the best state and
     the number of nodes in the best state. The best colors found might be just a bound if we put
     a max execution time. Thus a boolean helps to know wether we ran out of time or not.
+    With decompose_components, each connected component of the graph is optimized on its own
+    (in `processes` parallel processes if more than 1) and the number of colors is the max over them.
+    Otherwise with `processes` more than 1, that many probes of the dichotomy run at once and share their
+    bounds (see parallel_coloring).
+    progress_callback is called after each probe of the dichotomy with a dict: the colors tested, wether a
+    coloring was found, the best number of colors so far and the nodes of the probe, plus the state when
+    it improved the best coloring. It isn't called when the components are optimized separately.
+    With a cache, the proven results are stored for the graph and the configuration of backtrack_object,
+    and such a result is returned without any search (nor progress_callback call).
     """
+    if cache is not None:
+        key = _coloring_result_key(
+            coloring_instance=coloring_instance,
+            backtrack_object=backtrack_object,
+            decompose_components=decompose_components,
+        )
+        if (cached_result := cache.get(key)) is not None:
+            best_coloring_size, best_values, best_nodes = cached_result
+            best_state = (
+                None
+                if best_values is None
+                else dict(zip(coloring_instance.variables, best_values))
+            )
+            return best_coloring_size, best_state, best_nodes, True
+        result = coloring_optimization(
+            coloring_instance=coloring_instance,
+            max_degree=max_degree,
+            backtrack_object=backtrack_object,
+            time_limit=time_limit,
+            decompose_components=decompose_components,
+            processes=processes,
+            progress_callback=progress_callback,
+        )
+        best_coloring_size, best_state, best_nodes, finished = result
+        # A bound found before the time limit proves nothing
+        if finished:
+            best_values = (
+                None
+                if best_state is None
+                else [best_state[variable] for variable in coloring_instance.variables]
+            )
+            cache.put(key, (best_coloring_size, best_values, best_nodes))
+        return result
+
+    if decompose_components:
+        components_variables = connected_components(csp_instance=coloring_instance)
+        if len(components_variables) > 1:
+            return _coloring_optimization_by_components(
+                coloring_instance=coloring_instance,
+                components_variables=components_variables,
+                backtrack_object=backtrack_object,
+                time_limit=time_limit,
+                processes=processes,
+            )
+
+    if processes > 1 and fork_is_available():
+        from .parallel_coloring import parallel_coloring_optimization
+
+        return parallel_coloring_optimization(
+            coloring_instance=coloring_instance,
+            max_degree=max_degree,
+            backtrack_object=backtrack_object,
+            time_limit=time_limit,
+            processes=processes,
+            progress_callback=progress_callback,
+        )
+
     # For now it is very naive, we test the colorings between 2 colors and max_degree + 1 colors
     # by dichotomy to know the optimal value.
     # Result variables
@@ -82,6 +191,7 @@ def coloring_optimization(
     # Time variables
     run_time = 0
     start_time = time()
+    timed_out = False
 
     while smallest_size_to_test <= best_coloring_size - 1:
         # Set current time limit for backtrack
@@ -101,6 +211,11 @@ def coloring_optimization(
             coloring_instance.domains[i] = [j for j in range(size_to_test)]
         result, state = backtrack_object.run_backtrack(csp_instance=coloring_instance)
 
+        # A stopped probe proves nothing on size_to_test, keep the current bounds and stop
+        if backtrack_object.status == TIMEOUT_STATUS:
+            timed_out = True
+            break
+
         # If it didn't succeed, update smallest_size_to_test
         if not result:
             # Check if we still have sufficient gap
@@ -115,9 +230,135 @@ def coloring_optimization(
             best_state = state
             best_nodes = backtrack_object.nodes
 
+        if progress_callback is not None:
+            progress_callback(
+                {
+                    "colors_tested": size_to_test,
+                    "found": result,
+                    "best_colors": best_coloring_size,
+                    "nodes": backtrack_object.nodes,
+                    "state": state if result else None,
+                }
+            )
+
         # Update run time
         run_time = time() - start_time
 
-    finished = time_limit < 0 or run_time < time_limit
+    finished = not timed_out and (time_limit < 0 or run_time < time_limit)
+
+    return best_coloring_size, best_state, best_nodes, finished
+
+
+def _coloring_result_key(
+    coloring_instance: CSP, backtrack_object: BacktrackClass, decompose_components: bool
+) -> str:
+    """
+    The nodes and the coloring found depend on the configuration, the chromatic number doesn't.
+    """
+    return "_".join(
+        (
+            graph_key(
+                csp_instance=coloring_instance,
+                model_kind="coloring",
+                with_domains=False,
+            ),
+            solver_configuration_key(backtrack_object=backtrack_object),
+            str(int(decompose_components)),
+        )
+    )
+
+
+def _component_max_degree(component: CSP) -> int:
+    """
+    We count the neighbours rather than the edges, the files may hold an edge in both directions.
+    """
+    return max(
+        len(linked_variables)
+        for linked_variables in component.variable_is_constrained_by.values()
+    )
+
+
+def _optimize_component(
+    context: tuple, component_index: int
+) -> Tuple[int, dict, int, bool]:
+    """
+    Optimizes the coloring of a single component, used by the parallel workers too.
+    """
+    components, backtrack_object, time_limit = context
+    component = components[component_index]
+    # Single nodes don't need any search
+    if len(component.variables) == 1:
+        return 1, {component.variables[0]: 0}, 0, True
+    # The components aren't traced, the caller's tracer is given back once done
+    tracer = backtrack_object.tracer
+    backtrack_object.tracer = None
+    try:
+        return coloring_optimization(
+            coloring_instance=component,
+            max_degree=_component_max_degree(component=component),
+            backtrack_object=backtrack_object,
+            time_limit=time_limit,
+        )
+    finally:
+        backtrack_object.tracer = tracer
+
+
+def _coloring_optimization_by_components(
+    coloring_instance: CSP,
+    components_variables: list[list[int]],
+    backtrack_object: BacktrackClass,
+    time_limit: int,
+    processes: int,
+) -> Tuple[int, bool, int, bool]:
+    """
+    The chromatic number of a graph is the max of its components' ones, so each component is colored
+    independently and the colorings are merged.
+    """
+    components = [
+        build_sub_csp(csp_instance=coloring_instance, variables_indices=component)
+        for component in components_variables
+    ]
+    results = [None for _ in components]
+
+    if processes > 1 and fork_is_available():
+        for component_index, result in map_in_forked_processes(
+            function=_optimize_component,
+            context=(components, backtrack_object, time_limit),
+            tasks_count=len(components),
+            processes=processes,
+        ):
+            results[component_index] = result
+    else:
+        start_time = time()
+        for component_index in range(len(components)):
+            # Components share the remaining time
+            remaining_time = time_limit - (time() - start_time)
+            if time_limit > 0 and remaining_time <= 0:
+                # Out of time, only the degree bound is known for this component
+                results[component_index] = (
+                    _component_max_degree(component=components[component_index]) + 1,
+                    None,
+                    None,
+                    False,
+                )
+                continue
+            results[component_index] = _optimize_component(
+                context=(
+                    components,
+                    backtrack_object,
+                    remaining_time if time_limit > 0 else -1,
+                ),
+                component_index=component_index,
+            )
+
+    best_coloring_size = max(result[0] for result in results)
+    best_state = dict()
+    for _, component_state, _, _ in results:
+        if component_state is None:
+            best_state = None
+            break
+        best_state.update(component_state)
+    best_nodes = sum(result[2] for result in results if result[2] is not None)
+    finished = all(result[3] for result in results)
 
     return best_coloring_size, best_state, best_nodes, finished
@@ -0,0 +1,158 @@
+import re
+from typing import Tuple
+from time import time
+
+from pathlib import Path
+
+from models import CSP, CompactCSP
+from backtrack import BacktrackClass, SOLUTION_STATUS, NO_SOLUTION_STATUS
+from wrappers import DistanceConstraint, distance_at_least, parity
+
+# The data of the OPL models in opl/affectation
+AFFECTATION_DATA_PATH = (
+    Path(__file__).resolve().parent.parent / "opl" / "affectation" / "affectation.dat"
+)
+
+
+def _frequency_variable_name(index: int) -> str:
+    # Not a lambda so that the compact models can be cached
+    return f"f_{index + 1}"
+
+
+def read_frequency_assignment_data(
+    data_path: Path,
+) -> Tuple[int, int, list[Tuple[int, int, int]]]:
+    """
+    Reads an OPL .dat file of the affectation models and returns the number of frequencies, the number of
+    transmitters and the offsets (first transmitter, second transmitter, minimal distance), transmitters
+    being numbered from 1 like in OPL.
+    """
+    with open(data_path, "r", errors="replace") as data_file:
+        data = data_file.read()
+    # Remove the /* */ and // comments
+    data = re.sub(r"/\*.*?\*/", "", data, flags=re.DOTALL)
+    data = re.sub(r"//[^\n]*", "", data)
+
+    number_of_frequencies = int(re.search(r"nbFrequencies\s*=\s*(\d+)", data).group(1))
+    number_of_transmitters = int(
+        re.search(r"nbTransmitters\s*=\s*(\d+)", data).group(1)
+    )
+    offsets = [
+        (int(first_transmitter), int(second_transmitter), int(distance))
+        for first_transmitter, second_transmitter, distance in re.findall(
+            r"<\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*>", data
+        )
+    ]
+    return number_of_frequencies, number_of_transmitters, offsets
+
+
+def frequency_assignment_problem(
+    data_path: Path = AFFECTATION_DATA_PATH,
+    binary_distances: bool = False,
+    compact: bool = False,
+) -> Tuple[CSP, int]:
+    """
+    Used to build the CSP of the frequency assignment of opl/affectation/affectation.mod: each transmitter
+    t gets a frequency between 1 and nbFrequencies with the parity of t, and two transmitters of an offset
+    must have frequencies at least its value apart.
+    The distances are DistanceConstraint revised on the bounds, or with binary_distances the binary
+    constraints checked by the forward checking and AC3. It also returns the number of frequencies, the
+    upper bound of the optimization. With compact, the CSP is a CompactCSP whose variables are named
+    when read.
+    """
+    number_of_frequencies, number_of_transmitters, offsets = (
+        read_frequency_assignment_data(data_path=data_path)
+    )
+    domains = [
+        list(range(1, number_of_frequencies + 1)) for _ in range(number_of_transmitters)
+    ]
+    if compact:
+        csp_frequencies = CompactCSP(
+            variables_count=number_of_transmitters,
+            domains=domains,
+            variable_name=_frequency_variable_name,
+        )
+    else:
+        variables = [f"f_{t}" for t in range(1, number_of_transmitters + 1)]
+        csp_frequencies = CSP(variables=variables, domains=domains, constraints={})
+
+    for transmitter in range(1, number_of_transmitters + 1):
+        csp_frequencies.add_unary_constraint(
+            index_variable=transmitter - 1, unary_constraint=parity(offset=transmitter)
+        )
+    for first_transmitter, second_transmitter, distance in offsets:
+        if binary_distances:
+            csp_frequencies.add_constraint(
+                index_variable_1=first_transmitter - 1,
+                index_variable_2=second_transmitter - 1,
+                new_constraint=distance_at_least(distance=distance),
+            )
+        else:
+            csp_frequencies.add_global_constraint(
+                DistanceConstraint(
+                    index_variable_1=first_transmitter - 1,
+                    index_variable_2=second_transmitter - 1,
+                    distance=distance,
+                )
+            )
+
+    return csp_frequencies, number_of_frequencies
+
+
+def frequency_assignment_optimization(
+    frequency_instance: CSP,
+    max_frequency: int,
+    backtrack_object: BacktrackClass,
+    time_limit: int = -1,
+) -> Tuple[int, dict, int, bool]:
+    """
+    Minimizes the highest frequency used, like the loop of affectation_frequence.mod: once a solution is
+    found, the frequencies from its highest one are removed from the domains and we solve again, until
+    there is no solution left. It returns the smallest highest frequency found (None if there is no
+    solution at all), the best state, the number of nodes of the search and wether the optimum was proven.
+    """
+    original_domains = [list(domain) for domain in frequency_instance.domains]
+    best_max_frequency = None
+    best_state = None
+    nodes = 0
+    finished = False
+    start_time = time()
+
+    try:
+        while max_frequency > 0:
+            run_time = time() - start_time
+            if time_limit > 0 and run_time > time_limit:
+                break
+            backtrack_object.time_limit = (
+                time_limit - run_time if time_limit > 0 else -1
+            )
+
+            for i in range(len(original_domains)):
+                frequency_instance.domains[i] = [
+                    frequency
+                    for frequency in original_domains[i]
+                    if frequency <= max_frequency
+                ]
+            result, state = backtrack_object.run_backtrack(
+                csp_instance=frequency_instance
+            )
+            nodes += backtrack_object.nodes
+
+            if backtrack_object.status == SOLUTION_STATUS:
+                best_max_frequency = max(state.values())
+                best_state = state
+                max_frequency = best_max_frequency - 1
+            elif backtrack_object.status == NO_SOLUTION_STATUS:
+                finished = True
+                break
+            else:
+                break
+        else:
+            # No frequency left to test, the best one is 1
+            finished = True
+    finally:
+        # Give the instance its domains back
+        for i in range(len(original_domains)):
+            frequency_instance.domains[i] = original_domains[i]
+
+    return best_max_frequency, best_state, nodes, finished
@@ -0,0 +1,115 @@
+from typing import Tuple
+from time import time
+
+from models import CSP
+from backtrack import BacktrackClass, NO_SOLUTION_STATUS, SOLUTION_STATUS
+from backtrack.values_ordering_algorithms import phase_saving_values_ordering
+from local_search import tabu_coloring
+
+
+def _indices_state(coloring_instance: CSP, readable_state: dict) -> dict:
+    return {
+        coloring_instance.variables_to_index_dict[variable]: color
+        for variable, color in readable_state.items()
+    }
+
+
+def hybrid_coloring_optimization(
+    coloring_instance: CSP,
+    max_degree: int,
+    backtrack_object: BacktrackClass,
+    time_limit: int = -1,
+    local_search_time_limit: float = 5,
+    local_search_iterations: int = 100000,
+    local_search_stall_iterations: int = 20000,
+    seed: int = None,
+) -> Tuple[int, dict, int, bool]:
+    """
+    Same contract as coloring_optimization, but the upper bound is pushed down by the tabu search:
+        1. starting from max_degree + 1 colors, tabu_coloring looks for a coloring with one color less
+            (at most local_search_time_limit seconds, local_search_iterations iterations and
+            local_search_stall_iterations iterations without improvement per probe) until it fails or
+            reaches 2 colors.
+        2. the complete search then tries the number of colors just under the best coloring found. Its
+            values ordering tries first the color each node had in the best local search assignment
+            (phase saving). If it finds a coloring we go on one color lower, if it proves there is none the
+            best coloring is optimal.
+    The returned nodes are those of the backtrack runs.
+    """
+    start_time = time()
+    seed_offset = 0
+
+    def remaining_time() -> float:
+        return time_limit - (time() - start_time)
+
+    best_coloring_size = max_degree + 1
+    best_state = None
+    best_nodes = 0
+    # Best assignment, possibly with conflicts, found for the number of colors to try next
+    saved_phase = None
+
+    # 1. Local search pushes the upper bound down, to 2 colors at most: a single color is only enough
+    # without edges, the complete search proves it at once
+    while best_coloring_size > 2:
+        if time_limit > 0 and remaining_time() <= 0:
+            return best_coloring_size, best_state, best_nodes, False
+        probe_time_limit = (
+            local_search_time_limit
+            if time_limit <= 0
+            else min(local_search_time_limit, remaining_time())
+        )
+        found_coloring, state, _ = tabu_coloring(
+            csp_instance=coloring_instance,
+            colors_count=best_coloring_size - 1,
+            max_iterations=local_search_iterations,
+            time_limit=probe_time_limit,
+            seed=None if seed is None else seed + seed_offset,
+            initial_state=best_state,
+            max_stall_iterations=local_search_stall_iterations,
+        )
+        seed_offset += 1
+        saved_phase = state
+        if not found_coloring:
+            break
+        best_coloring_size -= 1
+        best_state = state
+
+    # 2. Complete search proves the lower bound, starting from the local search phase
+    original_values_ordering = backtrack_object.next_values_ordering_method
+    finished = False
+    try:
+        while best_coloring_size > 1:
+            if time_limit > 0 and remaining_time() <= 0:
+                break
+            backtrack_object.time_limit = remaining_time() if time_limit > 0 else -1
+            size_to_test = best_coloring_size - 1
+            for i in range(len(coloring_instance.domains)):
+                coloring_instance.domains[i] = [j for j in range(size_to_test)]
+            backtrack_object.next_values_ordering_method = phase_saving_values_ordering(
+                saved_values=(
+                    dict()
+                    if saved_phase is None
+                    else _indices_state(coloring_instance, saved_phase)
+                )
+            )
+            result, state = backtrack_object.run_backtrack(
+                csp_instance=coloring_instance
+            )
+            best_nodes += backtrack_object.nodes
+
+            if backtrack_object.status == SOLUTION_STATUS:
+                best_coloring_size = size_to_test
+                best_state = state
+                saved_phase = state
+            elif backtrack_object.status == NO_SOLUTION_STATUS:
+                finished = True
+                break
+            else:
+                break
+        else:
+            # A single color is enough, nothing to prove
+            finished = True
+    finally:
+        backtrack_object.next_values_ordering_method = original_values_ordering
+
+    return best_coloring_size, best_state, best_nodes, finished
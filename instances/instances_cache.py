@@ -0,0 +1,260 @@
+# This file implements the on-disk cache of the instances: the models built from the instance files and
+# the proven results of the optimizations, so that the same graphs and grids solved again by the
+# benchmark sweeps or the service jobs skip the parsing, the construction and the search. Each entry is
+# a pickle file of the cache directory, the least recently used ones being removed past max_bytes.
+# Only give it a directory you own: loading a pickle can run code.
+import hashlib
+import io
+import os
+import pickle
+import tempfile
+from array import array
+from pathlib import Path
+from typing import Tuple
+
+from backtrack import SEARCH_OPTIONS
+from wrappers import alldiff
+
+DEFAULT_CACHE_PATH = Path(
+    os.environ.get("PPC_CACHE_DIR", Path.home() / ".cache" / "projet_ppc")
+)
+DEFAULT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+
+CACHE_FILE_SUFFIX = ".pickle"
+
+# The constraints are lambdas, which pickle can't store. Those of the wrappers are stored by name and
+# are the same objects once loaded, so the models built with them can be cached.
+SHARED_CONSTRAINTS = {"alldiff": alldiff}
+_SHARED_CONSTRAINTS_NAMES = {
+    id(constraint): name for name, constraint in SHARED_CONSTRAINTS.items()
+}
+
+
+class _ModelPickler(pickle.Pickler):
+    def persistent_id(self, obj):
+        return _SHARED_CONSTRAINTS_NAMES.get(id(obj))
+
+
+class _ModelUnpickler(pickle.Unpickler):
+    def persistent_load(self, pid):
+        if pid not in SHARED_CONSTRAINTS:
+            raise pickle.UnpicklingError(f"Unknown shared constraint {pid}")
+        return SHARED_CONSTRAINTS[pid]
+
+
+def _hash_parts(*parts) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part if isinstance(part, bytes) else repr(part).encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def file_key(path: Path, *parts) -> str:
+    """
+    Key of a model built from a file: the hash of its content, so a moved or copied file is found again
+    and an edited one isn't, and of the parts of the build (builder, its options).
+    """
+    with open(path, "rb") as instance_file:
+        return _hash_parts(instance_file.read(), *parts)
+
+
+def _predicate_fingerprint(predicate):
+    """
+    What tells apart two constraints of the cache keys: the name of a shared constraint, the sorted tuples
+    of a constraint in extension, otherwise the name and the bytecode of the function along with the
+    values it captured, so distance_at_least(3) isn't distance_at_least(5).
+    """
+    if (name := _SHARED_CONSTRAINTS_NAMES.get(id(predicate))) is not None:
+        return name
+    if isinstance(predicate, (set, frozenset, list, tuple)):
+        return sorted(predicate, key=repr)
+    code = getattr(predicate, "__code__", None)
+    if code is None:
+        return _option_key(predicate)
+    captured_values = [
+        (
+            _predicate_fingerprint(cell.cell_contents)
+            if callable(cell.cell_contents)
+            else cell.cell_contents
+        )
+        for cell in predicate.__closure__ or ()
+    ]
+    return (
+        _option_key(predicate),
+        code.co_code,
+        code.co_names,
+        # The code objects of the nested functions are given by their captured values
+        [constant for constant in code.co_consts if not hasattr(constant, "co_code")],
+        captured_values,
+    )
+
+
+def _global_constraint_fingerprint(global_constraint):
+    # Its class, its variables and its plain options (the distance, the coefficients...)
+    return (
+        type(global_constraint).__qualname__,
+        list(global_constraint.variables_indices),
+        sorted(
+            (name, value)
+            for name, value in vars(global_constraint).items()
+            if not name.startswith("_") and isinstance(value, (int, float, str, tuple))
+        ),
+    )
+
+
+def graph_key(csp_instance, model_kind: str, with_domains: bool = True) -> str:
+    """
+    Canonical hash of the graph of a CSP, CSP or CompactCSP: its number of variables and its sorted edges,
+    whatever the order they were read in, their direction or their duplicates, along with model_kind (the
+    builder of the model, "coloring" for instance), the constraint of each edge and the global
+    constraints, so two models on the same graph don't share their entries. with_domains adds the
+    domains, which coloring_optimization leaves out as it sets them for each number of colors it tests.
+    """
+    neighbourhoods = csp_instance.variable_is_constrained_by
+    constraints = csp_instance.constraints
+    edges = array("q")
+    # Code of each constraint, in the order they are met, and their fingerprints
+    predicates_codes = dict()
+    predicates = []
+    for variable_index in range(len(csp_instance.variables)):
+        for neighbour in sorted(neighbourhoods.get(variable_index, ())):
+            if neighbour <= variable_index:
+                continue
+            predicate = constraints.get((variable_index, neighbour))
+            if (predicate_code := predicates_codes.get(id(predicate))) is None:
+                predicate_code = len(predicates)
+                predicates_codes[id(predicate)] = predicate_code
+                predicates.append(_predicate_fingerprint(predicate=predicate))
+            edges.append(neighbour)
+            edges.append(predicate_code)
+        # Ends the neighbours of each variable
+        edges.append(-1)
+    return _hash_parts(
+        model_kind,
+        len(csp_instance.variables),
+        edges.tobytes(),
+        predicates,
+        [
+            _global_constraint_fingerprint(global_constraint=global_constraint)
+            for global_constraint in csp_instance.global_constraints
+        ],
+        [list(domain) for domain in csp_instance.domains] if with_domains else None,
+    )
+
+
+def _option_key(value):
+    # The heuristics are functions, named by their module and name
+    if callable(value):
+        return f"{getattr(value, '__module__', '')}.{getattr(value, '__qualname__', repr(value))}"
+    return value
+
+
+def solver_configuration_key(backtrack_object) -> str:
+    """
+    Hash of the options of a BacktrackClass which change its search (SEARCH_OPTIONS): its heuristics, its
+    propagation and its search strategy. The limits aren't part of it, only the proven results are cached.
+    """
+    return _hash_parts(
+        *(
+            _option_key(getattr(backtrack_object, option, None))
+            for option in SEARCH_OPTIONS
+        )
+    )
+
+
+class InstanceCache:
+    """
+    On-disk cache mapping keys (see file_key, graph_key and solver_configuration_key) to picklable values,
+    models of the instances or results. Reading an entry marks it as recently used, and storing one
+    removes the least recently used entries until the cache holds at most max_bytes.
+    Several processes can share a directory: the entries are written to a temporary file then renamed,
+    and an entry which can't be read is a miss.
+    """
+
+    directory: Path
+    max_bytes: int
+
+    def __init__(
+        self,
+        directory: Path = DEFAULT_CACHE_PATH,
+        max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ) -> None:
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / f"{key}{CACHE_FILE_SUFFIX}"
+
+    def get(self, key: str, default=None):
+        entry_path = self._entry_path(key=key)
+        try:
+            with open(entry_path, "rb") as entry_file:
+                value = _ModelUnpickler(entry_file).load()
+        except FileNotFoundError:
+            return default
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Written by another version of the code, or truncated
+            entry_path.unlink(missing_ok=True)
+            return default
+        try:
+            os.utime(entry_path)
+        except FileNotFoundError:
+            pass
+        return value
+
+    def put(self, key: str, value) -> bool:
+        """
+        Stores the value and returns wether it could be pickled: a model with constraints which aren't
+        SHARED_CONSTRAINTS can't.
+        """
+        buffer = io.BytesIO()
+        try:
+            _ModelPickler(buffer, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+        except (pickle.PicklingError, AttributeError, TypeError):
+            return False
+        if buffer.tell() > self.max_bytes:
+            return False
+        file_descriptor, temporary_path = tempfile.mkstemp(
+            dir=self.directory, suffix=".tmp"
+        )
+        with os.fdopen(file_descriptor, "wb") as entry_file:
+            entry_file.write(buffer.getbuffer())
+        os.replace(temporary_path, self._entry_path(key=key))
+        self._evict()
+        return True
+
+    def __contains__(self, key: str) -> bool:
+        return self._entry_path(key=key).exists()
+
+    def _entries(self) -> list[Tuple[float, int, Path]]:
+        entries = []
+        for entry_path in self.directory.glob(f"*{CACHE_FILE_SUFFIX}"):
+            try:
+                entry_stat = entry_path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((entry_stat.st_mtime, entry_stat.st_size, entry_path))
+        return entries
+
+    def size_bytes(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total_size = sum(size for _, size, _ in entries)
+        # Least recently used first
+        entries.sort(key=lambda entry: entry[0])
+        for _, size, entry_path in entries:
+            if total_size <= self.max_bytes:
+                break
+            entry_path.unlink(missing_ok=True)
+            total_size -= size
+        return
+
+    def clear(self) -> None:
+        for _, _, entry_path in self._entries():
+            entry_path.unlink(missing_ok=True)
+        return
@@ -0,0 +1,221 @@
+import re
+from typing import Callable, Tuple
+from time import time
+
+from pathlib import Path
+
+from models import CSP, ConstraintFamily, with_vectorized_form
+from backtrack import BacktrackClass, SOLUTION_STATUS, NO_SOLUTION_STATUS
+from wrappers import LexLeaderConstraint, LinearConstraint
+
+# Every square covered with as few knights as possible, like the models of opl/Cavaliers
+KNIGHTS_DOMINATION = "domination"
+# As many knights as possible with no knight attacking another
+KNIGHTS_INDEPENDENCE = "independence"
+KNIGHTS_MODES = [KNIGHTS_DOMINATION, KNIGHTS_INDEPENDENCE]
+
+# The data of the OPL models in opl/Cavaliers
+CAVALIERS_DATA_PATH = (
+    Path(__file__).resolve().parent.parent / "opl" / "Cavaliers" / "cavaliers.dat"
+)
+
+# Known minimal numbers of knights covering a dimension x dimension board, the reference of
+# cavaliers_borne.mod being 12 for the 8x8 board
+KNIGHTS_DOMINATION_NUMBERS = {
+    1: 1,
+    2: 4,
+    3: 4,
+    4: 4,
+    5: 5,
+    6: 8,
+    7: 10,
+    8: 12,
+    9: 14,
+    10: 16,
+}
+
+
+def read_knights_dimension(data_path: Path = CAVALIERS_DATA_PATH) -> int:
+    """
+    Reads the dimension of the board in an OPL .dat file of the Cavaliers models.
+    """
+    with open(data_path, "r", errors="replace") as data_file:
+        data = re.sub(r"/\*.*?\*/", "", data_file.read(), flags=re.DOTALL)
+    return int(re.search(r"dimension\s*=\s*(\d+)", data).group(1))
+
+
+def knight_attacks(dimension: int) -> Callable[[int, int], bool]:
+    """
+    Returns the pair filter stating wether a knight on the square of index i attacks the one of index j,
+    squares being numbered row by row.
+    """
+
+    def attacks(i: int, j: int) -> bool:
+        row_gap = abs(i // dimension - j // dimension)
+        column_gap = abs(i % dimension - j % dimension)
+        return (row_gap == 1 and column_gap == 2) or (row_gap == 2 and column_gap == 1)
+
+    return attacks
+
+
+def board_symmetries(dimension: int) -> list[list[int]]:
+    """
+    The 7 rotations and reflections of the board other than the identity, each one as the list giving for
+    every square the index of its image.
+    """
+    last = dimension - 1
+    transformations = [
+        lambda row, column: (column, last - row),
+        lambda row, column: (last - row, last - column),
+        lambda row, column: (last - column, row),
+        lambda row, column: (row, last - column),
+        lambda row, column: (last - row, column),
+        lambda row, column: (column, row),
+        lambda row, column: (last - column, last - row),
+    ]
+    symmetries = []
+    for transformation in transformations:
+        symmetry = []
+        for square in range(dimension * dimension):
+            image_row, image_column = transformation(
+                square // dimension, square % dimension
+            )
+            symmetry.append(image_row * dimension + image_column)
+        symmetries.append(symmetry)
+    return symmetries
+
+
+def knights_problem(
+    dimension: int, mode: str = KNIGHTS_DOMINATION, symmetry_breaking: bool = True
+) -> CSP:
+    """
+    Used to build the CSP of the knights on a dimension x dimension board, a 0/1 variable per square.
+        - KNIGHTS_DOMINATION (opl/Cavaliers): each square holds a knight or is attacked by one, a linear
+            constraint sum >= 1 over the square and the squares a knight attacks from it.
+        - KNIGHTS_INDEPENDENCE: no two knights attack each other. The knight moves are a single constraint
+            family filtered by knight_attacks, no pair is stored.
+    With symmetry_breaking, a lex-leader constraint for each rotation and reflection keeps only the smallest
+    board of each class. The number of knights is optimized by knights_optimization.
+    """
+    assert dimension > 0 and type(dimension) == int
+    if mode not in KNIGHTS_MODES:
+        raise ValueError(f"Unknown knights mode {mode}")
+    variables = [
+        f"x_{i}_{j}" for i in range(1, dimension + 1) for j in range(1, dimension + 1)
+    ]
+    squares = range(dimension * dimension)
+    attacks = knight_attacks(dimension=dimension)
+    # The most promising value first: few knights to cover the board, many when they must not attack
+    if mode == KNIGHTS_DOMINATION:
+        domains = [[0, 1] for _ in squares]
+    else:
+        domains = [[1, 0] for _ in squares]
+    csp_knights = CSP(variables=variables, domains=domains, constraints={})
+
+    if mode == KNIGHTS_DOMINATION:
+        for square in squares:
+            covering_squares = [square] + [
+                other_square
+                for other_square in squares
+                if attacks(square, other_square)
+            ]
+            csp_knights.add_global_constraint(
+                LinearConstraint(
+                    variables_indices=covering_squares,
+                    coefficients=[1] * len(covering_squares),
+                    linear_operator=">=",
+                    constant=1,
+                )
+            )
+    else:
+        csp_knights.add_constraint_family(
+            ConstraintFamily(
+                predicate=with_vectorized_form(
+                    constraint=lambda i, j, value_var_i, value_var_j: not (
+                        value_var_i and value_var_j
+                    ),
+                    vectorized_constraint=lambda i, j, values_i, values_j: ~(
+                        (values_i != 0) & (values_j != 0)
+                    ),
+                    symmetric=True,
+                ),
+                scope=squares,
+                pair_filter=attacks,
+                symmetric=True,
+            )
+        )
+
+    if symmetry_breaking:
+        for symmetry in board_symmetries(dimension=dimension):
+            csp_knights.add_global_constraint(
+                LexLeaderConstraint(
+                    variables_indices=list(squares), permuted_indices=symmetry
+                )
+            )
+
+    return csp_knights
+
+
+def knights_optimization(
+    knights_instance: CSP,
+    mode: str,
+    backtrack_object: BacktrackClass,
+    time_limit: int = -1,
+) -> Tuple[int, dict, int, bool]:
+    """
+    Branch and bound on the number of knights: a linear constraint on the sum of the variables bounds it,
+    and each time a board is found the bound is tightened to require one knight less (domination) or one
+    more (independence). The bound is propagated at every node, cutting the branches which can't beat the
+    best board. It returns the best number of knights (None if no board was found), the best state, the
+    number of nodes and wether the optimum was proven.
+    """
+    number_of_squares = len(knights_instance.variables)
+    minimize = mode == KNIGHTS_DOMINATION
+    cardinality_constraint = LinearConstraint(
+        variables_indices=list(range(number_of_squares)),
+        coefficients=[1] * number_of_squares,
+        linear_operator="<=" if minimize else ">=",
+        constant=number_of_squares if minimize else 0,
+    )
+    knights_instance.add_global_constraint(global_constraint=cardinality_constraint)
+    # A successful search leaves the domains modified, each run starts from a copy
+    original_domains = [list(domain) for domain in knights_instance.domains]
+
+    best_knights_count = None
+    best_state = None
+    nodes = 0
+    finished = False
+    start_time = time()
+    try:
+        while True:
+            run_time = time() - start_time
+            if time_limit > 0 and run_time > time_limit:
+                break
+            backtrack_object.time_limit = (
+                time_limit - run_time if time_limit > 0 else -1
+            )
+
+            for i in range(number_of_squares):
+                knights_instance.domains[i] = list(original_domains[i])
+            _, state = backtrack_object.run_backtrack(csp_instance=knights_instance)
+            nodes += backtrack_object.nodes
+
+            if backtrack_object.status == SOLUTION_STATUS:
+                best_knights_count = sum(state.values())
+                best_state = state
+                cardinality_constraint.constant = (
+                    best_knights_count - 1 if minimize else best_knights_count + 1
+                )
+            elif backtrack_object.status == NO_SOLUTION_STATUS:
+                finished = True
+                break
+            else:
+                break
+    finally:
+        for i in range(number_of_squares):
+            knights_instance.domains[i] = original_domains[i]
+        knights_instance.remove_global_constraint(
+            global_constraint=cardinality_constraint
+        )
+
+    return best_knights_count, best_state, nodes, finished
@@ -0,0 +1,35 @@
+from models import CSP, ConstraintFamily
+from wrappers import alldiff, LinearConstraint
+
+
+def magic_square_problem(n: int) -> CSP:
+    """
+    This problem checks wether one can fill an nxn grid with the numbers from 1 to n^2 so that
+    every row, column and both diagonals sum to the magic constant n(n^2 + 1)/2.
+    The sums are linear global constraints, the values being all different is a family.
+    """
+    assert n > 0 and type(n) == int
+    variables = [f"x_{i}_{j}" for i in range(1, n + 1) for j in range(1, n + 1)]
+    domains = [list(range(1, n * n + 1)) for _ in range(len(variables))]
+    magic_constant = n * (n * n + 1) // 2
+
+    csp_magic_square = CSP(variables=variables, domains=domains, constraints={})
+    csp_magic_square.add_constraint_family(
+        ConstraintFamily(predicate=alldiff, scope=range(n * n), symmetric=True)
+    )
+
+    lines = [[i * n + j for j in range(n)] for i in range(n)]
+    lines += [[i * n + j for i in range(n)] for j in range(n)]
+    lines.append([i * n + i for i in range(n)])
+    lines.append([i * n + n - 1 - i for i in range(n)])
+    for line in lines:
+        csp_magic_square.add_global_constraint(
+            LinearConstraint(
+                variables_indices=line,
+                coefficients=[1] * n,
+                linear_operator="==",
+                constant=magic_constant,
+            )
+        )
+
+    return csp_magic_square
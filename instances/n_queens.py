@@ -1,15 +1,26 @@
-from models import CSP
+from models import (
+    CSP,
+    ConstraintFamily,
+    ExactCoverProblem,
+    IntervalDomain,
+    with_vectorized_form,
+)
 
-from wrappers import alldiff
 
-
-def n_queens_problem(n: int) -> CSP:
+def n_queens_problem(
+    n: int, interval_domains: bool = False, exact_cover: bool = False
+) -> CSP:
     """
     This problem checks wether one can place n queens
     on an nxn grid.
+    With interval_domains the domains are IntervalDomain instead of lists, which stores nothing for large n
+    but makes each value read slower for the forward checking.
+    With exact_cover, it is the ExactCoverProblem for the DancingLinksSolver instead of a CSP.
     """
     # This can only be defined on an int.
     assert n > 0 and type(n) == int
+    if exact_cover:
+        return n_queens_exact_cover_problem(n=n)
     # The i-th variable is the indice of the colonne in which
     # the queen on row i stands.
     # The way our CSP is coded, one will have to get the domain and constraints
@@ -17,39 +28,60 @@ def n_queens_problem(n: int) -> CSP:
     # from a queen to the next first, in order to check more quickly
     variables = [f"{str(i)}_col_queen" for i in range(1, n + 1)]
     # Each domain is [1, ..., n]
-    domains = [list(range(1, n + 1)) for _ in range(len(variables))]
+    if interval_domains:
+        domains = [IntervalDomain(low=1, high=n) for _ in range(len(variables))]
+    else:
+        domains = [list(range(1, n + 1)) for _ in range(len(variables))]
 
     csp_queen = CSP(variables=variables, domains=domains, constraints={})
 
-    # Constraint Var_i != Var_j
-    csp_queen.add_constraints_with_indices(
-        {
-            (i, j): alldiff
-            for i in range(len(variables))
-            for j in range(i + 1, len(variables))
-        }
-    )
-    # Constraint : for all i < j,  Var_i - Var_j != j - i
-    constraint_1 = (
-        lambda i, j, value_var_i, value_var_j: (value_var_i - value_var_j) != j - i
-    )
-    csp_queen.add_constraints_with_indices(
-        {
-            (i, j): constraint_1
-            for i in range(len(variables))
-            for j in range(i + 1, len(variables))
-        }
-    )
-    # Constraint : for all i < j,  Var_j - Var_i != j - i
-    constraint_2 = (
-        lambda i, j, value_var_i, value_var_j: (value_var_j - value_var_i) != j - i
-    )
-    csp_queen.add_constraints_with_indices(
-        {
-            (i, j): constraint_2
-            for i in range(len(variables))
-            for j in range(i + 1, len(variables))
-        }
+    # For all i < j : Var_i != Var_j (columns), Var_i - Var_j != j - i and Var_j - Var_i != j - i
+    # (diagonals). Every pair shares the same predicate, so it is declared once as a family
+    # instead of materializing 3 chained constraints per pair. Written with abs on both sides,
+    # it holds in both orders.
+    # The vectorized form checks whole domains at once in AC3 and the forward checking.
+    csp_queen.add_constraint_family(
+        ConstraintFamily(
+            predicate=with_vectorized_form(
+                constraint=lambda i, j, value_var_i, value_var_j: value_var_i
+                != value_var_j
+                and abs(value_var_i - value_var_j) != abs(j - i),
+                vectorized_constraint=lambda i, j, values_i, values_j: (
+                    values_i != values_j
+                )
+                & (abs(values_i - values_j) != abs(j - i)),
+                symmetric=True,
+            ),
+            scope=range(n),
+            symmetric=True,
+        )
     )
 
     return csp_queen
+
+
+def n_queens_exact_cover_problem(n: int) -> ExactCoverProblem:
+    """
+    The exact cover problem of the n-queens: a row per square, covering the columns of its row and of
+    its column, which hold exactly one queen, and of its two diagonals, secondary columns as they hold
+    at most one. The states of its solutions are those of the CSP.
+    """
+    diagonals_count = 2 * n - 1
+    exact_cover_queens = ExactCoverProblem(
+        variables=[f"{str(i)}_col_queen" for i in range(1, n + 1)],
+        primary_columns_count=2 * n,
+        secondary_columns_count=2 * diagonals_count,
+    )
+    for i in range(n):
+        for j in range(n):
+            exact_cover_queens.add_row(
+                variable_index=i,
+                value=j + 1,
+                columns=[
+                    i,
+                    n + j,
+                    2 * n + i + j,
+                    2 * n + diagonals_count + i - j + n - 1,
+                ],
+            )
+    return exact_cover_queens
@@ -0,0 +1,227 @@
+# This file implements the parallel optimization of a coloring: each worker tests a number of colors
+# (a probe of the dichotomy of coloring_optimization), the bounds found so far being shared by all the
+# workers in shared memory:
+#   - best_colors, the fewest colors of a coloring found, a probe of at least as many colors can't
+#       improve it.
+#   - lowest_colors, the fewest colors not proven to be too few, a probe of fewer colors can't succeed.
+# A worker updates them as soon as its probe ends, and the probes they make pointless are cancelled
+# through the cancellation token of their backtrack, checked every limits_check_frequency nodes. The
+# parent hands the numbers of colors to test to the free workers, in the middle of the largest range
+# left between the bounds and the probes running.
+# The coloring CSP and the backtrack object are inherited by the forked workers, like the components of
+# parallel_components. Where fork isn't available, the sequential dichotomy is run instead.
+from time import time
+from typing import Callable, Tuple
+
+from models import CSP
+from backtrack import BacktrackClass
+from backtrack.parallel_components import (
+    AnyTokenIsSet,
+    forked_process_pool,
+    submit_in_forked_process,
+)
+from backtrack.search_limits import CANCELLED_REASON, TIME_LIMIT_REASON
+
+
+class PointlessProbeToken:
+    """
+    Cancellation token of the probe of colors_count colors, set once the shared bounds decide it.
+    """
+
+    colors_count: int
+    best_colors: object
+    lowest_colors: object
+
+    def __init__(self, colors_count: int, best_colors, lowest_colors) -> None:
+        self.colors_count = colors_count
+        self.best_colors = best_colors
+        self.lowest_colors = lowest_colors
+        return
+
+    def is_set(self) -> bool:
+        return not (
+            self.lowest_colors.value <= self.colors_count < self.best_colors.value
+        )
+
+
+def _probe_colors(context: tuple, colors_count: int) -> tuple:
+    """
+    Runs in a worker: tests colors_count colors with the inherited copy of the backtrack object and
+    publishes the bound it proves. Returns the colors tested, wether a coloring was found, the state,
+    the nodes and the stop reason.
+    """
+    (
+        coloring_instance,
+        backtrack_object,
+        cancellation_token,
+        time_limit,
+        start_time,
+        best_colors,
+        lowest_colors,
+        stop_event,
+    ) = context
+    # The tracer's file can't be shared between processes
+    backtrack_object.tracer = None
+    backtrack_object.processes = 1
+    # The worker runs several probes, the token is built from the user's one each time
+    backtrack_object.cancellation_token = AnyTokenIsSet(
+        [
+            cancellation_token,
+            stop_event,
+            PointlessProbeToken(
+                colors_count=colors_count,
+                best_colors=best_colors,
+                lowest_colors=lowest_colors,
+            ),
+        ]
+    )
+    if time_limit > 0:
+        backtrack_object.time_limit = time_limit - (time() - start_time)
+        if backtrack_object.time_limit <= 0:
+            return colors_count, False, None, 0, TIME_LIMIT_REASON
+    for i in range(len(coloring_instance.domains)):
+        coloring_instance.domains[i] = list(range(colors_count))
+    found_coloring, state = backtrack_object.run_backtrack(
+        csp_instance=coloring_instance
+    )
+
+    # The bounds are published right away, the other workers see them at their next limits check
+    with best_colors.get_lock():
+        if found_coloring:
+            # The coloring may use fewer colors than allowed
+            best_colors.value = min(best_colors.value, len(set(state.values())))
+        elif backtrack_object.stop_reason is None:
+            lowest_colors.value = max(lowest_colors.value, colors_count + 1)
+    return (
+        colors_count,
+        found_coloring,
+        state,
+        backtrack_object.nodes,
+        backtrack_object.stop_reason,
+    )
+
+
+def _next_colors_to_probe(
+    lowest_colors: int, best_colors: int, running_probes: set
+) -> int:
+    """
+    The middle of the largest range of numbers of colors left untested between the bounds and the
+    running probes, None if they are all tested or running.
+    """
+    limits = sorted(
+        {lowest_colors - 1, best_colors}
+        | {
+            colors_count
+            for colors_count in running_probes
+            if lowest_colors <= colors_count < best_colors
+        }
+    )
+    largest_gap, colors_count = 1, None
+    for low, high in zip(limits, limits[1:]):
+        if high - low > largest_gap:
+            largest_gap, colors_count = high - low, (low + high) // 2
+    return colors_count
+
+
+def parallel_coloring_optimization(
+    coloring_instance: CSP,
+    max_degree: int,
+    backtrack_object: BacktrackClass,
+    time_limit: int = -1,
+    processes: int = 2,
+    progress_callback: Callable[[dict], None] = None,
+) -> Tuple[int, dict, int, bool]:
+    """
+    Same as coloring_optimization with `processes` probes running at once in forked workers. It returns
+    the fewest colors found, the coloring (None if it is the max_degree + 1 bound, which is never tested),
+    the nodes of the probe which found it and wether the number of colors is proven optimal.
+    progress_callback is called after each probe as by coloring_optimization, the probes cancelled because
+    of another probe's result included (with found False).
+    """
+    import multiprocessing
+    from concurrent.futures import FIRST_COMPLETED, wait
+
+    from backtrack.parallel_components import fork_is_available
+
+    if processes <= 1 or not fork_is_available():
+        from .coloring import coloring_optimization
+
+        return coloring_optimization(
+            coloring_instance=coloring_instance,
+            max_degree=max_degree,
+            backtrack_object=backtrack_object,
+            time_limit=time_limit,
+            progress_callback=progress_callback,
+        )
+
+    fork_context = multiprocessing.get_context("fork")
+    # A single lock for both bounds
+    bounds_lock = fork_context.RLock()
+    best_colors = fork_context.Value("i", max_degree + 1, lock=bounds_lock)
+    lowest_colors = fork_context.Value("i", 1, lock=bounds_lock)
+    # Stops all the probes once one was stopped by a budget or by the user's token
+    stop_event = fork_context.Event()
+    cancellation_token = backtrack_object.cancellation_token
+    best_state = None
+    best_state_colors = max_degree + 1
+    best_nodes = None
+    running_probes = dict()
+
+    with forked_process_pool(
+        context=(
+            coloring_instance,
+            backtrack_object,
+            cancellation_token,
+            time_limit,
+            time(),
+            best_colors,
+            lowest_colors,
+            stop_event,
+        ),
+        processes=processes,
+    ) as executor:
+        while True:
+            while not stop_event.is_set() and len(running_probes) < processes:
+                colors_count = _next_colors_to_probe(
+                    lowest_colors=lowest_colors.value,
+                    best_colors=best_colors.value,
+                    running_probes=set(running_probes.values()),
+                )
+                if colors_count is None:
+                    break
+                future = submit_in_forked_process(
+                    executor=executor, function=_probe_colors, task_index=colors_count
+                )
+                running_probes[future] = colors_count
+            if not running_probes:
+                break
+
+            done, _ = wait(running_probes, return_when=FIRST_COMPLETED)
+            for future in done:
+                del running_probes[future]
+                colors_count, found_coloring, state, nodes, stop_reason = (
+                    future.result()
+                )
+                if found_coloring and len(set(state.values())) < best_state_colors:
+                    best_state = state
+                    best_state_colors = len(set(state.values()))
+                    best_nodes = nodes
+                # A probe cancelled by the bounds proves nothing but was pointless anyway
+                if stop_reason is not None and (
+                    stop_reason != CANCELLED_REASON
+                    or (cancellation_token is not None and cancellation_token.is_set())
+                ):
+                    stop_event.set()
+                if progress_callback is not None:
+                    progress_callback(
+                        {
+                            "colors_tested": colors_count,
+                            "found": found_coloring,
+                            "best_colors": best_colors.value,
+                            "nodes": nodes,
+                            "state": state if found_coloring else None,
+                        }
+                    )
+
+    finished = not stop_event.is_set() and lowest_colors.value >= best_colors.value
+    return best_colors.value, best_state, best_nodes, finished
@@ -0,0 +1,197 @@
+# This file implements the random instances, for the scaling studies where the bundled files are too
+# few: Model RB binary CSPs, and random graphs to color (G(n, p), geometric, and Leighton-style graphs
+# whose chromatic number is known). Every generator takes a seed for a NumPy Generator, the same seed
+# giving the same instance. The graphs are streamed edge by edge and the CSPs built directly from them.
+import math
+from typing import Iterator, Tuple
+
+import numpy as np
+
+from models import CSP, with_vectorized_form
+from wrappers import alldiff
+
+Edge = Tuple[int, int]
+
+
+def _rng(seed) -> np.random.Generator:
+    return np.random.default_rng(seed)
+
+
+def model_rb_parameters(n: int, alpha: float, r: float) -> Tuple[int, int]:
+    """
+    The domains size d = n^alpha and the number of constraints m = r n ln n of Model RB.
+    """
+    return max(2, round(n**alpha)), round(r * n * math.log(n))
+
+
+def model_rb_critical_tightness(alpha: float, r: float) -> float:
+    """
+    The tightness of the phase transition of Model RB, 1 - exp(-alpha / r): the instances are mostly
+    satisfiable below it and mostly unsatisfiable above it, and the hardest around it.
+    """
+    return 1 - math.exp(-alpha / r)
+
+
+def _forbidden_couples_constraint(forbidden: np.ndarray):
+    """
+    The constraint of a boolean matrix of the forbidden couples of values, from 0 to d - 1.
+    """
+    allowed = ~forbidden
+    forbidden_couples = frozenset(
+        zip(*(axis.tolist() for axis in np.nonzero(forbidden)))
+    )
+    return with_vectorized_form(
+        constraint=lambda i, j, value_var_i, value_var_j: (value_var_i, value_var_j)
+        not in forbidden_couples,
+        vectorized_constraint=lambda i, j, values_i, values_j: allowed[
+            values_i, values_j
+        ],
+    )
+
+
+def model_rb_constraints(
+    n: int, d: int, constraints_count: int, tightness: float, seed=None
+) -> Iterator[Tuple[int, int, np.ndarray]]:
+    """
+    Streams the constraints of a Model RB instance: constraints_count distinct couples of variables
+    (i, j) with i < j, each one forbidding round(tightness * d^2) couples of values drawn without
+    replacement, given as a d x d boolean matrix.
+    """
+    rng = _rng(seed)
+    pairs_count = n * (n - 1) // 2
+    if constraints_count > pairs_count:
+        raise ValueError(f"At most {pairs_count} constraints on {n} variables")
+    forbidden_count = round(tightness * d * d)
+    firsts, seconds = np.triu_indices(n, k=1)
+    for pair in rng.choice(pairs_count, size=constraints_count, replace=False):
+        forbidden = np.zeros(d * d, dtype=bool)
+        forbidden[rng.choice(d * d, size=forbidden_count, replace=False)] = True
+        yield int(firsts[pair]), int(seconds[pair]), forbidden.reshape(d, d)
+    return
+
+
+def model_rb_problem(
+    n: int, d: int, density: float, tightness: float, seed=None
+) -> CSP:
+    """
+    Builds a random binary CSP of Model RB: n variables of domain 0..d-1, constraints on a density
+    fraction of the couples of variables, each one forbidding a tightness fraction of the couples of
+    values. model_rb_parameters gives d and the number of constraints of the asymptotic model, the
+    density being then m / (n (n - 1) / 2).
+    """
+    csp_instance = CSP(
+        variables=[f"x_{i}" for i in range(n)],
+        domains=[list(range(d)) for _ in range(n)],
+        constraints={},
+    )
+    for first, second, forbidden in model_rb_constraints(
+        n=n,
+        d=d,
+        constraints_count=round(density * n * (n - 1) / 2),
+        tightness=tightness,
+        seed=seed,
+    ):
+        csp_instance.add_constraint(
+            index_variable_1=first,
+            index_variable_2=second,
+            new_constraint=_forbidden_couples_constraint(forbidden=forbidden),
+        )
+    return csp_instance
+
+
+def gnp_graph_edges(n: int, p: float, seed=None) -> Iterator[Edge]:
+    """
+    Streams the edges of a G(n, p) graph, each couple of nodes being linked with probability p.
+    """
+    rng = _rng(seed)
+    for first in range(n - 1):
+        for second in np.flatnonzero(rng.random(n - first - 1) < p) + first + 1:
+            yield first, int(second)
+    return
+
+
+def geometric_graph_edges(n: int, radius: float, seed=None) -> Iterator[Edge]:
+    """
+    Streams the edges of a random geometric graph: n points drawn in the unit square, linked when
+    they are at most radius apart.
+    """
+    points = _rng(seed).random((n, 2))
+    for first in range(n - 1):
+        distances = np.hypot(*(points[first + 1 :] - points[first]).T)
+        for second in np.flatnonzero(distances <= radius) + first + 1:
+            yield first, int(second)
+    return
+
+
+def leighton_graph_edges(
+    n: int, chromatic_number: int, edges_count: int, seed=None
+) -> Iterator[Edge]:
+    """
+    Streams the edges of a Leighton-style graph of known chromatic number k: the nodes are split in k
+    classes which are never linked inside, so k colors are enough, and a k-clique with a node of each
+    class is planted, so k colors are needed. The other edges are drawn between different classes until
+    there are edges_count of them (fewer if the k-partite graph has no more room).
+    """
+    if not 1 <= chromatic_number <= n:
+        raise ValueError(
+            "The chromatic number must be between 1 and the number of nodes"
+        )
+    rng = _rng(seed)
+    nodes = rng.permutation(n)
+    # The first k nodes of the permutation make the clique, one in each class
+    classes = np.empty(n, dtype=np.int64)
+    classes[nodes[:chromatic_number]] = np.arange(chromatic_number)
+    classes[nodes[chromatic_number:]] = rng.integers(
+        chromatic_number, size=n - chromatic_number
+    )
+
+    edges = set()
+    for rank, first in enumerate(nodes[:chromatic_number].tolist()):
+        for second in nodes[rank + 1 : chromatic_number].tolist():
+            edges.add((min(first, second), max(first, second)))
+            yield min(first, second), max(first, second)
+    class_sizes = np.bincount(classes, minlength=chromatic_number)
+    edges_count = min(
+        edges_count, (n * n - int(np.sum(class_sizes * class_sizes))) // 2
+    )
+    while len(edges) < edges_count:
+        # Drawn by batches, the couples inside a class or already linked are dropped
+        batch = rng.integers(n, size=(2 * (edges_count - len(edges)), 2))
+        for first, second in batch.tolist():
+            if classes[first] == classes[second]:
+                continue
+            edge = (min(first, second), max(first, second))
+            if edge in edges:
+                continue
+            edges.add(edge)
+            yield edge
+            if len(edges) == edges_count:
+                break
+    return
+
+
+def graph_coloring_problem(n: int, edges: Iterator[Edge]) -> Tuple[CSP, int]:
+    """
+    Same as coloring_problem for a graph given as its number of nodes and its edges (a generator of
+    this file for instance): returns the CSP, whose domains are left to coloring_optimization, and the
+    max degree of the graph.
+    """
+    csp_coloring = CSP(
+        variables=[str(i) for i in range(1, n + 1)],
+        domains=[[] for _ in range(n)],
+        constraints={},
+    )
+    for first, second in edges:
+        if first == second or (first, second) in csp_coloring.constraints:
+            continue
+        csp_coloring.add_constraint(
+            index_variable_1=first, index_variable_2=second, new_constraint=alldiff
+        )
+    max_degree = max(
+        (
+            len(linked_variables)
+            for linked_variables in csp_coloring.variable_is_constrained_by.values()
+        ),
+        default=0,
+    )
+    return csp_coloring, max_degree
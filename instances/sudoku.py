@@ -1,8 +1,10 @@
+from functools import partial
 from typing import Tuple
 
 from pathlib import Path
 
-from models import CSP
+from models import CSP, ExactCoverProblem
+from constants import Domains
 from wrappers import alldiff
 
 lambda_wrapper_for_a_couple_of_variables = None
@@ -20,38 +22,145 @@ def display_grid(state: dict, grid_edge_size: int = 9) -> list:
     return sudoku_grid
 
 
-def sudoku_problem(instance_path: Path, block_edge_size: int = 3) -> Tuple[CSP]:
+def _sudoku_variable_name(grid_edge_size: int, index: int) -> str:
+    # Not a lambda so that the compact models can be cached
+    return f"x_{index // grid_edge_size + 1}_{index % grid_edge_size + 1}"
+
+
+def sudoku_domains(grid_lines: list[str], block_edge_size: int = 3) -> Domains:
+    """
+    Builds the domains of a grid given as its lines of digits, 0 standing for an empty cell.
+    """
+    grid_edge_size = block_edge_size * block_edge_size
+    if len(grid_lines) < grid_edge_size:
+        raise Exception(f"Missing lines in the grid, {grid_edge_size} expected")
+    # Each variable can take values from 1 to grid size
+    domains = [[] for _ in range(grid_edge_size * grid_edge_size)]
+
+    for i in range(grid_edge_size):
+        line = grid_lines[i]
+        # Each line consists of grid_edge_size ints one after the other
+        for j in range(grid_edge_size):
+            sudoku_starting_value = int(line[j])
+            if sudoku_starting_value != 0:
+                domains[i * grid_edge_size + j] = [sudoku_starting_value]
+
+    # Then fill remaining ones
+    for i in range(len(domains)):
+        if len(domains[i]) == 0:
+            domains[i] = [j for j in range(1, grid_edge_size + 1)]
+    return domains
+
+
+def sudoku_problem(
+    instance_path: Path,
+    block_edge_size: int = 3,
+    compact: bool = False,
+    cache: "InstanceCache" = None,
+    exact_cover: bool = False,
+) -> Tuple[CSP]:
     """
     Used to build a CSP to be resolved for a sudoku. Returns the built CSP.
     The block length is the size of the corner of one of the subsquares of the
     grid. For instance a 9x9 grid has 9 blocks of size 3x3 and block length = 3.
+    With compact, the CSP is a CompactCSP whose variables are named when read.
+    With exact_cover, it is the ExactCoverProblem of the grid for the DancingLinksSolver instead of a CSP.
+    With a cache, a grid file already built is loaded from it.
     """
+    if cache is not None:
+        from .instances_cache import file_key
+
+        key = file_key(
+            instance_path, "sudoku_problem", block_edge_size, compact, exact_cover
+        )
+        if (csp_sudoku := cache.get(key)) is not None:
+            return csp_sudoku
+        csp_sudoku = sudoku_problem(
+            instance_path=instance_path,
+            block_edge_size=block_edge_size,
+            compact=compact,
+            exact_cover=exact_cover,
+        )
+        cache.put(key, csp_sudoku)
+        return csp_sudoku
     grid_edge_size = block_edge_size * block_edge_size
+    grid_lines = []
+    # Read the lines of the grid from the file
+    with open(instance_path, "r") as instance_file:
+        for _ in range(grid_edge_size):
+            if not (line := instance_file.readline()):
+                raise Exception("Missing lines for instance " + str(instance_path))
+            grid_lines.append(line)
+    return sudoku_grid_problem(
+        grid_lines=grid_lines,
+        block_edge_size=block_edge_size,
+        compact=compact,
+        exact_cover=exact_cover,
+    )
+
+
+def sudoku_exact_cover_problem(
+    domains: Domains, block_edge_size: int = 3
+) -> ExactCoverProblem:
+    """
+    The exact cover problem of a grid: a row per cell and value, covering the columns of the cell, of the
+    value in the row, of the value in the column and of the value in the block. All the values of each
+    cell have their row, the given cells being the given_rows, so that the rows_of_domains of the
+    sudoku_domains of another grid solve it on the same links.
+    """
+    grid_edge_size = block_edge_size * block_edge_size
+    cells_count = grid_edge_size * grid_edge_size
+    exact_cover_sudoku = ExactCoverProblem(
+        variables=[
+            f"x_{i}_{j}"
+            for i in range(1, grid_edge_size + 1)
+            for j in range(1, grid_edge_size + 1)
+        ],
+        primary_columns_count=4 * cells_count,
+    )
+    for i in range(grid_edge_size):
+        for j in range(grid_edge_size):
+            block = (i // block_edge_size) * block_edge_size + j // block_edge_size
+            for value in range(1, grid_edge_size + 1):
+                exact_cover_sudoku.add_row(
+                    variable_index=i * grid_edge_size + j,
+                    value=value,
+                    columns=[
+                        i * grid_edge_size + j,
+                        cells_count + i * grid_edge_size + value - 1,
+                        2 * cells_count + j * grid_edge_size + value - 1,
+                        3 * cells_count + block * grid_edge_size + value - 1,
+                    ],
+                )
+    exact_cover_sudoku.given_rows = exact_cover_sudoku.rows_of_domains(domains=domains)
+    return exact_cover_sudoku
+
+
+def sudoku_grid_problem(
+    grid_lines: list[str],
+    block_edge_size: int = 3,
+    compact: bool = False,
+    exact_cover: bool = False,
+) -> CSP:
+    """
+    Same as sudoku_problem for a grid given as its lines of digits. Only the domains depend on the grid,
+    sudoku_domains builds them for another grid of the same size.
+    """
+    grid_edge_size = block_edge_size * block_edge_size
+    if exact_cover:
+        return sudoku_exact_cover_problem(
+            domains=sudoku_domains(
+                grid_lines=grid_lines, block_edge_size=block_edge_size
+            ),
+            block_edge_size=block_edge_size,
+        )
 
     variables = [
         f"x_{i}_{j}"
         for i in range(1, grid_edge_size + 1)
         for j in range(1, grid_edge_size + 1)
     ]
-    # Each variable can take values from 1 to grid size
-    domains = [[] for _ in range(len(variables))]
-
-    # Attempt to fill domains up with given file
-    with open(instance_path, "r") as instance_file:
-        for i in range(grid_edge_size):
-            if not (line := instance_file.readline()):
-                raise Exception("Missing lines for instance " + instance_path)
-
-            # Each line consists of grid_edge_size ints one after the other
-            for j in range(grid_edge_size):
-                sudoku_starting_value = int(line[j])
-                if sudoku_starting_value != 0:
-                    domains[i * grid_edge_size + j] = [sudoku_starting_value]
-
-    # Then fill remaining ones
-    for i in range(len(domains)):
-        if len(domains[i]) == 0:
-            domains[i] = [j for j in range(1, grid_edge_size + 1)]
+    domains = sudoku_domains(grid_lines=grid_lines, block_edge_size=block_edge_size)
 
     # Constraints on rows
     constraints = dict()
@@ -110,4 +219,22 @@ def sudoku_problem(instance_path: Path, block_edge_size: int = 3) -> Tuple[CSP]:
                         }
                     )
 
+    if compact:
+        # The CompactCSP and NumPy are only imported for the compact models
+        from models import CompactCSP
+
+        csp_sudoku = CompactCSP(
+            variables_count=len(variables),
+            domains=domains,
+            variable_name=partial(_sudoku_variable_name, grid_edge_size),
+        )
+        # Both orders hold alldiff, each pair is stored once
+        csp_sudoku.add_constraints_with_indices(
+            new_constraints={
+                cells: constraint
+                for cells, constraint in constraints.items()
+                if cells[0] < cells[1]
+            }
+        )
+        return csp_sudoku
     return CSP(variables=variables, domains=domains, constraints=constraints)
@@ -0,0 +1,2 @@
+from .min_conflicts import min_conflicts, n_queens_min_conflicts
+from .tabu_coloring import tabu_coloring
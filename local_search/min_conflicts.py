@@ -0,0 +1,384 @@
+# This file implements the min-conflicts local search, on any CSP and specialised for the
+# n-queens where the conflicts are counted along the diagonals.
+from time import monotonic
+from typing import Tuple
+
+import numpy as np
+
+from models import CSP
+
+# Number of iterations between two checks of the clock
+TIME_CHECK_FREQUENCY = 64
+
+
+def min_conflicts(
+    csp_instance: CSP,
+    max_iterations: int = 100000,
+    time_limit: float = -1,
+    random_walk_probability: float = 0.02,
+    seed: int = None,
+    initial_state: dict = None,
+) -> Tuple[bool, dict, int]:
+    """
+    Min-conflicts local search on a CSP. Starting from a complete assignment (the given readable
+    initial_state completed randomly), it repeatedly picks a variable involved in a violated constraint
+    and gives it the value of its domain violating the fewest constraints, or with probability
+    random_walk_probability a random value to escape local minima.
+    The number of violated constraints for each (variable, value) couple is stored in a NumPy array
+    and updated incrementally, only the neighbours of the changed variable are recomputed. The global
+    constraints count as one constraint each: the counters of the variables sharing one with the changed
+    variable are recomputed with is_satisfied, value by value.
+    It returns wether a solution was found, the best readable state and its number of violated constraints.
+    """
+    rng = np.random.default_rng(seed)
+    start_time = monotonic()
+    number_of_variables = len(csp_instance.variables)
+    domains = csp_instance.domains
+    domains_sizes = np.array([len(domain) for domain in domains], dtype=np.int64)
+    if number_of_variables == 0:
+        return True, dict(), 0
+    if (domains_sizes == 0).any():
+        return False, dict(), -1
+    neighbours = [
+        list(csp_instance.variable_is_constrained_by[index])
+        for index in range(number_of_variables)
+    ]
+    global_constraints_of = [
+        csp_instance.variable_global_constraints.get(index, [])
+        for index in range(number_of_variables)
+    ]
+
+    # Values are handled through their index in the domain
+    assignment = rng.integers(0, domains_sizes)
+    if initial_state is not None:
+        for variable, value in initial_state.items():
+            index = csp_instance.variables_to_index_dict[variable]
+            if value in domains[index]:
+                assignment[index] = domains[index].index(value)
+
+    # conflicts[v, k]: number of neighbours whose current value violates a constraint with v = domain[k].
+    # The padding after the end of a domain is never the minimum.
+    padding = np.iinfo(np.int32).max // 2
+    conflicts = np.zeros((number_of_variables, domains_sizes.max()), dtype=np.int32)
+    for variable_index in range(number_of_variables):
+        conflicts[variable_index, domains_sizes[variable_index] :] = padding
+        domain = domains[variable_index]
+        for linked_variable_index in neighbours[variable_index]:
+            constraint = csp_instance.constraints[
+                (variable_index, linked_variable_index)
+            ]
+            linked_value = domains[linked_variable_index][
+                assignment[linked_variable_index]
+            ]
+            for value_index in range(len(domain)):
+                if not constraint(
+                    variable_index,
+                    linked_variable_index,
+                    domain[value_index],
+                    linked_value,
+                ):
+                    conflicts[variable_index, value_index] += 1
+
+    # The global constraints' part of the counters, kept to be replaced when it is recomputed
+    indices_state = {
+        index: domains[index][assignment[index]] for index in range(number_of_variables)
+    }
+    global_conflicts = np.zeros_like(conflicts)
+    for variable_index in range(number_of_variables):
+        if global_constraints_of[variable_index]:
+            global_conflicts[variable_index] = _global_conflicts(
+                global_constraints=global_constraints_of[variable_index],
+                variable_index=variable_index,
+                domain=domains[variable_index],
+                indices_state=indices_state,
+                row_size=conflicts.shape[1],
+            )
+    all_indices = np.arange(number_of_variables)
+    # Each violated binary constraint is counted by both its variables
+    violated = int(conflicts[all_indices, assignment].sum()) // 2 + sum(
+        not global_constraint.is_satisfied(indices_state)
+        for global_constraint in csp_instance.global_constraints
+    )
+    conflicts += global_conflicts
+    current_conflicts = conflicts[all_indices, assignment]
+    best_violated = violated
+    best_assignment = assignment.copy()
+
+    iteration = 0
+    while violated > 0 and iteration < max_iterations:
+        iteration += 1
+        if (
+            time_limit > 0
+            and iteration % TIME_CHECK_FREQUENCY == 0
+            and monotonic() - start_time >= time_limit
+        ):
+            break
+
+        conflicted_variables = np.flatnonzero(current_conflicts)
+        variable_index = conflicted_variables[rng.integers(len(conflicted_variables))]
+        old_value_index = assignment[variable_index]
+        if rng.random() < random_walk_probability:
+            new_value_index = rng.integers(domains_sizes[variable_index])
+        else:
+            variable_conflicts = conflicts[variable_index]
+            candidates = np.flatnonzero(variable_conflicts == variable_conflicts.min())
+            new_value_index = candidates[rng.integers(len(candidates))]
+        if new_value_index == old_value_index:
+            continue
+
+        # Update the counters of the neighbours
+        old_value = domains[variable_index][old_value_index]
+        new_value = domains[variable_index][new_value_index]
+        assignment[variable_index] = new_value_index
+        for linked_variable_index in neighbours[variable_index]:
+            constraint = csp_instance.constraints[
+                (linked_variable_index, variable_index)
+            ]
+            linked_domain = domains[linked_variable_index]
+            for value_index in range(len(linked_domain)):
+                conflicts[linked_variable_index, value_index] += int(
+                    not constraint(
+                        linked_variable_index,
+                        variable_index,
+                        linked_domain[value_index],
+                        new_value,
+                    )
+                ) - int(
+                    not constraint(
+                        linked_variable_index,
+                        variable_index,
+                        linked_domain[value_index],
+                        old_value,
+                    )
+                )
+        # The row of the variable only depends on the others, it holds the change of both counts
+        violated += int(
+            conflicts[variable_index, new_value_index]
+            - conflicts[variable_index, old_value_index]
+        )
+        indices_state[variable_index] = new_value
+        for linked_variable_index in {
+            linked_variable_index
+            for global_constraint in global_constraints_of[variable_index]
+            for linked_variable_index in global_constraint.variables_indices
+            if linked_variable_index != variable_index
+        }:
+            new_global_conflicts = _global_conflicts(
+                global_constraints=global_constraints_of[linked_variable_index],
+                variable_index=linked_variable_index,
+                domain=domains[linked_variable_index],
+                indices_state=indices_state,
+                row_size=conflicts.shape[1],
+            )
+            conflicts[linked_variable_index] += (
+                new_global_conflicts - global_conflicts[linked_variable_index]
+            )
+            global_conflicts[linked_variable_index] = new_global_conflicts
+        current_conflicts = conflicts[all_indices, assignment]
+
+        if violated < best_violated:
+            best_violated = violated
+            best_assignment = assignment.copy()
+
+    readable_state = {
+        csp_instance.variables[index]: domains[index][best_assignment[index]]
+        for index in range(number_of_variables)
+    }
+    return best_violated == 0, readable_state, best_violated
+
+
+def _global_conflicts(
+    global_constraints: list,
+    variable_index: int,
+    domain: list,
+    indices_state: dict,
+    row_size: int,
+) -> np.ndarray:
+    """
+    For each value of the domain, the number of global_constraints of the variable violated if it took
+    it, the other variables keeping their value of indices_state.
+    """
+    row = np.zeros(row_size, dtype=np.int32)
+    current_value = indices_state[variable_index]
+    for value_index, value in enumerate(domain):
+        indices_state[variable_index] = value
+        row[value_index] = sum(
+            not global_constraint.is_satisfied(indices_state)
+            for global_constraint in global_constraints
+        )
+    indices_state[variable_index] = current_value
+    return row
+
+
+def _n_queens_greedy_start(
+    n: int, rng: np.random.Generator, attempts: int = 32
+) -> np.ndarray:
+    """
+    Places the queens row by row on columns not used yet (so there is never a column conflict),
+    trying a few random free columns to find one with free diagonals. This leaves very few conflicts,
+    even for very large n.
+    """
+    columns = rng.permutation(n)
+    first_diagonals = np.zeros(2 * n - 1, dtype=bool)
+    second_diagonals = np.zeros(2 * n - 1, dtype=bool)
+    random_offsets = rng.integers(0, n, size=(n, attempts)) if n > 0 else None
+    for row in range(n):
+        free_columns_count = n - row
+        for attempt in range(attempts):
+            candidate = row + random_offsets[row, attempt] % free_columns_count
+            column = columns[candidate]
+            if (
+                not first_diagonals[row + column]
+                and not second_diagonals[row - column + n - 1]
+            ):
+                break
+        columns[row], columns[candidate] = columns[candidate], columns[row]
+        first_diagonals[row + columns[row]] = True
+        second_diagonals[row - columns[row] + n - 1] = True
+    return columns
+
+
+def n_queens_min_conflicts(
+    n: int,
+    max_iterations: int = 100000,
+    time_limit: float = -1,
+    random_walk_probability: float = 0.02,
+    seed: int = None,
+) -> Tuple[bool, dict, int]:
+    """
+    Min-conflicts for the n-queens, for sizes out of reach of the complete search (n >= 10^5).
+    The number of queens on each column and diagonal are stored in NumPy arrays, so moving a queen
+    updates the number of attacking pairs in O(1) and the conflicts of all the columns of a row are
+    computed in a single vectorized operation. The rows of the queens of each line are kept too: the
+    queen to move is drawn from the candidate rows, the attacked queens being added to them when a queen
+    lands on their line and dropped when drawn unattacked. The state uses the variables names of
+    n_queens_problem (columns from 1 to n).
+    It returns wether a solution was found, the best readable state and its number of attacking pairs
+    of queens.
+    """
+    rng = np.random.default_rng(seed)
+    start_time = monotonic()
+
+    columns = _n_queens_greedy_start(n=n, rng=rng)
+    rows = np.arange(n)
+    all_columns = np.arange(n)
+    columns_count = np.bincount(columns, minlength=n)
+    first_diagonals_count = np.bincount(rows + columns, minlength=2 * n - 1)
+    second_diagonals_count = np.bincount(rows - columns + n - 1, minlength=2 * n - 1)
+
+    # Rows of the queens on each column, first diagonal and second diagonal
+    columns_rows = [set() for _ in range(n)]
+    first_diagonals_rows = [set() for _ in range(2 * n - 1)]
+    second_diagonals_rows = [set() for _ in range(2 * n - 1)]
+    for row, column in enumerate(columns.tolist()):
+        columns_rows[column].add(row)
+        first_diagonals_rows[row + column].add(row)
+        second_diagonals_rows[row - column + n - 1].add(row)
+
+    def queen_conflicts(row: int) -> int:
+        column = columns[row]
+        return (
+            columns_count[column]
+            + first_diagonals_count[row + column]
+            + second_diagonals_count[row - column + n - 1]
+            - 3
+        )
+
+    # Pairs of queens on a same line
+    attacks = sum(
+        int((lines_count * (lines_count - 1) // 2).sum())
+        for lines_count in (
+            columns_count,
+            first_diagonals_count,
+            second_diagonals_count,
+        )
+    )
+    candidate_rows = np.flatnonzero(
+        columns_count[columns]
+        + first_diagonals_count[rows + columns]
+        + second_diagonals_count[rows - columns + n - 1]
+        - 3
+    ).tolist()
+    is_candidate = bytearray(n)
+    for row in candidate_rows:
+        is_candidate[row] = 1
+    best_attacks = attacks
+    best_columns = columns.copy()
+
+    iteration = 0
+    while best_attacks > 0 and iteration < max_iterations:
+        iteration += 1
+        if (
+            time_limit > 0
+            and iteration % TIME_CHECK_FREQUENCY == 0
+            and monotonic() - start_time >= time_limit
+        ):
+            break
+
+        # Every attacked queen is a candidate, the ones which aren't anymore are dropped when drawn
+        row = None
+        while row is None:
+            position = rng.integers(len(candidate_rows))
+            candidate_row = candidate_rows[position]
+            candidate_rows[position] = candidate_rows[-1]
+            candidate_rows.pop()
+            is_candidate[candidate_row] = 0
+            if queen_conflicts(candidate_row) > 0:
+                row = candidate_row
+
+        # Take the queen off the board, then count the conflicts of each column of its row
+        old_column = int(columns[row])
+        columns_count[old_column] -= 1
+        first_diagonals_count[row + old_column] -= 1
+        second_diagonals_count[row - old_column + n - 1] -= 1
+        columns_rows[old_column].discard(row)
+        first_diagonals_rows[row + old_column].discard(row)
+        second_diagonals_rows[row - old_column + n - 1].discard(row)
+        attacks -= int(
+            columns_count[old_column]
+            + first_diagonals_count[row + old_column]
+            + second_diagonals_count[row - old_column + n - 1]
+        )
+        if rng.random() < random_walk_probability:
+            new_column = int(rng.integers(n))
+        else:
+            row_conflicts = (
+                columns_count
+                + first_diagonals_count[row : row + n]
+                + second_diagonals_count[row + n - 1 - all_columns]
+            )
+            candidates = np.flatnonzero(row_conflicts == row_conflicts.min())
+            new_column = int(candidates[rng.integers(len(candidates))])
+        attacks += int(
+            columns_count[new_column]
+            + first_diagonals_count[row + new_column]
+            + second_diagonals_count[row - new_column + n - 1]
+        )
+        columns[row] = new_column
+        columns_count[new_column] += 1
+        first_diagonals_count[row + new_column] += 1
+        second_diagonals_count[row - new_column + n - 1] += 1
+        # The queen and the ones on its new lines attack each other
+        lines_rows = (
+            columns_rows[new_column],
+            first_diagonals_rows[row + new_column],
+            second_diagonals_rows[row - new_column + n - 1],
+        )
+        for line_rows in lines_rows:
+            for attacked_row in line_rows:
+                if not is_candidate[attacked_row]:
+                    is_candidate[attacked_row] = 1
+                    candidate_rows.append(attacked_row)
+            if line_rows and not is_candidate[row]:
+                is_candidate[row] = 1
+                candidate_rows.append(row)
+            line_rows.add(row)
+
+        if attacks < best_attacks:
+            best_attacks = attacks
+            best_columns = columns.copy()
+
+    readable_state = {
+        f"{str(i)}_col_queen": int(best_columns[i - 1]) + 1 for i in range(1, n + 1)
+    }
+    return best_attacks == 0, readable_state, best_attacks
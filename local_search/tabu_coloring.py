@@ -0,0 +1,160 @@
+# This file implements the TabuCol tabu search (Hertz and de Werra) looking for a coloring of a
+# graph with a fixed number of colors.
+from time import monotonic
+from typing import Tuple
+
+import numpy as np
+
+from models import CSP
+
+from .min_conflicts import TIME_CHECK_FREQUENCY
+
+
+def _greedy_coloring(
+    neighbours: list[np.ndarray], colors_count: int, rng: np.random.Generator
+) -> np.ndarray:
+    """
+    Gives each node the smallest color not used by its neighbours, or a random one when all the
+    colors are used. It is a far better start for the tabu search than a random coloring.
+    """
+    colors = np.full(len(neighbours), -1, dtype=np.int64)
+    for node in range(len(neighbours)):
+        used_colors = np.zeros(colors_count + 1, dtype=bool)
+        neighbours_colors = colors[neighbours[node]]
+        used_colors[neighbours_colors[neighbours_colors >= 0]] = True
+        free_colors = np.flatnonzero(~used_colors[:colors_count])
+        colors[node] = (
+            free_colors[0] if len(free_colors) > 0 else rng.integers(colors_count)
+        )
+    return colors
+
+
+def tabu_coloring(
+    csp_instance: CSP,
+    colors_count: int,
+    max_iterations: int = 100000,
+    time_limit: float = -1,
+    random_walk_probability: float = 0.0,
+    tabu_tenure: int = 10,
+    tabu_tenure_factor: float = 0.6,
+    seed: int = None,
+    initial_state: dict = None,
+    max_stall_iterations: int = -1,
+) -> Tuple[bool, dict, int]:
+    """
+    TabuCol for a coloring CSP (as built by coloring_problem, every constraint being a difference) with
+    colors_count colors numbered from 0. A move gives a new color to a node in conflict; the best non tabu
+    move is applied, a move being allowed despite its tabu status if it beats the best coloring found
+    (aspiration). Giving back its old color to a node is then tabu for tabu_tenure random iterations plus
+    tabu_tenure_factor times the number of nodes in conflict.
+    gamma[v, c], the number of neighbours of v with color c, is stored in a NumPy array so that the
+    deltas of all the moves are computed at once and a move only updates the rows of the neighbours.
+    The search stops after max_iterations, time_limit seconds, or max_stall_iterations iterations without
+    improving the best coloring (-1 for no limit).
+    It returns wether a proper coloring was found, the best readable state and its number of conflicting edges.
+    """
+    rng = np.random.default_rng(seed)
+    start_time = monotonic()
+    number_of_nodes = len(csp_instance.variables)
+    if number_of_nodes == 0:
+        return True, dict(), 0
+    neighbours = [
+        np.fromiter(csp_instance.variable_is_constrained_by[node], dtype=np.int64)
+        for node in range(number_of_nodes)
+    ]
+    if colors_count == 1:
+        # No move to make, the single coloring is proper if there is no edge
+        conflicts = sum(len(node_neighbours) for node_neighbours in neighbours) // 2
+        return (
+            conflicts == 0,
+            {variable: 0 for variable in csp_instance.variables},
+            conflicts,
+        )
+
+    colors = _greedy_coloring(neighbours=neighbours, colors_count=colors_count, rng=rng)
+    if initial_state is not None:
+        # Phase saving: start from a previous coloring, its colors above colors_count are redrawn
+        for variable, color in initial_state.items():
+            if 0 <= color < colors_count:
+                colors[csp_instance.variables_to_index_dict[variable]] = color
+
+    gamma = np.zeros((number_of_nodes, colors_count), dtype=np.int64)
+    for node in range(number_of_nodes):
+        gamma[node] = np.bincount(colors[neighbours[node]], minlength=colors_count)
+    all_nodes = np.arange(number_of_nodes)
+    conflicts = int(gamma[all_nodes, colors].sum()) // 2
+    best_conflicts = conflicts
+    best_colors = colors.copy()
+    tabu_until = np.zeros((number_of_nodes, colors_count), dtype=np.int64)
+    forbidden = np.iinfo(np.int64).max // 2
+
+    iteration = 0
+    best_iteration = 0
+    while best_conflicts > 0 and iteration < max_iterations:
+        iteration += 1
+        if (
+            max_stall_iterations > 0
+            and iteration - best_iteration > max_stall_iterations
+        ):
+            break
+        if (
+            time_limit > 0
+            and iteration % TIME_CHECK_FREQUENCY == 0
+            and monotonic() - start_time >= time_limit
+        ):
+            break
+
+        conflicted_nodes = np.flatnonzero(gamma[all_nodes, colors])
+        if rng.random() < random_walk_probability:
+            node = conflicted_nodes[rng.integers(len(conflicted_nodes))]
+            color = (colors[node] + 1 + rng.integers(colors_count - 1)) % colors_count
+            delta = gamma[node, color] - gamma[node, colors[node]]
+        else:
+            conflicted_gamma = gamma[conflicted_nodes]
+            conflicted_colors = colors[conflicted_nodes]
+            rows = np.arange(len(conflicted_nodes))
+            deltas = (
+                conflicted_gamma - conflicted_gamma[rows, conflicted_colors][:, None]
+            )
+            allowed = (tabu_until[conflicted_nodes] <= iteration) | (
+                conflicts + deltas < best_conflicts
+            )
+            allowed[rows, conflicted_colors] = False
+            deltas = np.where(allowed, deltas, forbidden)
+            best_delta = deltas.min()
+            if best_delta == forbidden:
+                # Every move is tabu, make a random one
+                candidates_rows = rows
+                candidates_colors = (
+                    conflicted_colors
+                    + 1
+                    + rng.integers(colors_count - 1, size=len(rows))
+                ) % colors_count
+            else:
+                candidates_rows, candidates_colors = np.nonzero(deltas == best_delta)
+            candidate = rng.integers(len(candidates_rows))
+            node = conflicted_nodes[candidates_rows[candidate]]
+            color = candidates_colors[candidate]
+            delta = gamma[node, color] - gamma[node, colors[node]]
+
+        old_color = colors[node]
+        colors[node] = color
+        gamma[neighbours[node], old_color] -= 1
+        gamma[neighbours[node], color] += 1
+        conflicts += int(delta)
+        tabu_until[node, old_color] = (
+            iteration
+            + rng.integers(tabu_tenure)
+            + int(tabu_tenure_factor * len(conflicted_nodes))
+        )
+
+        if conflicts < best_conflicts:
+            best_conflicts = conflicts
+            best_colors = colors.copy()
+            best_iteration = iteration
+
+    readable_state = {
+        csp_instance.variables[node]: int(best_colors[node])
+        for node in range(number_of_nodes)
+    }
+    return best_conflicts == 0, readable_state, best_conflicts
@@ -1 +1,21 @@
-from .csp import CSP
\ No newline at end of file
+from constants.lazy_exports import lazy_exports
+
+from .csp import CSP
+from .constraint_family import ConstraintFamily
+from .exact_cover import ExactCoverProblem
+from .interval_domain import (
+    IntervalDomain,
+    domain_valid_bounds,
+    remove_valid_values_between,
+)
+from .vectorized_constraint import (
+    with_vectorized_form,
+    vectorized_form,
+    is_symmetric,
+)
+
+# The CompactCSP needs NumPy, imported on its first use
+__getattr__, __dir__ = lazy_exports(
+    package_globals=globals(),
+    exports={"CompactCSP": "compact_csp", "VariableNames": "compact_csp"},
+)
@@ -0,0 +1,506 @@
+# This file implements the compact CSP: an index-only core stored in arrays, where each arc is
+# stored once and the names of the variables are only generated when they are read (the readable
+# state of run_backtrack). It answers the same mappings as CSP, so the propagators don't need to
+# know which one they work on.
+from array import array
+from bisect import bisect_left
+from typing import Callable, Iterator, Tuple
+
+import numpy as np
+
+from constants import Constraint, Domains, Variable
+
+from .constraint_family import FamilyConstraints
+from .csp import CSP
+
+
+class VariableNames:
+    """
+    The variables of a CompactCSP: a sequence of names computed from the index by variable_name when
+    they are read, nothing is stored per variable.
+    """
+
+    __slots__ = ("count", "variable_name")
+
+    count: int
+    variable_name: Callable[[int], Variable]
+
+    def __init__(
+        self, count: int, variable_name: Callable[[int], Variable] = str
+    ) -> None:
+        self.count = count
+        self.variable_name = variable_name
+        return
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.variable_name(i) for i in range(self.count)[index]]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+        return self.variable_name(index)
+
+    def __iter__(self) -> Iterator[Variable]:
+        return map(self.variable_name, range(self.count))
+
+    def __repr__(self) -> str:
+        return f"VariableNames({self.count} variables)"
+
+
+class _VariablesGlobalConstraints(dict):
+    """
+    The variable_global_constraints of a CompactCSP, only the variables of a global constraint get an entry.
+    """
+
+    __slots__ = ()
+
+    def __missing__(self, variable_index: int) -> tuple:
+        return ()
+
+
+class CompactConstraints:
+    """
+    The constraints mapping of a CompactCSP: (index_variable_1, index_variable_2) -> constraint in both
+    orders, like the constraints dict of a CSP, the swapped constraint being built on the first lookup.
+    """
+
+    __slots__ = ("csp_instance",)
+
+    csp_instance: "CompactCSP"
+
+    def __init__(self, csp_instance: "CompactCSP") -> None:
+        self.csp_instance = csp_instance
+        return
+
+    def get(self, key: Tuple[int, int], default: Constraint = None) -> Constraint:
+        # Inlined as it is on the path of the forward checking and of the consistency checks
+        csp_instance = self.csp_instance
+        if csp_instance.adjacency_is_stale:
+            csp_instance._ensure_adjacency()
+        index_variable_1, index_variable_2 = key
+        neighbours_array = csp_instance.neighbours_array
+        end = csp_instance.neighbour_offsets[index_variable_1 + 1]
+        position = bisect_left(
+            neighbours_array,
+            index_variable_2,
+            csp_instance.neighbour_offsets[index_variable_1],
+            end,
+        )
+        if position == end or neighbours_array[position] != index_variable_2:
+            return default
+        return csp_instance.oriented_constraints[csp_instance.neighbour_codes[position]]
+
+    def __getitem__(self, key: Tuple[int, int]) -> Constraint:
+        if (constraint := self.get(key)) is None:
+            raise KeyError(key)
+        return constraint
+
+    def __contains__(self, key: Tuple[int, int]) -> bool:
+        return self.get(key) is not None
+
+    def keys(self) -> Iterator[Tuple[int, int]]:
+        for index_variable_1, index_variable_2 in self.csp_instance.arcs():
+            yield index_variable_1, index_variable_2
+            yield index_variable_2, index_variable_1
+        return
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return self.keys()
+
+    def __len__(self) -> int:
+        return 2 * self.csp_instance.arcs_count()
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], Constraint]]:
+        for key in self.keys():
+            yield key, self[key]
+        return
+
+    def values(self) -> Iterator[Constraint]:
+        for key in self.keys():
+            yield self[key]
+        return
+
+
+class CompactNeighbourhoods:
+    """
+    The variable_is_constrained_by mapping of a CompactCSP: variable index -> the sorted array of the
+    indices of its neighbours.
+    """
+
+    __slots__ = ("csp_instance",)
+
+    csp_instance: "CompactCSP"
+
+    def __init__(self, csp_instance: "CompactCSP") -> None:
+        self.csp_instance = csp_instance
+        return
+
+    def __getitem__(self, variable_index: int) -> array:
+        csp_instance = self.csp_instance
+        if csp_instance.adjacency_is_stale:
+            csp_instance._ensure_adjacency()
+        neighbour_offsets = csp_instance.neighbour_offsets
+        return csp_instance.neighbours_array[
+            neighbour_offsets[variable_index] : neighbour_offsets[variable_index + 1]
+        ]
+
+    def get(self, variable_index: int, default=None):
+        if not 0 <= variable_index < len(self.csp_instance.variables):
+            return default
+        return self[variable_index]
+
+    def __len__(self) -> int:
+        return len(self.csp_instance.variables)
+
+    def keys(self) -> range:
+        return range(len(self.csp_instance.variables))
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self.keys())
+
+    def values(self) -> Iterator[array]:
+        for variable_index in self.keys():
+            yield self[variable_index]
+        return
+
+    def items(self) -> Iterator[Tuple[int, array]]:
+        for variable_index in self.keys():
+            yield variable_index, self[variable_index]
+        return
+
+
+class CompactCSP:
+    """
+    A CSP whose bookkeeping is stored in flat arrays rather than in per variable dicts and sets:
+        - the variables are only indices, their names are given by variable_name(index) when read.
+        - each arc is stored once as (first, second) with first < second, with the code of its constraint
+            oriented from first to second. The constraints are stored once in oriented_constraints, the
+            constraint of code 2k being followed by its swapped version (2k + 1), so the code of the other
+            orientation is code ^ 1. A constraint shared by many arcs (alldiff) is stored once.
+        - the neighbours are stored in compressed rows: the neighbours of the variable i are sorted in
+            neighbours_array[neighbour_offsets[i]:neighbour_offsets[i + 1]], along with the code of the
+            constraint towards each of them, found by bisection.
+    The arcs added are appended and the compressed rows are rebuilt on the next lookup, the constraints
+    given twice on an arc being intersected then like CSP.add_constraint does.
+    It exposes the same attributes as CSP (variables, domains, constraints, variable_is_constrained_by,
+    global_constraints, variable_global_constraints) so the backtrack runs on it unchanged. Constraint
+    families aren't supported, they already store nothing per pair.
+    """
+
+    __slots__ = (
+        "variables",
+        "domains",
+        "constraints",
+        "variable_is_constrained_by",
+        "global_constraints",
+        "variable_global_constraints",
+        "oriented_constraints",
+        "neighbour_offsets",
+        "neighbours_array",
+        "neighbour_codes",
+        "adjacency_is_stale",
+        "_arcs_first",
+        "_arcs_second",
+        "_arcs_code",
+        "_constraint_codes",
+        "_variables_to_index_dict",
+    )
+
+    variables: VariableNames
+    domains: Domains
+    constraints: CompactConstraints
+    variable_is_constrained_by: CompactNeighbourhoods
+    global_constraints: list
+    variable_global_constraints: dict
+    # code -> constraint, each constraint followed by its swapped version
+    oriented_constraints: list
+    # Compressed rows of the neighbours and of the codes of the constraints towards them
+    neighbour_offsets: array
+    neighbours_array: array
+    neighbour_codes: array
+    adjacency_is_stale: bool
+    # Arcs (first < second) and the codes of their constraint from first to second
+    _arcs_first: array
+    _arcs_second: array
+    _arcs_code: array
+    # id(constraint) -> code
+    _constraint_codes: dict
+    _variables_to_index_dict: dict
+
+    # Same orientation and intersection rules, and same helpers, as CSP
+    _swap_constraint = CSP._swap_constraint
+    _combine_two_constraints = CSP._combine_two_constraints
+    _build_tuples_from_constraint = CSP._build_tuples_from_constraint
+    add_constraints_with_indices = CSP.add_constraints_with_indices
+    add_constraint_with_variables = CSP.add_constraint_with_variables
+    add_unary_constraint = CSP.add_unary_constraint
+    __str__ = CSP.__str__
+
+    def __init__(
+        self,
+        variables_count: int,
+        domains: Domains,
+        variable_name: Callable[[int], Variable] = str,
+    ) -> None:
+        self.variables = VariableNames(
+            count=variables_count, variable_name=variable_name
+        )
+        self.domains = domains
+        self.constraints = CompactConstraints(csp_instance=self)
+        self.variable_is_constrained_by = CompactNeighbourhoods(csp_instance=self)
+        self.global_constraints = []
+        self.variable_global_constraints = _VariablesGlobalConstraints()
+        self.oriented_constraints = []
+        self.neighbour_offsets = array("q", [0] * (variables_count + 1))
+        self.neighbours_array = array("i")
+        self.neighbour_codes = array("i")
+        self.adjacency_is_stale = False
+        self._arcs_first = array("i")
+        self._arcs_second = array("i")
+        self._arcs_code = array("i")
+        self._constraint_codes = dict()
+        self._variables_to_index_dict = None
+        return
+
+    @classmethod
+    def from_csp(cls, csp_instance: CSP) -> "CompactCSP":
+        """
+        Builds the compact version of a CSP, sharing its domains and its global constraints. Its variables
+        list is kept to give the names.
+        """
+        if isinstance(csp_instance.constraints, FamilyConstraints):
+            raise ValueError("Constraint families can't be stored in a CompactCSP")
+        compact_csp = cls(
+            variables_count=len(csp_instance.variables),
+            domains=csp_instance.domains,
+            variable_name=csp_instance.variables.__getitem__,
+        )
+        for (
+            index_variable_1,
+            index_variable_2,
+        ), constraint in csp_instance.constraints.items():
+            # The other order is the swapped version of the same constraint
+            if index_variable_1 < index_variable_2:
+                compact_csp.add_constraint(
+                    index_variable_1=index_variable_1,
+                    index_variable_2=index_variable_2,
+                    new_constraint=constraint,
+                )
+        for global_constraint in csp_instance.global_constraints:
+            compact_csp.add_global_constraint(global_constraint=global_constraint)
+        return compact_csp
+
+    def with_domains(self, domains: Domains) -> "CompactCSP":
+        """
+        Returns a CompactCSP with other domains sharing the arcs of this one, which shouldn't get new
+        constraints anymore (the presolve works on such a copy).
+        """
+        self._ensure_adjacency()
+        compact_csp = CompactCSP(
+            variables_count=len(self.variables),
+            domains=domains,
+            variable_name=self.variables.variable_name,
+        )
+        compact_csp.oriented_constraints = self.oriented_constraints
+        compact_csp.neighbour_offsets = self.neighbour_offsets
+        compact_csp.neighbours_array = self.neighbours_array
+        compact_csp.neighbour_codes = self.neighbour_codes
+        compact_csp._arcs_first = self._arcs_first
+        compact_csp._arcs_second = self._arcs_second
+        compact_csp._arcs_code = self._arcs_code
+        compact_csp._constraint_codes = self._constraint_codes
+        for global_constraint in self.global_constraints:
+            compact_csp.add_global_constraint(global_constraint=global_constraint)
+        return compact_csp
+
+    @property
+    def variables_to_index_dict(self) -> dict:
+        """
+        Built on the first use, only the interfaces working with names need it.
+        """
+        if self._variables_to_index_dict is None:
+            self._variables_to_index_dict = {
+                variable: index for index, variable in enumerate(self.variables)
+            }
+        return self._variables_to_index_dict
+
+    def _constraint_code(self, constraint: Constraint) -> int:
+        """
+        Returns the code of the constraint, storing it with its swapped version if it is new.
+        """
+        if (code := self._constraint_codes.get(id(constraint))) is None:
+            code = len(self.oriented_constraints)
+            self.oriented_constraints.append(constraint)
+            self.oriented_constraints.append(
+                self._swap_constraint(constraint=constraint)
+            )
+            self._constraint_codes[id(constraint)] = code
+        return code
+
+    def add_constraint(
+        self,
+        index_variable_1: int,
+        index_variable_2: int,
+        new_constraint: Constraint,
+    ) -> None:
+        """
+        Adds a single constraint to the CSP, it is intersected with the current constraint of the arc (if
+        any) when the compressed rows are rebuilt.
+        """
+        code = self._constraint_code(constraint=new_constraint)
+        if index_variable_1 < index_variable_2:
+            self._arcs_first.append(index_variable_1)
+            self._arcs_second.append(index_variable_2)
+            self._arcs_code.append(code)
+        else:
+            self._arcs_first.append(index_variable_2)
+            self._arcs_second.append(index_variable_1)
+            self._arcs_code.append(code ^ 1)
+        self.adjacency_is_stale = True
+        return
+
+    def remove_constraint(
+        self, index_variable_1: int, index_variable_2: int
+    ) -> Constraint:
+        """
+        Same as CSP.remove_constraint, the compressed rows are rebuilt on their next use.
+        """
+        self._ensure_adjacency()
+        first, second = min(index_variable_1, index_variable_2), max(
+            index_variable_1, index_variable_2
+        )
+        # The arcs are sorted by first then second
+        start = bisect_left(self._arcs_first, first)
+        end = bisect_left(self._arcs_first, first + 1, lo=start)
+        arc = bisect_left(self._arcs_second, second, lo=start, hi=end)
+        if arc == end or self._arcs_second[arc] != second:
+            raise KeyError((index_variable_1, index_variable_2))
+        code = self._arcs_code[arc]
+        del self._arcs_first[arc]
+        del self._arcs_second[arc]
+        del self._arcs_code[arc]
+        self.adjacency_is_stale = True
+        return self.oriented_constraints[
+            code if index_variable_1 < index_variable_2 else code ^ 1
+        ]
+
+    def _merge_duplicated_arcs(
+        self, first: np.ndarray, second: np.ndarray, codes: np.ndarray
+    ) -> np.ndarray:
+        """
+        The arcs are sorted, the constraints given several times on an arc are intersected in the first of
+        its occurrences. Returns the mask of the arcs kept.
+        """
+        kept = np.ones(len(first), dtype=bool)
+        duplicated = np.flatnonzero(
+            (first[1:] == first[:-1]) & (second[1:] == second[:-1])
+        )
+        for arc in (duplicated + 1).tolist():
+            kept_arc = arc - 1
+            while not kept[kept_arc]:
+                kept_arc -= 1
+            codes[kept_arc] = self._constraint_code(
+                constraint=self._combine_two_constraints(
+                    current_constraint=self.oriented_constraints[codes[kept_arc]],
+                    new_constraint=self.oriented_constraints[codes[arc]],
+                )
+            )
+            kept[arc] = False
+        return kept
+
+    def _ensure_adjacency(self) -> None:
+        """
+        Rebuilds the compressed rows of the neighbours after arcs were added.
+        """
+        if not self.adjacency_is_stale:
+            return
+        first = np.array(self._arcs_first, dtype=np.intc)
+        second = np.array(self._arcs_second, dtype=np.intc)
+        codes = np.array(self._arcs_code, dtype=np.intc)
+        order = np.lexsort((second, first))
+        first, second, codes = first[order], second[order], codes[order]
+        kept = self._merge_duplicated_arcs(first=first, second=second, codes=codes)
+        first, second, codes = first[kept], second[kept], codes[kept]
+        self._arcs_first = array("i", first.tobytes())
+        self._arcs_second = array("i", second.tobytes())
+        self._arcs_code = array("i", codes.tobytes())
+
+        # Each arc is in the rows of both its variables, with the code of its orientation
+        variables = np.concatenate((first, second))
+        neighbours = np.concatenate((second, first))
+        order = np.lexsort((neighbours, variables))
+        counts = np.bincount(variables, minlength=len(self.variables))
+        self.neighbour_offsets = array(
+            "q", np.concatenate(([0], np.cumsum(counts))).astype(np.int64).tobytes()
+        )
+        self.neighbours_array = array("i", neighbours[order].tobytes())
+        self.neighbour_codes = array(
+            "i", np.concatenate((codes, codes ^ 1))[order].tobytes()
+        )
+        self.adjacency_is_stale = False
+        return
+
+    def neighbours(self, variable_index: int) -> array:
+        """
+        The sorted indices of the variables constraining the variable.
+        """
+        return self.variable_is_constrained_by[variable_index]
+
+    def neighbour_constraints(
+        self, variable_index: int, towards: bool = False
+    ) -> Iterator[Tuple[int, Constraint]]:
+        """
+        Same as CSP.neighbour_constraints: the row of the variable is read once along with the codes of
+        its constraints, instead of a bisection per neighbour through constraints.
+        """
+        if self.adjacency_is_stale:
+            self._ensure_adjacency()
+        start = self.neighbour_offsets[variable_index]
+        end = self.neighbour_offsets[variable_index + 1]
+        codes = self.neighbour_codes[start:end]
+        if towards:
+            codes = [code ^ 1 for code in codes]
+        return zip(
+            self.neighbours_array[start:end],
+            map(self.oriented_constraints.__getitem__, codes),
+        )
+
+    def constraint_between(
+        self, index_variable_1: int, index_variable_2: int
+    ) -> Constraint:
+        """
+        The constraint oriented for the couple (index_variable_1, index_variable_2), None if there is none.
+        """
+        return self.constraints.get((index_variable_1, index_variable_2))
+
+    def arcs(self) -> Iterator[Tuple[int, int]]:
+        """
+        Iterates over the arcs, each one once as (first, second) with first < second.
+        """
+        self._ensure_adjacency()
+        return zip(self._arcs_first, self._arcs_second)
+
+    def arcs_count(self) -> int:
+        self._ensure_adjacency()
+        return len(self._arcs_first)
+
+    def add_global_constraint(self, global_constraint) -> None:
+        """
+        Same as CSP.add_global_constraint.
+        """
+        self.global_constraints.append(global_constraint)
+        for variable_index in global_constraint.variables_indices:
+            self.variable_global_constraints.setdefault(variable_index, []).append(
+                global_constraint
+            )
+        return
+
+    def remove_global_constraint(self, global_constraint) -> None:
+        self.global_constraints.remove(global_constraint)
+        for variable_index in global_constraint.variables_indices:
+            self.variable_global_constraints[variable_index].remove(global_constraint)
+        return
@@ -0,0 +1,327 @@
+# This file implements constraint families: a single predicate applying to a whole set of
+# variable pairs, which is never materialized. The CSP queries them through the same mappings
+# as the explicit constraints, so the propagators don't need to know about them.
+from itertools import chain
+from typing import Callable, Iterable, Iterator, Tuple
+
+from constants import Constraint, Constraints
+
+from .vectorized_constraint import combine_vectorized_forms, swap_vectorized_form
+
+
+class ConstraintFamily:
+    """
+    A constraint family applies the same predicate to every pair of distinct variables of its scope,
+    optionally filtered by pair_filter.
+        - predicate (Constraint): called as predicate(i, j, value_var_i, value_var_j) with i < j, exactly like
+            the constraints of the dicts given to add_constraints_with_indices. The family swaps it itself when
+            it is queried in the other order.
+        - scope : the indices of the variables concerned, it can be a range so that nothing is stored.
+        - pair_filter (Callable): optional, pair_filter(i, j) with i < j states wether the pair is constrained.
+            When None every pair of the scope is.
+        - symmetric (bool): the predicate gives the same result when both the indices and the values are
+            swapped, so it can be called in any order and is never wrapped.
+    The predicate may have a vectorized form (with_vectorized_form), it follows the swaps and combinations.
+    For instance the n-queens constraints are a single family over range(n) with no filter.
+    """
+
+    predicate: Constraint
+    swapped_predicate: Constraint
+    scope: range
+    pair_filter: Callable[[int, int], bool]
+
+    def __init__(
+        self,
+        predicate: Constraint,
+        scope: range,
+        pair_filter: Callable[[int, int], bool] = None,
+        symmetric: bool = False,
+    ) -> None:
+        self.predicate = predicate
+        if symmetric:
+            self.swapped_predicate = predicate
+        else:
+            # Built once for the whole family rather than once per pair
+            self.swapped_predicate = swap_vectorized_form(
+                constraint=predicate,
+                swapped_constraint=lambda i, j, value_var_i, value_var_j: predicate(
+                    j, i, value_var_j, value_var_i
+                ),
+            )
+        self.scope = scope
+        self.pair_filter = pair_filter
+        return
+
+    def contains(self, index_variable_1: int, index_variable_2: int) -> bool:
+        if (
+            index_variable_1 == index_variable_2
+            or index_variable_1 not in self.scope
+            or index_variable_2 not in self.scope
+        ):
+            return False
+        if self.pair_filter is None:
+            return True
+        return self.pair_filter(
+            min(index_variable_1, index_variable_2),
+            max(index_variable_1, index_variable_2),
+        )
+
+    def constraint_for(
+        self, index_variable_1: int, index_variable_2: int
+    ) -> Constraint:
+        """
+        Returns the predicate oriented for the couple (index_variable_1, index_variable_2).
+        """
+        if index_variable_1 < index_variable_2:
+            return self.predicate
+        return self.swapped_predicate
+
+    def neighbours(self, variable_index: int) -> Iterable[int]:
+        if variable_index not in self.scope:
+            return ()
+        if self.pair_filter is None:
+            if isinstance(self.scope, range) and self.scope.step == 1:
+                # Iterated at C speed, this is on the path of the forward checking
+                return chain(
+                    range(self.scope.start, variable_index),
+                    range(variable_index + 1, self.scope.stop),
+                )
+            return (
+                linked_variable_index
+                for linked_variable_index in self.scope
+                if linked_variable_index != variable_index
+            )
+        return (
+            linked_variable_index
+            for linked_variable_index in self.scope
+            if linked_variable_index != variable_index
+            and self.pair_filter(
+                min(variable_index, linked_variable_index),
+                max(variable_index, linked_variable_index),
+            )
+        )
+
+    def neighbours_count(self, variable_index: int) -> int:
+        if variable_index not in self.scope:
+            return 0
+        if self.pair_filter is None:
+            return len(self.scope) - 1
+        return sum(1 for _ in self.neighbours(variable_index))
+
+    def pairs(self) -> Iterator[Tuple[int, int]]:
+        """
+        Iterates over the ordered couples (both orientations) of the family.
+        """
+        for index_variable_1 in self.scope:
+            for index_variable_2 in self.neighbours(index_variable_1):
+                yield index_variable_1, index_variable_2
+        return
+
+
+def _combine_constraints(constraints: list[Constraint]) -> Constraint:
+    return combine_vectorized_forms(
+        constraints=constraints,
+        combined_constraint=lambda i, j, value_var_i, value_var_j: all(
+            constraint(i, j, value_var_i, value_var_j) for constraint in constraints
+        ),
+    )
+
+
+class FamilyConstraints(dict):
+    """
+    The constraints dict of a CSP holding constraint families. The explicit constraints are stored in the
+    dict itself, already intersected with the families covering their pair, so looking them up costs a plain
+    dict access. The pairs only covered by the families are answered on the fly by __missing__ and get.
+    """
+
+    families: list[ConstraintFamily]
+
+    def __init__(self, explicit_constraints: Constraints, families: list) -> None:
+        super().__init__(explicit_constraints)
+        self.families = families
+        return
+
+    def families_constraint(
+        self, key: Tuple[int, int], default: Constraint = None
+    ) -> Constraint:
+        """
+        Returns the constraint the families put on the couple, default if there is none.
+        """
+        if len(self.families) == 1:
+            # Inlined as it is called for every family pair looked up by the propagators
+            family = self.families[0]
+            index_variable_1, index_variable_2 = key
+            if (
+                index_variable_1 != index_variable_2
+                and index_variable_1 in family.scope
+                and index_variable_2 in family.scope
+                and (
+                    family.pair_filter is None
+                    or family.contains(index_variable_1, index_variable_2)
+                )
+            ):
+                if index_variable_1 < index_variable_2:
+                    return family.predicate
+                return family.swapped_predicate
+            return default
+        constraints = [
+            family.constraint_for(*key)
+            for family in self.families
+            if family.contains(*key)
+        ]
+        if not constraints:
+            return default
+        if len(constraints) == 1:
+            return constraints[0]
+        return _combine_constraints(constraints)
+
+    def __missing__(self, key: Tuple[int, int]) -> Constraint:
+        if (constraint := self.families_constraint(key)) is None:
+            raise KeyError(key)
+        return constraint
+
+    def get(self, key: Tuple[int, int], default: Constraint = None) -> Constraint:
+        if (constraint := dict.get(self, key, None)) is not None:
+            return constraint
+        return self.families_constraint(key, default)
+
+    def __contains__(self, key: Tuple[int, int]) -> bool:
+        return dict.__contains__(self, key) or any(
+            family.contains(*key) for family in self.families
+        )
+
+    def keys(self) -> Iterator[Tuple[int, int]]:
+        seen_in_families = set() if len(self.families) > 1 else None
+        for family in self.families:
+            for key in family.pairs():
+                if seen_in_families is not None:
+                    if key in seen_in_families:
+                        continue
+                    seen_in_families.add(key)
+                yield key
+        for key in dict.keys(self):
+            if not any(family.contains(*key) for family in self.families):
+                yield key
+        return
+
+    def explicit_keys(self) -> Iterator[Tuple[int, int]]:
+        return dict.keys(self)
+
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return self.keys()
+
+    def __len__(self) -> int:
+        if len(self.families) > 1:
+            # The families may share pairs, only the enumeration tells them apart
+            return sum(1 for _ in self.keys())
+        families_pairs_count = sum(
+            family.neighbours_count(variable_index)
+            for family in self.families
+            for variable_index in family.scope
+        )
+        explicit_pairs_count = sum(
+            1
+            for key in dict.keys(self)
+            if not any(family.contains(*key) for family in self.families)
+        )
+        return families_pairs_count + explicit_pairs_count
+
+    def items(self) -> Iterator[Tuple[Tuple[int, int], Constraint]]:
+        for key in self.keys():
+            yield key, self.get(key)
+        return
+
+    def values(self) -> Iterator[Constraint]:
+        for key in self.keys():
+            yield self.get(key)
+        return
+
+    def explicit_items(self):
+        return dict.items(self)
+
+
+class Neighbourhood:
+    """
+    The set of the variables constraining a variable, made of an explicit set and of the neighbours
+    given by the families, which are never stored.
+    """
+
+    explicit_neighbours: set
+    families: list[ConstraintFamily]
+    variable_index: int
+
+    def __init__(
+        self, explicit_neighbours: set, families: list, variable_index: int
+    ) -> None:
+        self.explicit_neighbours = explicit_neighbours
+        self.families = families
+        self.variable_index = variable_index
+        return
+
+    def __iter__(self) -> Iterator[int]:
+        if len(self.families) == 1 and not self.explicit_neighbours:
+            return iter(self.families[0].neighbours(self.variable_index))
+        return self._merged_neighbours()
+
+    def _merged_neighbours(self) -> Iterator[int]:
+        seen = set()
+        for family in self.families:
+            for linked_variable_index in family.neighbours(self.variable_index):
+                if linked_variable_index not in seen:
+                    seen.add(linked_variable_index)
+                    yield linked_variable_index
+        for linked_variable_index in self.explicit_neighbours:
+            if linked_variable_index not in seen:
+                yield linked_variable_index
+        return
+
+    def __contains__(self, linked_variable_index: int) -> bool:
+        return linked_variable_index in self.explicit_neighbours or any(
+            family.contains(self.variable_index, linked_variable_index)
+            for family in self.families
+        )
+
+    def __len__(self) -> int:
+        if len(self.families) == 1 and not self.explicit_neighbours:
+            return self.families[0].neighbours_count(self.variable_index)
+        return sum(1 for _ in self)
+
+    def add(self, linked_variable_index: int) -> None:
+        self.explicit_neighbours.add(linked_variable_index)
+        return
+
+
+class FamilyNeighbourhoods(dict):
+    """
+    The variable_is_constrained_by dict of a CSP holding constraint families. It stores the explicit
+    neighbours sets and returns for each variable a Neighbourhood adding the families' neighbours.
+    """
+
+    families: list[ConstraintFamily]
+
+    def __init__(self, explicit_neighbours: dict, families: list) -> None:
+        super().__init__(explicit_neighbours)
+        self.families = families
+        return
+
+    def __getitem__(self, variable_index: int) -> Neighbourhood:
+        return Neighbourhood(
+            explicit_neighbours=dict.__getitem__(self, variable_index),
+            families=self.families,
+            variable_index=variable_index,
+        )
+
+    def get(self, variable_index: int, default=None):
+        if not dict.__contains__(self, variable_index):
+            return default
+        return self[variable_index]
+
+    def values(self) -> Iterator[Neighbourhood]:
+        for variable_index in dict.keys(self):
+            yield self[variable_index]
+        return
+
+    def items(self) -> Iterator[Tuple[int, Neighbourhood]]:
+        for variable_index in dict.keys(self):
+            yield variable_index, self[variable_index]
+        return
@@ -1,4 +1,4 @@
-from typing import Tuple
+from typing import Iterator, Tuple
 
 from constants import (
     Domains,
@@ -7,6 +7,14 @@ from constants import (
     Variables,
     Constraint,
     VariableValue,
+    UnaryConstraint,
+)
+
+from .constraint_family import ConstraintFamily, FamilyConstraints, FamilyNeighbourhoods
+from .vectorized_constraint import (
+    combine_vectorized_forms,
+    is_symmetric,
+    swap_vectorized_form,
 )
 
 
@@ -28,6 +36,13 @@ class CSP:
             to provide easier functions where one would for instance build a constraint on "Apple" and "Pear" rather than 1
             and 14.
         - variable_is_constrained_by : a dict which stores for each variables what variables it is constrained by.
+
+    Constraints on more than two variables (LinearConstraint from the wrappers) are stored in global_constraints.
+    They only need variables_indices, is_satisfied(state), propagate(...) and reindexed(new_indices).
+
+    Constraints shared by many pairs of variables (n-queens) can be declared once as a ConstraintFamily.
+    The families are never materialized: constraints and variable_is_constrained_by then become dicts
+    answering the families' pairs on the fly, the explicit constraints still being plain dict entries.
     """
 
     # Init/provided variables
@@ -37,6 +52,10 @@ class CSP:
     # Built variables
     variables_to_index_dict: dict
     variable_is_constrained_by: dict = None
+    constraint_families: list[ConstraintFamily]
+    # Global (n-ary) constraints, and for each variable the global constraints it is in
+    global_constraints: list
+    variable_global_constraints: dict
 
     # Building functions
     def __init__(
@@ -44,9 +63,16 @@ class CSP:
         variables: Variables,
         domains: Domains,
         constraints: Constraints,
+        constraint_families: list[ConstraintFamily] = None,
     ) -> None:
         self.variables = variables
         self.domains = domains
+        self.constraint_families = []
+        # The constraints of another CSP may hold families, split them from the explicit ones
+        # (which are already intersected with them).
+        if isinstance(constraints, FamilyConstraints):
+            self.constraint_families.extend(constraints.families)
+            constraints = dict(constraints.explicit_items())
         self.constraints = constraints
         # Self built variables
         self.variables_to_index_dict = {
@@ -56,6 +82,30 @@ class CSP:
             index: set() for index in range(len(variables))
         }
         self._update_constrained_information_with_constraints(constraints=constraints)
+        self.global_constraints = []
+        self.variable_global_constraints = {
+            index: [] for index in range(len(variables))
+        }
+        if self.constraint_families:
+            self._use_families_mappings()
+        for family in constraint_families or []:
+            self.add_constraint_family(family=family)
+
+    def _use_families_mappings(self) -> None:
+        """
+        Switch constraints and variable_is_constrained_by to the mappings answering the families' pairs.
+        """
+        if not isinstance(self.constraints, FamilyConstraints):
+            self.constraints = FamilyConstraints(
+                explicit_constraints=self.constraints,
+                families=self.constraint_families,
+            )
+        if not isinstance(self.variable_is_constrained_by, FamilyNeighbourhoods):
+            self.variable_is_constrained_by = FamilyNeighbourhoods(
+                explicit_neighbours=self.variable_is_constrained_by,
+                families=self.constraint_families,
+            )
+        return
 
     def _update_constrained_information_with_single_constraint(
         self, index_variable_1: int, index_variable_2: int
@@ -112,6 +162,11 @@ class CSP:
         for (i, j), constraint in self.constraints.items():
             str_representation += f"{(self.variables[i], self.variables[j])}  {self._build_tuples_from_constraint(i, j, constraint)}.\n"
 
+        if self.global_constraints:
+            str_representation += "\nGlobal constraints:\n"
+            for global_constraint in self.global_constraints:
+                str_representation += f"{global_constraint}\n"
+
         return str_representation
 
     def _swap_constraint(
@@ -119,10 +174,16 @@ class CSP:
         constraint: Constraint,
     ) -> Constraint:
         """
-        We swap a constraint so that it takes the variables in the opposite order.
+        We swap a constraint so that it takes the variables in the opposite order. A symmetric constraint
+        (alldiff) is its own swapped version, its vectorized form is kept.
         """
-        return lambda i, j, value_var_i, value_var_j: constraint(
-            j, i, value_var_j, value_var_i
+        if is_symmetric(constraint):
+            return constraint
+        return swap_vectorized_form(
+            constraint=constraint,
+            swapped_constraint=lambda i, j, value_var_i, value_var_j: constraint(
+                j, i, value_var_j, value_var_i
+            ),
         )
 
     def _combine_two_constraints(
@@ -131,9 +192,16 @@ class CSP:
         """
         This function combines two constraint on the same variables to build a new one.
         """
-        return lambda i, j, value_var_i, value_var_j: current_constraint(
+        if current_constraint is new_constraint:
+            # The same constraint given twice, as the sudoku does for both orders of a pair
+            return current_constraint
+        combined_constraint = lambda i, j, value_var_i, value_var_j: current_constraint(
             i, j, value_var_i, value_var_j
         ) and new_constraint(i, j, value_var_i, value_var_j)
+        return combine_vectorized_forms(
+            constraints=[current_constraint, new_constraint],
+            combined_constraint=combined_constraint,
+        )
 
     def add_constraint(
         self,
@@ -209,3 +277,99 @@ class CSP:
                 new_constraint=constraint,
             )
         return
+
+    def remove_constraint(
+        self, index_variable_1: int, index_variable_2: int
+    ) -> Constraint:
+        """
+        Removes the constraint between two variables, in both orders, and returns it oriented for
+        (index_variable_1, index_variable_2). The pairs of a constraint family can't be removed.
+        """
+        if any(
+            family.contains(index_variable_1, index_variable_2)
+            for family in self.constraint_families
+        ):
+            raise ValueError(
+                f"The constraint between {index_variable_1} and {index_variable_2} belongs to a family"
+            )
+        removed_constraint = self.constraints.pop((index_variable_1, index_variable_2))
+        del self.constraints[(index_variable_2, index_variable_1)]
+        # The explicit neighbours, even when the families mappings are used
+        dict.__getitem__(self.variable_is_constrained_by, index_variable_1).discard(
+            index_variable_2
+        )
+        dict.__getitem__(self.variable_is_constrained_by, index_variable_2).discard(
+            index_variable_1
+        )
+        return removed_constraint
+
+    def neighbour_constraints(
+        self, variable_index: int, towards: bool = False
+    ) -> Iterator[Tuple[int, Constraint]]:
+        """
+        Iterates over the variables constraining the variable with the constraint oriented from the
+        variable to each of them, or from each of them to the variable if towards. The forward checking
+        and the arc consistency go through it, the CompactCSP answering it without a lookup per neighbour.
+        """
+        constraints = self.constraints
+        for linked_variable_index in self.variable_is_constrained_by[variable_index]:
+            if towards:
+                key = (linked_variable_index, variable_index)
+            else:
+                key = (variable_index, linked_variable_index)
+            yield linked_variable_index, constraints[key]
+        return
+
+    def add_constraint_family(self, family: ConstraintFamily) -> None:
+        """
+        Adds a constraint family to the CSP. Nothing is stored per pair, except for the pairs which
+        already hold an explicit constraint: it is intersected with the family once and for all.
+        """
+        explicit_keys = (
+            list(self.constraints.explicit_keys())
+            if isinstance(self.constraints, FamilyConstraints)
+            else list(self.constraints.keys())
+        )
+        for index_variable_1, index_variable_2 in explicit_keys:
+            if family.contains(index_variable_1, index_variable_2):
+                self.constraints[
+                    (index_variable_1, index_variable_2)
+                ] = self._combine_two_constraints(
+                    current_constraint=self.constraints[
+                        (index_variable_1, index_variable_2)
+                    ],
+                    new_constraint=family.constraint_for(
+                        index_variable_1, index_variable_2
+                    ),
+                )
+        self.constraint_families.append(family)
+        self._use_families_mappings()
+        return
+
+    def add_unary_constraint(
+        self, index_variable: int, unary_constraint: UnaryConstraint
+    ) -> None:
+        """
+        A unary constraint is applied once and for all by removing the values violating it from the domain.
+        An IntervalDomain becomes a list.
+        """
+        self.domains[index_variable] = [
+            value for value in self.domains[index_variable] if unary_constraint(value)
+        ]
+        return
+
+    def add_global_constraint(self, global_constraint) -> None:
+        """
+        Adds a constraint on any number of variables, which is checked and propagated by the backtrack
+        on its own rather than through the binary constraints dict.
+        """
+        self.global_constraints.append(global_constraint)
+        for variable_index in global_constraint.variables_indices:
+            self.variable_global_constraints[variable_index].append(global_constraint)
+        return
+
+    def remove_global_constraint(self, global_constraint) -> None:
+        self.global_constraints.remove(global_constraint)
+        for variable_index in global_constraint.variables_indices:
+            self.variable_global_constraints[variable_index].remove(global_constraint)
+        return
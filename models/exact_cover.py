@@ -0,0 +1,87 @@
+# This file implements the exact cover model: sudoku and n-queens are exact cover problems, each row
+# being an assignment of a variable and covering the columns of the constraints this assignment
+# fulfills. A solution is a set of rows covering every primary column exactly once and every secondary
+# column at most once. The dancing links solver of backtrack searches it.
+from constants import Domains, Variable, Variables, VariableValue
+
+
+class ExactCoverProblem:
+    """
+    An exact cover problem is represented in the following way:
+        - the columns are the indices 0 to primary_columns_count - 1 for the primary ones, which must
+            be covered exactly once, then secondary_columns_count secondary ones (the diagonals of the
+            n-queens), which can be left uncovered.
+        - rows[r] is the list of the columns covered by the row r, rows_assignments[r] the couple
+            (variable index, value) it stands for, so that a solution is read as the state of the CSP
+            of the same instance.
+        - given_rows are the rows which must be part of the solutions, the given cells of a sudoku.
+    """
+
+    variables: Variables
+    primary_columns_count: int
+    secondary_columns_count: int
+    rows: list[list[int]]
+    rows_assignments: list[tuple[int, VariableValue]]
+    given_rows: list[int]
+    # Row of each (variable index, value)
+    rows_by_assignment: dict
+
+    def __init__(
+        self,
+        variables: Variables,
+        primary_columns_count: int,
+        secondary_columns_count: int = 0,
+    ) -> None:
+        self.variables = variables
+        self.primary_columns_count = primary_columns_count
+        self.secondary_columns_count = secondary_columns_count
+        self.rows = []
+        self.rows_assignments = []
+        self.given_rows = []
+        self.rows_by_assignment = dict()
+        return
+
+    @property
+    def columns_count(self) -> int:
+        return self.primary_columns_count + self.secondary_columns_count
+
+    def add_row(
+        self, variable_index: int, value: VariableValue, columns: list[int]
+    ) -> int:
+        """
+        Adds the row of the assignment of value to the variable, covering columns, and returns its index.
+        """
+        for column in columns:
+            if not 0 <= column < self.columns_count:
+                raise ValueError(f"No column {column} in the problem")
+        self.rows.append(list(columns))
+        self.rows_assignments.append((variable_index, value))
+        self.rows_by_assignment[(variable_index, value)] = len(self.rows) - 1
+        return len(self.rows) - 1
+
+    def rows_of_domains(self, domains: Domains) -> list[int]:
+        """
+        The rows of the variables whose domain is a single value, the given cells of a sudoku: another grid
+        of the same size is solved with the same problem by giving these rows to the solver.
+        """
+        given_rows = []
+        for variable_index, domain in enumerate(domains):
+            if len(domain) != 1:
+                continue
+            row = self.rows_by_assignment.get((variable_index, domain[0]))
+            if row is None:
+                raise ValueError(
+                    f"No row for the value {domain[0]} of {self.variables[variable_index]}"
+                )
+            given_rows.append(row)
+        return given_rows
+
+    def readable_state(self, rows: list[int]) -> dict[Variable, VariableValue]:
+        """
+        The state of the assignments of rows, with the names of the variables in their order.
+        """
+        assignments = sorted(self.rows_assignments[row] for row in rows)
+        return {
+            self.variables[variable_index]: value
+            for variable_index, value in assignments
+        }
@@ -0,0 +1,275 @@
+# This file implements the interval domains: the integers from low to high, never materialized,
+# for the models with wide numeric domains.
+from typing import Iterable, Iterator, Tuple, Union
+
+
+class IntervalDomain:
+    """
+    The domain of the integers from low to high (both included), usable wherever a list domain is.
+    The search removes values by swapping them after domains_last_valid_index and undoes it by moving the
+    index back (shrinking_operations being the trail), so the domain only has to behave as a list holding
+    a permutation of [low, high]. Only the positions written by the swaps are stored, in both directions,
+    every other position p holds low + (p + offset) % size: the memory is the number of values moved, not
+    the size of the domain. The offset is the rotation moving the smallest values of an untouched domain
+    after its valid part at once.
+        - size, min, max and membership of the whole interval are O(1).
+        - the position of a value, so knowing if it is in the valid part, is O(1).
+        - the bounds of the valid part cost O(number of holes) and removing the values outside some bounds
+            costs the number of values removed, this is what the bounds propagators use.
+    """
+
+    low: int
+    high: int
+    size: int
+    offset: int
+    # position -> value and value -> position, for the values moved from their position
+    values_at: dict
+    positions_of: dict
+
+    def __init__(self, low: int, high: int) -> None:
+        self.low = low
+        self.high = high
+        self.size = max(0, high - low + 1)
+        self.offset = 0
+        self.values_at = dict()
+        self.positions_of = dict()
+        return
+
+    def __len__(self) -> int:
+        return self.size
+
+    def __repr__(self) -> str:
+        return f"IntervalDomain({self.low}, {self.high})"
+
+    def _default_value(self, position: int) -> int:
+        return self.low + (position + self.offset) % self.size
+
+    def _default_position(self, value: int) -> int:
+        return (value - self.low - self.offset) % self.size
+
+    def _value_at(self, position: int) -> int:
+        if position in self.values_at:
+            return self.values_at[position]
+        return self.low + (position + self.offset) % self.size
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[int, list]:
+        if isinstance(key, slice):
+            return [
+                self._value_at(position) for position in range(*key.indices(len(self)))
+            ]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("IntervalDomain index out of range")
+        return self._value_at(key)
+
+    def __setitem__(self, position: int, value: int) -> None:
+        if position < 0:
+            position += len(self)
+        if value == self._default_value(position):
+            self.values_at.pop(position, None)
+        else:
+            self.values_at[position] = value
+        if self._default_position(value) == position:
+            self.positions_of.pop(value, None)
+        else:
+            self.positions_of[value] = position
+        return
+
+    def __iter__(self) -> Iterator[int]:
+        for position in range(len(self)):
+            yield self._value_at(position)
+        return
+
+    def __contains__(self, value: int) -> bool:
+        return self.low <= value <= self.high
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, IntervalDomain):
+            return list(self) == list(other)
+        return isinstance(other, list) and list(self) == other
+
+    def copy(self) -> "IntervalDomain":
+        domain_copy = IntervalDomain(low=self.low, high=self.high)
+        domain_copy.offset = self.offset
+        domain_copy.values_at = dict(self.values_at)
+        domain_copy.positions_of = dict(self.positions_of)
+        return domain_copy
+
+    def position_of(self, value: int) -> int:
+        """
+        Returns the position of the value, -1 if it is not in the domain.
+        The backtrack overwrites the first value of the last assigned variable for a while, so a stored
+        position may be outdated: it is always checked, and the moved values scanned as a last resort.
+        """
+        if value not in self:
+            return -1
+        position = self.positions_of.get(value, None)
+        if position is not None:
+            if self._value_at(position) == value:
+                return position
+            del self.positions_of[value]
+        position = self._default_position(value)
+        if self._value_at(position) == value:
+            return position
+        for position, moved_value in self.values_at.items():
+            if moved_value == value:
+                self.positions_of[value] = position
+                return position
+        return -1
+
+    def index(self, value: int) -> int:
+        position = self.position_of(value)
+        if position < 0:
+            raise ValueError(f"{value} is not in {self}")
+        return position
+
+    def valid_contains(self, value: int, last_valid_index: int) -> bool:
+        return 0 <= self.position_of(value) <= last_valid_index
+
+    def valid_bounds(self, last_valid_index: int) -> Tuple[int, int]:
+        """
+        Min and max of the values up to last_valid_index, looking at the smallest of the valid part and
+        of the holes (the removed values after it).
+        """
+        if self._is_ascending_up_to(last_valid_index=last_valid_index):
+            return (
+                self.low + self.offset,
+                self.low + self.offset + last_valid_index,
+            )
+        if last_valid_index + 1 <= len(self) - last_valid_index - 1:
+            valid_values = self[: last_valid_index + 1]
+            return min(valid_values), max(valid_values)
+        holes = set(self[last_valid_index + 1 :])
+        valid_min = self.low
+        while valid_min in holes:
+            valid_min += 1
+        valid_max = self.high
+        while valid_max in holes:
+            valid_max -= 1
+        return valid_min, valid_max
+
+    def _is_ascending_up_to(self, last_valid_index: int) -> bool:
+        """
+        Nothing was swapped and the rotation doesn't wrap before last_valid_index: the valid part is the
+        interval from low + offset, in order.
+        """
+        return not self.values_at and self.offset + last_valid_index < self.size
+
+    def remove_values_outside(
+        self, lower_bound: int, upper_bound: int, last_valid_index: int
+    ) -> int:
+        """
+        Swaps the valid values under lower_bound or above upper_bound after the valid part and returns the
+        new last valid index, -1 when nothing is left. The caller records the removals.
+        """
+        valid_min, valid_max = self.valid_bounds(last_valid_index=last_valid_index)
+        if lower_bound > valid_max or upper_bound < valid_min:
+            return -1
+        if (
+            lower_bound > valid_min
+            and self._is_ascending_up_to(last_valid_index=last_valid_index)
+            and self.offset + last_valid_index == self.size - 1
+        ):
+            # The valid part ends with the largest value: a rotation puts the values under lower_bound
+            # just after it, the values already removed keep their positions
+            last_valid_index -= lower_bound - valid_min
+            self.offset = lower_bound - self.low
+            self.positions_of.clear()
+            valid_min = lower_bound
+        if lower_bound <= valid_min and self._is_ascending_up_to(
+            last_valid_index=last_valid_index
+        ):
+            # The largest values are already at the end of the valid part
+            return min(last_valid_index, upper_bound - self.low - self.offset)
+        # The values at the end of the valid part don't have to move
+        while (
+            last_valid_index >= 0
+            and not lower_bound <= self._value_at(last_valid_index) <= upper_bound
+        ):
+            last_valid_index -= 1
+        if last_valid_index < 0:
+            return -1
+        valid_min, valid_max = self.valid_bounds(last_valid_index=last_valid_index)
+        values_to_remove = range(valid_min, min(lower_bound, valid_max + 1))
+        if upper_bound < valid_max:
+            values_to_remove = list(values_to_remove) + list(
+                range(max(upper_bound + 1, valid_min), valid_max + 1)
+            )
+        return self.remove_values(
+            values=values_to_remove, last_valid_index=last_valid_index
+        )
+
+    def remove_values(self, values: Iterable[int], last_valid_index: int) -> int:
+        """
+        Swaps the given values after the valid part if they are in it and returns the new last valid index.
+        The caller records the removals.
+        """
+        for value in values:
+            position = self.position_of(value)
+            if 0 <= position <= last_valid_index:
+                last_value = self._value_at(last_valid_index)
+                self[position] = last_value
+                self[last_valid_index] = value
+                last_valid_index -= 1
+        return last_valid_index
+
+    def valid_part(self, last_valid_index: int) -> Union["IntervalDomain", list]:
+        """
+        The values up to last_valid_index as a new domain: an interval again if they have no hole, a list
+        otherwise.
+        """
+        if last_valid_index < 0:
+            return []
+        valid_min, valid_max = self.valid_bounds(last_valid_index=last_valid_index)
+        if valid_max - valid_min == last_valid_index:
+            return IntervalDomain(low=valid_min, high=valid_max)
+        return self[: last_valid_index + 1]
+
+
+def domain_valid_bounds(domain, last_valid_index: int) -> Tuple[int, int]:
+    """
+    Min and max of the valid part of a domain, a list or an IntervalDomain.
+    """
+    if isinstance(domain, IntervalDomain):
+        return domain.valid_bounds(last_valid_index=last_valid_index)
+    valid_domain = domain[: last_valid_index + 1]
+    return min(valid_domain), max(valid_domain)
+
+
+def remove_valid_values_between(
+    domain, lower_bound: int, upper_bound: int, last_valid_index: int
+) -> int:
+    """
+    Swaps the valid values of a domain (a list or an IntervalDomain) in [lower_bound, upper_bound] after
+    its valid part and returns the new last valid index. The caller records the removals.
+    """
+    if isinstance(domain, IntervalDomain):
+        valid_min, valid_max = domain.valid_bounds(last_valid_index=last_valid_index)
+        if lower_bound <= valid_min:
+            return domain.remove_values_outside(
+                lower_bound=upper_bound + 1,
+                upper_bound=valid_max,
+                last_valid_index=last_valid_index,
+            )
+        if upper_bound >= valid_max:
+            return domain.remove_values_outside(
+                lower_bound=valid_min,
+                upper_bound=lower_bound - 1,
+                last_valid_index=last_valid_index,
+            )
+        return domain.remove_values(
+            values=range(lower_bound, upper_bound + 1),
+            last_valid_index=last_valid_index,
+        )
+    position = 0
+    while position <= last_valid_index:
+        if lower_bound <= domain[position] <= upper_bound:
+            domain[position], domain[last_valid_index] = (
+                domain[last_valid_index],
+                domain[position],
+            )
+            last_valid_index -= 1
+        else:
+            position += 1
+    return last_valid_index
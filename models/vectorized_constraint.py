@@ -0,0 +1,68 @@
+# This file implements the optional vectorized form of the binary constraints: the same predicate
+# evaluated on NumPy arrays of values, so that a whole domain is checked in a single call. It is
+# stored as the `vectorized` attribute of the constraint, plain lambdas without it keep working.
+from constants import Constraint, VectorizedConstraint
+
+
+def with_vectorized_form(
+    constraint: Constraint,
+    vectorized_constraint: VectorizedConstraint,
+    symmetric: bool = False,
+) -> Constraint:
+    """
+    Attaches to a constraint its vectorized form, called as vectorized_constraint(i, j, values_i, values_j)
+    where values_i and values_j are NumPy arrays broadcast against each other, and returning the boolean
+    mask of the valid couples. With symmetric the constraint gives the same result when both the indices
+    and the values are swapped, so it is stored as is in both orders.
+    """
+    constraint.vectorized = vectorized_constraint
+    constraint.symmetric = symmetric
+    return constraint
+
+
+def vectorized_form(constraint: Constraint) -> VectorizedConstraint:
+    """
+    Returns the vectorized form of a constraint, None if it has none.
+    """
+    return getattr(constraint, "vectorized", None)
+
+
+def is_symmetric(constraint: Constraint) -> bool:
+    return getattr(constraint, "symmetric", False)
+
+
+def swap_vectorized_form(
+    constraint: Constraint, swapped_constraint: Constraint
+) -> Constraint:
+    """
+    Gives the swapped version of a constraint the swapped vectorized form, if the constraint has one.
+    """
+    if (vectorized_constraint := vectorized_form(constraint)) is not None:
+        swapped_constraint.vectorized = (
+            lambda i, j, values_i, values_j: vectorized_constraint(
+                j, i, values_j, values_i
+            )
+        )
+    return swapped_constraint
+
+
+def combine_vectorized_forms(
+    constraints: list[Constraint], combined_constraint: Constraint
+) -> Constraint:
+    """
+    Gives the conjunction of constraints the conjunction of their vectorized forms, if they all have one.
+    """
+    vectorized_constraints = [vectorized_form(constraint) for constraint in constraints]
+    if all(
+        vectorized_constraint is not None
+        for vectorized_constraint in vectorized_constraints
+    ):
+
+        def combined_vectorized_constraint(i, j, values_i, values_j):
+            mask = vectorized_constraints[0](i, j, values_i, values_j)
+            for vectorized_constraint in vectorized_constraints[1:]:
+                mask = mask & vectorized_constraint(i, j, values_i, values_j)
+            return mask
+
+        combined_constraint.vectorized = combined_vectorized_constraint
+    return combined_constraint
@@ -0,0 +1,14 @@
+from .solve_jobs import (
+    JOB_KINDS,
+    SUDOKU_JOB,
+    COLORING_JOB,
+    QUEENS_JOB,
+    ACCEPTED_EVENT,
+    PROGRESS_EVENT,
+    INCUMBENT_EVENT,
+    RESULT_EVENT,
+    ERROR_EVENT,
+    run_solve_job,
+    validate_solve_job,
+)
+from .solve_service import SolveService
@@ -0,0 +1,63 @@
+# Command line entry point of the solve service, run from the root of the repository:
+#   python -m service < jobs.jsonl
+#   python -m service --socket /tmp/solver.sock --workers 4
+import argparse
+import asyncio
+import sys
+
+from .solve_jobs import DEFAULT_WARM_MODELS
+from .solve_service import DEFAULT_WORKERS, SolveService
+
+
+async def serve(parsed_arguments: argparse.Namespace) -> None:
+    async with SolveService(
+        workers=parsed_arguments.workers,
+        warm_models=parsed_arguments.warm_models,
+        default_time_limit=parsed_arguments.time_limit,
+        cache_directory=parsed_arguments.cache_dir,
+    ) as service:
+        if parsed_arguments.socket is None and parsed_arguments.port is None:
+            await service.serve_stdio()
+        else:
+            await service.serve_socket(
+                socket_path=parsed_arguments.socket, port=parsed_arguments.port
+            )
+    return
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m service",
+        description="Runs solve jobs given as JSON lines on stdin or on a local socket.",
+    )
+    listening = parser.add_mutually_exclusive_group()
+    listening.add_argument("--socket", default=None, help="unix socket path")
+    listening.add_argument("--port", type=int, default=None, help="localhost TCP port")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS)
+    parser.add_argument(
+        "--warm-models",
+        type=int,
+        default=DEFAULT_WARM_MODELS,
+        help="models kept loaded by each worker",
+    )
+    parser.add_argument(
+        "--time-limit",
+        type=float,
+        default=-1,
+        help="seconds per job without time_limit, -1 for none",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        help="directory of the on-disk cache of the graphs and proven colorings",
+    )
+    parsed_arguments = parser.parse_args(arguments)
+    try:
+        asyncio.run(serve(parsed_arguments=parsed_arguments))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
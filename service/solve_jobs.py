@@ -0,0 +1,307 @@
+# This file implements the solve jobs of the service: their validation, and their run in a worker
+# process where the models built by the previous jobs are kept warm. A job is a JSON object:
+#   {"id": "a", "kind": "sudoku", "grid": ["530070000", ...], "config": "forward_smallest", "time_limit": 10}
+#   {"id": "b", "kind": "coloring", "graph_path": "myciel5.col.txt", "config": {"use_forward_checking": true}}
+#   {"id": "c", "kind": "queens", "n": 30}
+# and its run sends events, JSON objects too, the last one being its result (or an error).
+import os
+from collections import OrderedDict
+from pathlib import Path
+from time import perf_counter
+from typing import Callable
+
+from backtrack import SEARCH_STRATEGIES, BacktrackClass
+from backtrack.values_ordering_algorithms import naive_values_ordering
+from backtrack.variables_choosing_algorithms import (
+    naive_variable_choosing,
+    random_variable_choosing,
+    smallest_domain_variable_choosing,
+)
+from benchmarks.benchmark_configurations import SOLVER_CONFIGURATIONS
+from instances import (
+    COLORING_INSTANCES_PATH,
+    InstanceCache,
+    SUDOKU_INSTANCES_PATH,
+    coloring_optimization,
+    coloring_problem,
+    n_queens_problem,
+    sudoku_domains,
+    sudoku_grid_problem,
+)
+
+SUDOKU_JOB = "sudoku"
+COLORING_JOB = "coloring"
+QUEENS_JOB = "queens"
+JOB_KINDS = [SUDOKU_JOB, COLORING_JOB, QUEENS_JOB]
+
+# Events sent by a job
+ACCEPTED_EVENT = "accepted"
+PROGRESS_EVENT = "progress"
+INCUMBENT_EVENT = "incumbent"
+RESULT_EVENT = "result"
+ERROR_EVENT = "error"
+
+# Options of the BacktrackClass a job can set in its config, the heuristics being given by name
+CONFIG_OPTIONS = {
+    "use_arc_consistency": bool,
+    "use_forward_checking": bool,
+    "arc_consistency_frequency": int,
+    "adaptive_propagation": bool,
+    "node_limit": int,
+    "memory_limit": int,
+    "use_presolve": bool,
+    "use_singleton_arc_consistency": bool,
+    "decompose_components": bool,
+    "use_tree_decomposition": bool,
+    "goods_table_size": int,
+    "search_strategy": str,
+    "max_discrepancies": int,
+    "next_variable_choosing_method": str,
+    "next_values_ordering_method": str,
+}
+# Heuristics which can be named, for each option
+NAMED_HEURISTICS = {
+    "next_variable_choosing_method": {
+        "naive_variable_choosing": naive_variable_choosing,
+        "smallest_domain_variable_choosing": smallest_domain_variable_choosing,
+        "random_variable_choosing": random_variable_choosing,
+    },
+    "next_values_ordering_method": {"naive_values_ordering": naive_values_ordering},
+}
+
+# Number of models kept warm by a worker
+DEFAULT_WARM_MODELS = 16
+
+# Models of the worker: key -> (CSP, copy of its initial domains), the least recently used first
+_warm_models = OrderedDict()
+
+
+def _solver_options(config) -> dict:
+    """
+    Returns the keyword arguments of the BacktrackClass of a config, either the name of one of the
+    benchmarks' SOLVER_CONFIGURATIONS or a dict of CONFIG_OPTIONS.
+    """
+    if config is None:
+        return dict()
+    if isinstance(config, str):
+        if config not in SOLVER_CONFIGURATIONS:
+            raise ValueError(f"Unknown solver configuration {config}")
+        return dict(SOLVER_CONFIGURATIONS[config])
+    if not isinstance(config, dict):
+        raise ValueError("The config must be a configuration name or an object")
+    options = dict()
+    for option, value in config.items():
+        if option not in CONFIG_OPTIONS:
+            raise ValueError(f"Unknown solver option {option}")
+        if not isinstance(value, CONFIG_OPTIONS[option]):
+            raise ValueError(
+                f"The solver option {option} must be a {CONFIG_OPTIONS[option].__name__}"
+            )
+        if option in NAMED_HEURISTICS:
+            if value not in NAMED_HEURISTICS[option]:
+                raise ValueError(f"Unknown heuristic {value}")
+            value = NAMED_HEURISTICS[option][value]
+        if option == "search_strategy" and value not in SEARCH_STRATEGIES:
+            raise ValueError(f"Unknown search strategy {value}")
+        options[option] = value
+    return options
+
+
+def _graph_path(graph_path: str) -> Path:
+    """
+    The bundled instances can be given by their name only.
+    """
+    path = Path(graph_path)
+    if not path.exists() and (COLORING_INSTANCES_PATH / graph_path).exists():
+        path = COLORING_INSTANCES_PATH / graph_path
+    if not path.is_file():
+        raise ValueError(f"No graph file {graph_path}")
+    return path
+
+
+def _sudoku_grid_lines(job: dict) -> list[str]:
+    """
+    A grid is given as its lines, as a single string of all its digits, or by the name of a bundled
+    instance.
+    """
+    if not isinstance(job.get("block_edge_size", 3), int):
+        raise ValueError("The block_edge_size must be an int")
+    if "instance" in job:
+        instance_path = SUDOKU_INSTANCES_PATH / Path(str(job["instance"])).name
+        if not instance_path.is_file():
+            raise ValueError(f"No sudoku instance {job['instance']}")
+        with open(instance_path, "r") as grid_file:
+            return grid_file.read().split()
+    grid = job.get("grid")
+    if isinstance(grid, str):
+        grid_edge_size = job.get("block_edge_size", 3) ** 2
+        grid = [
+            grid[start : start + grid_edge_size]
+            for start in range(0, len(grid), grid_edge_size)
+        ]
+    if not isinstance(grid, list) or not all(isinstance(line, str) for line in grid):
+        raise ValueError("A sudoku job needs a grid (lines of digits) or an instance")
+    return grid
+
+
+def validate_solve_job(job: dict) -> None:
+    """
+    Raises a ValueError if the job can't be run, so that it doesn't take a worker.
+    """
+    if not isinstance(job, dict):
+        raise ValueError("A job must be an object")
+    if job.get("kind") not in JOB_KINDS:
+        raise ValueError(f"The kind of a job must be one of {', '.join(JOB_KINDS)}")
+    if not isinstance(job.get("time_limit", -1), (int, float)):
+        raise ValueError("The time_limit must be a number of seconds")
+    _solver_options(config=job.get("config"))
+    if job["kind"] == SUDOKU_JOB:
+        _sudoku_grid_lines(job=job)
+    elif job["kind"] == COLORING_JOB:
+        _graph_path(graph_path=str(job.get("graph_path", "")))
+    elif not isinstance(job.get("n"), int) or job["n"] < 1:
+        raise ValueError("A queens job needs a positive n")
+    return
+
+
+def _warm_model(key: tuple, build_model: Callable, warm_models: int):
+    """
+    Returns the model of the key, built on the first use only. The backtrack reorders the domains in
+    place, they are restored from their initial copy.
+    """
+    if key in _warm_models:
+        _warm_models.move_to_end(key)
+        csp_instance, initial_domains = _warm_models[key]
+        for index, domain in enumerate(initial_domains):
+            csp_instance.domains[index] = domain.copy()
+        return csp_instance
+    csp_instance = build_model()
+    _warm_models[key] = (
+        csp_instance,
+        [domain.copy() for domain in csp_instance.domains],
+    )
+    while len(_warm_models) > warm_models:
+        _warm_models.popitem(last=False)
+    return csp_instance
+
+
+def _run_decision_job(
+    csp_instance, backtrack_object: BacktrackClass, start_time: float
+) -> dict:
+    found_solution, state = backtrack_object.run_backtrack(csp_instance=csp_instance)
+    return {
+        "event": RESULT_EVENT,
+        "found": found_solution,
+        "status": backtrack_object.status,
+        "stop_reason": backtrack_object.stop_reason,
+        "state": state,
+        "nodes": backtrack_object.nodes,
+        "time": perf_counter() - start_time,
+    }
+
+
+def _run_coloring_job(
+    job: dict,
+    backtrack_object: BacktrackClass,
+    send_event: Callable[[dict], None],
+    warm_models: int,
+    start_time: float,
+    cache: InstanceCache,
+) -> dict:
+    graph_path = _graph_path(graph_path=str(job["graph_path"]))
+    # A file edited since it was loaded is read again
+    key = (COLORING_JOB, str(graph_path.resolve()), os.stat(graph_path).st_mtime_ns)
+    coloring_instance = _warm_model(
+        key=key,
+        build_model=lambda: coloring_problem(graph_path=graph_path, cache=cache)[0],
+        warm_models=warm_models,
+    )
+    max_degree = max(
+        (
+            len(linked_variables)
+            for linked_variables in coloring_instance.variable_is_constrained_by.values()
+        ),
+        default=0,
+    )
+
+    def send_progress(progress: dict) -> None:
+        send_event(
+            dict(
+                {"event": INCUMBENT_EVENT if progress["found"] else PROGRESS_EVENT},
+                **progress,
+                time=perf_counter() - start_time,
+            )
+        )
+        return
+
+    colors, state, nodes, finished = coloring_optimization(
+        coloring_instance=coloring_instance,
+        max_degree=max_degree,
+        backtrack_object=backtrack_object,
+        time_limit=job.get("time_limit", -1),
+        progress_callback=send_progress,
+        cache=cache,
+    )
+    return {
+        "event": RESULT_EVENT,
+        "found": state is not None,
+        "colors": colors,
+        "finished": finished,
+        "state": state,
+        "nodes": nodes,
+        "time": perf_counter() - start_time,
+    }
+
+
+def run_solve_job(
+    job: dict,
+    send_event: Callable[[dict], None],
+    warm_models: int = DEFAULT_WARM_MODELS,
+    cache: InstanceCache = None,
+) -> dict:
+    """
+    Runs a validated job and returns its result event, the progress and incumbent events of the
+    optimization jobs being given to send_event meanwhile. The deadline of the job is its time_limit
+    (seconds, -1 for none), the time limit of its BacktrackClass. The components are never solved in
+    parallel processes, the jobs already are.
+    With a cache, the graphs are loaded from it and the proven colorings are returned from it.
+    """
+    start_time = perf_counter()
+    backtrack_object = BacktrackClass(
+        time_limit=job.get("time_limit", -1),
+        **_solver_options(config=job.get("config")),
+    )
+    if job["kind"] == COLORING_JOB:
+        return _run_coloring_job(
+            job=job,
+            backtrack_object=backtrack_object,
+            send_event=send_event,
+            warm_models=warm_models,
+            start_time=start_time,
+            cache=cache,
+        )
+    if job["kind"] == SUDOKU_JOB:
+        block_edge_size = job.get("block_edge_size", 3)
+        grid_lines = _sudoku_grid_lines(job=job)
+        # The constraints only depend on the size of the grid, the domains are those of the job
+        csp_instance = _warm_model(
+            key=(SUDOKU_JOB, block_edge_size),
+            build_model=lambda: sudoku_grid_problem(
+                grid_lines=grid_lines, block_edge_size=block_edge_size
+            ),
+            warm_models=warm_models,
+        )
+        csp_instance.domains[:] = sudoku_domains(
+            grid_lines=grid_lines, block_edge_size=block_edge_size
+        )
+    else:
+        csp_instance = _warm_model(
+            key=(QUEENS_JOB, job["n"]),
+            build_model=lambda: n_queens_problem(job["n"]),
+            warm_models=warm_models,
+        )
+    return _run_decision_job(
+        csp_instance=csp_instance,
+        backtrack_object=backtrack_object,
+        start_time=start_time,
+    )
@@ -0,0 +1,300 @@
+# This file implements the solve service: a long-lived asyncio process reading solve jobs as JSON lines
+# on stdin or on a local socket and running them in a pool of worker processes, which keep the stack
+# imported and the models of the previous jobs warm. Every event of a job is written back as a JSON line
+# holding the id of the job, so that the events of concurrent jobs can be told apart.
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import count
+from typing import Awaitable, Callable
+
+from backtrack.parallel_components import fork_is_available
+from instances import InstanceCache
+
+from .solve_jobs import (
+    ACCEPTED_EVENT,
+    DEFAULT_WARM_MODELS,
+    ERROR_EVENT,
+    RESULT_EVENT,
+    run_solve_job,
+    validate_solve_job,
+)
+
+DEFAULT_WORKERS = max(1, (os.cpu_count() or 1) - 1)
+
+# Queue of the events of the worker, set by its initializer
+_worker_events_queue = None
+_worker_warm_models = DEFAULT_WARM_MODELS
+_worker_cache = None
+
+
+def _initialize_worker(events_queue, warm_models: int, cache_directory: str) -> None:
+    global _worker_events_queue, _worker_warm_models, _worker_cache
+    _worker_events_queue = events_queue
+    _worker_warm_models = warm_models
+    if cache_directory is not None:
+        _worker_cache = InstanceCache(directory=cache_directory)
+    return
+
+
+def _run_job_in_worker(job_key: int, job: dict) -> None:
+    """
+    Runs in a worker: all the events of the job, the result included, go through the events queue so
+    that they reach the service in order.
+    """
+
+    def send_event(event: dict) -> None:
+        _worker_events_queue.put((job_key, event))
+        return
+
+    try:
+        result = run_solve_job(
+            job=job,
+            send_event=send_event,
+            warm_models=_worker_warm_models,
+            cache=_worker_cache,
+        )
+    except Exception as error:
+        result = {"event": ERROR_EVENT, "message": f"{type(error).__name__}: {error}"}
+    send_event(result)
+    return
+
+
+def _json_default(value):
+    # NumPy scalars, from the vectorized constraints or the local search
+    if hasattr(value, "item"):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def encode_event(event: dict) -> str:
+    return json.dumps(event, default=_json_default) + "\n"
+
+
+class SolveService:
+    """
+    Dispatches the solve jobs (see solve_jobs) to a pool of `workers` processes and sends their events:
+    accepted, then progress and incumbent for the optimization jobs, and finally result or error.
+    Each worker keeps its `warm_models` last models, so a job on a model already loaded only restores its
+    domains. A job without time_limit gets default_time_limit (seconds, -1 for none), its deadline is
+    enforced by the time limit of its BacktrackClass. With a cache_directory, the workers share an
+    InstanceCache there (see instances_cache).
+    The service is started and closed in the event loop: `async with SolveService() as service`.
+    """
+
+    workers: int
+    warm_models: int
+    default_time_limit: float
+    cache_directory: str
+    # job key -> (id of the job, function sending its events, future of its last event)
+    _listeners: dict
+    _job_keys: count
+    _loop: asyncio.AbstractEventLoop
+    _context: multiprocessing.context.BaseContext
+    _executor: ProcessPoolExecutor
+    _events_queue: object
+    _events_thread: threading.Thread
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        warm_models: int = DEFAULT_WARM_MODELS,
+        default_time_limit: float = -1,
+        cache_directory: str = None,
+    ) -> None:
+        self.workers = workers
+        self.warm_models = warm_models
+        self.default_time_limit = default_time_limit
+        self.cache_directory = cache_directory
+        self._listeners = dict()
+        self._job_keys = count()
+        return
+
+    async def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        # Forked workers inherit the imported stack, the others import it once when they start
+        self._context = (
+            multiprocessing.get_context("fork")
+            if fork_is_available()
+            else multiprocessing.get_context()
+        )
+        self._events_queue = self._context.Queue()
+        await self._start_executor()
+        self._events_thread = threading.Thread(target=self._forward_events, daemon=True)
+        self._events_thread.start()
+        return
+
+    async def _start_executor(self) -> None:
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=self._context,
+            initializer=_initialize_worker,
+            initargs=(self._events_queue, self.warm_models, self.cache_directory),
+        )
+        # The pool forks all its workers on its first task: they are forked now, as workers forked while
+        # clients are connected would inherit their sockets and keep them open.
+        await self._loop.run_in_executor(self._executor, int)
+        return
+
+    async def _replace_broken_executor(self, executor: ProcessPoolExecutor) -> None:
+        """
+        A worker died (killed, out of memory...) and the pool is broken: all its jobs fail and no job can be
+        submitted anymore, so a new pool takes its place. The jobs of the broken pool each call it, only
+        the first one builds the new pool.
+        """
+        if executor is not self._executor:
+            return
+        executor.shutdown(wait=False, cancel_futures=True)
+        await self._start_executor()
+        return
+
+    async def close(self) -> None:
+        await self._loop.run_in_executor(None, self._executor.shutdown)
+        self._events_queue.put(None)
+        await self._loop.run_in_executor(None, self._events_thread.join)
+        return
+
+    async def __aenter__(self) -> "SolveService":
+        await self.start()
+        return self
+
+    async def __aexit__(self, *_) -> None:
+        await self.close()
+        return
+
+    def _forward_events(self) -> None:
+        """
+        Runs in a thread: the events of the workers are handed to the event loop.
+        """
+        while (item := self._events_queue.get()) is not None:
+            self._loop.call_soon_threadsafe(self._dispatch_event, *item)
+        return
+
+    def _dispatch_event(self, job_key: int, event: dict) -> None:
+        if (listener := self._listeners.get(job_key)) is None:
+            return
+        job_id, send_event, last_event = listener
+        event = dict({"id": job_id}, **event)
+        send_event(event)
+        if event["event"] in (RESULT_EVENT, ERROR_EVENT):
+            del self._listeners[job_key]
+            last_event.set_result(event)
+        return
+
+    async def solve(self, job: dict, send_event: Callable[[dict], None]) -> dict:
+        """
+        Runs a job in the pool, its events being given to send_event as they come. Returns its last event,
+        the result or an error.
+        """
+        job_id = job.get("id") if isinstance(job, dict) else None
+        try:
+            validate_solve_job(job=job)
+        except ValueError as error:
+            event = {"id": job_id, "event": ERROR_EVENT, "message": str(error)}
+            send_event(event)
+            return event
+        job = dict(job)
+        job.setdefault("time_limit", self.default_time_limit)
+
+        job_key = next(self._job_keys)
+        last_event = self._loop.create_future()
+        self._listeners[job_key] = (job_id, send_event, last_event)
+        send_event({"id": job_id, "event": ACCEPTED_EVENT})
+        executor = self._executor
+        try:
+            await self._loop.run_in_executor(executor, _run_job_in_worker, job_key, job)
+        except Exception as error:
+            # The worker died before sending the result
+            if not last_event.done():
+                self._dispatch_event(
+                    job_key=job_key,
+                    event={
+                        "event": ERROR_EVENT,
+                        "message": f"{type(error).__name__}: {error}",
+                    },
+                )
+            if isinstance(error, BrokenProcessPool):
+                await self._replace_broken_executor(executor=executor)
+        return await last_event
+
+    async def serve_lines(
+        self,
+        read_line: Callable[[], Awaitable[bytes]],
+        send_event: Callable[[dict], None],
+    ) -> None:
+        """
+        Reads jobs, one JSON object per line, until the end of the input and runs them concurrently. It
+        returns once all of them are done.
+        """
+        jobs = set()
+        while line := await read_line():
+            if not line.strip():
+                continue
+            try:
+                job = json.loads(line)
+            except json.JSONDecodeError as error:
+                send_event({"id": None, "event": ERROR_EVENT, "message": str(error)})
+                continue
+            task = asyncio.create_task(self.solve(job=job, send_event=send_event))
+            jobs.add(task)
+            task.add_done_callback(jobs.discard)
+        if jobs:
+            await asyncio.gather(*jobs)
+        return
+
+    async def serve_stdio(self) -> None:
+        """
+        Serves the jobs written on stdin, the events being written on stdout.
+        """
+
+        def send_event(event: dict) -> None:
+            sys.stdout.write(encode_event(event=event))
+            sys.stdout.flush()
+            return
+
+        # Read in a thread as stdin may be a file, which asyncio can't watch
+        await self.serve_lines(
+            read_line=lambda: self._loop.run_in_executor(
+                None, sys.stdin.buffer.readline
+            ),
+            send_event=send_event,
+        )
+        return
+
+    async def _serve_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        def send_event(event: dict) -> None:
+            # The client may leave before the end of its jobs
+            if not writer.is_closing():
+                writer.write(encode_event(event=event).encode())
+            return
+
+        try:
+            await self.serve_lines(read_line=reader.readline, send_event=send_event)
+            await writer.drain()
+        finally:
+            writer.close()
+        return
+
+    async def serve_socket(self, socket_path: str = None, port: int = None) -> None:
+        """
+        Serves the jobs of the clients of a unix socket (socket_path) or of a TCP port of localhost, each
+        connection getting the events of its own jobs. It runs until it is cancelled.
+        """
+        if socket_path is not None:
+            server = await asyncio.start_unix_server(
+                self._serve_connection, path=socket_path
+            )
+        else:
+            server = await asyncio.start_server(
+                self._serve_connection, host="127.0.0.1", port=port
+            )
+        async with server:
+            await server.serve_forever()
+        return
@@ -0,0 +1,2 @@
+# Command line solver of a single instance, see __main__.py. Nothing is imported here so that
+# python -m solver starts with argparse only.
@@ -0,0 +1,284 @@
+# Command line entry point of the solver, run from the root of the repository:
+#   python -m solver sudoku expert1.txt --variables smallest
+#   python -m solver coloring myciel5.col.txt --consistency forward_arc
+#   python -m solver queens 30 --json
+#   python -m solver sudoku expert1.txt --exact-cover
+#   python -m solver coloring anna.col.txt --processes 4 --time-limit 60
+# Only argparse is imported at startup: the solver and the builder of the instance kind are imported
+# once the arguments are parsed, and the time spent importing them is reported with the stats.
+import argparse
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+
+SUDOKU_KIND = "sudoku"
+COLORING_KIND = "coloring"
+QUEENS_KIND = "queens"
+INSTANCE_KINDS = [SUDOKU_KIND, COLORING_KIND, QUEENS_KIND]
+
+# Builder of each kind in instances
+INSTANCE_BUILDERS = {
+    SUDOKU_KIND: "sudoku_problem",
+    COLORING_KIND: "coloring_problem",
+    QUEENS_KIND: "n_queens_problem",
+}
+# Options of the BacktrackClass of each consistency level
+CONSISTENCY_OPTIONS = {
+    "none": dict(),
+    "forward": dict(use_forward_checking=True),
+    "arc": dict(use_arc_consistency=True),
+    "forward_arc": dict(use_forward_checking=True, use_arc_consistency=True),
+    "adaptive": dict(adaptive_propagation=True),
+}
+# Variables choosing methods of backtrack.variables_choosing_algorithms
+VARIABLES_HEURISTICS = {
+    "naive": "naive_variable_choosing",
+    "smallest": "smallest_domain_variable_choosing",
+    "random": "random_variable_choosing",
+}
+
+
+def _import_solver(parsed_arguments: argparse.Namespace):
+    """
+    Imports the solver and the builder of the instance kind, returns the BacktrackClass of the arguments
+    and the builder.
+    """
+    import backtrack.variables_choosing_algorithms as variables_choosing_algorithms
+    import instances
+    from backtrack import BacktrackClass
+
+    backtrack_object = BacktrackClass(
+        next_variable_choosing_method=getattr(
+            variables_choosing_algorithms,
+            VARIABLES_HEURISTICS[parsed_arguments.variables],
+        ),
+        time_limit=parsed_arguments.time_limit,
+        node_limit=parsed_arguments.node_limit,
+        use_presolve=parsed_arguments.presolve,
+        **CONSISTENCY_OPTIONS[parsed_arguments.consistency],
+    )
+    return backtrack_object, getattr(
+        instances, INSTANCE_BUILDERS[parsed_arguments.kind]
+    )
+
+
+def _bundled_path(instance: str, bundled_instances_path: Path) -> Path:
+    """
+    The bundled grids and graphs can be given by their name only.
+    """
+    path = Path(instance)
+    if not path.exists() and (bundled_instances_path / instance).exists():
+        path = bundled_instances_path / instance
+    if not path.is_file():
+        raise ValueError(f"No instance file {instance}")
+    return path
+
+
+def _build_instance(parsed_arguments: argparse.Namespace, build_instance):
+    """
+    Returns the CSP of the instance and the max degree of a graph (None for the other kinds).
+    """
+    from instances import COLORING_INSTANCES_PATH, SUDOKU_INSTANCES_PATH
+
+    if parsed_arguments.kind == SUDOKU_KIND:
+        return (
+            build_instance(
+                instance_path=_bundled_path(
+                    instance=parsed_arguments.instance,
+                    bundled_instances_path=SUDOKU_INSTANCES_PATH,
+                ),
+                block_edge_size=parsed_arguments.block_edge_size,
+                exact_cover=parsed_arguments.exact_cover,
+            ),
+            None,
+        )
+    if parsed_arguments.kind == COLORING_KIND:
+        csp_coloring, max_degree = build_instance(
+            graph_path=_bundled_path(
+                instance=parsed_arguments.instance,
+                bundled_instances_path=COLORING_INSTANCES_PATH,
+            )
+        )
+        if parsed_arguments.colors is not None:
+            for variable_index in range(len(csp_coloring.variables)):
+                csp_coloring.domains[variable_index] = list(
+                    range(parsed_arguments.colors)
+                )
+        return csp_coloring, max_degree
+    return (
+        build_instance(
+            n=int(parsed_arguments.instance), exact_cover=parsed_arguments.exact_cover
+        ),
+        None,
+    )
+
+
+def _solve(
+    parsed_arguments: argparse.Namespace, csp_instance, max_degree, backtrack_object
+) -> dict:
+    """
+    A decision for the sudokus, the queens and the colorings with a number of colors, the optimization of
+    the colors otherwise. The exact cover problems are solved with the dancing links.
+    """
+    if parsed_arguments.exact_cover:
+        from backtrack import DancingLinksSolver
+
+        backtrack_object = DancingLinksSolver(
+            problem=csp_instance,
+            time_limit=parsed_arguments.time_limit,
+            node_limit=parsed_arguments.node_limit,
+        )
+        found_solution, state = backtrack_object.run()
+        return {
+            "found": found_solution,
+            "status": backtrack_object.status,
+            "nodes": backtrack_object.nodes,
+            "state": state,
+        }
+    if parsed_arguments.kind == COLORING_KIND and parsed_arguments.colors is None:
+        from instances import coloring_optimization
+
+        colors, state, nodes, finished = coloring_optimization(
+            coloring_instance=csp_instance,
+            max_degree=max_degree,
+            backtrack_object=backtrack_object,
+            time_limit=parsed_arguments.time_limit,
+            processes=parsed_arguments.processes,
+        )
+        if state is None and finished:
+            # The dichotomy never tests max_degree + 1 colors, which are always enough, a coloring with
+            # them is found without backtracking
+            for variable_index in range(len(csp_instance.variables)):
+                csp_instance.domains[variable_index] = list(range(colors))
+            _, state = backtrack_object.run_backtrack(csp_instance=csp_instance)
+            nodes = backtrack_object.nodes
+        return {
+            "found": state is not None,
+            "status": "optimal" if finished else backtrack_object.status,
+            "nodes": nodes,
+            "colors": colors,
+            "state": state if state is not None else dict(),
+        }
+    found_solution, state = backtrack_object.run_backtrack(csp_instance=csp_instance)
+    return {
+        "found": found_solution,
+        "status": backtrack_object.status,
+        "nodes": backtrack_object.nodes,
+        "state": state,
+    }
+
+
+def _print_result(parsed_arguments: argparse.Namespace, result: dict) -> None:
+    state = result["state"]
+    if not result["found"]:
+        print("No solution found")
+    elif parsed_arguments.kind == SUDOKU_KIND:
+        grid_edge_size = parsed_arguments.block_edge_size**2
+        for i in range(1, grid_edge_size + 1):
+            print(
+                " ".join(str(state[f"x_{i}_{j}"]) for j in range(1, grid_edge_size + 1))
+            )
+    elif parsed_arguments.kind == QUEENS_KIND:
+        # Column of the queen of each row
+        print(
+            " ".join(
+                str(state[f"{i}_col_queen"])
+                for i in range(1, int(parsed_arguments.instance) + 1)
+            )
+        )
+    else:
+        if "colors" in result:
+            print(f"colors {result['colors']}")
+        print(" ".join(f"{variable}={value}" for variable, value in state.items()))
+    print(
+        f"status {result['status']}  nodes {result['nodes']}  "
+        f"imports {result['import_time']:.3f}s  build {result['build_time']:.3f}s  "
+        f"solve {result['solve_time']:.3f}s"
+    )
+    return
+
+
+def main(arguments: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m solver",
+        description="Solves a sudoku grid, a DIMACS graph coloring or an n-queens instance.",
+    )
+    parser.add_argument("kind", choices=INSTANCE_KINDS)
+    parser.add_argument(
+        "instance",
+        help="grid file or bundled grid name, DIMACS file or bundled graph name, or n",
+    )
+    parser.add_argument(
+        "--variables", choices=list(VARIABLES_HEURISTICS), default="smallest"
+    )
+    parser.add_argument(
+        "--consistency", choices=list(CONSISTENCY_OPTIONS), default="forward"
+    )
+    parser.add_argument("--presolve", action="store_true")
+    parser.add_argument(
+        "--exact-cover",
+        action="store_true",
+        help="sudoku and queens: solve the exact cover problem with the dancing links",
+    )
+    parser.add_argument(
+        "--colors",
+        type=int,
+        default=None,
+        help="coloring: only decide wether this many colors are enough",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=1,
+        help="coloring: numbers of colors tested at once, sharing their bounds",
+    )
+    parser.add_argument("--block-edge-size", type=int, default=3)
+    parser.add_argument(
+        "--time-limit", type=int, default=-1, help="seconds, -1 for none"
+    )
+    parser.add_argument("--node-limit", type=int, default=-1)
+    parser.add_argument(
+        "--seed", type=int, default=None, help="of the random variables heuristic"
+    )
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    parsed_arguments = parser.parse_args(arguments)
+    if parsed_arguments.kind == QUEENS_KIND and not parsed_arguments.instance.isdigit():
+        parser.error("the instance of queens is the number of queens")
+    if parsed_arguments.kind == COLORING_KIND and parsed_arguments.exact_cover:
+        parser.error("a coloring has no exact cover problem")
+
+    start = perf_counter()
+    backtrack_object, build_instance = _import_solver(parsed_arguments=parsed_arguments)
+    if parsed_arguments.seed is not None:
+        import numpy as np
+
+        np.random.seed(parsed_arguments.seed)
+    import_time = perf_counter() - start
+    try:
+        csp_instance, max_degree = _build_instance(
+            parsed_arguments=parsed_arguments, build_instance=build_instance
+        )
+    except (OSError, ValueError) as error:
+        print(f"python -m solver: error: {error}", file=sys.stderr)
+        return 2
+    build_time = perf_counter() - start - import_time
+    result = _solve(
+        parsed_arguments=parsed_arguments,
+        csp_instance=csp_instance,
+        max_degree=max_degree,
+        backtrack_object=backtrack_object,
+    )
+    result["import_time"] = import_time
+    result["build_time"] = build_time
+    result["solve_time"] = perf_counter() - start - import_time - build_time
+
+    if parsed_arguments.json:
+        print(json.dumps(result))
+    else:
+        _print_result(parsed_arguments=parsed_arguments, result=result)
+    return 0 if result["found"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+# The packages of the repository are imported from its root, as in the notebooks and the benchmarks
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from instances import (
+    COLORING_INSTANCES_PATH,
+    SUDOKU_INSTANCES_PATH,
+    coloring_problem,
+    sudoku_problem,
+)
+
+
+# Helpers shared by the test modules, imported with "from conftest import ..."
+def lower_than(i, j, value_var_i, value_var_j) -> bool:
+    return value_var_i < value_var_j
+
+
+def valid_values(domains: list, domains_last_valid_index: list) -> list:
+    return [
+        sorted(domain[index] for index in range(last_valid + 1))
+        for domain, last_valid in zip(domains, domains_last_valid_index)
+    ]
+
+
+def coloring_model(instance_name: str, colors: int, compact: bool = False):
+    csp_instance, _ = coloring_problem(
+        graph_path=COLORING_INSTANCES_PATH / instance_name, compact=compact
+    )
+    for variable_index in range(len(csp_instance.variables)):
+        csp_instance.domains[variable_index] = list(range(colors))
+    return csp_instance
+
+
+def expert_sudoku():
+    return sudoku_problem(instance_path=SUDOKU_INSTANCES_PATH / "expert1.txt")
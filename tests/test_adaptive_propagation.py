@@ -0,0 +1,96 @@
+import pytest
+
+from backtrack import (
+    AC3_current_state,
+    ARC_CONSISTENCY_MODE,
+    FORWARD_CHECKING_MODE,
+    NO_PROPAGATION_MODE,
+    AdaptivePropagationScheduler,
+    BacktrackClass,
+)
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from conftest import lower_than
+from instances import SUDOKU_INSTANCES_PATH, n_queens_problem, sudoku_problem
+from models import CSP
+
+
+def test_arc_consistency_propagates_along_the_chain():
+    # x < y < z on [1, 3]: every removal must be propagated to the other end of the chain
+    csp_instance = CSP(
+        variables=["x", "y", "z"],
+        domains=[[1, 2, 3] for _ in range(3)],
+        constraints={},
+    )
+    csp_instance.add_constraint(
+        index_variable_1=0, index_variable_2=1, new_constraint=lower_than
+    )
+    csp_instance.add_constraint(
+        index_variable_1=1, index_variable_2=2, new_constraint=lower_than
+    )
+    domains_last_valid_index = [2, 2, 2]
+    assert not AC3_current_state(
+        csp_instance=csp_instance,
+        state=dict(),
+        shrinking_operations=dict(),
+        domains_last_valid_index=domains_last_valid_index,
+        last_variable_index=None,
+    )
+    assert [
+        domain[: last_valid + 1]
+        for domain, last_valid in zip(csp_instance.domains, domains_last_valid_index)
+    ] == [[1], [2], [3]]
+
+
+def test_scheduler_tries_each_mode_then_the_best_one():
+    with pytest.raises(ValueError):
+        AdaptivePropagationScheduler(modes=["unknown"])
+    scheduler = AdaptivePropagationScheduler(exploration_period=1000)
+    assert scheduler.root_mode() == ARC_CONSISTENCY_MODE
+    for mode, removed_values in (
+        (NO_PROPAGATION_MODE, 0),
+        (FORWARD_CHECKING_MODE, 10),
+        (ARC_CONSISTENCY_MODE, 1),
+    ):
+        assert scheduler.choose_mode() == mode
+        scheduler.record(
+            mode=mode,
+            removed_values=removed_values,
+            emptied_a_domain=False,
+            free_variables=5,
+            propagation_time=1e-6,
+        )
+    # The node time is measured from the second node on
+    scheduler.average_node_time = 1e-3
+    assert scheduler.choose_mode() == FORWARD_CHECKING_MODE
+    scheduler.reset()
+    assert scheduler.choose_mode() == NO_PROPAGATION_MODE
+
+
+def test_scheduler_explores_the_mode_used_the_longest_ago():
+    scheduler = AdaptivePropagationScheduler(exploration_period=4)
+    for _ in range(3):
+        mode = scheduler.choose_mode()
+        scheduler.record(
+            mode=mode,
+            removed_values=100 if mode == FORWARD_CHECKING_MODE else 0,
+            emptied_a_domain=False,
+            free_variables=5,
+            propagation_time=0.0,
+        )
+    assert scheduler.choose_mode() == NO_PROPAGATION_MODE
+
+
+def test_adaptive_propagation_solves():
+    for csp_instance in (
+        sudoku_problem(instance_path=SUDOKU_INSTANCES_PATH / "expert1.txt"),
+        n_queens_problem(n=20),
+    ):
+        backtrack_object = BacktrackClass(
+            use_forward_checking=True,
+            use_arc_consistency=True,
+            adaptive_propagation=True,
+            next_variable_choosing_method=smallest_domain_variable_choosing,
+        )
+        found_solution, state = backtrack_object.run_backtrack(csp_instance)
+        assert found_solution and len(state) == len(csp_instance.variables)
+        assert sum(backtrack_object.propagation_scheduler.mode_counts.values()) > 0
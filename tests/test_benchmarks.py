@@ -0,0 +1,54 @@
+from benchmarks import IMPROVEMENT_CHANGE, REGRESSION_CHANGE, compare_with_baseline
+
+
+def _record(instance: str, time_median: float, timed_out: bool, **fields) -> dict:
+    record = {
+        "suite": "queens",
+        "instance": instance,
+        "configuration": "default",
+        "found": True,
+        "time_median": time_median,
+        "nodes": 100,
+        "timed_out": timed_out,
+    }
+    record.update(fields)
+    return record
+
+
+def _changes_by_instance(results: list, baseline: list) -> dict:
+    return {
+        change["instance"]: (change["kind"], change["reasons"])
+        for change in compare_with_baseline(results=results, baseline=baseline)
+    }
+
+
+def test_timeouts_are_their_own_changes():
+    baseline = [
+        _record(instance="slower", time_median=1.0, timed_out=False),
+        _record(instance="now_times_out", time_median=1.0, timed_out=False),
+        _record(instance="no_longer_times_out", time_median=10.0, timed_out=True),
+        _record(instance="still_times_out", time_median=10.0, timed_out=True),
+    ]
+    results = [
+        _record(instance="slower", time_median=2.0, timed_out=False),
+        _record(instance="now_times_out", time_median=10.0, timed_out=True, nodes=500),
+        _record(instance="no_longer_times_out", time_median=0.5, timed_out=False),
+        # The time and the nodes of a timed out run only measure the limit
+        _record(
+            instance="still_times_out", time_median=12.0, timed_out=True, nodes=500
+        ),
+    ]
+    changes = _changes_by_instance(results=results, baseline=baseline)
+    assert changes["slower"] == (REGRESSION_CHANGE, ["time 1.000s -> 2.000s"])
+    assert changes["now_times_out"] == (REGRESSION_CHANGE, ["now times out"])
+    assert changes["no_longer_times_out"][0] == IMPROVEMENT_CHANGE
+    assert "still_times_out" not in changes
+
+
+def test_baselines_without_timeouts_are_compared():
+    baseline = [_record(instance="old", time_median=1.0, timed_out=False)]
+    del baseline[0]["timed_out"]
+    results = [_record(instance="old", time_median=1.0, timed_out=False, found=False)]
+    assert _changes_by_instance(results=results, baseline=baseline) == {
+        "old": (REGRESSION_CHANGE, ["lost solution"])
+    }
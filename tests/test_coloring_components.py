@@ -0,0 +1,47 @@
+import pytest
+
+from backtrack import BacktrackClass, SearchTracer
+from backtrack.parallel_components import fork_is_available
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import coloring_optimization, graph_coloring_problem
+
+# A triangle with a pendant node, a 4-cycle and an isolated node (indices from 0), the number of colors
+# of each component is under its max degree + 1 so that a coloring is found for each one
+COMPONENTS_EDGES = [(0, 1), (1, 2), (0, 2), (2, 7), (3, 4), (4, 5), (5, 6), (6, 3)]
+
+
+def _optimize_components(backtrack_object: BacktrackClass, processes: int = 1):
+    csp_coloring, max_degree = graph_coloring_problem(n=9, edges=iter(COMPONENTS_EDGES))
+    colors, state, _, finished = coloring_optimization(
+        coloring_instance=csp_coloring,
+        max_degree=max_degree,
+        backtrack_object=backtrack_object,
+        decompose_components=True,
+        processes=processes,
+    )
+    assert finished and colors == 3
+    for index_variable_1, index_variable_2 in csp_coloring.constraints:
+        assert (
+            state[csp_coloring.variables[index_variable_1]]
+            != state[csp_coloring.variables[index_variable_2]]
+        )
+    return state
+
+
+def test_components_leave_the_tracer_of_the_caller(tmp_path):
+    with SearchTracer(tmp_path / "run.trace") as tracer:
+        backtrack_object = BacktrackClass(
+            use_forward_checking=True,
+            next_variable_choosing_method=smallest_domain_variable_choosing,
+            tracer=tracer,
+        )
+        _optimize_components(backtrack_object=backtrack_object)
+        assert backtrack_object.tracer is tracer
+
+
+@pytest.mark.skipif(not fork_is_available(), reason="fork is needed")
+def test_components_in_parallel_processes():
+    state = _optimize_components(
+        backtrack_object=BacktrackClass(use_forward_checking=True), processes=2
+    )
+    assert len(state) == 9
@@ -0,0 +1,137 @@
+import pytest
+
+from backtrack import BacktrackClass
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from conftest import lower_than
+from instances import (
+    COLORING_INSTANCES_PATH,
+    SUDOKU_INSTANCES_PATH,
+    coloring_problem,
+    n_queens_problem,
+    sudoku_problem,
+)
+from models import CSP, CompactCSP, VariableNames
+from wrappers import alldiff
+
+
+def _solver() -> BacktrackClass:
+    return BacktrackClass(
+        use_forward_checking=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    )
+
+
+def _chain_csp() -> CSP:
+    csp_instance = CSP(
+        variables=["a", "b", "c", "d"],
+        domains=[[4, 3, 2, 1] for _ in range(4)],
+        constraints={},
+    )
+    for index in range(3):
+        csp_instance.add_constraint(
+            index_variable_1=index + 1,
+            index_variable_2=index,
+            new_constraint=lower_than,
+        )
+    return csp_instance
+
+
+def test_variable_names_are_computed_when_read():
+    variables = VariableNames(count=3, variable_name=lambda index: f"v{index}")
+    assert len(variables) == 3
+    assert list(variables) == ["v0", "v1", "v2"]
+    assert variables[-1] == "v2" and variables[1:] == ["v1", "v2"]
+    with pytest.raises(IndexError):
+        variables[3]
+
+
+def test_arcs_are_stored_once_and_swapped_on_lookup():
+    compact_csp = CompactCSP(variables_count=3, domains=[[1, 2, 3] for _ in range(3)])
+    compact_csp.add_constraint(
+        index_variable_1=1, index_variable_2=0, new_constraint=lower_than
+    )
+    compact_csp.add_constraint(
+        index_variable_1=1, index_variable_2=2, new_constraint=alldiff
+    )
+    # Given twice on an arc, the constraints are intersected
+    compact_csp.add_constraint(
+        index_variable_1=2,
+        index_variable_2=1,
+        new_constraint=lambda i, j, value_var_i, value_var_j: value_var_i != 3,
+    )
+    assert list(compact_csp.neighbours(1)) == [0, 2]
+    assert compact_csp.arcs_count() == 2
+    assert len(compact_csp.constraints) == 4
+    # x_1 < x_0
+    assert compact_csp.constraints[(1, 0)](1, 0, 1, 2)
+    assert compact_csp.constraints[(0, 1)](0, 1, 2, 1)
+    assert not compact_csp.constraints[(0, 1)](0, 1, 1, 2)
+    assert compact_csp.constraint_between(1, 2)(1, 2, 1, 2)
+    assert not compact_csp.constraint_between(1, 2)(1, 2, 1, 3)
+    assert not compact_csp.constraint_between(1, 2)(1, 2, 2, 2)
+    assert (0, 2) not in compact_csp.constraints
+
+    compact_csp.remove_constraint(index_variable_1=0, index_variable_2=1)
+    assert list(compact_csp.neighbours(0)) == []
+    with pytest.raises(KeyError):
+        compact_csp.remove_constraint(index_variable_1=0, index_variable_2=1)
+
+
+def test_shared_constraint_is_stored_once():
+    compact_coloring, _ = coloring_problem(
+        graph_path=COLORING_INSTANCES_PATH / "myciel4.col.txt", compact=True
+    )
+    assert compact_coloring.arcs_count() > 1
+    # alldiff and its swapped version, which is itself
+    assert len(compact_coloring.oriented_constraints) == 2
+
+
+def test_neighbour_constraints_are_oriented_like_the_lookups():
+    for csp_instance in (_chain_csp(), CompactCSP.from_csp(_chain_csp())):
+        for variable_index in range(4):
+            for towards in (False, True):
+                neighbour_constraints = list(
+                    csp_instance.neighbour_constraints(
+                        variable_index=variable_index, towards=towards
+                    )
+                )
+                assert [linked for linked, _ in neighbour_constraints] == list(
+                    csp_instance.variable_is_constrained_by[variable_index]
+                )
+                for linked_variable_index, constraint in neighbour_constraints:
+                    arc = (
+                        (linked_variable_index, variable_index)
+                        if towards
+                        else (variable_index, linked_variable_index)
+                    )
+                    for value_1 in range(1, 5):
+                        for value_2 in range(1, 5):
+                            assert constraint(
+                                *arc, value_1, value_2
+                            ) == csp_instance.constraints[arc](*arc, value_1, value_2)
+
+
+def test_compact_models_search_like_the_csp():
+    for build_csp in (
+        lambda compact: sudoku_problem(
+            instance_path=SUDOKU_INSTANCES_PATH / "expert1.txt", compact=compact
+        ),
+        lambda compact: (
+            CompactCSP.from_csp(_chain_csp()) if compact else _chain_csp()
+        ),
+    ):
+        results = []
+        for compact in (False, True):
+            backtrack_object = _solver()
+            results.append(
+                (
+                    backtrack_object.run_backtrack(build_csp(compact)),
+                    backtrack_object.nodes,
+                )
+            )
+        assert results[0] == results[1] and results[0][0][0]
+
+
+def test_constraint_families_are_refused():
+    with pytest.raises(ValueError):
+        CompactCSP.from_csp(n_queens_problem(n=4))
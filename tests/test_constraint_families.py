@@ -0,0 +1,81 @@
+from backtrack import BacktrackClass
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from conftest import lower_than
+from instances import n_queens_problem
+from models import CSP, ConstraintFamily
+
+
+def test_family_answers_its_pairs_without_storing_them():
+    csp_instance = CSP(
+        variables=["a", "b", "c", "d"], domains=[[1, 2, 3, 4]] * 4, constraints={}
+    )
+    # Only the pairs of consecutive variables
+    csp_instance.add_constraint_family(
+        ConstraintFamily(
+            predicate=lower_than, scope=range(4), pair_filter=lambda i, j: j == i + 1
+        )
+    )
+    assert dict.__len__(csp_instance.constraints) == 0
+    assert sorted(csp_instance.variable_is_constrained_by[1]) == [0, 2]
+    assert (0, 2) not in csp_instance.constraints
+    assert csp_instance.constraints.get((0, 2)) is None
+    assert csp_instance.constraints[(0, 1)](0, 1, 1, 2)
+    # Queried in the other order, the predicate is swapped
+    assert csp_instance.constraints[(1, 0)](1, 0, 2, 1)
+    assert not csp_instance.constraints[(1, 0)](1, 0, 1, 2)
+
+
+def test_explicit_constraint_is_intersected_with_the_family():
+    csp_instance = CSP(variables=["a", "b"], domains=[[1, 2, 3]] * 2, constraints={})
+    csp_instance.add_constraint(
+        index_variable_1=0,
+        index_variable_2=1,
+        new_constraint=lambda i, j, value_var_i, value_var_j: value_var_j != 2,
+    )
+    csp_instance.add_constraint_family(
+        ConstraintFamily(predicate=lower_than, scope=range(2))
+    )
+    found_solution, state = BacktrackClass().run_backtrack(csp_instance)
+    assert found_solution and state == {"a": 1, "b": 3}
+
+
+def test_n_queens_family_is_solved():
+    for n in (1, 4, 8, 30):
+        csp_queens = n_queens_problem(n=n)
+        found_solution, state = BacktrackClass(
+            use_forward_checking=True,
+            next_variable_choosing_method=smallest_domain_variable_choosing,
+        ).run_backtrack(csp_queens)
+        assert found_solution
+        columns = [state[f"{i}_col_queen"] for i in range(1, n + 1)]
+        assert len(set(columns)) == n
+        assert len({column - row for row, column in enumerate(columns)}) == n
+        assert len({column + row for row, column in enumerate(columns)}) == n
+    assert not BacktrackClass(use_forward_checking=True).run_backtrack(
+        n_queens_problem(n=3)
+    )[0]
+
+
+def test_constraints_count_matches_their_enumeration():
+    csp_instance = CSP(
+        variables=["a", "b", "c", "d", "e"], domains=[[1, 2, 3]] * 5, constraints={}
+    )
+    csp_instance.add_constraint(
+        index_variable_1=0, index_variable_2=4, new_constraint=lower_than
+    )
+    csp_instance.add_constraint(
+        index_variable_1=1, index_variable_2=2, new_constraint=lower_than
+    )
+    csp_instance.add_constraint_family(
+        ConstraintFamily(predicate=lower_than, scope=range(4))
+    )
+    # The 12 couples of the family, the explicit one it covers isn't counted twice
+    assert len(csp_instance.constraints) == 14
+    assert len(csp_instance.constraints) == len(list(csp_instance.constraints.keys()))
+    csp_instance.add_constraint_family(
+        ConstraintFamily(
+            predicate=lower_than, scope=range(5), pair_filter=lambda i, j: j == i + 1
+        )
+    )
+    assert len(csp_instance.constraints) == len(set(csp_instance.constraints.keys()))
+    assert len(csp_instance.constraints) == 16
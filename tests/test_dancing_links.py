@@ -0,0 +1,118 @@
+from backtrack import (
+    NO_SOLUTION_STATUS,
+    SOLUTION_STATUS,
+    TIMEOUT_STATUS,
+    BacktrackClass,
+    DancingLinksSolver,
+)
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import (
+    SUDOKU_EXPERT_INSTANCES,
+    SUDOKU_INSTANCES_PATH,
+    n_queens_problem,
+    sudoku_domains,
+    sudoku_grid_problem,
+    sudoku_problem,
+)
+from models import ExactCoverProblem
+
+# Number of solutions of the n-queens for n from 1 to 8
+QUEENS_SOLUTIONS_COUNTS = [1, 0, 0, 2, 10, 4, 40, 92]
+
+
+def _grid_lines(grid_name: str) -> list[str]:
+    with open(SUDOKU_INSTANCES_PATH / grid_name) as grid_file:
+        return grid_file.read().split()[:9]
+
+
+def _assert_valid_sudoku(state: dict, grid_lines: list[str]) -> None:
+    for i in range(1, 10):
+        assert sorted(state[f"x_{i}_{j}"] for j in range(1, 10)) == list(range(1, 10))
+        assert sorted(state[f"x_{j}_{i}"] for j in range(1, 10)) == list(range(1, 10))
+    for block_i in range(3):
+        for block_j in range(3):
+            assert sorted(
+                state[f"x_{3 * block_i + i}_{3 * block_j + j}"]
+                for i in range(1, 4)
+                for j in range(1, 4)
+            ) == list(range(1, 10))
+    for i, line in enumerate(grid_lines, start=1):
+        for j, digit in enumerate(line[:9], start=1):
+            if digit != "0":
+                assert state[f"x_{i}_{j}"] == int(digit)
+
+
+def test_sudoku_solution_is_the_backtrack_one():
+    grid_path = SUDOKU_INSTANCES_PATH / "expert1.txt"
+    solver = DancingLinksSolver(problem=sudoku_problem(grid_path, exact_cover=True))
+    found_solution, state = solver.run()
+    assert found_solution and solver.status == SOLUTION_STATUS
+    _assert_valid_sudoku(state=state, grid_lines=_grid_lines("expert1.txt"))
+
+    backtrack_object = BacktrackClass(
+        use_forward_checking=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    )
+    # The grid has a unique solution
+    assert backtrack_object.run_backtrack(sudoku_problem(grid_path))[1] == state
+    assert solver.count_solutions(solutions_limit=2) == 1
+
+
+def test_n_queens_solutions_are_counted():
+    for n, solutions_count in enumerate(QUEENS_SOLUTIONS_COUNTS, start=1):
+        solver = DancingLinksSolver(problem=n_queens_problem(n=n, exact_cover=True))
+        assert solver.count_solutions() == solutions_count
+        found_solution, state = solver.run()
+        assert found_solution == (solutions_count > 0)
+        if not found_solution:
+            assert solver.status == NO_SOLUTION_STATUS
+            continue
+        columns = [state[f"{i}_col_queen"] for i in range(1, n + 1)]
+        assert len(set(columns)) == n
+        assert len({column - row for row, column in enumerate(columns)}) == n
+        assert len({column + row for row, column in enumerate(columns)}) == n
+
+
+def test_batch_of_grids_on_the_same_links():
+    grids_lines = [_grid_lines(grid_name) for grid_name in SUDOKU_EXPERT_INSTANCES]
+    problem = sudoku_grid_problem(grid_lines=grids_lines[0], exact_cover=True)
+    solver = DancingLinksSolver(problem=problem)
+    results = solver.run_batch(
+        problem.rows_of_domains(domains=sudoku_domains(grid_lines=grid_lines))
+        for grid_lines in grids_lines
+    )
+    assert len(results) == len(grids_lines)
+    for (found_solution, state), grid_lines in zip(results, grids_lines):
+        assert found_solution
+        _assert_valid_sudoku(state=state, grid_lines=grid_lines)
+    # The links are restored after each run
+    assert solver.run()[1] == results[0][1]
+
+    # Two given 1s in the first row
+    conflicting_lines = ["110000000"] + ["000000000"] * 8
+    assert solver.run(
+        given_rows=problem.rows_of_domains(
+            domains=sudoku_domains(grid_lines=conflicting_lines)
+        )
+    ) == (False, dict())
+    assert solver.status == NO_SOLUTION_STATUS
+
+
+def test_budgets_stop_the_search():
+    solver = DancingLinksSolver(
+        problem=n_queens_problem(n=10, exact_cover=True), node_limit=100
+    )
+    assert solver.count_solutions() < 724
+    assert solver.status == TIMEOUT_STATUS and solver.nodes == 101
+
+
+def test_secondary_columns_can_stay_uncovered():
+    problem = ExactCoverProblem(
+        variables=["a", "b"], primary_columns_count=2, secondary_columns_count=1
+    )
+    problem.add_row(variable_index=0, value=1, columns=[0, 2])
+    problem.add_row(variable_index=1, value=1, columns=[1, 2])
+    problem.add_row(variable_index=1, value=2, columns=[1])
+    solver = DancingLinksSolver(problem=problem)
+    assert solver.count_solutions() == 1
+    assert solver.run() == (True, {"a": 1, "b": 2})
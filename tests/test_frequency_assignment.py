@@ -0,0 +1,60 @@
+from backtrack import BacktrackClass
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import (
+    AFFECTATION_DATA_PATH,
+    frequency_assignment_optimization,
+    frequency_assignment_problem,
+    read_frequency_assignment_data,
+)
+from wrappers import DistanceConstraint
+
+# Smallest highest frequency of opl/affectation/affectation.dat
+AFFECTATION_OPTIMUM = 6
+
+
+def test_distance_constraint_removes_the_values_without_support():
+    constraint = DistanceConstraint(index_variable_1=0, index_variable_2=1, distance=3)
+    domains = [[4], list(range(1, 10))]
+    domains_last_valid_index = [0, 8]
+    shrinking_operations = dict()
+    emptied_a_domain, shrunk_variables = constraint.propagate(
+        domains=domains,
+        state=dict(),
+        domains_last_valid_index=domains_last_valid_index,
+        shrinking_operations=shrinking_operations,
+    )
+    assert not emptied_a_domain and shrunk_variables == [1]
+    assert sorted(domains[1][: domains_last_valid_index[1] + 1]) == [1, 7, 8, 9]
+    assert shrinking_operations == {1: 5}
+    assert constraint.is_satisfied(state={0: 4, 1: 7})
+    assert not constraint.is_satisfied(state={0: 4, 1: 6})
+
+
+def test_all_the_models_prove_the_optimum():
+    number_of_frequencies, number_of_transmitters, offsets = (
+        read_frequency_assignment_data(data_path=AFFECTATION_DATA_PATH)
+    )
+    for options in (
+        dict(),
+        dict(binary_distances=True),
+        dict(compact=True),
+    ):
+        csp_frequencies, max_frequency = frequency_assignment_problem(**options)
+        assert max_frequency == number_of_frequencies
+        best_max_frequency, state, _, finished = frequency_assignment_optimization(
+            frequency_instance=csp_frequencies,
+            max_frequency=max_frequency,
+            backtrack_object=BacktrackClass(
+                use_forward_checking=True,
+                next_variable_choosing_method=smallest_domain_variable_choosing,
+            ),
+        )
+        assert finished and best_max_frequency == AFFECTATION_OPTIMUM
+        assert len(state) == number_of_transmitters
+        for transmitter in range(1, number_of_transmitters + 1):
+            assert (state[f"f_{transmitter}"] + transmitter) % 2 == 0
+        for first_transmitter, second_transmitter, distance in offsets:
+            assert (
+                abs(state[f"f_{first_transmitter}"] - state[f"f_{second_transmitter}"])
+                >= distance
+            )
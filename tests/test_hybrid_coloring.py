@@ -0,0 +1,46 @@
+from backtrack import BacktrackClass
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import (
+    COLORING_INSTANCES,
+    COLORING_INSTANCES_PATH,
+    coloring_problem,
+    hybrid_coloring_optimization,
+)
+
+
+def _hybrid_optimization(graph_name: str):
+    csp_coloring, max_degree = coloring_problem(
+        graph_path=COLORING_INSTANCES_PATH / graph_name
+    )
+    backtrack_object = BacktrackClass(
+        use_forward_checking=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    )
+    colors, state, _, finished = hybrid_coloring_optimization(
+        coloring_instance=csp_coloring,
+        max_degree=max_degree,
+        backtrack_object=backtrack_object,
+        time_limit=30,
+        local_search_time_limit=1,
+        seed=0,
+    )
+    return csp_coloring, colors, state, finished
+
+
+def test_bipartite_graphs_are_proven_two_colorable():
+    # The local search used to be asked for a coloring with a single color
+    for graph_name in ("toy_even_cycle.txt", "toy_chain.txt"):
+        csp_coloring, colors, state, finished = _hybrid_optimization(graph_name)
+        assert finished and colors == 2
+        for index_variable_1, index_variable_2 in csp_coloring.constraints:
+            assert (
+                state[csp_coloring.variables[index_variable_1]]
+                != state[csp_coloring.variables[index_variable_2]]
+            )
+
+
+def test_hybrid_optimization_finds_the_chromatic_number():
+    for graph_name in ("toy_odd_cycle.txt", "myciel3.col.txt", "myciel4.col.txt"):
+        _, colors, _, finished = _hybrid_optimization(graph_name)
+        assert finished
+        assert colors == COLORING_INSTANCES[graph_name]
@@ -0,0 +1,107 @@
+from backtrack import BacktrackClass, IncrementalSolver, NO_SOLUTION_STATUS
+from conftest import coloring_model
+from wrappers import alldiff
+
+
+def _is_valid_coloring(csp_instance, solution: dict) -> bool:
+    return all(
+        solution[variable_index] in csp_instance.domains[variable_index]
+        and all(
+            solution[variable_index] != solution[linked_variable_index]
+            for linked_variable_index in csp_instance.variable_is_constrained_by[
+                variable_index
+            ]
+        )
+        for variable_index in range(len(csp_instance.variables))
+    )
+
+
+def test_warm_resolve_after_adding_a_constraint():
+    csp_instance = coloring_model(instance_name="myciel4.col.txt", colors=5)
+    solver = IncrementalSolver(
+        csp_instance=csp_instance,
+        backtrack_object=BacktrackClass(use_forward_checking=True),
+    )
+    found_solution, _ = solver.solve()
+    assert found_solution
+    first_solution = dict(solver.solution)
+
+    # A constraint already satisfied by the last solution is a repair without search
+    satisfied_pair = next(
+        (i, j)
+        for i in range(len(csp_instance.variables))
+        for j in range(i + 1, len(csp_instance.variables))
+        if csp_instance.constraints.get((i, j)) is None
+        and first_solution[i] != first_solution[j]
+    )
+    solver.add_constraint(*satisfied_pair, new_constraint=alldiff)
+    found_solution, _ = solver.solve()
+    assert found_solution and solver.repaired and solver.nodes == 0
+
+    # A violated one needs a search, which starts from the last solution
+    violated_pair = next(
+        (i, j)
+        for i in range(len(csp_instance.variables))
+        for j in range(i + 1, len(csp_instance.variables))
+        if csp_instance.constraints.get((i, j)) is None
+        and first_solution[i] == first_solution[j]
+    )
+    solver.add_constraint(*violated_pair, new_constraint=alldiff)
+    found_solution, readable_state = solver.solve()
+    assert found_solution and not solver.repaired
+    assert _is_valid_coloring(csp_instance=csp_instance, solution=solver.solution)
+    assert readable_state == {
+        csp_instance.variables[index]: value for index, value in solver.solution.items()
+    }
+    # The model domains are never reduced by the solves
+    assert all(len(domain) == 5 for domain in csp_instance.domains)
+
+
+def test_relax_then_tighten_domain():
+    csp_instance = coloring_model(instance_name="toy_odd_cycle.txt", colors=2)
+    solver = IncrementalSolver(csp_instance=csp_instance)
+    found_solution, _ = solver.solve()
+    assert not found_solution and solver.status == NO_SOLUTION_STATUS
+
+    # Still infeasible after tightening, known without search
+    solver.tighten_domain(variable_index=0, values=[0])
+    assert solver.solve() == (False, dict()) and solver.nodes == 0
+
+    # Relaxing gives a third color to the first node, the cycle becomes colorable
+    solver.relax_domain(variable_index=0, values=[0, 1, 2])
+    found_solution, _ = solver.solve()
+    assert found_solution
+    assert _is_valid_coloring(csp_instance=csp_instance, solution=solver.solution)
+
+    # Tightening away the value of the solution forces a new search
+    solver.tighten_domain(
+        variable_index=0,
+        values=[value for value in range(3) if value != solver.solution[0]],
+    )
+    found_solution, _ = solver.solve()
+    assert found_solution == (2 in csp_instance.domains[0])
+    if found_solution:
+        assert _is_valid_coloring(csp_instance=csp_instance, solution=solver.solution)
+
+
+def test_remove_constraint_plain_and_compact():
+    for compact in (False, True):
+        csp_instance = coloring_model(
+            instance_name="toy_triangle.txt", colors=2, compact=compact
+        )
+        solver = IncrementalSolver(csp_instance=csp_instance)
+        assert not solver.solve()[0]
+
+        index_variable_2 = sorted(csp_instance.variable_is_constrained_by[0])[0]
+        removed_constraint = solver.remove_constraint(
+            index_variable_1=index_variable_2, index_variable_2=0
+        )
+        assert removed_constraint is not None
+        assert csp_instance.constraints.get((0, index_variable_2)) is None
+        assert index_variable_2 not in csp_instance.variable_is_constrained_by[0]
+        assert 0 not in csp_instance.variable_is_constrained_by[index_variable_2]
+
+        # The triangle without an edge is a path, colorable with 2 colors
+        found_solution, _ = solver.solve()
+        assert found_solution
+        assert _is_valid_coloring(csp_instance=csp_instance, solution=solver.solution)
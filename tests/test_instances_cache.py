@@ -0,0 +1,131 @@
+from backtrack import BEST_FIRST_STRATEGY, BacktrackClass
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import (
+    COLORING_INSTANCES,
+    COLORING_INSTANCES_PATH,
+    InstanceCache,
+    coloring_optimization,
+    coloring_problem,
+    frequency_assignment_problem,
+    graph_key,
+    solver_configuration_key,
+)
+from models import CSP
+from wrappers import alldiff, distance_at_least
+
+
+def _path_csp(constraint, domain_size: int = 3) -> CSP:
+    csp_instance = CSP(
+        variables=["a", "b", "c"],
+        domains=[list(range(domain_size)) for _ in range(3)],
+        constraints={},
+    )
+    csp_instance.add_constraint(
+        index_variable_1=0, index_variable_2=1, new_constraint=constraint
+    )
+    csp_instance.add_constraint(
+        index_variable_1=2, index_variable_2=1, new_constraint=constraint
+    )
+    return csp_instance
+
+
+def test_graph_key_tells_the_models_apart():
+    key = graph_key(csp_instance=_path_csp(constraint=alldiff), model_kind="coloring")
+    # The order and the direction of the edges don't matter
+    reversed_csp = CSP(
+        variables=["a", "b", "c"], domains=[list(range(3))] * 3, constraints={}
+    )
+    reversed_csp.add_constraint(
+        index_variable_1=1, index_variable_2=2, new_constraint=alldiff
+    )
+    reversed_csp.add_constraint(
+        index_variable_1=1, index_variable_2=0, new_constraint=alldiff
+    )
+    assert graph_key(csp_instance=reversed_csp, model_kind="coloring") == key
+
+    assert (
+        graph_key(csp_instance=_path_csp(constraint=alldiff), model_kind="n_queens")
+        != key
+    )
+    assert (
+        graph_key(
+            csp_instance=_path_csp(constraint=alldiff, domain_size=4),
+            model_kind="coloring",
+        )
+        != key
+    )
+    assert graph_key(
+        csp_instance=_path_csp(constraint=alldiff, domain_size=4),
+        model_kind="coloring",
+        with_domains=False,
+    ) == graph_key(
+        csp_instance=_path_csp(constraint=alldiff),
+        model_kind="coloring",
+        with_domains=False,
+    )
+    distance_key = graph_key(
+        csp_instance=_path_csp(constraint=distance_at_least(distance=2)),
+        model_kind="coloring",
+    )
+    assert distance_key != key
+    assert distance_key == graph_key(
+        csp_instance=_path_csp(constraint=distance_at_least(distance=2)),
+        model_kind="coloring",
+    )
+    assert distance_key != graph_key(
+        csp_instance=_path_csp(constraint=distance_at_least(distance=3)),
+        model_kind="coloring",
+    )
+
+
+def test_solver_configuration_key_covers_the_search_options():
+    key = solver_configuration_key(backtrack_object=BacktrackClass())
+    assert (
+        solver_configuration_key(backtrack_object=BacktrackClass(node_limit=10)) == key
+    )
+    for options in (
+        dict(use_tree_decomposition=True),
+        dict(goods_table_size=10),
+        dict(search_strategy=BEST_FIRST_STRATEGY),
+        dict(max_discrepancies=2),
+    ):
+        assert (
+            solver_configuration_key(backtrack_object=BacktrackClass(**options)) != key
+        )
+
+
+def test_compact_frequency_model_is_cached(tmp_path):
+    cache = InstanceCache(directory=tmp_path)
+    csp_frequencies, max_frequency = frequency_assignment_problem(compact=True)
+    assert cache.put("frequencies", (csp_frequencies, max_frequency))
+    cached_csp, cached_max_frequency = cache.get("frequencies")
+    assert cached_max_frequency == max_frequency
+    assert list(cached_csp.variables) == list(csp_frequencies.variables)
+    assert cached_csp.variables[0] == "f_1"
+
+
+def test_proven_coloring_is_read_from_the_cache(tmp_path):
+    cache = InstanceCache(directory=tmp_path)
+    graph_name = "myciel4.col.txt"
+    results = []
+    for _ in range(2):
+        csp_coloring, max_degree = coloring_problem(
+            graph_path=COLORING_INSTANCES_PATH / graph_name, cache=cache
+        )
+        progress = []
+        results.append(
+            coloring_optimization(
+                coloring_instance=csp_coloring,
+                max_degree=max_degree,
+                backtrack_object=BacktrackClass(
+                    use_forward_checking=True,
+                    next_variable_choosing_method=smallest_domain_variable_choosing,
+                ),
+                progress_callback=progress.append,
+                cache=cache,
+            )
+        )
+    assert results[0] == results[1]
+    assert results[1][0] == COLORING_INSTANCES[graph_name] and results[1][3]
+    # The second optimization made no probe
+    assert not progress
@@ -0,0 +1,122 @@
+import random
+
+from backtrack import BacktrackClass
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from conftest import valid_values
+from instances import n_queens_problem
+from models import IntervalDomain, domain_valid_bounds, remove_valid_values_between
+from wrappers import LinearConstraint
+
+
+def test_interval_domain_behaves_as_a_list():
+    domain = IntervalDomain(low=3, high=12)
+    assert len(domain) == 10 and list(domain) == list(range(3, 13))
+    assert 3 in domain and 12 in domain and 13 not in domain
+    # Swapped like the search does
+    domain[0], domain[9] = domain[9], domain[0]
+    assert domain[0] == 12 and domain[9] == 3
+    assert domain.index(3) == 9 and domain.position_of(13) == -1
+    assert sorted(domain) == list(range(3, 13))
+    assert domain.valid_bounds(last_valid_index=8) == (4, 12)
+    assert domain.copy() == domain
+
+
+def test_bounds_removals_match_the_list_domains():
+    randomizer = random.Random(0)
+    for _ in range(200):
+        low = randomizer.randint(-5, 5)
+        high = low + randomizer.randint(0, 30)
+        interval_domain = IntervalDomain(low=low, high=high)
+        list_domain = list(range(low, high + 1))
+        interval_last_valid = list_last_valid = high - low
+        for _ in range(5):
+            if list_last_valid < 0:
+                break
+            valid_min, valid_max = domain_valid_bounds(
+                domain=list_domain, last_valid_index=list_last_valid
+            )
+            assert interval_domain.valid_bounds(
+                last_valid_index=interval_last_valid
+            ) == (valid_min, valid_max)
+            lower_bound = randomizer.randint(valid_min - 2, valid_max + 2)
+            upper_bound = randomizer.randint(lower_bound - 1, valid_max + 2)
+            if randomizer.random() < 0.5:
+                interval_last_valid = interval_domain.remove_values_outside(
+                    lower_bound=lower_bound,
+                    upper_bound=upper_bound,
+                    last_valid_index=interval_last_valid,
+                )
+                kept_values = [
+                    value
+                    for value in list_domain[: list_last_valid + 1]
+                    if lower_bound <= value <= upper_bound
+                ]
+                list_last_valid = len(kept_values) - 1
+                list_domain = kept_values
+            else:
+                interval_last_valid = remove_valid_values_between(
+                    domain=interval_domain,
+                    lower_bound=lower_bound,
+                    upper_bound=upper_bound,
+                    last_valid_index=interval_last_valid,
+                )
+                list_last_valid = remove_valid_values_between(
+                    domain=list_domain,
+                    lower_bound=lower_bound,
+                    upper_bound=upper_bound,
+                    last_valid_index=list_last_valid,
+                )
+            assert interval_last_valid == list_last_valid
+            assert sorted(interval_domain[: interval_last_valid + 1]) == sorted(
+                list_domain[: list_last_valid + 1]
+            )
+            assert sorted(interval_domain) == list(range(low, high + 1))
+
+
+def test_removing_the_smallest_values_stores_nothing():
+    domain = IntervalDomain(low=1, high=10**9)
+    last_valid_index = domain.remove_values_outside(
+        lower_bound=1000, upper_bound=10**9, last_valid_index=len(domain) - 1
+    )
+    assert last_valid_index == 10**9 - 1000
+    assert not domain.values_at
+    valid_part = domain.valid_part(last_valid_index=last_valid_index)
+    assert isinstance(valid_part, IntervalDomain)
+    assert (valid_part.low, valid_part.high) == (1000, 10**9)
+
+
+def test_linear_bounds_on_interval_domains():
+    # x + 2y <= 6, as on the list domains
+    domains = [IntervalDomain(low=1, high=5), IntervalDomain(low=1, high=5)]
+    domains_last_valid_index = [4, 4]
+    shrinking_operations = dict()
+    emptied_a_domain, _ = LinearConstraint(
+        variables_indices=[0, 1],
+        coefficients=[1, 2],
+        linear_operator="<=",
+        constant=6,
+    ).propagate(
+        domains=domains,
+        state=dict(),
+        domains_last_valid_index=domains_last_valid_index,
+        shrinking_operations=shrinking_operations,
+    )
+    assert not emptied_a_domain
+    assert valid_values(domains, domains_last_valid_index) == [[1, 2, 3, 4], [1, 2]]
+    assert shrinking_operations == {0: 1, 1: 3}
+    assert not domains[0].values_at and not domains[1].values_at
+
+
+def test_n_queens_on_interval_domains():
+    for n in (6, 12):
+        backtrack_object = BacktrackClass(
+            use_forward_checking=True,
+            next_variable_choosing_method=smallest_domain_variable_choosing,
+        )
+        list_result = backtrack_object.run_backtrack(n_queens_problem(n=n))
+        list_nodes = backtrack_object.nodes
+        interval_result = backtrack_object.run_backtrack(
+            n_queens_problem(n=n, interval_domains=True)
+        )
+        assert interval_result == list_result and list_result[0]
+        assert backtrack_object.nodes == list_nodes
@@ -0,0 +1,81 @@
+from backtrack import BacktrackClass
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import (
+    KNIGHTS_DOMINATION,
+    KNIGHTS_DOMINATION_NUMBERS,
+    KNIGHTS_INDEPENDENCE,
+    knights_optimization,
+    knights_problem,
+)
+from instances.knights import board_symmetries, knight_attacks
+
+# Largest numbers of knights attacking no other knight
+KNIGHTS_INDEPENDENCE_NUMBERS = {3: 5, 4: 8, 5: 13}
+
+
+def _optimize(dimension: int, mode: str, symmetry_breaking: bool):
+    return knights_optimization(
+        knights_instance=knights_problem(
+            dimension=dimension, mode=mode, symmetry_breaking=symmetry_breaking
+        ),
+        mode=mode,
+        backtrack_object=BacktrackClass(
+            use_forward_checking=True,
+            next_variable_choosing_method=smallest_domain_variable_choosing,
+        ),
+    )
+
+
+def _board(state: dict, dimension: int) -> list[int]:
+    return [
+        state[f"x_{i}_{j}"]
+        for i in range(1, dimension + 1)
+        for j in range(1, dimension + 1)
+    ]
+
+
+def test_board_symmetries_are_permutations():
+    symmetries = board_symmetries(dimension=4)
+    assert len(symmetries) == 7
+    for symmetry in symmetries:
+        assert sorted(symmetry) == list(range(16))
+        assert symmetry != list(range(16))
+
+
+def test_knights_optima_are_proven():
+    for dimension in (3, 4, 5):
+        attacks = knight_attacks(dimension=dimension)
+        for mode, optima in (
+            (KNIGHTS_DOMINATION, KNIGHTS_DOMINATION_NUMBERS),
+            (KNIGHTS_INDEPENDENCE, KNIGHTS_INDEPENDENCE_NUMBERS),
+        ):
+            results = [
+                _optimize(
+                    dimension=dimension, mode=mode, symmetry_breaking=symmetry_breaking
+                )
+                for symmetry_breaking in (True, False)
+            ]
+            for knights_count, state, _, finished in results:
+                assert finished and knights_count == optima[dimension]
+                board = _board(state=state, dimension=dimension)
+                assert sum(board) == knights_count
+                squares = range(dimension * dimension)
+                if mode == KNIGHTS_DOMINATION:
+                    assert all(
+                        board[square]
+                        or any(
+                            board[other] and attacks(square, other) for other in squares
+                        )
+                        for square in squares
+                    )
+                else:
+                    assert not any(
+                        board[square] and board[other] and attacks(square, other)
+                        for square in squares
+                        for other in squares
+                    )
+            # The lex-leader constraints cut the symmetric boards
+            assert results[0][2] < results[1][2]
+            board = _board(state=results[0][1], dimension=dimension)
+            for symmetry in board_symmetries(dimension=dimension):
+                assert board <= [board[image] for image in symmetry]
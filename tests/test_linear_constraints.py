@@ -0,0 +1,91 @@
+import pytest
+
+from backtrack import BacktrackClass
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from conftest import valid_values
+from instances import magic_square_problem
+from models import CSP
+from wrappers import LinearConstraint, weighted_sum
+
+
+def test_bounds_are_propagated():
+    # x + 2y <= 6
+    constraint = LinearConstraint(
+        variables_indices=[0, 1],
+        coefficients=[1, 2],
+        linear_operator="<=",
+        constant=6,
+    )
+    domains = [list(range(1, 6)), list(range(1, 6))]
+    domains_last_valid_index = [4, 4]
+    shrinking_operations = dict()
+    emptied_a_domain, shrunk_variables = constraint.propagate(
+        domains=domains,
+        state=dict(),
+        domains_last_valid_index=domains_last_valid_index,
+        shrinking_operations=shrinking_operations,
+    )
+    assert not emptied_a_domain
+    assert sorted(set(shrunk_variables)) == [0, 1]
+    assert valid_values(domains, domains_last_valid_index) == [
+        [1, 2, 3, 4],
+        [1, 2],
+    ]
+    assert shrinking_operations == {0: 1, 1: 3}
+
+
+def test_unsatisfiable_sum_empties_a_domain():
+    constraint = LinearConstraint(
+        variables_indices=[0, 1],
+        coefficients=[1, 1],
+        linear_operator=">=",
+        constant=11,
+    )
+    assert constraint.propagate(
+        domains=[list(range(1, 6)), list(range(1, 6))],
+        state=dict(),
+        domains_last_valid_index=[4, 4],
+        shrinking_operations=dict(),
+    )[0]
+
+
+def test_linear_constraints_are_checked():
+    with pytest.raises(ValueError):
+        LinearConstraint(
+            variables_indices=[0, 1], coefficients=[1], linear_operator="<=", constant=1
+        )
+    with pytest.raises(ValueError):
+        LinearConstraint(
+            variables_indices=[0], coefficients=[1], linear_operator="<", constant=1
+        )
+
+
+def test_weighted_sum_binary_form():
+    csp_instance = CSP(variables=["x", "y"], domains=[[1, 2, 3]] * 2, constraints={})
+    csp_instance.add_constraint(
+        index_variable_1=0,
+        index_variable_2=1,
+        new_constraint=weighted_sum(
+            coefficient_1=2, coefficient_2=-1, linear_operator="==", constant=3
+        ),
+    )
+    found_solution, state = BacktrackClass(use_forward_checking=True).run_backtrack(
+        csp_instance
+    )
+    assert found_solution and state == {"x": 2, "y": 1}
+
+
+def test_magic_square_sums():
+    n = 3
+    found_solution, state = BacktrackClass(
+        use_forward_checking=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    ).run_backtrack(magic_square_problem(n=n))
+    assert found_solution
+    grid = [[state[f"x_{i}_{j}"] for j in range(1, n + 1)] for i in range(1, n + 1)]
+    assert sorted(value for row in grid for value in row) == list(range(1, n * n + 1))
+    for i in range(n):
+        assert sum(grid[i]) == 15
+        assert sum(grid[j][i] for j in range(n)) == 15
+    assert sum(grid[i][i] for i in range(n)) == 15
+    assert sum(grid[i][n - 1 - i] for i in range(n)) == 15
@@ -0,0 +1,86 @@
+from instances import (
+    COLORING_INSTANCES_PATH,
+    coloring_problem,
+    magic_square_problem,
+    n_queens_problem,
+)
+from local_search import min_conflicts, n_queens_min_conflicts, tabu_coloring
+from models import CSP
+
+
+def _toy_graph(graph_name: str) -> CSP:
+    csp_coloring, _ = coloring_problem(graph_path=COLORING_INSTANCES_PATH / graph_name)
+    return csp_coloring
+
+
+def test_tabu_with_a_single_color():
+    found_coloring, state, conflicts = tabu_coloring(
+        csp_instance=_toy_graph("toy_even_cycle.txt"), colors_count=1, seed=0
+    )
+    assert not found_coloring and conflicts > 0
+    assert set(state.values()) == {0}
+    # Without edges a single color is enough
+    no_edges = CSP(variables=["a", "b"], domains=[[0], [0]], constraints={})
+    assert tabu_coloring(csp_instance=no_edges, colors_count=1) == (
+        True,
+        {"a": 0, "b": 0},
+        0,
+    )
+
+
+def test_tabu_colors_bipartite_graphs_with_two_colors():
+    for graph_name in ("toy_even_cycle.txt", "toy_chain.txt"):
+        csp_coloring = _toy_graph(graph_name)
+        found_coloring, state, _ = tabu_coloring(
+            csp_instance=csp_coloring, colors_count=2, seed=0
+        )
+        assert found_coloring
+        for index_variable_1, index_variable_2 in csp_coloring.constraints:
+            assert (
+                state[csp_coloring.variables[index_variable_1]]
+                != state[csp_coloring.variables[index_variable_2]]
+            )
+
+
+def test_min_conflicts_counts_the_global_constraints():
+    csp_magic_square = magic_square_problem(n=3)
+    found_solution, state, violated = min_conflicts(
+        csp_instance=csp_magic_square,
+        max_iterations=20000,
+        random_walk_probability=0.1,
+        seed=0,
+    )
+    assert found_solution and violated == 0
+    indices_state = {
+        csp_magic_square.variables_to_index_dict[variable]: value
+        for variable, value in state.items()
+    }
+    for global_constraint in csp_magic_square.global_constraints:
+        assert global_constraint.is_satisfied(indices_state)
+    assert sorted(state.values()) == list(range(1, 10))
+
+    # Unreachable sums are reported as violated
+    found_solution, _, violated = min_conflicts(
+        csp_instance=magic_square_problem(n=2), max_iterations=500, seed=0
+    )
+    assert not found_solution and violated > 0
+
+
+def test_n_queens_min_conflicts():
+    for n in (8, 200):
+        found_solution, state, attacks = n_queens_min_conflicts(n=n, seed=0)
+        assert found_solution and attacks == 0
+        columns = [state[f"{i}_col_queen"] for i in range(1, n + 1)]
+        assert len(set(columns)) == n
+        assert len({column - row for row, column in enumerate(columns)}) == n
+        assert len({column + row for row, column in enumerate(columns)}) == n
+    # No solution for 3 queens, the attacking pairs of the best placement are returned
+    found_solution, _, attacks = n_queens_min_conflicts(n=3, max_iterations=200, seed=0)
+    assert not found_solution and attacks > 0
+    # The generic version agrees on the state format
+    found_solution, state, _ = min_conflicts(
+        csp_instance=n_queens_problem(n=8), max_iterations=5000, seed=0
+    )
+    assert found_solution and sorted(state) == sorted(
+        f"{i}_col_queen" for i in range(1, 9)
+    )
@@ -0,0 +1,97 @@
+import multiprocessing
+
+import pytest
+
+from backtrack import BacktrackClass
+from backtrack.parallel_components import fork_is_available
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import (
+    COLORING_INSTANCES,
+    COLORING_INSTANCES_PATH,
+    coloring_optimization,
+    coloring_problem,
+)
+from instances.parallel_coloring import PointlessProbeToken, _next_colors_to_probe
+
+needs_fork = pytest.mark.skipif(not fork_is_available(), reason="fork is needed")
+
+
+def _optimize(graph_name: str, **options):
+    csp_coloring, max_degree = coloring_problem(
+        graph_path=COLORING_INSTANCES_PATH / graph_name
+    )
+    progress = []
+    result = coloring_optimization(
+        coloring_instance=csp_coloring,
+        max_degree=max_degree,
+        backtrack_object=BacktrackClass(
+            use_forward_checking=True,
+            next_variable_choosing_method=smallest_domain_variable_choosing,
+        ),
+        progress_callback=progress.append,
+        **options,
+    )
+    return csp_coloring, result, progress
+
+
+def test_probes_are_spread_between_the_bounds():
+    assert (
+        _next_colors_to_probe(lowest_colors=1, best_colors=9, running_probes=set()) == 4
+    )
+    assert (
+        _next_colors_to_probe(lowest_colors=1, best_colors=9, running_probes={4}) == 6
+    )
+    # A probe made pointless by the bounds doesn't count
+    assert (
+        _next_colors_to_probe(lowest_colors=5, best_colors=7, running_probes={3, 8})
+        == 5
+    )
+    assert (
+        _next_colors_to_probe(lowest_colors=5, best_colors=6, running_probes={5})
+        is None
+    )
+    assert (
+        _next_colors_to_probe(lowest_colors=4, best_colors=4, running_probes=set())
+        is None
+    )
+
+
+def test_shared_bounds_cancel_pointless_probes():
+    best_colors = multiprocessing.Value("i", 8)
+    lowest_colors = multiprocessing.Value("i", 1)
+    token = PointlessProbeToken(
+        colors_count=5, best_colors=best_colors, lowest_colors=lowest_colors
+    )
+    assert not token.is_set()
+    best_colors.value = 5
+    assert token.is_set()
+    best_colors.value = 8
+    lowest_colors.value = 6
+    assert token.is_set()
+
+
+@needs_fork
+def test_parallel_optimization_proves_the_chromatic_number():
+    for graph_name in ("toy_even_cycle.txt", "toy_chain.txt", "myciel4.col.txt"):
+        csp_coloring, (colors, state, _, finished), progress = _optimize(
+            graph_name=graph_name, processes=3
+        )
+        assert finished
+        assert colors == COLORING_INSTANCES[graph_name]
+        assert len(set(state.values())) == colors
+        for index_variable_1, index_variable_2 in csp_coloring.constraints:
+            assert (
+                state[csp_coloring.variables[index_variable_1]]
+                != state[csp_coloring.variables[index_variable_2]]
+            )
+        assert any(event["found"] for event in progress)
+        assert progress[-1]["best_colors"] == colors
+
+
+@needs_fork
+def test_parallel_optimization_stops_at_the_time_limit():
+    _, (colors, _, _, finished), _ = _optimize(
+        graph_name="myciel6.col.txt", processes=2, time_limit=1
+    )
+    assert not finished
+    assert colors >= COLORING_INSTANCES["myciel6.col.txt"]
@@ -0,0 +1,45 @@
+import threading
+
+from backtrack import SOLUTION_STATUS, TIMEOUT_STATUS, BacktrackClass
+from backtrack.search_limits import CANCELLED_REASON, NODE_LIMIT_REASON
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from conftest import expert_sudoku
+
+
+def _presolving_solver(**options) -> BacktrackClass:
+    return BacktrackClass(
+        use_forward_checking=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+        use_presolve=True,
+        use_singleton_arc_consistency=True,
+        limits_check_frequency=1,
+        **options,
+    )
+
+
+def test_singleton_arc_consistency_solves_within_the_budgets():
+    backtrack_object = _presolving_solver(node_limit=100000)
+    found_solution, state = backtrack_object.run_backtrack(expert_sudoku())
+    assert found_solution and backtrack_object.status == SOLUTION_STATUS
+    assert len(state) == 81
+    assert not backtrack_object.presolve_result.stopped
+
+
+def test_node_limit_stops_the_singleton_probes():
+    backtrack_object = _presolving_solver(node_limit=5)
+    assert backtrack_object.run_backtrack(expert_sudoku()) == (False, dict())
+    assert backtrack_object.status == TIMEOUT_STATUS
+    assert backtrack_object.stop_reason == NODE_LIMIT_REASON
+    assert backtrack_object.presolve_result.stopped
+    assert not backtrack_object.presolve_result.solved
+    assert backtrack_object.nodes == 6
+
+
+def test_cancellation_stops_the_singleton_probes():
+    cancellation_token = threading.Event()
+    cancellation_token.set()
+    backtrack_object = _presolving_solver(cancellation_token=cancellation_token)
+    assert backtrack_object.run_backtrack(expert_sudoku()) == (False, dict())
+    assert backtrack_object.status == TIMEOUT_STATUS
+    assert backtrack_object.stop_reason == CANCELLED_REASON
+    assert backtrack_object.presolve_result.stopped
@@ -0,0 +1,242 @@
+from backtrack import AC3_current_state, PropagationEngine
+from constants import (
+    DOMAIN_EVENT,
+    FIXED_EVENT,
+    FORWARD_CHECKING_PRIORITY,
+    GLOBAL_PRIORITY,
+)
+from conftest import lower_than, valid_values
+from models import CSP
+from wrappers import LinearConstraint
+
+
+class RecordingConstraint:
+    """
+    Removes nothing and records when the engine runs it.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        variables_indices: list,
+        events: tuple,
+        priority: int,
+        runs: list,
+    ) -> None:
+        self.name = name
+        self.variables_indices = variables_indices
+        self.events = events
+        self.priority = priority
+        self.runs = runs
+        return
+
+    def propagate(
+        self, domains, state, domains_last_valid_index, shrinking_operations
+    ) -> tuple:
+        self.runs.append(self.name)
+        return False, []
+
+
+def _assign(
+    csp_instance: CSP, domains_last_valid_index: list, variable_index: int, value
+) -> None:
+    # The search puts the value first and keeps it alone in the valid part
+    domain = csp_instance.domains[variable_index]
+    position = domain.index(value)
+    domain[0], domain[position] = domain[position], domain[0]
+    domains_last_valid_index[variable_index] = 0
+    return
+
+
+def _chain_csp() -> CSP:
+    # x_3 < x_2 < x_1 < x_0
+    csp_instance = CSP(
+        variables=["x_0", "x_1", "x_2", "x_3"],
+        domains=[[1, 2, 3, 4, 5] for _ in range(4)],
+        constraints={},
+    )
+    for index in range(3):
+        csp_instance.add_constraint(
+            index_variable_1=index + 1,
+            index_variable_2=index,
+            new_constraint=lower_than,
+        )
+    return csp_instance
+
+
+def test_propagators_run_by_priority_on_their_events():
+    runs = []
+    csp_instance = CSP(
+        variables=["x", "y"], domains=[[1, 2, 3], [1, 2, 3]], constraints={}
+    )
+    # x + y <= 3, on the bounds
+    csp_instance.add_global_constraint(
+        LinearConstraint(
+            variables_indices=[0, 1],
+            coefficients=[1, 1],
+            linear_operator="<=",
+            constant=3,
+        )
+    )
+    for name, events, priority in (
+        ("fixed", (FIXED_EVENT,), GLOBAL_PRIORITY),
+        ("domain", (DOMAIN_EVENT,), FORWARD_CHECKING_PRIORITY),
+    ):
+        csp_instance.add_global_constraint(
+            RecordingConstraint(
+                name=name,
+                variables_indices=[1],
+                events=events,
+                priority=priority,
+                runs=runs,
+            )
+        )
+    engine = PropagationEngine(csp_instance=csp_instance, use_forward_checking=True)
+    domains_last_valid_index = [2, 2]
+    shrinking_operations = dict()
+
+    # At the root every global constraint runs once, the cheapest first, and the removals of the
+    # linear constraint wake up the domain subscriber again
+    assert not engine.propagate(
+        state=dict(),
+        last_variable_index=None,
+        shrinking_operations=shrinking_operations,
+        domains_last_valid_index=domains_last_valid_index,
+    )
+    assert runs == ["domain", "domain", "fixed"]
+    assert valid_values(csp_instance.domains, domains_last_valid_index) == [
+        [1, 2],
+        [1, 2],
+    ]
+
+    # x = 2 fixes y to 1
+    runs.clear()
+    domain = csp_instance.domains[0]
+    position = domain.index(2)
+    domain[0], domain[position] = domain[position], domain[0]
+    domains_last_valid_index[0] = 0
+    shrinking_operations = dict()
+    assert not engine.propagate(
+        state={0: 2},
+        last_variable_index=0,
+        shrinking_operations=shrinking_operations,
+        domains_last_valid_index=domains_last_valid_index,
+    )
+    assert valid_values(csp_instance.domains, domains_last_valid_index) == [[2], [1]]
+    assert shrinking_operations == {1: 1}
+    assert runs == ["domain", "fixed"]
+
+
+def test_global_constraints_are_run_to_their_fixpoint():
+    csp_instance = CSP(
+        variables=["x", "y", "z"],
+        domains=[[1, 2, 3, 4, 5], [1, 2, 3, 4, 5], [1, 2, 3]],
+        constraints={},
+    )
+    # x < y < z, each removal of one of them wakes up the other
+    for variables_indices in ([0, 1], [1, 2]):
+        csp_instance.add_global_constraint(
+            LinearConstraint(
+                variables_indices=variables_indices,
+                coefficients=[-1, 1],
+                linear_operator=">=",
+                constant=1,
+            )
+        )
+    engine = PropagationEngine(csp_instance=csp_instance)
+    domains_last_valid_index = [4, 4, 2]
+    shrinking_operations = dict()
+    assert not engine.propagate(
+        state=dict(),
+        last_variable_index=None,
+        shrinking_operations=shrinking_operations,
+        domains_last_valid_index=domains_last_valid_index,
+    )
+    assert valid_values(csp_instance.domains, domains_last_valid_index) == [
+        [1],
+        [2],
+        [3],
+    ]
+    assert shrinking_operations == {0: 4, 1: 4, 2: 2}
+
+
+def test_wipe_out_leaves_a_trail_restoring_the_domains():
+    # A triangle with two colors
+    csp_instance = CSP(
+        variables=["x", "y", "z"], domains=[[1, 2] for _ in range(3)], constraints={}
+    )
+    different = lambda i, j, value_var_i, value_var_j: value_var_i != value_var_j
+    for index_variable_1, index_variable_2 in ((0, 1), (0, 2), (1, 2)):
+        csp_instance.add_constraint(
+            index_variable_1=index_variable_1,
+            index_variable_2=index_variable_2,
+            new_constraint=different,
+        )
+    engine = PropagationEngine(
+        csp_instance=csp_instance, use_forward_checking=True, use_arc_consistency=True
+    )
+    domains_last_valid_index = [1, 1, 1]
+    _assign(csp_instance, domains_last_valid_index, variable_index=0, value=1)
+    shrinking_operations = dict()
+    assert engine.propagate(
+        state={0: 1},
+        last_variable_index=0,
+        shrinking_operations=shrinking_operations,
+        domains_last_valid_index=domains_last_valid_index,
+    )
+    # Reverting the trail gives back the domains before the assignment
+    for variable_index, removed_values in shrinking_operations.items():
+        domains_last_valid_index[variable_index] += removed_values
+    domains_last_valid_index[0] = 1
+    assert valid_values(csp_instance.domains, domains_last_valid_index) == [
+        [1, 2],
+        [1, 2],
+        [1, 2],
+    ]
+
+
+def test_forward_checking_and_arc_consistency_prune_like_AC3():
+    for assigned_value in (3, 4):
+        results = []
+        for use_engine in (True, False):
+            csp_instance = _chain_csp()
+            # The search starts from arc consistent domains
+            domains_last_valid_index = [4, 4, 4, 4]
+            assert not AC3_current_state(
+                csp_instance=csp_instance,
+                state=dict(),
+                shrinking_operations=dict(),
+                domains_last_valid_index=domains_last_valid_index,
+                last_variable_index=None,
+            )
+            _assign(csp_instance, domains_last_valid_index, 1, assigned_value)
+            shrinking_operations = dict()
+            if use_engine:
+                emptied_a_domain = PropagationEngine(
+                    csp_instance=csp_instance,
+                    use_forward_checking=True,
+                    use_arc_consistency=True,
+                ).propagate(
+                    state={1: assigned_value},
+                    last_variable_index=1,
+                    shrinking_operations=shrinking_operations,
+                    domains_last_valid_index=domains_last_valid_index,
+                )
+            else:
+                emptied_a_domain = AC3_current_state(
+                    csp_instance=csp_instance,
+                    state={1: assigned_value},
+                    shrinking_operations=shrinking_operations,
+                    domains_last_valid_index=domains_last_valid_index,
+                    last_variable_index=1,
+                )
+            results.append(
+                (
+                    emptied_a_domain,
+                    valid_values(csp_instance.domains, domains_last_valid_index),
+                    shrinking_operations,
+                )
+            )
+        assert results[0] == results[1] and not results[0][0]
+    # x_1 = 4 keeps two values for x_2 and x_3
+    assert results[0][1] == [[5], [4], [2, 3], [1, 2]]
@@ -0,0 +1,112 @@
+from itertools import product
+
+from backtrack import BacktrackClass, NO_SOLUTION_STATUS
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import (
+    coloring_optimization,
+    geometric_graph_edges,
+    gnp_graph_edges,
+    graph_coloring_problem,
+    leighton_graph_edges,
+    model_rb_critical_tightness,
+    model_rb_parameters,
+    model_rb_problem,
+)
+
+
+def _solver() -> BacktrackClass:
+    return BacktrackClass(
+        use_forward_checking=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+    )
+
+
+def test_generators_are_determined_by_the_seed():
+    assert list(gnp_graph_edges(n=40, p=0.2, seed=3)) == list(
+        gnp_graph_edges(n=40, p=0.2, seed=3)
+    )
+    assert list(gnp_graph_edges(n=40, p=0.2, seed=3)) != list(
+        gnp_graph_edges(n=40, p=0.2, seed=4)
+    )
+    assert list(geometric_graph_edges(n=40, radius=0.3, seed=3)) == list(
+        geometric_graph_edges(n=40, radius=0.3, seed=3)
+    )
+    assert list(
+        leighton_graph_edges(n=40, chromatic_number=4, edges_count=100, seed=3)
+    ) == list(leighton_graph_edges(n=40, chromatic_number=4, edges_count=100, seed=3))
+
+
+def test_graph_edges_are_distinct_and_ordered():
+    for edges in (
+        list(gnp_graph_edges(n=30, p=0.3, seed=0)),
+        list(geometric_graph_edges(n=30, radius=0.4, seed=0)),
+        list(leighton_graph_edges(n=30, chromatic_number=3, edges_count=80, seed=0)),
+    ):
+        assert len(edges) == len(set(edges))
+        assert all(0 <= first < second < 30 for first, second in edges)
+    assert len(list(gnp_graph_edges(n=10, p=1.0, seed=0))) == 45
+    assert list(gnp_graph_edges(n=10, p=0.0, seed=0)) == []
+    assert (
+        len(
+            list(leighton_graph_edges(n=30, chromatic_number=3, edges_count=80, seed=0))
+        )
+        == 80
+    )
+
+
+def test_leighton_graphs_have_their_chromatic_number():
+    for chromatic_number, seed in product((2, 3, 4), range(3)):
+        csp_coloring, max_degree = graph_coloring_problem(
+            n=25,
+            edges=leighton_graph_edges(
+                n=25, chromatic_number=chromatic_number, edges_count=60, seed=seed
+            ),
+        )
+        colors_needed, coloring, _, finished = coloring_optimization(
+            coloring_instance=csp_coloring,
+            max_degree=max_degree,
+            backtrack_object=_solver(),
+        )
+        assert finished
+        assert colors_needed == chromatic_number
+
+
+def test_model_rb_instances_have_the_requested_shape():
+    d, constraints_count = model_rb_parameters(n=20, alpha=0.8, r=0.8)
+    csp_instance = model_rb_problem(
+        n=20,
+        d=d,
+        density=constraints_count / (20 * 19 / 2),
+        tightness=0.5,
+        seed=1,
+    )
+    assert len(csp_instance.variables) == 20
+    assert all(len(domain) == d for domain in csp_instance.domains)
+    # Both directions of each constraint are stored
+    assert len(csp_instance.constraints) == 2 * constraints_count
+    first, second = next(iter(csp_instance.constraints))
+    forbidden_count = sum(
+        not csp_instance.constraints[(first, second)](first, second, value_1, value_2)
+        for value_1, value_2 in product(range(d), repeat=2)
+    )
+    assert forbidden_count == round(0.5 * d * d)
+
+
+def test_model_rb_is_unsatisfiable_far_above_the_phase_transition():
+    d, constraints_count = model_rb_parameters(n=15, alpha=0.8, r=0.8)
+    density = constraints_count / (15 * 14 / 2)
+    loose_instance = model_rb_problem(n=15, d=d, density=density, tightness=0.1, seed=0)
+    found_solution, _ = _solver().run_backtrack(csp_instance=loose_instance)
+    assert found_solution
+
+    tight_instance = model_rb_problem(
+        n=15,
+        d=d,
+        density=density,
+        tightness=min(0.95, 1.3 * model_rb_critical_tightness(alpha=0.8, r=0.8)),
+        seed=0,
+    )
+    backtrack_object = _solver()
+    found_solution, _ = backtrack_object.run_backtrack(csp_instance=tight_instance)
+    assert not found_solution
+    assert backtrack_object.status == NO_SOLUTION_STATUS
@@ -0,0 +1,71 @@
+import threading
+
+import pytest
+
+from backtrack import SOLUTION_STATUS, TIMEOUT_STATUS, BacktrackClass
+from backtrack.search_limits import (
+    CANCELLED_REASON,
+    MEMORY_LIMIT_REASON,
+    NODE_LIMIT_REASON,
+    current_memory_usage,
+)
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from conftest import expert_sudoku
+from instances import n_queens_problem
+
+needs_memory_measure = pytest.mark.skipif(
+    current_memory_usage is None, reason="no way to measure the memory here"
+)
+MEGABYTE = 2**20
+
+
+def _solver(**options) -> BacktrackClass:
+    return BacktrackClass(
+        use_forward_checking=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+        limits_check_frequency=1,
+        **options,
+    )
+
+
+@needs_memory_measure
+def test_memory_usage_is_the_current_one():
+    before = current_memory_usage()
+    allocation = bytearray(200 * MEGABYTE)
+    # Touch the pages so that they are resident
+    allocation[::4096] = b"1" * len(range(0, len(allocation), 4096))
+    assert current_memory_usage() >= before + 150 * MEGABYTE
+    del allocation
+    assert current_memory_usage() < before + 50 * MEGABYTE
+
+
+@needs_memory_measure
+def test_memory_budget_after_a_run_over_it():
+    backtrack_object = _solver(memory_limit=current_memory_usage() + 100 * MEGABYTE)
+    assert backtrack_object.run_backtrack(csp_instance=expert_sudoku())[0]
+
+    # A run going over the budget is stopped
+    allocation = bytearray(200 * MEGABYTE)
+    allocation[::4096] = b"1" * len(range(0, len(allocation), 4096))
+    backtrack_object.run_backtrack(csp_instance=expert_sudoku())
+    assert backtrack_object.status == TIMEOUT_STATUS
+    assert backtrack_object.stop_reason == MEMORY_LIMIT_REASON
+    del allocation
+
+    # The peak of the process doesn't stop the next runs of the same worker
+    found_solution, _ = backtrack_object.run_backtrack(csp_instance=expert_sudoku())
+    assert found_solution and backtrack_object.status == SOLUTION_STATUS
+
+
+def test_node_budget_and_cancellation():
+    backtrack_object = _solver(node_limit=20)
+    backtrack_object.run_backtrack(csp_instance=n_queens_problem(n=30))
+    assert backtrack_object.status == TIMEOUT_STATUS
+    assert backtrack_object.stop_reason == NODE_LIMIT_REASON
+    assert backtrack_object.nodes == 21
+
+    cancellation_token = threading.Event()
+    cancellation_token.set()
+    backtrack_object = _solver(cancellation_token=cancellation_token)
+    backtrack_object.run_backtrack(csp_instance=expert_sudoku())
+    assert backtrack_object.stop_reason == CANCELLED_REASON
@@ -0,0 +1,113 @@
+import pytest
+
+from backtrack import (
+    BEST_FIRST_STRATEGY,
+    DEPTH_BOUNDED_DISCREPANCY_STRATEGY,
+    ITERATIVE_DISCREPANCY_STRATEGY,
+    LIMITED_DISCREPANCY_STRATEGY,
+    NO_SOLUTION_STATUS,
+    SEARCH_STRATEGIES,
+    SOLUTION_STATUS,
+    TIMEOUT_STATUS,
+    BacktrackClass,
+)
+from backtrack.search_limits import DISCREPANCY_LIMIT_REASON
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import (
+    COLORING_INSTANCES_PATH,
+    SUDOKU_INSTANCES_PATH,
+    coloring_problem,
+    n_queens_problem,
+    sudoku_problem,
+)
+
+
+def _solver(search_strategy: str, **options) -> BacktrackClass:
+    return BacktrackClass(
+        use_forward_checking=True,
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+        search_strategy=search_strategy,
+        **options,
+    )
+
+
+def _coloring(graph_name: str, colors: int):
+    csp_coloring, _ = coloring_problem(graph_path=COLORING_INSTANCES_PATH / graph_name)
+    for variable_index in range(len(csp_coloring.variables)):
+        csp_coloring.domains[variable_index] = list(range(colors))
+    return csp_coloring
+
+
+@pytest.mark.parametrize("search_strategy", SEARCH_STRATEGIES)
+def test_strategies_solve_sudokus_and_queens(search_strategy):
+    # expert10 needs the depth-bounded search to go deep, its domains are reordered between iterations
+    for grid_name in ("expert1.txt", "expert10.txt"):
+        backtrack_object = _solver(search_strategy=search_strategy)
+        found_solution, state = backtrack_object.run_backtrack(
+            csp_instance=sudoku_problem(instance_path=SUDOKU_INSTANCES_PATH / grid_name)
+        )
+        assert found_solution and backtrack_object.status == SOLUTION_STATUS
+        for i in range(1, 10):
+            assert sorted(state[f"x_{i}_{j}"] for j in range(1, 10)) == list(
+                range(1, 10)
+            )
+            assert sorted(state[f"x_{j}_{i}"] for j in range(1, 10)) == list(
+                range(1, 10)
+            )
+
+    found_solution, state = _solver(search_strategy=search_strategy).run_backtrack(
+        csp_instance=n_queens_problem(n=12)
+    )
+    assert found_solution
+    columns = [state[f"{i}_col_queen"] for i in range(1, 13)]
+    assert len(set(columns)) == 12
+    assert len({column - row for row, column in enumerate(columns)}) == 12
+    assert len({column + row for row, column in enumerate(columns)}) == 12
+
+
+@pytest.mark.parametrize("search_strategy", SEARCH_STRATEGIES)
+def test_complete_strategies_prove_infeasibility(search_strategy):
+    for graph_name, colors in (("toy_odd_cycle.txt", 2), ("myciel3.col.txt", 3)):
+        backtrack_object = _solver(search_strategy=search_strategy)
+        found_solution, _ = backtrack_object.run_backtrack(
+            csp_instance=_coloring(graph_name=graph_name, colors=colors)
+        )
+        assert not found_solution
+        assert backtrack_object.status == NO_SOLUTION_STATUS
+
+
+def test_discrepancy_limit_stops_the_search():
+    for search_strategy in (
+        LIMITED_DISCREPANCY_STRATEGY,
+        ITERATIVE_DISCREPANCY_STRATEGY,
+        DEPTH_BOUNDED_DISCREPANCY_STRATEGY,
+    ):
+        backtrack_object = _solver(search_strategy=search_strategy, max_discrepancies=0)
+        found_solution, _ = backtrack_object.run_backtrack(
+            csp_instance=_coloring(graph_name="myciel3.col.txt", colors=3)
+        )
+        assert not found_solution
+        assert backtrack_object.status == TIMEOUT_STATUS
+        assert backtrack_object.stop_reason == DISCREPANCY_LIMIT_REASON
+
+    # Enough discrepancies for the whole tree of the odd cycle
+    backtrack_object = _solver(
+        search_strategy=LIMITED_DISCREPANCY_STRATEGY, max_discrepancies=10
+    )
+    backtrack_object.run_backtrack(
+        csp_instance=_coloring(graph_name="toy_odd_cycle.txt", colors=2)
+    )
+    assert backtrack_object.status == NO_SOLUTION_STATUS
+
+
+def test_best_first_respects_the_node_limit():
+    backtrack_object = _solver(search_strategy=BEST_FIRST_STRATEGY, node_limit=10)
+    backtrack_object.run_backtrack(
+        csp_instance=_coloring(graph_name="myciel4.col.txt", colors=4)
+    )
+    assert backtrack_object.status == TIMEOUT_STATUS
+
+
+def test_unknown_strategy_is_refused():
+    with pytest.raises(ValueError):
+        _solver(search_strategy="breadth_first")
@@ -0,0 +1,43 @@
+import pytest
+
+import backtrack.search_tracer as search_tracer
+from backtrack import (
+    BacktrackClass,
+    SearchTracer,
+    build_trace_histograms,
+    read_search_trace,
+)
+from backtrack.variables_choosing_algorithms import smallest_domain_variable_choosing
+from instances import n_queens_problem
+
+
+def _trace_queens(path, trace_format: str) -> BacktrackClass:
+    with SearchTracer(path, trace_format=trace_format) as tracer:
+        backtrack_object = BacktrackClass(
+            use_forward_checking=True,
+            next_variable_choosing_method=smallest_domain_variable_choosing,
+            tracer=tracer,
+        )
+        backtrack_object.run_backtrack(n_queens_problem(n=12))
+    return backtrack_object
+
+
+def test_binary_trace_is_read_in_chunks(tmp_path, monkeypatch):
+    _trace_queens(path=tmp_path / "run.jsonl", trace_format="jsonl")
+    _trace_queens(path=tmp_path / "run.trace", trace_format="binary")
+    jsonl_events = list(read_search_trace(tmp_path / "run.jsonl"))
+    assert len(jsonl_events) > 10
+    # Chunks which don't divide the number of records
+    monkeypatch.setattr(search_tracer, "READ_CHUNK_RECORDS", 3)
+    assert list(read_search_trace(tmp_path / "run.trace")) == jsonl_events
+    assert build_trace_histograms(tmp_path / "run.trace") == build_trace_histograms(
+        tmp_path / "run.jsonl"
+    )
+
+
+def test_truncated_binary_trace_is_reported(tmp_path):
+    _trace_queens(path=tmp_path / "run.trace", trace_format="binary")
+    with open(tmp_path / "run.trace", "ab") as trace_file:
+        trace_file.write(b"\0\0\0")
+    with pytest.raises(ValueError):
+        list(read_search_trace(tmp_path / "run.trace"))
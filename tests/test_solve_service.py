@@ -0,0 +1,73 @@
+import asyncio
+import os
+
+import pytest
+
+import service.solve_service as solve_service
+from backtrack.parallel_components import fork_is_available
+from service.solve_jobs import (
+    ERROR_EVENT,
+    RESULT_EVENT,
+    run_solve_job,
+    validate_solve_job,
+)
+
+needs_fork = pytest.mark.skipif(not fork_is_available(), reason="fork is needed")
+
+
+def _run_or_crash(job: dict, **options) -> dict:
+    # The worker process dies as if it was killed
+    if job["n"] == 2:
+        os._exit(1)
+    return run_solve_job(job=job, **options)
+
+
+async def _solve_jobs(jobs: list) -> list:
+    async with solve_service.SolveService(workers=2) as service:
+        events = []
+        results = []
+        for job in jobs:
+            results.append(await service.solve(job=job, send_event=events.append))
+    return results
+
+
+@needs_fork
+def test_solve_service_runs_a_job():
+    (result,) = asyncio.run(_solve_jobs(jobs=[{"id": 1, "kind": "queens", "n": 8}]))
+    assert result["id"] == 1 and result["event"] == RESULT_EVENT
+
+
+@needs_fork
+def test_a_new_pool_replaces_a_broken_one(monkeypatch):
+    # The workers are forked, they inherit the patched module
+    monkeypatch.setattr(solve_service, "run_solve_job", _run_or_crash)
+    crash, after_crash = asyncio.run(
+        _solve_jobs(
+            jobs=[
+                {"id": "crash", "kind": "queens", "n": 2},
+                {"id": "after", "kind": "queens", "n": 8},
+            ]
+        )
+    )
+    assert crash["id"] == "crash" and crash["event"] == ERROR_EVENT
+    assert "BrokenProcessPool" in crash["message"]
+    assert after_crash["id"] == "after" and after_crash["event"] == RESULT_EVENT
+
+
+def test_jobs_can_choose_the_search_strategy():
+    job = {
+        "id": 1,
+        "kind": "queens",
+        "n": 8,
+        "config": {
+            "use_forward_checking": True,
+            "search_strategy": "limited_discrepancy",
+            "max_discrepancies": 2,
+        },
+    }
+    validate_solve_job(job=job)
+    result = run_solve_job(job=job, send_event=lambda event: None)
+    assert result["event"] == RESULT_EVENT
+    job["config"]["search_strategy"] = "breadth_first"
+    with pytest.raises(ValueError, match="Unknown search strategy"):
+        validate_solve_job(job=job)
@@ -0,0 +1,76 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+import instances
+from solver.__main__ import main
+
+REPOSITORY_PATH = Path(__file__).resolve().parent.parent
+
+
+def test_solves_a_bundled_sudoku(capsys):
+    assert main(["sudoku", "expert1.txt"]) == 0
+    lines = capsys.readouterr().out.splitlines()
+    grid = [[int(value) for value in line.split()] for line in lines[:9]]
+    for row in grid:
+        assert sorted(row) == list(range(1, 10))
+    for column in zip(*grid):
+        assert sorted(column) == list(range(1, 10))
+    assert lines[9].startswith("status solution")
+
+
+def test_exact_cover_engine(capsys):
+    assert main(["sudoku", "expert1.txt", "--json"]) == 0
+    backtrack_state = json.loads(capsys.readouterr().out)["state"]
+    assert main(["sudoku", "expert1.txt", "--exact-cover", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["state"] == backtrack_state
+    assert main(["queens", "3", "--exact-cover"]) == 1
+    with pytest.raises(SystemExit):
+        main(["coloring", "myciel3.col.txt", "--exact-cover"])
+
+
+def test_queens_and_coloring_results_as_json(capsys):
+    assert main(["queens", "8", "--consistency", "forward_arc", "--json"]) == 0
+    result = json.loads(capsys.readouterr().out)
+    columns = [result["state"][f"{i}_col_queen"] for i in range(1, 9)]
+    assert len(set(columns)) == 8
+    assert result["import_time"] >= 0 and result["solve_time"] >= 0
+
+    assert main(["coloring", "toy_odd_cycle.txt", "--json"]) == 0
+    assert json.loads(capsys.readouterr().out)["colors"] == 3
+    # Decision with a number of colors: an odd cycle needs 3
+    assert main(["coloring", "toy_odd_cycle.txt", "--colors", "2"]) == 1
+    assert "No solution found" in capsys.readouterr().out
+
+
+def test_bad_instances_are_reported(capsys):
+    assert main(["sudoku", "no_such_grid.txt"]) == 2
+    assert "No instance file" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(["queens", "eight"])
+
+
+def test_lazy_exports():
+    assert "sudoku_problem" in dir(instances)
+    with pytest.raises(AttributeError):
+        instances.no_such_builder
+    # A fresh interpreter, the tests already imported everything
+    loaded_modules = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import sys\n"
+            "from instances import sudoku_problem\n"
+            "from backtrack import BacktrackClass\n"
+            "print(' '.join(sys.modules))",
+        ],
+        cwd=REPOSITORY_PATH,
+        check=True,
+        stdout=subprocess.PIPE,
+        text=True,
+    ).stdout.split()
+    for module in ("numpy", "multiprocessing", "instances.coloring", "local_search"):
+        assert module not in loaded_modules
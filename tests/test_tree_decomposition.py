@@ -0,0 +1,144 @@
+from backtrack import (
+    BacktrackClass,
+    GoodsTable,
+    NO_SOLUTION_STATUS,
+    SOLUTION_STATUS,
+    TreeDecomposition,
+)
+from backtrack.variables_choosing_algorithms import (
+    ordered_variable_choosing,
+    smallest_domain_variable_choosing,
+)
+from conftest import coloring_model, expert_sudoku
+
+
+def _ancestors(decomposition: TreeDecomposition, variable_index: int) -> set:
+    ancestors = set()
+    while (variable_index := decomposition.parents[variable_index]) is not None:
+        ancestors.add(variable_index)
+    return ancestors
+
+
+def test_decomposition_covers_the_edges_and_separators_are_ancestors():
+    csp_instance = coloring_model(instance_name="myciel4.col.txt", colors=5)
+    decomposition = TreeDecomposition(csp_instance=csp_instance)
+    variables_count = len(csp_instance.variables)
+    assert sorted(decomposition.order) == list(range(variables_count))
+    for variable_index in range(variables_count):
+        assert set(decomposition.separators[variable_index]) <= _ancestors(
+            decomposition=decomposition, variable_index=variable_index
+        )
+        for neighbour in csp_instance.variable_is_constrained_by[variable_index]:
+            assert (
+                neighbour in decomposition.separators[variable_index]
+                or variable_index in decomposition.separators[neighbour]
+            )
+    position = {
+        variable_index: rank for rank, variable_index in enumerate(decomposition.order)
+    }
+    for variable_index in range(variables_count):
+        assert all(
+            position[separator_variable] < position[variable_index]
+            for separator_variable in decomposition.separators[variable_index]
+        )
+
+
+def test_tree_decomposition_search_matches_the_backtrack():
+    for instance_name, colors, status in [
+        ("myciel3.col.txt", 4, SOLUTION_STATUS),
+        ("myciel3.col.txt", 3, NO_SOLUTION_STATUS),
+        ("toy_even_cycle.txt", 2, SOLUTION_STATUS),
+        ("toy_odd_cycle.txt", 2, NO_SOLUTION_STATUS),
+        ("anna.col.txt", 11, SOLUTION_STATUS),
+    ]:
+        csp_instance = coloring_model(instance_name=instance_name, colors=colors)
+        backtrack_object = BacktrackClass(
+            use_forward_checking=True, use_tree_decomposition=True, time_limit=30
+        )
+        found_solution, state = backtrack_object.run_backtrack(
+            csp_instance=csp_instance
+        )
+        assert backtrack_object.status == status
+        if found_solution:
+            assert len(state) == len(csp_instance.variables)
+            assert all(
+                state[csp_instance.variables[i]] != state[csp_instance.variables[j]]
+                for i, j in csp_instance.constraints.keys()
+            )
+
+
+def test_clusters_split_the_variables_left():
+    csp_instance = coloring_model(instance_name="jean.col.txt", colors=10)
+    fixed_variables = {0: 0, 5: 1}
+    decomposition = TreeDecomposition(
+        csp_instance=csp_instance, fixed_variables=fixed_variables
+    )
+    clustered = [
+        variable_index
+        for cluster in decomposition.clusters
+        for variable_index in cluster
+    ]
+    assert sorted(clustered) == sorted(decomposition.order)
+    assert sorted(decomposition.order) == [
+        variable_index
+        for variable_index in range(len(csp_instance.variables))
+        if variable_index not in fixed_variables
+    ]
+    for variable_index, cluster in enumerate(decomposition.clusters):
+        if not cluster:
+            continue
+        assert cluster[0] == variable_index
+        assert (
+            decomposition.parents[variable_index] is None
+            or decomposition.recorded[variable_index]
+        )
+        for child in decomposition.cluster_children[variable_index]:
+            assert decomposition.parents[child] in cluster
+            assert set(decomposition.separators[child]).isdisjoint(fixed_variables)
+
+
+def test_variables_choosing_method_orders_the_clusters():
+    found_solution, state = BacktrackClass(
+        next_variable_choosing_method=smallest_domain_variable_choosing,
+        use_tree_decomposition=True,
+        node_limit=5000,
+    ).run_backtrack(csp_instance=expert_sudoku())
+    assert found_solution and len(state) == 81
+    # A choice outside of the cluster falls back on the order of the decomposition
+    csp_instance = coloring_model(instance_name="anna.col.txt", colors=11)
+    backtrack_object = BacktrackClass(
+        next_variable_choosing_method=lambda csp_instance, state, domains_last_valid_index: 0,
+        use_tree_decomposition=True,
+        time_limit=30,
+    )
+    found_solution, state = backtrack_object.run_backtrack(csp_instance=csp_instance)
+    assert found_solution
+    assert all(
+        state[csp_instance.variables[i]] != state[csp_instance.variables[j]]
+        for i, j in csp_instance.constraints.keys()
+    )
+
+
+def test_ordered_variable_choosing_follows_the_decomposition():
+    csp_instance = coloring_model(instance_name="jean.col.txt", colors=10)
+    decomposition = TreeDecomposition(csp_instance=csp_instance)
+    backtrack_object = BacktrackClass(
+        use_forward_checking=True,
+        next_variable_choosing_method=ordered_variable_choosing(
+            order=decomposition.order
+        ),
+    )
+    found_solution, _ = backtrack_object.run_backtrack(csp_instance=csp_instance)
+    assert found_solution
+
+
+def test_goods_table_evicts_the_least_recently_used():
+    goods_table = GoodsTable(max_entries=2)
+    goods_table.put(key=(0, (1,)), record=(1, 2))
+    goods_table.put(key=(0, (2,)), record=None)
+    goods_table.get(key=(0, (1,)))
+    goods_table.put(key=(0, (3,)), record=(3, 4))
+    assert len(goods_table) == 2
+    assert goods_table.get(key=(0, (1,))) == (1, 2)
+    assert (0, (2,)) not in goods_table.records
+    assert goods_table.hits == 2 and goods_table.misses == 0
@@ -0,0 +1,127 @@
+import random
+
+import backtrack.vectorized_revision as vectorized_revision
+from backtrack.AC3 import restrict_domain_with_constraint
+from backtrack.vectorized_revision import (
+    vectorized_restrict_domain_with_constraint,
+    vectorized_restrict_domain_with_value,
+)
+from conftest import valid_values
+from models import CSP, IntervalDomain, vectorized_form
+from wrappers import distance_at_least, weighted_sum
+
+
+def _two_variables_csp(domain_1, domain_2, constraint) -> CSP:
+    csp_instance = CSP(
+        variables=["x", "y"], domains=[domain_1, domain_2], constraints={}
+    )
+    csp_instance.add_constraint(
+        index_variable_1=0, index_variable_2=1, new_constraint=constraint
+    )
+    return csp_instance
+
+
+def _python_only(constraint):
+    # The same predicate without its vectorized form
+    return lambda i, j, value_var_i, value_var_j: constraint(
+        i, j, value_var_i, value_var_j
+    )
+
+
+def test_vectorized_revision_matches_the_python_one(monkeypatch):
+    # Small chunks so that the mask is built in several parts
+    monkeypatch.setattr(vectorized_revision, "VECTORIZED_REVISION_CHUNK_PAIRS", 7)
+    randomizer = random.Random(0)
+    combined_csp = _two_variables_csp(
+        domain_1=[], domain_2=[], constraint=distance_at_least(distance=3)
+    )
+    combined_csp.add_constraint(
+        index_variable_1=0,
+        index_variable_2=1,
+        new_constraint=weighted_sum(
+            coefficient_1=1, coefficient_2=-1, linear_operator="<=", constant=5
+        ),
+    )
+    for constraint in (
+        distance_at_least(distance=4),
+        weighted_sum(
+            coefficient_1=2, coefficient_2=3, linear_operator=">=", constant=40
+        ),
+        # The combined form and its swapped version
+        combined_csp.constraints[(0, 1)],
+        combined_csp.constraints[(1, 0)],
+    ):
+        assert vectorized_form(constraint) is not None
+        for interval_domain in (False, True):
+            domain_1 = randomizer.sample(range(20), 12)
+            domain_2 = randomizer.sample(range(20), 5)
+            results = []
+            for revision, revised_constraint in (
+                (restrict_domain_with_constraint, _python_only(constraint)),
+                (vectorized_restrict_domain_with_constraint, constraint),
+            ):
+                csp_instance = _two_variables_csp(
+                    domain_1=(
+                        IntervalDomain(low=0, high=11)
+                        if interval_domain
+                        else list(domain_1)
+                    ),
+                    domain_2=list(domain_2),
+                    constraint=constraint,
+                )
+                domains_last_valid_index = [11, 4]
+                shrinking_operations = dict()
+                options = (
+                    dict(constraint=revised_constraint)
+                    if revision is restrict_domain_with_constraint
+                    else dict(vectorized_constraint=vectorized_form(revised_constraint))
+                )
+                emptied_a_domain, restricted = revision(
+                    csp_instance=csp_instance,
+                    index_variable_1=0,
+                    index_variable_2=1,
+                    shrinking_operations=shrinking_operations,
+                    domains_last_valid_index=domains_last_valid_index,
+                    **options,
+                )
+                results.append(
+                    (
+                        emptied_a_domain,
+                        restricted,
+                        shrinking_operations,
+                        (
+                            None
+                            if emptied_a_domain
+                            else valid_values(
+                                csp_instance.domains, domains_last_valid_index
+                            )
+                        ),
+                    )
+                )
+            assert results[0] == results[1]
+
+
+def test_vectorized_forward_checking_removes_the_unsupported_values():
+    constraint = distance_at_least(distance=3)
+    csp_instance = _two_variables_csp(
+        domain_1=[5], domain_2=list(range(10)), constraint=constraint
+    )
+    domains_last_valid_index = [0, 9]
+    shrinking_operations = dict()
+    assert vectorized_restrict_domain_with_value(
+        csp_instance=csp_instance,
+        index_variable=1,
+        fixed_variable_index=0,
+        fixed_variable_value=5,
+        vectorized_constraint=vectorized_form(csp_instance.constraints[(0, 1)]),
+        shrinking_operations=shrinking_operations,
+        domains_last_valid_index=domains_last_valid_index,
+    ) == (False, True)
+    assert valid_values(csp_instance.domains, domains_last_valid_index)[1] == [
+        0,
+        1,
+        2,
+        8,
+        9,
+    ]
+    assert shrinking_operations == {1: 5}
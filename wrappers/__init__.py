@@ -1 +1,4 @@
-from .alldiff_wrapper import alldiff
+from .alldiff_wrapper import alldiff, AllDifferentConstraint
+from .linear_wrapper import weighted_sum, LinearConstraint, LINEAR_OPERATORS
+from .distance_wrapper import distance_at_least, parity, DistanceConstraint
+from .lex_wrapper import LexLeaderConstraint
@@ -1,4 +1,107 @@
-from constants import Constraint
+from typing import Tuple
 
+from constants import Constraint, DOMAIN_EVENT, GLOBAL_PRIORITY
+from models import remove_valid_values_between, with_vectorized_form
 
-alldiff: Constraint = lambda i, j, value_var_i, value_var_j: value_var_i != value_var_j
+alldiff: Constraint = with_vectorized_form(
+    constraint=lambda i, j, value_var_i, value_var_j: value_var_i != value_var_j,
+    vectorized_constraint=lambda i, j, values_i, values_j: values_i != values_j,
+    symmetric=True,
+)
+
+
+class AllDifferentConstraint:
+    """
+    Global form of alldiff: all the variables of variables_indices take different values, added with
+    CSP.add_global_constraint instead of a clique of binary alldiff.
+    The value of each fixed variable is removed from the other domains, which may fix other variables,
+    and the scope fails as soon as fewer values are left than unfixed variables (pigeonhole).
+    """
+
+    # Any removal may trigger the pigeonhole check, it goes after the cheaper propagators
+    events = (DOMAIN_EVENT,)
+    priority = GLOBAL_PRIORITY
+    variables_indices: list[int]
+
+    def __init__(self, variables_indices: list[int]) -> None:
+        self.variables_indices = list(variables_indices)
+        return
+
+    def __str__(self) -> str:
+        variables = ", ".join(f"x{index}" for index in self.variables_indices)
+        return f"alldifferent({variables})"
+
+    def reindexed(self, new_indices: dict) -> "AllDifferentConstraint":
+        """
+        The same constraint on a CSP where the variable i became new_indices[i].
+        """
+        return AllDifferentConstraint(
+            variables_indices=[new_indices[index] for index in self.variables_indices]
+        )
+
+    def is_satisfied(self, state: dict) -> bool:
+        values = [state[index] for index in self.variables_indices]
+        return len(set(values)) == len(values)
+
+    def propagate(
+        self,
+        domains: list,
+        state: dict,
+        domains_last_valid_index: list,
+        shrinking_operations: dict,
+    ) -> Tuple[bool, list[int]]:
+        """
+        Removes the values of the fixed variables from the other domains, in place like the forward
+        checking, until no new variable gets fixed, then checks the pigeonhole. It returns wether a domain
+        was emptied and the indices of the variables whose domain was shrunk.
+        """
+        shrunk_variables = []
+        used_values = set()
+        to_be_removed = []
+        for index in self.variables_indices:
+            if domains_last_valid_index[index] == 0:
+                value = domains[index][0]
+                if value in used_values:
+                    return True, shrunk_variables
+                used_values.add(value)
+                to_be_removed.append(index)
+
+        while to_be_removed:
+            fixed_index = to_be_removed.pop()
+            value = domains[fixed_index][0]
+            for index in self.variables_indices:
+                last_valid = domains_last_valid_index[index]
+                if last_valid == 0:
+                    # A fixed variable holding the same value was caught above
+                    continue
+                new_last_valid = remove_valid_values_between(
+                    domain=domains[index],
+                    lower_bound=value,
+                    upper_bound=value,
+                    last_valid_index=last_valid,
+                )
+                if new_last_valid == last_valid:
+                    continue
+                domains_last_valid_index[index] = new_last_valid
+                shrinking_operations[index] = 1 + shrinking_operations.get(index, 0)
+                shrunk_variables.append(index)
+                if new_last_valid == 0:
+                    new_value = domains[index][0]
+                    if new_value in used_values:
+                        return True, shrunk_variables
+                    used_values.add(new_value)
+                    to_be_removed.append(index)
+
+        free_values = set()
+        free_variables = 0
+        for index in self.variables_indices:
+            last_valid = domains_last_valid_index[index]
+            if last_valid + 1 >= len(self.variables_indices):
+                # This domain alone holds enough values for the free variables
+                return False, shrunk_variables
+            if last_valid > 0:
+                free_variables += 1
+                free_values.update(domains[index][: last_valid + 1])
+        if len(free_values - used_values) < free_variables:
+            return True, shrunk_variables
+        return False, shrunk_variables
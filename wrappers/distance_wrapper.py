@@ -0,0 +1,145 @@
+# This file implements the distance constraints |x_i - x_j| >= d of the frequency assignment,
+# as a binary constraint and as a global constraint revised on the bounds, and the parity
+# unary constraint.
+from typing import Tuple
+
+from constants import (
+    BOUNDS_EVENT,
+    BOUNDS_PRIORITY,
+    Constraint,
+    UnaryConstraint,
+    VariableValue,
+)
+from models import (
+    domain_valid_bounds,
+    remove_valid_values_between,
+    with_vectorized_form,
+)
+
+
+def distance_at_least(distance: VariableValue) -> Constraint:
+    """
+    Binary form: returns the constraint |x_i - x_j| >= distance, to be added with add_constraint like
+    alldiff. Its vectorized form is used by the forward checking and AC3 on large domains.
+    """
+
+    def constraint(i, j, value_var_i, value_var_j):
+        return abs(value_var_i - value_var_j) >= distance
+
+    def vectorized_constraint(i, j, values_i, values_j):
+        # The builtin abs works on the arrays, without importing NumPy for the binary form
+        return abs(values_i - values_j) >= distance
+
+    return with_vectorized_form(
+        constraint=constraint,
+        vectorized_constraint=vectorized_constraint,
+        symmetric=True,
+    )
+
+
+def parity(offset: int) -> UnaryConstraint:
+    """
+    Unary constraint (x + offset) % 2 == 0, to be added with CSP.add_unary_constraint.
+    """
+    return lambda value: (value + offset) % 2 == 0
+
+
+class DistanceConstraint:
+    """
+    Global form: |x_i - x_j| >= distance, added with CSP.add_global_constraint.
+    A value v of x_j has a support in x_i if and only if min_i <= v - distance or max_i >= v + distance,
+    so the values without support are exactly those strictly between max_i - distance and min_i + distance.
+    Revising x_j is then an O(1) test on the bounds of x_i, plus a pass over the window when it isn't
+    empty, where AC3 on the binary form tests every couple of values.
+    """
+
+    # Its supports only depend on the bounds, the propagation engine wakes it up when they move
+    events = (BOUNDS_EVENT,)
+    priority = BOUNDS_PRIORITY
+    variables_indices: list[int]
+    distance: VariableValue
+
+    def __init__(
+        self, index_variable_1: int, index_variable_2: int, distance: VariableValue
+    ) -> None:
+        self.variables_indices = [index_variable_1, index_variable_2]
+        self.distance = distance
+        return
+
+    def __str__(self) -> str:
+        index_variable_1, index_variable_2 = self.variables_indices
+        return f"|x{index_variable_1} - x{index_variable_2}| >= {self.distance}"
+
+    def reindexed(self, new_indices: dict) -> "DistanceConstraint":
+        """
+        The same constraint on a CSP where the variable i became new_indices[i].
+        """
+        index_variable_1, index_variable_2 = self.variables_indices
+        return DistanceConstraint(
+            index_variable_1=new_indices[index_variable_1],
+            index_variable_2=new_indices[index_variable_2],
+            distance=self.distance,
+        )
+
+    def is_satisfied(self, state: dict) -> bool:
+        index_variable_1, index_variable_2 = self.variables_indices
+        return abs(state[index_variable_1] - state[index_variable_2]) >= self.distance
+
+    def propagate(
+        self,
+        domains: list,
+        state: dict,
+        domains_last_valid_index: list,
+        shrinking_operations: dict,
+    ) -> Tuple[bool, list[int]]:
+        """
+        Revises both variables on the bounds of the other one until nothing changes, shrinking the domains
+        in place like the forward checking. It returns wether a domain was emptied and the indices of the
+        variables whose domain was shrunk.
+        """
+        shrunk_variables = []
+        index_variable_1, index_variable_2 = self.variables_indices
+        if (
+            domains_last_valid_index[index_variable_1] < 0
+            or domains_last_valid_index[index_variable_2] < 0
+        ):
+            return True, shrunk_variables
+        changed = True
+        while changed:
+            changed = False
+            for revised_index, support_index in (
+                (index_variable_2, index_variable_1),
+                (index_variable_1, index_variable_2),
+            ):
+                support_min, support_max = domain_valid_bounds(
+                    domain=domains[support_index],
+                    last_valid_index=domains_last_valid_index[support_index],
+                )
+                window_low = support_max - self.distance + 1
+                window_high = support_min + self.distance - 1
+                if window_low > window_high:
+                    # Every value has a support
+                    continue
+
+                domain = domains[revised_index]
+                last_valid = domains_last_valid_index[revised_index]
+                if revised_index in state:
+                    if window_low <= domain[0] <= window_high:
+                        return True, shrunk_variables
+                    continue
+                new_last_valid = remove_valid_values_between(
+                    domain=domain,
+                    lower_bound=window_low,
+                    upper_bound=window_high,
+                    last_valid_index=last_valid,
+                )
+                if new_last_valid < 0:
+                    return True, shrunk_variables
+                if new_last_valid < last_valid:
+                    domains_last_valid_index[revised_index] = new_last_valid
+                    shrinking_operations[revised_index] = (
+                        last_valid - new_last_valid
+                    ) + shrinking_operations.get(revised_index, 0)
+                    shrunk_variables.append(revised_index)
+                    changed = True
+        return False, shrunk_variables
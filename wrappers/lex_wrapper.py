@@ -0,0 +1,128 @@
+# This file implements the lexicographic ordering constraint used to break symmetries with
+# lex-leader constraints: an assignment must be lexicographically smaller than its image by
+# every symmetry of the problem.
+from typing import Tuple
+
+from constants import BOUNDS_EVENT, BOUNDS_PRIORITY
+from models import domain_valid_bounds, remove_valid_values_between
+
+
+class LexLeaderConstraint:
+    """
+    Global constraint (x_{variables_indices[0]}, ..., x_{variables_indices[n-1]}) <=_lex
+    (x_{permuted_indices[0]}, ..., x_{permuted_indices[n-1]}), added with CSP.add_global_constraint.
+    With permuted_indices the image of the variables by a symmetry, only the smallest assignment of each
+    orbit is kept.
+    The propagation goes along the two sequences while both sides are fixed to the same value: at the first
+    position which isn't, the left value must be at most the right one, so the left domain loses the values
+    above the right max and the right domain the values under the left min.
+    """
+
+    # Propagated again by the engine when the min or max of one of its variables changes
+    events = (BOUNDS_EVENT,)
+    priority = BOUNDS_PRIORITY
+    variables_indices: list[int]
+    # Both sequences, without the positions a symmetry leaves in place
+    left_indices: list[int]
+    right_indices: list[int]
+
+    def __init__(
+        self, variables_indices: list[int], permuted_indices: list[int]
+    ) -> None:
+        if len(variables_indices) != len(permuted_indices):
+            raise ValueError("Both sequences must have the same length")
+        # Positions where the symmetry leaves the variable in place compare it to itself
+        kept_positions = [
+            position
+            for position in range(len(variables_indices))
+            if variables_indices[position] != permuted_indices[position]
+        ]
+        self.left_indices = [variables_indices[position] for position in kept_positions]
+        self.right_indices = [permuted_indices[position] for position in kept_positions]
+        self.variables_indices = sorted(
+            set(self.left_indices) | set(self.right_indices)
+        )
+        return
+
+    def __str__(self) -> str:
+        left = ", ".join(f"x{index}" for index in self.left_indices)
+        right = ", ".join(f"x{index}" for index in self.right_indices)
+        return f"({left}) <=lex ({right})"
+
+    def reindexed(self, new_indices: dict) -> "LexLeaderConstraint":
+        """
+        The same constraint on a CSP where the variable i became new_indices[i].
+        """
+        return LexLeaderConstraint(
+            variables_indices=[new_indices[index] for index in self.left_indices],
+            permuted_indices=[new_indices[index] for index in self.right_indices],
+        )
+
+    def is_satisfied(self, state: dict) -> bool:
+        return [state[index] for index in self.left_indices] <= [
+            state[index] for index in self.right_indices
+        ]
+
+    def propagate(
+        self,
+        domains: list,
+        state: dict,
+        domains_last_valid_index: list,
+        shrinking_operations: dict,
+    ) -> Tuple[bool, list[int]]:
+        """
+        Shrinks the domains of the first position whose sides aren't fixed to the same value, in place like
+        the forward checking, and goes on if they now are. It returns wether a domain was emptied and the indices of the variables whose
+        domain was shrunk.
+        """
+        shrunk_variables = []
+        position = 0
+        while position < len(self.left_indices):
+            left_index = self.left_indices[position]
+            right_index = self.right_indices[position]
+            left_min, left_max = domain_valid_bounds(
+                domain=domains[left_index],
+                last_valid_index=domains_last_valid_index[left_index],
+            )
+            right_min, right_max = domain_valid_bounds(
+                domain=domains[right_index],
+                last_valid_index=domains_last_valid_index[right_index],
+            )
+            if left_min == left_max == right_min == right_max:
+                position += 1
+                continue
+            if left_max < right_min:
+                # Strictly smaller whatever the values, the rest doesn't matter
+                return False, shrunk_variables
+            if left_min > right_max:
+                return True, shrunk_variables
+
+            shrunk = False
+            for index, lower_bound, upper_bound in (
+                (left_index, right_max + 1, left_max),
+                (right_index, right_min, left_min - 1),
+            ):
+                if lower_bound > upper_bound:
+                    continue
+                if index in state:
+                    # A fixed side never loses its value here, that case failed above
+                    continue
+                last_valid = domains_last_valid_index[index]
+                new_last_valid = remove_valid_values_between(
+                    domain=domains[index],
+                    lower_bound=lower_bound,
+                    upper_bound=upper_bound,
+                    last_valid_index=last_valid,
+                )
+                if new_last_valid < 0:
+                    return True, shrunk_variables
+                if new_last_valid < last_valid:
+                    domains_last_valid_index[index] = new_last_valid
+                    shrinking_operations[index] = (
+                        last_valid - new_last_valid
+                    ) + shrinking_operations.get(index, 0)
+                    shrunk_variables.append(index)
+                    shrunk = True
+            if not shrunk:
+                return False, shrunk_variables
+        return False, shrunk_variables
@@ -0,0 +1,273 @@
+# This file implements the linear (weighted sum) constraints sum(a_i * x_i) op c, as a binary
+# constraint for two variables and as a global constraint for any number of them.
+import operator
+from typing import Tuple
+
+from constants import BOUNDS_EVENT, BOUNDS_PRIORITY, Constraint, VariableValue
+from models import IntervalDomain, domain_valid_bounds, with_vectorized_form
+
+LINEAR_OPERATORS = {
+    "<=": operator.le,
+    ">=": operator.ge,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+
+def weighted_sum(
+    coefficient_1: VariableValue,
+    coefficient_2: VariableValue,
+    linear_operator: str,
+    constant: VariableValue,
+) -> Constraint:
+    """
+    Binary form: returns the constraint a_1 * x_i + a_2 * x_j op c, to be added with add_constraint
+    like alldiff. It has a vectorized form for the forward checking and AC3 on large domains.
+    """
+    compare = LINEAR_OPERATORS[linear_operator]
+    return with_vectorized_form(
+        constraint=lambda i, j, value_var_i, value_var_j: compare(
+            coefficient_1 * value_var_i + coefficient_2 * value_var_j, constant
+        ),
+        # The operators of LINEAR_OPERATORS compare NumPy arrays element-wise
+        vectorized_constraint=lambda i, j, values_i, values_j: compare(
+            coefficient_1 * values_i + coefficient_2 * values_j, constant
+        ),
+    )
+
+
+class LinearConstraint:
+    """
+    Global form: sum(coefficients[k] * x_{variables_indices[k]}) op constant over any number of variables,
+    added with CSP.add_global_constraint.
+    Instead of enumerating couples of values, it propagates on the bounds: with m_k and M_k the min and max
+    of coefficients[k] * x_k over the current domain, for "<=" every term must stay under
+    constant - sum(m_l for l != k), for ">=" above constant - sum(M_l for l != k), "==" doing both. "!=" can
+    only remove a value once all the other variables are fixed.
+    A propagation costs O(arity) once the bounds of the domains are known. On an IntervalDomain the bounds
+    are read and the values out of them removed without going through the whole domain.
+    """
+
+    # Woken up by the propagation engine when a bound of one of its variables changes
+    events = (BOUNDS_EVENT,)
+    priority = BOUNDS_PRIORITY
+    variables_indices: list[int]
+    coefficients: list[VariableValue]
+    linear_operator: str
+    constant: VariableValue
+
+    def __init__(
+        self,
+        variables_indices: list[int],
+        coefficients: list[VariableValue],
+        linear_operator: str,
+        constant: VariableValue,
+    ) -> None:
+        if linear_operator not in LINEAR_OPERATORS:
+            raise ValueError(f"Unknown linear operator {linear_operator}")
+        if len(variables_indices) != len(coefficients):
+            raise ValueError("There must be one coefficient per variable")
+        self.variables_indices = list(variables_indices)
+        self.coefficients = list(coefficients)
+        self.linear_operator = linear_operator
+        self.constant = constant
+        return
+
+    def __str__(self) -> str:
+        terms = " + ".join(
+            f"{coefficient} * x{index}"
+            for coefficient, index in zip(self.coefficients, self.variables_indices)
+        )
+        return f"{terms} {self.linear_operator} {self.constant}"
+
+    def reindexed(self, new_indices: dict) -> "LinearConstraint":
+        """
+        The same constraint on a CSP where the variable i became new_indices[i].
+        """
+        return LinearConstraint(
+            variables_indices=[new_indices[index] for index in self.variables_indices],
+            coefficients=self.coefficients,
+            linear_operator=self.linear_operator,
+            constant=self.constant,
+        )
+
+    def is_satisfied(self, state: dict) -> bool:
+        """
+        Checks the constraint once all its variables hold a value in the (indices) state.
+        """
+        return LINEAR_OPERATORS[self.linear_operator](
+            sum(
+                coefficient * state[index]
+                for coefficient, index in zip(self.coefficients, self.variables_indices)
+            ),
+            self.constant,
+        )
+
+    def _terms_bounds(
+        self, domains: list, domains_last_valid_index: list
+    ) -> Tuple[list, list]:
+        terms_min = []
+        terms_max = []
+        for coefficient, index in zip(self.coefficients, self.variables_indices):
+            low, high = domain_valid_bounds(
+                domain=domains[index], last_valid_index=domains_last_valid_index[index]
+            )
+            if coefficient >= 0:
+                terms_min.append(coefficient * low)
+                terms_max.append(coefficient * high)
+            else:
+                terms_min.append(coefficient * high)
+                terms_max.append(coefficient * low)
+        return terms_min, terms_max
+
+    @staticmethod
+    def _shrink_interval_domain(
+        domain: IntervalDomain,
+        coefficient: VariableValue,
+        lower_bound: VariableValue,
+        upper_bound: VariableValue,
+        last_valid: int,
+        instantiated: bool,
+    ) -> int:
+        """
+        Turns the bounds on coefficient * x into bounds on x (rounded inwards, flipped for a negative
+        coefficient) and removes the values out of them. Returns the new last valid index, -1 if the domain
+        would be emptied or the value of an instantiated variable removed.
+        """
+        if coefficient < 0:
+            lower_bound, upper_bound = upper_bound, lower_bound
+        value_lower_bound = (
+            domain.low if lower_bound is None else -((-lower_bound) // coefficient)
+        )
+        value_upper_bound = (
+            domain.high if upper_bound is None else upper_bound // coefficient
+        )
+        if instantiated:
+            value = domain[0]
+            return last_valid if value_lower_bound <= value <= value_upper_bound else -1
+        return domain.remove_values_outside(
+            lower_bound=value_lower_bound,
+            upper_bound=value_upper_bound,
+            last_valid_index=last_valid,
+        )
+
+    def propagate(
+        self,
+        domains: list,
+        state: dict,
+        domains_last_valid_index: list,
+        shrinking_operations: dict,
+    ) -> Tuple[bool, list[int]]:
+        """
+        Shrinks the domains of the variables of the constraint in place (moving the removed values after the
+        valid part of the domain and storing the removals in shrinking_operations, like the forward checking).
+        We loop until the bounds are stable. It returns wether a domain was emptied and the indices of the
+        variables whose domain was shrunk.
+        """
+        shrunk_variables = []
+        if any(domains_last_valid_index[index] < 0 for index in self.variables_indices):
+            return True, shrunk_variables
+        changed = True
+        while changed:
+            changed = False
+            terms_min, terms_max = self._terms_bounds(
+                domains=domains, domains_last_valid_index=domains_last_valid_index
+            )
+            if self.linear_operator == "!=":
+                not_fixed = [
+                    k for k in range(len(terms_min)) if terms_min[k] != terms_max[k]
+                ]
+                if len(not_fixed) > 1:
+                    return False, shrunk_variables
+                if len(not_fixed) == 0:
+                    return sum(terms_min) == self.constant, shrunk_variables
+                k = not_fixed[0]
+                rest = sum(terms_min) - terms_min[k]
+                lower_bounds = [None] * len(terms_min)
+                upper_bounds = [None] * len(terms_min)
+                forbidden_term = self.constant - rest
+            else:
+                forbidden_term = None
+                total_min, total_max = sum(terms_min), sum(terms_max)
+                upper_bounds = [
+                    (
+                        self.constant - (total_min - terms_min[k])
+                        if self.linear_operator in ("<=", "==")
+                        else None
+                    )
+                    for k in range(len(terms_min))
+                ]
+                lower_bounds = [
+                    (
+                        self.constant - (total_max - terms_max[k])
+                        if self.linear_operator in (">=", "==")
+                        else None
+                    )
+                    for k in range(len(terms_max))
+                ]
+
+            for k, (coefficient, index) in enumerate(
+                zip(self.coefficients, self.variables_indices)
+            ):
+                lower_bound, upper_bound = lower_bounds[k], upper_bounds[k]
+                if forbidden_term is None and (
+                    (lower_bound is None or terms_min[k] >= lower_bound)
+                    and (upper_bound is None or terms_max[k] <= upper_bound)
+                ):
+                    continue
+                if forbidden_term is not None and k != not_fixed[0]:
+                    continue
+
+                domain = domains[index]
+                last_valid = domains_last_valid_index[index]
+                if (
+                    forbidden_term is None
+                    and coefficient != 0
+                    and isinstance(domain, IntervalDomain)
+                ):
+                    new_last_valid = self._shrink_interval_domain(
+                        domain=domain,
+                        coefficient=coefficient,
+                        lower_bound=lower_bound,
+                        upper_bound=upper_bound,
+                        last_valid=last_valid,
+                        instantiated=index in state,
+                    )
+                    if new_last_valid < 0:
+                        return True, shrunk_variables
+                    if new_last_valid < last_valid:
+                        domains_last_valid_index[index] = new_last_valid
+                        shrinking_operations[index] = (
+                            last_valid - new_last_valid
+                        ) + shrinking_operations.get(index, 0)
+                        shrunk_variables.append(index)
+                        changed = True
+                    continue
+                removed = 0
+                position = 0
+                while position <= last_valid:
+                    term = coefficient * domain[position]
+                    if (
+                        (lower_bound is not None and term < lower_bound)
+                        or (upper_bound is not None and term > upper_bound)
+                        or (forbidden_term is not None and term == forbidden_term)
+                    ):
+                        # An instantiated variable can't lose its value, the state is inconsistent
+                        if index in state or last_valid == 0:
+                            return True, shrunk_variables
+                        domain[position], domain[last_valid] = (
+                            domain[last_valid],
+                            domain[position],
+                        )
+                        last_valid -= 1
+                        removed += 1
+                    else:
+                        position += 1
+                if removed > 0:
+                    domains_last_valid_index[index] = last_valid
+                    shrinking_operations[index] = removed + shrinking_operations.get(
+                        index, 0
+                    )
+                    shrunk_variables.append(index)
+                    changed = forbidden_term is None
+        return False, shrunk_variables